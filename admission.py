@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+from flask import g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+CRITICAL, NORMAL, LOW = 'critical', 'normal', 'low'
+
+# Flask endpoint -> priority; anything not listed is NORMAL. None = not admission-controlled
+DEFAULT_PRIORITIES = {
+    # Rate reads served from the snapshot: what clients come for on a busy day
+    'index': CRITICAL,
+    'get_all_rates': CRITICAL,
+    'get_usd_rate': CRITICAL,
+    'get_eur_rate': CRITICAL,
+    'get_currency_rate_endpoint': CRITICAL,
+    'health_check': CRITICAL,
+    # Aggregations, multi-currency work, large listings and exports
+    'compare_currencies': LOW,
+    'get_api_metrics': LOW,
+    'list_request_metrics': LOW,
+    'list_updates': LOW,
+    'list_webhooks': LOW,
+    'list_webhook_deliveries': LOW,
+    'export_history': LOW,
+    'export_candles': LOW,
+    'export_metrics': LOW,
+    # Long-lived; RateBroadcaster enforces its own connection limit
+    'stream_rates': None,
+    'static': None,
+}
+
+class _ClassState:
+    """In-flight count, counters and recent latencies of one priority class"""
+
+    def __init__(self, max_samples: int):
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self.samples = deque(maxlen=max_samples)  # (finished_at, milliseconds)
+
+class AdmissionController:
+    """
+    Admission control with priority classes, per process.
+
+    Every request is classified by Flask endpoint. A class is admitted while
+    its own in-flight count is below its share of ``max_in_flight`` and the
+    process pressure is below the class limit; otherwise it gets ``503`` with
+    ``Retry-After`` and never touches the database.
+
+    Pressure is the larger of two signals: in-flight requests over
+    ``max_in_flight``, and the p95 latency of critical requests over the last
+    ``window_seconds`` relative to ``critical_slo_ms``. The second one makes
+    shedding adaptive: when rate reads slow down because aggregations or
+    exports are saturating the database or the GIL, low-priority work is
+    refused first (at 70% of the SLO), then normal work (at the SLO), while
+    critical reads are only refused once every slot is busy.
+    """
+
+    # share: fraction of max_in_flight one class may hold; max_pressure: shed at or above it
+    LIMITS = {
+        CRITICAL: {'share': 1.0, 'max_pressure': float('inf')},
+        NORMAL: {'share': 0.75, 'max_pressure': 1.0},
+        LOW: {'share': 0.25, 'max_pressure': 0.7},
+    }
+
+    def __init__(self, app=None, max_in_flight: int = 64, critical_slo_ms: float = 250,
+                 window_seconds: float = 10, retry_after_seconds: int = 5,
+                 priorities: Optional[Dict[str, Optional[str]]] = None, min_samples: int = 20,
+                 latency_refresh_seconds: float = 0.25):
+        self.max_in_flight = max(1, max_in_flight)
+        self.critical_slo_ms = critical_slo_ms
+        self.window_seconds = window_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.priorities = dict(DEFAULT_PRIORITIES, **(priorities or {}))
+        self.min_samples = min_samples
+        # Sorting the window on every request would cost more than the p95 moves in a quarter second
+        self.latency_refresh_seconds = latency_refresh_seconds
+        self._classes = {name: _ClassState(max_samples=1024) for name in self.LIMITS}
+        self._lock = threading.Lock()
+        self._latency_cache = (0.0, 0.0)  # (computed_at, critical p95 ms)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+
+    def priority_for(self, endpoint: Optional[str]) -> Optional[str]:
+        if endpoint is None:
+            return None  # 404s and other unrouted requests
+        return self.priorities.get(endpoint, NORMAL)
+
+    def try_admit(self, priority: str) -> bool:
+        """Reserve a slot for a request of ``priority``; pair every True with ``release``"""
+        limits = self.LIMITS[priority]
+        pressure = self.pressure()
+        with self._lock:
+            state = self._classes[priority]
+            total = sum(s.in_flight for s in self._classes.values())
+            if (total >= self.max_in_flight or state.in_flight >= limits['share'] * self.max_in_flight
+                    or pressure >= limits['max_pressure']):
+                state.shed += 1
+                return False
+            state.in_flight += 1
+            state.admitted += 1
+            return True
+
+    def release(self, priority: str, elapsed_ms: float):
+        with self._lock:
+            state = self._classes[priority]
+            state.in_flight -= 1
+            state.samples.append((time.monotonic(), elapsed_ms))
+
+    def pressure(self) -> float:
+        with self._lock:
+            in_flight = sum(s.in_flight for s in self._classes.values())
+        return max(in_flight / self.max_in_flight, self.critical_p95_ms() / self.critical_slo_ms)
+
+    def critical_p95_ms(self) -> float:
+        """p95 latency of critical requests in the window; 0 with too few samples"""
+        now = time.monotonic()
+        computed_at, value = self._latency_cache
+        if now - computed_at < self.latency_refresh_seconds:
+            return value
+        value = self._p95(CRITICAL, now)
+        self._latency_cache = (now, value)
+        return value
+
+    def before_request(self):
+        priority = self.priority_for(request.endpoint)
+        if priority is None:
+            return None
+        if not self.try_admit(priority):
+            logger.warning(f"Shedding {priority} request to {request.endpoint} (pressure {self.pressure():.2f})")
+            response = jsonify({
+                'error': 'Service overloaded',
+                'message': f'Too much load to serve {priority}-priority requests right now, retry later',
+                'priority': priority,
+                'timestamp': datetime.now().isoformat()
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(self.retry_after_seconds)
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        g.admission = (priority, time.perf_counter())
+        return None
+
+    def teardown_request(self, exc=None):
+        # Runs after streamed bodies finish too, so exports hold their slot while they stream
+        admission = g.pop('admission', None)
+        if admission:
+            priority, started = admission
+            self.release(priority, (time.perf_counter() - started) * 1000)
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            classes = {
+                name: {
+                    'in_flight': state.in_flight,
+                    'admitted': state.admitted,
+                    'shed': state.shed,
+                    'p95_ms': round(self._p95(name, now), 2)
+                }
+                for name, state in self._classes.items()
+            }
+        return {
+            'max_in_flight': self.max_in_flight,
+            'critical_slo_ms': self.critical_slo_ms,
+            'pressure': round(self.pressure(), 3),
+            'shed_total': sum(c['shed'] for c in classes.values()),
+            'classes': classes
+        }
+
+    def _p95(self, priority: str, now: float) -> float:
+        cutoff = now - self.window_seconds
+        recent = sorted(ms for finished_at, ms in list(self._classes[priority].samples) if finished_at >= cutoff)
+        if len(recent) < self.min_samples:
+            return 0.0
+        return recent[int(len(recent) * 0.95) - 1]
@@ -0,0 +1,240 @@
+import bisect
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+from sqlalchemy import func
+from models import ExchangeRateHistory
+
+logger = logging.getLogger(__name__)
+
+_WINDOW = re.compile(r'^(\d+)([hd])$')
+_UNIT_SECONDS = {'h': 3600, 'd': 86400}
+
+def parse_window(value: str) -> int:
+    """``'7d'`` or ``'12h'`` -> seconds; raises ValueError otherwise"""
+    match = _WINDOW.match(value.strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f'Invalid window {value!r}, use e.g. 7d or 12h')
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+def format_window(seconds: int) -> str:
+    return f'{seconds // 86400}d' if seconds % 86400 == 0 else f'{seconds // 3600}h'
+
+class WindowStats:
+    """
+    Statistics over a sliding time window, updated in amortized O(1) per sample.
+
+    The mean and variance use Welford's algorithm with removals as samples
+    leave the window, min/max come from monotonic deques, and the EMA is a
+    continuous-time one whose time constant is the window length, so
+    irregular sampling (missed refreshes) is weighted correctly.
+    """
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.samples: Deque[Tuple[int, datetime, float]] = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ema: Optional[float] = None
+        self._ema_at: Optional[datetime] = None
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._sequence = 0
+
+    def add(self, at: datetime, rate: float):
+        self._sequence += 1
+        self.samples.append((self._sequence, at, rate))
+        delta = rate - self.mean
+        self.mean += delta / len(self.samples)
+        self.m2 += delta * (rate - self.mean)
+
+        while self._min and self._min[-1][1] >= rate:
+            self._min.pop()
+        self._min.append((self._sequence, rate))
+        while self._max and self._max[-1][1] <= rate:
+            self._max.pop()
+        self._max.append((self._sequence, rate))
+
+        if self.ema is None:
+            self.ema = rate
+        else:
+            elapsed = max((at - self._ema_at).total_seconds(), 0.0)
+            self.ema += (1 - math.exp(-elapsed / self.seconds)) * (rate - self.ema)
+        self._ema_at = at
+        self._evict(at - timedelta(seconds=self.seconds))
+
+    def _evict(self, cutoff: datetime):
+        while self.samples and self.samples[0][1] <= cutoff:
+            _, _, rate = self.samples.popleft()
+            remaining = len(self.samples)
+            if not remaining:
+                self.mean, self.m2 = 0.0, 0.0
+                continue
+            delta = rate - self.mean
+            self.mean -= delta / remaining
+            self.m2 = max(self.m2 - delta * (rate - self.mean), 0.0)
+        first = self.samples[0][0] if self.samples else self._sequence + 1
+        while self._min and self._min[0][0] < first:
+            self._min.popleft()
+        while self._max and self._max[0][0] < first:
+            self._max.popleft()
+
+    def result(self) -> Optional[Dict]:
+        if not self.samples:
+            return None
+        count = len(self.samples)
+        _, first_at, first = self.samples[0]
+        _, last_at, last = self.samples[-1]
+        return {
+            'window': format_window(self.seconds),
+            'samples': count,
+            'from': first_at.isoformat(),
+            'to': last_at.isoformat(),
+            'first': first,
+            'last': last,
+            'sma': round(self.mean, 6),
+            'ema': round(self.ema, 6),
+            'std': round(math.sqrt(self.m2 / (count - 1)), 6) if count > 1 else 0.0,
+            'min': self._min[0][1],
+            'max': self._max[0][1],
+            'change_pct': round((last - first) / first * 100, 4) if first else None
+        }
+
+class RollingAnalytics:
+    """
+    Rolling per-currency analytics (SMA, EMA, standard deviation, min/max and
+    percentage change) over configurable time windows.
+
+    Like ``RateIndex`` it remembers the highest history id it has loaded and
+    only reads newer rows, feeding each into the live window states instead
+    of recomputing. Rows inside ``max_window_days`` of the latest sample are
+    retained so a window requested for the first time can be built once by
+    replaying them. Results are cached until the snapshot version changes or
+    the history table gains rows without a new snapshot (an import): its
+    highest id, checked at most every ``check_seconds``, is the data
+    generation that also goes into the ETag.
+    """
+
+    def __init__(self, max_window_days: int = 365, max_windows: int = 16, batch_size: int = 10000,
+                 check_seconds: float = 5):
+        self.max_window_seconds = max_window_days * 86400
+        self.max_windows = max_windows
+        self.batch_size = batch_size
+        self._points: Dict[str, List[Tuple[datetime, float]]] = {}
+        self._windows: Dict[str, 'OrderedDict[int, WindowStats]'] = {}
+        self._results: Dict[Tuple[str, Tuple[int, ...]], Dict] = {}
+        self._last_id = 0
+        self._version = None
+        self.check_seconds = check_seconds
+        self._generation = 0
+        self._checked_at = None
+        self._lock = threading.RLock()
+        self._stats = {'rows_loaded': 0, 'cache_hits': 0, 'computed': 0, 'rebuilds': 0}
+
+    def get(self, currency: str, windows: List[int], version: int) -> Dict[str, Dict]:
+        """Statistics per window label for ``currency`` (empty if it has no history)"""
+        for seconds in windows:
+            if seconds > self.max_window_seconds:
+                raise ValueError(f'Window {format_window(seconds)} exceeds the {self.max_window_seconds // 86400}d maximum')
+        currency = currency.upper()
+        key = (currency, tuple(windows))
+        with self._lock:
+            if version != self._version or self.generation() > self._last_id:
+                self.refresh()
+                self._results.clear()
+                self._version = version
+            cached = self._results.get(key)
+            if cached is not None:
+                self._stats['cache_hits'] += 1
+                return cached
+            if not self._points.get(currency):
+                return {}
+
+            result = {}
+            for seconds in windows:
+                stats = self._window(currency, seconds).result()
+                if stats:
+                    result[format_window(seconds)] = stats
+            self._results[key] = result
+            self._stats['computed'] += 1
+            return result
+
+    def generation(self) -> int:
+        """Highest history id in the table, re-read at most every ``check_seconds``"""
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+                self._generation = ExchangeRateHistory.query.with_entities(
+                    func.max(ExchangeRateHistory.id)).scalar() or 0
+                self._checked_at = now
+            return self._generation
+
+    def refresh(self) -> int:
+        """Load history rows added since the last refresh; returns how many"""
+        with self._lock:
+            rows = ExchangeRateHistory.query.with_entities(
+                ExchangeRateHistory.id,
+                ExchangeRateHistory.currency,
+                ExchangeRateHistory.created_at,
+                ExchangeRateHistory.rate
+            ).filter(ExchangeRateHistory.id > self._last_id)
+            if not self._last_id:
+                # First load: only what the largest window can use
+                latest = ExchangeRateHistory.query.with_entities(func.max(ExchangeRateHistory.created_at)).scalar()
+                if latest:
+                    rows = rows.filter(
+                        ExchangeRateHistory.created_at > latest - timedelta(seconds=self.max_window_seconds)
+                    )
+
+            added = 0
+            for row_id, currency, created_at, rate in rows.order_by(ExchangeRateHistory.id).yield_per(self.batch_size):
+                self._last_id = max(self._last_id, row_id)
+                if created_at is not None:
+                    self._add(currency, created_at, rate)
+                    added += 1
+            self._stats['rows_loaded'] += added
+            return added
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'currencies': len(self._points),
+                'retained_points': sum(len(points) for points in self._points.values()),
+                'windows': sorted({format_window(s) for states in self._windows.values() for s in states})
+            }
+
+    def _add(self, currency: str, at: datetime, rate: float):
+        points = self._points.setdefault(currency, [])
+        states = self._windows.get(currency, {})
+        if not points or at >= points[-1][0]:
+            points.append((at, rate))
+            for stats in states.values():
+                stats.add(at, rate)
+        else:
+            # Back-filled row: keep points sorted and rebuild this currency's windows on demand
+            bisect.insort(points, (at, rate))
+            self._windows.pop(currency, None)
+            self._stats['rebuilds'] += 1
+
+        cutoff = points[-1][0] - timedelta(seconds=self.max_window_seconds)
+        if points[0][0] <= cutoff:
+            del points[:bisect.bisect_right(points, (cutoff, math.inf))]
+
+    def _window(self, currency: str, seconds: int) -> WindowStats:
+        states = self._windows.setdefault(currency, OrderedDict())
+        stats = states.get(seconds)
+        if stats is None:
+            stats = WindowStats(seconds)
+            for at, rate in self._points[currency]:
+                stats.add(at, rate)
+            states[seconds] = stats
+            while len(states) > self.max_windows:
+                states.popitem(last=False)
+        states.move_to_end(seconds)
+        return stats
@@ -1,13 +1,26 @@
 import os
 import logging
-import csv
-import io
-from flask import Flask, jsonify, render_template, request, Response, make_response
+from flask import Flask, g, jsonify, render_template, request, Response, make_response, stream_with_context
 from werkzeug.middleware.proxy_fix import ProxyFix
-from models import db, ExchangeRate, UpdateLog, ExchangeRateHistory, ApiMetrics
+from models import db, ExchangeRate, UpdateLog, ExchangeRateHistory, ApiMetrics, WebhookSubscription, WebhookDelivery
 from database_service import DatabaseService
-from datetime import datetime, timedelta
+from rate_stream import RateBroadcaster
+from webhooks import WebhookDispatcher, caller_authorized, check_destination, issue_management_token
+from compression import ResponseCompressor
+from serializers import negotiate_format, get_serializer, unavailable_format, SERIALIZERS
+from sqlite_tuning import CheckpointManager, apply_sqlite_pragmas, sqlite_pragmas
+from arrow_export import ArrowExporter, ExportError, EXPORT_FORMATS, format_available
+from static_assets import AssetManifest
+from cache_policy import CachePolicy, NO_STORE, PRIVATE_NO_STORE
+from admission import AdmissionController
+from response_cache import ResponseCache
+from analytics import parse_window, format_window
+from migrations import SchemaMigrator
+from pagination import keyset_page, encode_cursor, decode_cursor, page_size
+from urllib.parse import urlparse
+from datetime import datetime, timedelta, timezone
 import time
+import hashlib
 from functools import wraps
 from sqlalchemy import func, desc
 from config import get_config, DatabaseConfig
@@ -36,9 +49,216 @@ last_request_time = {}
 RATE_LIMIT_SECONDS = config.RATE_LIMIT_SECONDS  # Get from configuration
 
 # Initialize database tables and service within app context
+checkpoint_manager = None
 with app.app_context():
-    db.create_all()
+    if config.SQLITE_PRODUCTION_MODE and db.engine.dialect.name == 'sqlite':
+        apply_sqlite_pragmas(db.engine, sqlite_pragmas(
+            busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+            mmap_size=config.SQLITE_MMAP_SIZE,
+            cache_size_kb=config.SQLITE_CACHE_SIZE_KB,
+            synchronous=config.SQLITE_SYNCHRONOUS,
+            wal_autocheckpoint=config.SQLITE_WAL_AUTOCHECKPOINT
+        ))
+        checkpoint_manager = CheckpointManager(
+            db.engine,
+            interval_seconds=config.SQLITE_CHECKPOINT_SECONDS,
+            truncate_bytes=config.SQLITE_CHECKPOINT_TRUNCATE_MB * 1024 * 1024
+        )
+    schema_migrator = SchemaMigrator(db.engine)
+    if config.SCHEMA_AUTO_MIGRATE:
+        schema_migrator.migrate()
+    elif schema_migrator.pending():
+        logger.warning("Schema migrations pending, run `python migrate.py`")
     db_service = DatabaseService()
+    db_service.sync_history_archive()
+    db_service.sync_daily_candles()
+    db_service.sync_shared_snapshot()
+
+rate_broadcaster = RateBroadcaster(
+    app,
+    db_service,
+    poll_interval=config.SSE_POLL_SECONDS,
+    heartbeat_interval=config.SSE_HEARTBEAT_SECONDS,
+    max_connections=config.SSE_MAX_CONNECTIONS
+)
+
+webhook_dispatcher = WebhookDispatcher(
+    app,
+    max_workers=config.WEBHOOK_MAX_WORKERS,
+    timeout_seconds=config.WEBHOOK_TIMEOUT_SECONDS,
+    max_attempts=config.WEBHOOK_MAX_ATTEMPTS,
+    base_backoff_seconds=config.WEBHOOK_BASE_BACKOFF_SECONDS,
+    max_backoff_seconds=config.WEBHOOK_MAX_BACKOFF_SECONDS,
+    poll_interval=config.WEBHOOK_POLL_SECONDS,
+    allow_private_destinations=config.WEBHOOK_ALLOW_PRIVATE_DESTINATIONS
+)
+db_service.add_snapshot_listener(webhook_dispatcher.enqueue_snapshot)
+
+arrow_exporter = ArrowExporter(
+    batch_size=config.EXPORT_BATCH_SIZE,
+    parquet_compression=config.EXPORT_PARQUET_COMPRESSION,
+    first_fetch_size=config.EXPORT_FIRST_FETCH_SIZE,
+    text_batch_size=config.EXPORT_TEXT_BATCH_SIZE
+)
+
+compressor = None
+if config.COMPRESSION_ENABLED:
+    compressor = ResponseCompressor(
+        app,
+        min_size=config.COMPRESSION_MIN_SIZE,
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+        cache_entries=config.COMPRESSION_CACHE_ENTRIES
+    )
+
+cache_policy = None
+if config.CACHE_CONTROL_ENABLED:
+    cache_policy = CachePolicy(
+        update_interval_seconds=config.UPDATE_INTERVAL_MINUTES * 60,
+        stale_while_revalidate=config.CACHE_STALE_WHILE_REVALIDATE_SECONDS,
+        stale_if_error=config.CACHE_STALE_IF_ERROR_SECONDS,
+        min_max_age=config.CACHE_MIN_MAX_AGE_SECONDS
+    )
+
+response_cache = ResponseCache(max_entries=config.RESPONSE_CACHE_ENTRIES) if config.RESPONSE_CACHE_ENABLED else None
+
+# Registered before the other request hooks so shed requests do no work at all
+admission = None
+if config.ADMISSION_ENABLED:
+    admission = AdmissionController(
+        app,
+        max_in_flight=config.ADMISSION_MAX_IN_FLIGHT,
+        critical_slo_ms=config.ADMISSION_CRITICAL_SLO_MS,
+        window_seconds=config.ADMISSION_LATENCY_WINDOW_SECONDS,
+        retry_after_seconds=config.ADMISSION_RETRY_AFTER_SECONDS
+    )
+
+# Fingerprinted build output; precompressed files carry Content-Encoding, so the compressor skips them
+asset_manifest = AssetManifest(app)
+
+@app.before_request
+def start_background_workers():
+    # Started lazily so each gunicorn worker gets its own threads after fork; with
+    # REFRESH_MODE=worker only refresh_worker.py enqueues and delivers webhooks
+    if db_service.refresh_inline:
+        webhook_dispatcher.start()
+    if checkpoint_manager:
+        checkpoint_manager.start()
+
+@app.before_request
+def reject_unavailable_format():
+    # ?format=msgpack without msgpack installed must not quietly answer JSON
+    package = unavailable_format(request.args.get('format'))
+    if package and request.path.startswith('/api/') and not request.path.startswith('/api/export/'):
+        return jsonify({
+            'error': 'Format not available',
+            'message': f"{request.args['format']} needs the {package} package on the server; "
+                       f"available formats: {', '.join(SERIALIZERS)}",
+            'timestamp': datetime.now().isoformat()
+        }), 406
+
+@app.before_request
+def pin_read_source():
+    # One source per request: the version in an ETag and the body it describes are read together
+    db_service.replicas.pin()
+
+@app.teardown_request
+def release_read_source(exception=None):
+    db_service.replicas.release()
+
+@app.after_request
+def allow_service_worker_scope(response):
+    # sw.js is served from /static/ but registered for the whole app
+    if request.path == '/static/sw.js':
+        response.headers['Service-Worker-Allowed'] = '/'
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.after_request
+def add_snapshot_version_header(response):
+    # Invalidation hint for caches (service worker, SDK): which rate version this response reflects
+    version = g.get('snapshot_version')
+    if version:
+        response.headers['X-Snapshot-Version'] = str(version)
+    return response
+
+@app.after_request
+def default_api_cache_control(response):
+    # API responses that did not choose a policy (errors included) must not be reused by shared caches
+    if cache_policy and request.path.startswith('/api/') and 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = NO_STORE
+    return response
+
+def schedule_cached(f):
+    """Let browsers, proxies and CDNs keep rate responses until the next scheduled refresh"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if cache_policy and response.status_code in (200, 304):
+            response.headers['Cache-Control'] = cache_policy.for_rates(db_service.get_next_refresh_at())
+            response.vary.add('Accept')  # ?format= aside, the representation is negotiated on Accept
+        return response
+    return decorated_function
+
+def private_no_store(f):
+    """Mark operational and write endpoints as never cacheable"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        response.headers['Cache-Control'] = PRIVATE_NO_STORE
+        return response
+    return decorated_function
+
+def response_cached(params):
+    """
+    Serve repeated parameter combinations from response_cache until the next rate snapshot
+    (or, for ?as_of=, until history rows are imported).
+    params maps every query parameter the view reads to a normalizer, so ?amount=1&from=usd and
+    ?from=USD&amount=1.0 share an entry; a value the normalizer rejects bypasses the cache.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not response_cache:
+                return f(*args, **kwargs)
+            try:
+                normalized = tuple(
+                    (name, None if request.args.get(name) is None else normalize(request.args[name].strip()))
+                    for name, normalize in params.items()
+                )
+            except ValueError:
+                return f(*args, **kwargs)
+            if db_service.refresh_inline:
+                # The due-check a miss would run anyway, so hits never hold back a scheduled refresh
+                try:
+                    db_service.refresh_rates()
+                except Exception as e:
+                    logger.warning(f"Refresh before cached response failed: {str(e)}")
+            version = db_service.get_snapshot_version()
+            if not version:
+                return f(*args, **kwargs)
+            g.snapshot_version = version
+            generation = None
+            if request.args.get('as_of'):
+                # Point-in-time answers also change when history is imported, which keeps the snapshot version
+                generation = db_service.get_analytics_generation()
+                if generation is None:
+                    return f(*args, **kwargs)
+
+            def render():
+                response = make_response(f(*args, **kwargs))
+                return response.get_data(), response.status_code, response.mimetype
+
+            body, status, mimetype = response_cache.get_or_compute(
+                (request.endpoint, version, generation, tuple(kwargs.items()), normalized), render,
+                cacheable=lambda rendered: rendered[1] == 200
+            )
+            return Response(body, status=status, mimetype=mimetype)
+        return decorated_function
+    return decorator
+
+def currency_list_param(value):
+    return ','.join(c.strip().upper() for c in value.split(','))
 
 def rate_limit(f):
     @wraps(f)
@@ -102,184 +322,125 @@ def track_metrics(f):
 
 def get_response_format():
     """Determine response format from request parameters or headers"""
-    # Check query parameter first
-    format_param = request.args.get('format', '').lower()
-    if format_param in ['json', 'csv', 'xml']:
-        return format_param
-    
-    # Check Accept header
-    accept_header = request.headers.get('Accept', '')
-    if 'text/csv' in accept_header:
-        return 'csv'
-    elif 'application/xml' in accept_header or 'text/xml' in accept_header:
-        return 'xml'
-    
-    # Default to JSON
-    return 'json'
+    return negotiate_format(request.args.get('format', ''), request.headers.get('Accept', ''))
 
-def format_response(data, format_type='json', endpoint_type='single'):
-    """Format response data in requested format"""
-    timestamp = datetime.now().isoformat()
-    
-    if format_type == 'csv':
-        return format_csv_response(data, endpoint_type)
-    elif format_type == 'xml':
-        return format_xml_response(data, endpoint_type, timestamp)
-    else:
-        return jsonify(data)
+def parse_datetime_param(value):
+    """Parse an ISO 8601 date/datetime query parameter into naive UTC"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
-def format_csv_response(data, endpoint_type):
-    """Format response as CSV"""
-    output = io.StringIO()
-    
-    if endpoint_type == 'all_rates' and data.get('success') and 'data' in data:
-        # CSV for all rates
-        writer = csv.writer(output)
-        writer.writerow(['Currency', 'Rate', 'Date_Published', 'Last_Updated', 'Base_Currency'])
-        
-        rates = data['data']['rates']
-        date_published = data['data'].get('date', '')
-        last_updated = data['data'].get('last_updated', '')
-        base_currency = data['data'].get('base_currency', 'VES')
-        
-        for currency, rate in rates.items():
-            writer.writerow([currency, rate, date_published, last_updated, base_currency])
-    
-    elif endpoint_type == 'single_rate' and data.get('success'):
-        # CSV for single rate
-        writer = csv.writer(output)
-        writer.writerow(['Currency', 'Rate', 'Date_Published', 'Last_Updated', 'Timestamp'])
-        writer.writerow([
-            data.get('currency', ''),
-            data.get('rate', ''),
-            data.get('date_published', ''),
-            data.get('last_updated', ''),
-            data.get('timestamp', '')
-        ])
+def invalid_cursor_response(error):
+    """400 for a pagination cursor that is malformed or from another listing"""
+    return jsonify({
+        'error': 'Invalid cursor',
+        'message': f'{error}; pass next_cursor from the previous page unchanged',
+        'timestamp': datetime.now().isoformat()
+    }), 400
+
+def request_page_size():
+    return page_size(request.args.get('limit', type=int), config.PAGINATION_DEFAULT_LIMIT, config.PAGINATION_MAX_LIMIT)
+
+def rate_as_of_response(currency, as_of_param):
+    """Build the point-in-time response for /api/rates/<currency>?as_of="""
+    try:
+        as_of = parse_datetime_param(as_of_param)
+    except ValueError:
+        return jsonify({
+            'error': 'Invalid as_of',
+            'message': 'Use an ISO 8601 date or datetime, e.g. ?as_of=2025-03-14T09:00',
+            'timestamp': datetime.now().isoformat()
+        }), 400
     
-    elif endpoint_type == 'status' and data.get('success'):
-        # CSV for status
-        writer = csv.writer(output)
-        writer.writerow(['Metric', 'Value'])
-        writer.writerow(['System_Status', data.get('system_status', '')])
-        writer.writerow(['Rates_Available', data.get('rates_available', '')])
-        writer.writerow(['Last_Update', data.get('last_update', '')])
-        writer.writerow(['Timestamp', data.get('timestamp', '')])
+    results = db_service.get_rates_as_of_many(currency, [as_of])
+    if results is None:
+        return jsonify({
+            'error': 'History not available',
+            'message': f'Unable to read the {currency} rate history',
+            'timestamp': datetime.now().isoformat()
+        }), 503
+    rate_data = results[0]
+    if not rate_data:
+        return jsonify({
+            'error': 'Rate not available',
+            'message': f'No {currency} rate recorded on or before {as_of.isoformat()}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
     
+    return jsonify({
+        'success': True,
+        **rate_data,
+        'timestamp': datetime.now().isoformat(),
+        'source': 'Banco Central de Venezuela (BCV) - History'
+    })
+
+def format_response(data, format_type='json', endpoint_type='single', etag=None):
+    """Format response data in requested format using the serializer registry"""
+    if format_type == 'json':
+        response = jsonify(data)
     else:
-        # Error response in CSV
-        writer = csv.writer(output)
-        writer.writerow(['Error', 'Message', 'Timestamp'])
-        writer.writerow([
-            data.get('error', 'Unknown error'),
-            data.get('message', ''),
-            data.get('timestamp', timestamp)
-        ])
-    
-    csv_content = output.getvalue()
-    output.close()
+        serializer = get_serializer(format_type)
+        body = serializer.encode(data, endpoint_type, datetime.now().isoformat())
+        response = Response(body, mimetype=serializer.mimetype, headers=serializer.headers)
     
-    response = make_response(csv_content)
-    response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-    response.headers['Content-Disposition'] = 'attachment; filename=bcv_rates.csv'
+    if etag:
+        response.set_etag(etag, weak=True)
     return response
 
-def format_xml_response(data, endpoint_type, timestamp):
-    """Format response as XML"""
-    if endpoint_type == 'all_rates' and data.get('success') and 'data' in data:
-        # XML for all rates
-        rates = data['data']['rates']
-        date_published = data['data'].get('date', '')
-        last_updated = data['data'].get('last_updated', '')
-        base_currency = data['data'].get('base_currency', 'VES')
-        
-        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<bcv_rates>
-    <success>true</success>
-    <timestamp>{timestamp}</timestamp>
-    <source>{data.get('source', '')}</source>
-    <data>
-        <base_currency>{base_currency}</base_currency>
-        <date>{date_published}</date>
-        <last_updated>{last_updated}</last_updated>
-        <rates>'''
-        
-        for currency, rate in rates.items():
-            xml_content += f'''
-            <rate>
-                <currency>{currency}</currency>
-                <value>{rate}</value>
-            </rate>'''
-        
-        xml_content += '''
-        </rates>
-    </data>
-</bcv_rates>'''
+def check_not_modified(format_type):
+    """Weak ETag for the current snapshot and format, plus a 304 if the client has it"""
+    version = db_service.get_snapshot_version()
+    if not version:
+        return None, None
     
-    elif endpoint_type == 'single_rate' and data.get('success'):
-        # XML for single rate
-        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<bcv_rate>
-    <success>true</success>
-    <currency>{data.get('currency', '')}</currency>
-    <rate>{data.get('rate', '')}</rate>
-    <date_published>{data.get('date_published', '')}</date_published>
-    <last_updated>{data.get('last_updated', '')}</last_updated>
-    <timestamp>{timestamp}</timestamp>
-    <source>{data.get('source', '')}</source>
-</bcv_rate>'''
-    
-    elif endpoint_type == 'status' and data.get('success'):
-        # XML for status
-        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<bcv_status>
-    <success>true</success>
-    <system_status>{data.get('system_status', '')}</system_status>
-    <rates_available>{data.get('rates_available', '')}</rates_available>
-    <last_update>{data.get('last_update', '')}</last_update>
-    <timestamp>{timestamp}</timestamp>
-</bcv_status>'''
-    
-    else:
-        # Error response in XML
-        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<bcv_error>
-    <success>false</success>
-    <error>{data.get('error', 'Unknown error')}</error>
-    <message>{data.get('message', '')}</message>
-    <timestamp>{timestamp}</timestamp>
-</bcv_error>'''
-    
-    response = make_response(xml_content)
-    response.headers['Content-Type'] = 'application/xml; charset=utf-8'
-    return response
+    g.snapshot_version = version
+    etag = f'v{version}-{format_type}'
+    if etag_matches(etag):
+        response = make_response('', 304)
+        response.set_etag(etag, weak=True)
+        return etag, response
+    return etag, None
+
+def etag_matches(etag):
+    """Whether If-None-Match names this ETag (compressed variants are folded in by the compressor)"""
+    return request.if_none_match.contains_weak(etag)
 
 @app.route('/')
 def index():
     """Main page with API documentation and test interface"""
-    return render_template('index.html')
+    html = render_template('index.html')
+    # Assets are referenced by fingerprinted URL, so the page changes only when a build or template does
+    etag = hashlib.sha1(html.encode('utf-8')).hexdigest()[:16]
+    response = make_response('', 304) if etag_matches(etag) else make_response(html)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/rates', methods=['GET'])
+@schedule_cached
 @rate_limit
 @track_metrics
 def get_all_rates():
     """Get all available currency exchange rates from database"""
+    response_format = get_response_format()
     try:
         logger.info("Fetching all currency rates from database")
         rates_data = db_service.get_rates_with_auto_update()
         
-        response_format = get_response_format()
-        
         if not rates_data:
             error_response = {
                 'error': 'No data available',
                 'message': 'Unable to fetch exchange rates from database',
                 'timestamp': datetime.now().isoformat()
             }
-            if response_format == 'json':
-                return jsonify(error_response), 503
-            else:
-                return format_response(error_response, response_format, 'all_rates')
+            return format_response(error_response, response_format, 'all_rates'), 503
+        
+        etag, not_modified = check_not_modified(response_format)
+        if not_modified:
+            return not_modified
         
         response_data = {
             'success': True,
@@ -289,11 +450,7 @@ def get_all_rates():
         }
         
         logger.info(f"Successfully fetched rates from database: {len(rates_data.get('rates', {}))}")
-        
-        if response_format == 'json':
-            return jsonify(response_data)
-        else:
-            return format_response(response_data, response_format, 'all_rates')
+        return format_response(response_data, response_format, 'all_rates', etag=etag)
         
     except Exception as e:
         logger.error(f"Error fetching all rates: {str(e)}")
@@ -302,37 +459,30 @@ def get_all_rates():
             'message': 'An error occurred while fetching exchange rates',
             'timestamp': datetime.now().isoformat()
         }
-        
-        response_format = get_response_format()
-        if response_format == 'json':
-            return jsonify(error_response), 500
-        else:
-            return format_response(error_response, response_format, 'all_rates')
+        return format_response(error_response, response_format, 'all_rates'), 500
 
-@app.route('/api/rates/usd', methods=['GET'])
-@rate_limit
-def get_usd_rate():
-    """Get USD exchange rate from database"""
+def single_rate_response(currency):
+    """Build the current-rate response for one currency in the negotiated format"""
+    response_format = get_response_format()
     try:
-        logger.info("Fetching USD rate from database")
-        rate_data = db_service.get_currency_rate('USD')
+        etag, not_modified = check_not_modified(response_format)
+        if not_modified:
+            return not_modified
         
-        response_format = get_response_format()
+        logger.info(f"Fetching {currency} rate from database")
+        rate_data = db_service.get_currency_rate(currency)
         
         if not rate_data:
             error_response = {
                 'error': 'Currency not found',
-                'message': 'USD exchange rate not available',
+                'message': f'{currency} exchange rate not available',
                 'timestamp': datetime.now().isoformat()
             }
-            if response_format == 'json':
-                return jsonify(error_response), 404
-            else:
-                return format_response(error_response, response_format, 'single_rate')
+            return format_response(error_response, response_format, 'single_rate'), 404
         
         response_data = {
             'success': True,
-            'currency': 'USD',
+            'currency': currency,
             'rate': rate_data['rate'],
             'date_published': rate_data.get('date_published'),
             'last_updated': rate_data.get('updated_at'),
@@ -340,72 +490,64 @@ def get_usd_rate():
             'source': 'Banco Central de Venezuela (BCV) - Cached'
         }
         
-        logger.info(f"Successfully fetched USD rate: {rate_data['rate']}")
-        
-        if response_format == 'json':
-            return jsonify(response_data)
-        else:
-            return format_response(response_data, response_format, 'single_rate')
+        logger.info(f"Successfully fetched {currency} rate: {rate_data['rate']}")
+        return format_response(response_data, response_format, 'single_rate', etag=etag)
         
     except Exception as e:
-        logger.error(f"Error fetching USD rate: {str(e)}")
+        logger.error(f"Error fetching {currency} rate: {str(e)}")
         error_response = {
             'error': 'Internal server error',
-            'message': 'An error occurred while fetching USD exchange rate',
+            'message': f'An error occurred while fetching {currency} exchange rate',
             'timestamp': datetime.now().isoformat()
         }
-        
-        response_format = get_response_format()
-        if response_format == 'json':
-            return jsonify(error_response), 500
-        else:
-            return format_response(error_response, response_format, 'single_rate')
+        return format_response(error_response, response_format, 'single_rate'), 500
+
+@app.route('/api/rates/usd', methods=['GET'])
+@schedule_cached
+@rate_limit
+def get_usd_rate():
+    """Get USD exchange rate from database"""
+    if request.args.get('as_of'):
+        return rate_as_of_response('USD', request.args['as_of'])
+    return single_rate_response('USD')
 
 @app.route('/api/rates/eur', methods=['GET'])
+@schedule_cached
 @rate_limit
 def get_eur_rate():
     """Get EUR exchange rate from database"""
-    try:
-        logger.info("Fetching EUR rate from database")
-        rate_data = db_service.get_currency_rate('EUR')
-        
-        if not rate_data:
-            return jsonify({
-                'error': 'Currency not found',
-                'message': 'EUR exchange rate not available',
-                'timestamp': datetime.now().isoformat()
-            }), 404
-        
-        response = {
-            'success': True,
-            'currency': 'EUR',
-            'rate': rate_data['rate'],
-            'date_published': rate_data.get('date_published'),
-            'last_updated': rate_data.get('updated_at'),
-            'timestamp': datetime.now().isoformat(),
-            'source': 'Banco Central de Venezuela (BCV) - Cached'
-        }
-        
-        logger.info(f"Successfully fetched EUR rate: {rate_data['rate']}")
-        return jsonify(response)
-        
-    except Exception as e:
-        logger.error(f"Error fetching EUR rate: {str(e)}")
-        return jsonify({
-            'error': 'Internal server error',
-            'message': 'An error occurred while fetching EUR exchange rate',
-            'timestamp': datetime.now().isoformat()
-        }), 500
+    if request.args.get('as_of'):
+        return rate_as_of_response('EUR', request.args['as_of'])
+    return single_rate_response('EUR')
 
 @app.route('/api/rates/<currency>', methods=['GET'])
+@schedule_cached
 @rate_limit
 def get_currency_rate_endpoint(currency):
     """Get exchange rate for a specific currency from database"""
+    currency = currency.upper()
+    
+    # Validate currency
+    valid_currencies = ['USD', 'EUR', 'CNY', 'TRY', 'RUB']
+    if currency not in valid_currencies:
+        return jsonify({
+            'error': 'Invalid currency',
+            'message': f'Currency {currency} is not supported. Valid currencies: {", ".join(valid_currencies)}',
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    
+    if request.args.get('as_of'):
+        return rate_as_of_response(currency, request.args['as_of'])
+    return single_rate_response(currency)
+
+@app.route('/api/rates/<currency>/as_of', methods=['GET'])
+@schedule_cached
+@rate_limit
+@track_metrics
+def get_currency_rates_as_of(currency):
+    """Resolve many point-in-time rates for a currency in one call"""
     try:
         currency = currency.upper()
-        logger.info(f"Fetching {currency} rate from database")
-        
-        # Validate currency
         valid_currencies = ['USD', 'EUR', 'CNY', 'TRY', 'RUB']
         if currency not in valid_currencies:
             return jsonify({
@@ -414,41 +556,64 @@ def get_currency_rate_endpoint(currency):
                 'timestamp': datetime.now().isoformat()
             }), 400
         
-        rate_data = db_service.get_currency_rate(currency)
+        dates_param = [d for d in request.args.get('dates', '').split(',') if d.strip()]
+        if not dates_param or len(dates_param) > 1000:
+            return jsonify({
+                'error': 'Invalid dates',
+                'message': 'Provide between 1 and 1000 comma-separated ISO 8601 dates using ?dates=',
+                'timestamp': datetime.now().isoformat()
+            }), 400
         
-        if not rate_data:
+        try:
+            dates = [parse_datetime_param(d) for d in dates_param]
+        except ValueError:
             return jsonify({
-                'error': 'Currency not found',
-                'message': f'{currency} exchange rate not available',
+                'error': 'Invalid dates',
+                'message': 'Use ISO 8601 dates or datetimes, e.g. ?dates=2025-03-14T09:00,2025-03-15',
                 'timestamp': datetime.now().isoformat()
-            }), 404
+            }), 400
+        
+        results = db_service.get_rates_as_of_many(currency, dates)
+        if results is None:
+            return jsonify({
+                'error': 'History not available',
+                'message': f'Unable to read the {currency} rate history',
+                'timestamp': datetime.now().isoformat()
+            }), 503
         
-        response = {
+        return jsonify({
             'success': True,
             'currency': currency,
-            'rate': rate_data['rate'],
-            'date_published': rate_data.get('date_published'),
-            'last_updated': rate_data.get('updated_at'),
+            'results': [
+                result or {'currency': currency, 'rate': None, 'as_of': as_of.isoformat(), 'effective_at': None}
+                for as_of, result in zip(dates, results)
+            ],
             'timestamp': datetime.now().isoformat(),
-            'source': 'Banco Central de Venezuela (BCV) - Cached'
-        }
-        
-        logger.info(f"Successfully fetched {currency} rate: {rate_data['rate']}")
-        return jsonify(response)
+            'source': 'Banco Central de Venezuela (BCV) - History'
+        })
         
     except Exception as e:
-        logger.error(f"Error fetching {currency} rate: {str(e)}")
+        logger.error(f"Error fetching {currency} as-of rates: {str(e)}")
         return jsonify({
             'error': 'Internal server error',
-            'message': f'An error occurred while fetching {currency} exchange rate',
+            'message': f'An error occurred while fetching {currency} as-of rates',
             'timestamp': datetime.now().isoformat()
         }), 500
 
 @app.route('/api/update', methods=['POST'])
+@private_no_store
 @rate_limit
 def force_update():
     """Force an immediate update from BCV website"""
     try:
+        if not db_service.refresh_inline:
+            # Read-only web process: only refresh_worker.py contacts BCV
+            return jsonify({
+                'error': 'Updates handled by refresh worker',
+                'message': 'This server runs with REFRESH_MODE=worker; run "python refresh_worker.py --once --force"',
+                'timestamp': datetime.now().isoformat()
+            }), 409
+        
         logger.info("Force update requested")
         success = db_service.force_update()
         
@@ -474,10 +639,11 @@ def force_update():
         }), 500
 
 @app.route('/api/status', methods=['GET'])
+@private_no_store
 def get_status():
     """Get system status and recent update logs"""
     try:
-        update_logs = db_service.get_update_status()
+        update_logs = db_service.get_update_status(limit=5)
         rates_data = db_service.get_all_rates()
         
         return jsonify({
@@ -485,7 +651,20 @@ def get_status():
             'system_status': 'operational',
             'rates_available': len(rates_data.get('rates', {})) if rates_data else 0,
             'last_update': rates_data.get('last_updated') if rates_data else None,
-            'recent_updates': update_logs[:5],  # Last 5 updates
+            'recent_updates': update_logs,  # Last 5 updates, older ones in /api/updates
+            'circuit_breaker': db_service.get_circuit_breaker_status(),
+            'refresh': db_service.get_refresh_status(),
+            'snapshot_version': db_service.get_snapshot_version(),
+            'stream': rate_broadcaster.get_stats(),
+            'compression': compressor.get_stats() if compressor else None,
+            'admission': admission.get_stats() if admission else None,
+            'response_cache': response_cache.get_stats() if response_cache else None,
+            'assets': asset_manifest.get_stats(),
+            'read_replicas': db_service.get_replica_status(),
+            'sqlite': checkpoint_manager.get_stats() if checkpoint_manager else None,
+            'shared_snapshot': db_service.get_shared_snapshot_status(),
+            'analytics': db_service.get_analytics_status(),
+            'schema': schema_migrator.get_status(),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -497,6 +676,48 @@ def get_status():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/api/updates', methods=['GET'])
+@private_no_store
+@rate_limit
+def list_updates():
+    """Page through BCV update logs, newest first (?limit=&cursor=&status=)"""
+    try:
+        page = db_service.get_update_logs(request_page_size(), request.args.get('cursor'),
+                                          request.args.get('status'))
+    except ValueError as e:
+        return invalid_cursor_response(e)
+    if page is None:
+        return jsonify({
+            'error': 'Update logs not available',
+            'message': 'Unable to fetch update logs',
+            'timestamp': datetime.now().isoformat()
+        }), 503
+    return jsonify({'success': True, **page, 'timestamp': datetime.now().isoformat()})
+
+@app.route('/api/stream/rates', methods=['GET'])
+def stream_rates():
+    """Server-Sent Events stream that pushes the rate snapshot when its version changes"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    if not rate_broadcaster.try_acquire():
+        response = jsonify({
+            'error': 'Too many connections',
+            'message': 'Stream capacity reached, fall back to polling /api/rates',
+            'timestamp': datetime.now().isoformat()
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    
+    response = Response(rate_broadcaster.stream(last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -509,8 +730,10 @@ def health_check():
 # NEW ENHANCED ENDPOINTS
 
 @app.route('/api/convert', methods=['GET'])
+@schedule_cached
 @rate_limit
 @track_metrics
+@response_cached({'amount': float, 'from': str.upper, 'to': str.upper, 'as_of': str})
 def currency_converter():
     """Convert amount between currencies using current BCV rates"""
     try:
@@ -562,8 +785,19 @@ def currency_converter():
             }
             return jsonify(response_data)
         
-        # Get all rates for conversion
-        rates_data = db_service.get_rates_with_auto_update()
+        # Get all rates for conversion, optionally as of a past instant
+        if request.args.get('as_of'):
+            try:
+                as_of = parse_datetime_param(request.args['as_of'])
+            except ValueError:
+                return jsonify({
+                    'error': 'Invalid as_of',
+                    'message': 'Use an ISO 8601 date or datetime, e.g. ?as_of=2025-03-14T09:00',
+                    'timestamp': datetime.now().isoformat()
+                }), 400
+            rates_data = db_service.get_all_rates_as_of(as_of)
+        else:
+            rates_data = db_service.get_rates_with_auto_update()
         if not rates_data:
             return jsonify({
                 'error': 'Conversion not available',
@@ -627,6 +861,9 @@ def currency_converter():
             'source': 'Banco Central de Venezuela (BCV) - Cached',
             'rates_date': rates_data.get('last_updated')
         }
+        if rates_data.get('as_of'):
+            response_data['as_of'] = rates_data['as_of']
+            response_data['source'] = 'Banco Central de Venezuela (BCV) - History'
         
         logger.info(f"Currency conversion: {amount} {from_currency} → {converted_amount:.6f} {to_currency}")
         return jsonify(response_data)
@@ -640,8 +877,10 @@ def currency_converter():
         }), 500
 
 @app.route('/api/compare', methods=['GET'])
+@schedule_cached
 @rate_limit
 @track_metrics
+@response_cached({'base': str.upper, 'currencies': currency_list_param, 'amount': float})
 def compare_currencies():
     """Compare multiple currencies against a base currency"""
     try:
@@ -744,7 +983,438 @@ def compare_currencies():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/api/history/<currency>', methods=['GET'])
+@schedule_cached
+@rate_limit
+@track_metrics
+def get_currency_history(currency):
+    """Get historical rates for a currency within an optional time range"""
+    try:
+        currency = currency.upper()
+        valid_currencies = ['USD', 'EUR', 'CNY', 'TRY', 'RUB']
+        if currency not in valid_currencies:
+            return jsonify({
+                'error': 'Invalid currency',
+                'message': f'Currency {currency} is not supported. Valid currencies: {", ".join(valid_currencies)}',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        try:
+            start = parse_datetime_param(request.args.get('start'))
+            end = parse_datetime_param(request.args.get('end'))
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid date',
+                'message': 'Use ISO 8601 dates, e.g. ?start=2025-01-01&end=2025-03-31T23:59:59',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        source = request.args.get('source', 'archive').lower()
+        
+        try:
+            history = db_service.get_history(currency, start, end, request_page_size(), source,
+                                             request.args.get('cursor'))
+        except ValueError as e:
+            return invalid_cursor_response(e)
+        if history is None:
+            return jsonify({
+                'error': 'History not available',
+                'message': f'Unable to fetch {currency} history',
+                'timestamp': datetime.now().isoformat()
+            }), 503
+        
+        return jsonify({
+            'success': True,
+            **history,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching {currency} history: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': f'An error occurred while fetching {currency} history',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+@app.route('/api/analytics/<currency>', methods=['GET'])
+@schedule_cached
+@rate_limit
+@track_metrics
+def get_currency_analytics(currency):
+    """Get rolling SMA/EMA, volatility, min/max and change for a currency over time windows"""
+    try:
+        currency = currency.upper()
+        valid_currencies = ['USD', 'EUR', 'CNY', 'TRY', 'RUB']
+        if currency not in valid_currencies:
+            return jsonify({
+                'error': 'Invalid currency',
+                'message': f'Currency {currency} is not supported. Valid currencies: {", ".join(valid_currencies)}',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        try:
+            windows_param = request.args.get('windows') or config.ANALYTICS_WINDOWS
+            windows = sorted({parse_window(w) for w in windows_param.split(',') if w.strip()})
+            if not windows or len(windows) > 5:
+                raise ValueError('Request between 1 and 5 windows, e.g. ?windows=7d,30d')
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid windows',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        # Imported history changes the result without a new snapshot version
+        generation = db_service.get_analytics_generation() or 0
+        etag, not_modified = check_not_modified(f'analytics-h{generation}-' + '-'.join(format_window(w) for w in windows))
+        if not_modified:
+            return not_modified
+        
+        try:
+            analytics = db_service.get_analytics(currency, windows)
+        except ValueError as e:
+            return jsonify({
+                'error': 'Invalid windows',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        if analytics is None:
+            return jsonify({
+                'error': 'Analytics not available',
+                'message': f'Unable to compute {currency} analytics',
+                'timestamp': datetime.now().isoformat()
+            }), 503
+        if not analytics:
+            return jsonify({
+                'error': 'History not found',
+                'message': f'No {currency} history to analyze yet',
+                'timestamp': datetime.now().isoformat()
+            }), 404
+        
+        response = jsonify({
+            'success': True,
+            'currency': currency,
+            'snapshot_version': g.get('snapshot_version'),
+            'windows': analytics,
+            'timestamp': datetime.now().isoformat(),
+            'source': 'Banco Central de Venezuela (BCV) - History'
+        })
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error computing {currency} analytics: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': f'An error occurred while computing {currency} analytics',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+@app.route('/api/candles/<currency>', methods=['GET'])
+@schedule_cached
+@rate_limit
+@track_metrics
+def get_currency_candles(currency):
+    """Get daily open/high/low/close candles for a currency"""
+    try:
+        currency = currency.upper()
+        valid_currencies = ['USD', 'EUR', 'CNY', 'TRY', 'RUB']
+        if currency not in valid_currencies:
+            return jsonify({
+                'error': 'Invalid currency',
+                'message': f'Currency {currency} is not supported. Valid currencies: {", ".join(valid_currencies)}',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        try:
+            start = parse_datetime_param(request.args.get('start'))
+            end = parse_datetime_param(request.args.get('end'))
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid date',
+                'message': 'Use ISO 8601 dates, e.g. ?start=2024-01-01&end=2025-03-31',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        try:
+            candles = db_service.get_candles(currency, start.date() if start else None, end.date() if end else None,
+                                             request_page_size(), request.args.get('cursor'))
+        except ValueError as e:
+            return invalid_cursor_response(e)
+        if candles is None:
+            return jsonify({
+                'error': 'Candles not available',
+                'message': f'Unable to fetch {currency} candles',
+                'timestamp': datetime.now().isoformat()
+            }), 503
+        
+        return jsonify({
+            'success': True,
+            **candles,
+            'start': start.date().isoformat() if start else None,
+            'end': end.date().isoformat() if end else None,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching {currency} candles: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': f'An error occurred while fetching {currency} candles',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+def export_response(dataset, filter_params):
+    """Stream a dataset as Arrow IPC, Parquet, NDJSON or CSV, chunk by chunk from a server-side cursor"""
+    export_format = request.args.get('format', 'arrow').lower()
+    if not format_available(export_format):
+        return jsonify({
+            'error': 'Export not available',
+            'message': 'Arrow/Parquet export requires pyarrow (pip install pyarrow); '
+                       'use ?format=ndjson or ?format=csv instead',
+            'timestamp': datetime.now().isoformat()
+        }), 501
+    
+    try:
+        start = parse_datetime_param(request.args.get('start'))
+        end = parse_datetime_param(request.args.get('end'))
+    except ValueError:
+        return jsonify({
+            'error': 'Invalid date',
+            'message': 'Use ISO 8601 dates, e.g. ?start=2025-01-01&end=2025-03-31T23:59:59',
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    
+    columns = [c.strip() for c in request.args.get('columns', '').split(',') if c.strip()]
+    filters = {}
+    for param, param_type in filter_params.items():
+        value = request.args.get(param)
+        if not value:
+            continue
+        try:
+            filters[param] = param_type(value)
+        except ValueError:
+            # request.args.get(type=int) would turn ?status_code=abc into None and filter on IS NULL
+            return jsonify({
+                'error': 'Invalid filter',
+                'message': f'Could not parse {param}={value}',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+    
+    try:
+        chunks = arrow_exporter.stream(dataset, export_format, columns=columns, start=start, end=end,
+                                       filters=filters)
+    except ExportError as e:
+        return jsonify({
+            'error': 'Invalid export request',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f"divisa_{dataset}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}"
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no'  # Rows reach the client as they are read, not after the whole export
+    })
+
+@app.route('/api/export/history', methods=['GET'])
+@schedule_cached
+@rate_limit
+@track_metrics
+def export_history():
+    """Export rate history as Arrow IPC stream, Parquet, NDJSON or CSV"""
+    return export_response('history', {'currency': str.upper})
+
+@app.route('/api/export/candles', methods=['GET'])
+@schedule_cached
+@rate_limit
+@track_metrics
+def export_candles():
+    """Export daily OHLC candles as Arrow IPC stream, Parquet, NDJSON or CSV"""
+    return export_response('candles', {'currency': str.upper})
+
+@app.route('/api/export/metrics', methods=['GET'])
+@private_no_store
+@rate_limit
+@track_metrics
+def export_metrics():
+    """Export API metrics as Arrow IPC stream, Parquet, NDJSON or CSV"""
+    return export_response('metrics', {'endpoint': str, 'status_code': int})
+
+def webhook_caller_authorized(subscription=None):
+    return caller_authorized(request.headers.get('Authorization'), config.WEBHOOK_ADMIN_TOKEN, subscription)
+
+def webhook_unauthorized_response():
+    response = jsonify({
+        'error': 'Unauthorized',
+        'message': 'Send the webhook management token (or the admin token) as "Authorization: Bearer <token>"',
+        'timestamp': datetime.now().isoformat()
+    })
+    response.headers['WWW-Authenticate'] = 'Bearer'
+    return response, 401
+
+@app.route('/api/webhooks', methods=['POST'])
+@private_no_store
+@rate_limit
+def create_webhook():
+    """Register an endpoint to be notified when the published rates change"""
+    try:
+        body = request.get_json(silent=True) or {}
+        url = (body.get('url') or '').strip()
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.netloc or len(url) > 500:
+            return jsonify({
+                'error': 'Invalid url',
+                'message': 'Provide an absolute http(s) URL in the JSON body, e.g. {"url": "https://example.com/hook"}',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        max_concurrency = body.get('max_concurrency', 2)
+        if not isinstance(max_concurrency, int) or not 1 <= max_concurrency <= 10:
+            return jsonify({
+                'error': 'Invalid max_concurrency',
+                'message': 'max_concurrency must be an integer between 1 and 10',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        if not config.WEBHOOK_ALLOW_PRIVATE_DESTINATIONS:
+            reason = check_destination(url)
+            if reason:
+                return jsonify({
+                    'error': 'Destination not allowed',
+                    'message': f'Webhooks must point to a public address: {reason}',
+                    'timestamp': datetime.now().isoformat()
+                }), 400
+        
+        subscription = WebhookSubscription(
+            url=url,
+            secret=body.get('secret'),
+            description=body.get('description'),
+            max_concurrency=max_concurrency
+        )
+        management_token = issue_management_token(subscription)
+        db.session.add(subscription)
+        db.session.commit()
+        logger.info(f"Registered webhook {subscription.id} -> {url}")
+        
+        return jsonify({
+            'success': True,
+            'webhook': subscription.to_dict(),
+            'management_token': management_token,  # Shown only once; needed to delete or inspect the webhook
+            'timestamp': datetime.now().isoformat()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error registering webhook: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An error occurred while registering the webhook',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+@app.route('/api/webhooks', methods=['GET'])
+@private_no_store
+def list_webhooks():
+    """List webhook subscriptions, oldest first, and delivery statistics (admin token only; ?limit=&cursor=)"""
+    if not webhook_caller_authorized():
+        return webhook_unauthorized_response()
+    try:
+        after = decode_cursor(request.args.get('cursor'), 'webhooks')
+    except ValueError as e:
+        return invalid_cursor_response(e)
+    try:
+        subscriptions, next_key = keyset_page(
+            WebhookSubscription.query, WebhookSubscription.created_at, WebhookSubscription.id, after,
+            request_page_size()
+        )
+        return jsonify({
+            'success': True,
+            'webhooks': [subscription.to_dict() for subscription in subscriptions],
+            'next_cursor': encode_cursor('webhooks', next_key) if next_key else None,
+            'dispatcher': webhook_dispatcher.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error listing webhooks: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An error occurred while listing webhooks',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+@app.route('/api/webhooks/<int:webhook_id>', methods=['DELETE'])
+@private_no_store
+def delete_webhook(webhook_id):
+    """Deactivate a webhook subscription"""
+    try:
+        subscription = db.session.get(WebhookSubscription, webhook_id)
+        if not webhook_caller_authorized(subscription):
+            return webhook_unauthorized_response()
+        if not subscription:
+            return jsonify({
+                'error': 'Webhook not found',
+                'message': f'Webhook {webhook_id} does not exist',
+                'timestamp': datetime.now().isoformat()
+            }), 404
+        
+        subscription.active = False
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'webhook': subscription.to_dict(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error deleting webhook {webhook_id}: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An error occurred while deleting the webhook',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+@app.route('/api/webhooks/<int:webhook_id>/deliveries', methods=['GET'])
+@private_no_store
+def list_webhook_deliveries(webhook_id):
+    """Deliveries for a webhook subscription, newest first (?limit=&cursor=)"""
+    if not webhook_caller_authorized(db.session.get(WebhookSubscription, webhook_id)):
+        return webhook_unauthorized_response()
+    scope = f'webhook_deliveries:{webhook_id}'
+    try:
+        after = decode_cursor(request.args.get('cursor'), scope)
+    except ValueError as e:
+        return invalid_cursor_response(e)
+    try:
+        deliveries, next_key = keyset_page(
+            WebhookDelivery.query.filter_by(subscription_id=webhook_id),
+            WebhookDelivery.created_at, WebhookDelivery.id, after, request_page_size(), descending=True
+        )
+        return jsonify({
+            'success': True,
+            'webhook_id': webhook_id,
+            'deliveries': [delivery.to_dict() for delivery in deliveries],
+            'next_cursor': encode_cursor(scope, next_key) if next_key else None,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error listing deliveries for webhook {webhook_id}: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An error occurred while listing webhook deliveries',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
 @app.route('/api/metrics', methods=['GET'])
+@private_no_store
 @rate_limit
 def get_api_metrics():
     """Get API usage metrics and statistics"""
@@ -758,32 +1428,38 @@ def get_api_metrics():
             
         cutoff_time = datetime.utcnow() - timedelta(hours=hours)
         
-        # Basic metrics
-        total_requests = db.session.query(func.count(ApiMetrics.id)).filter(
-            ApiMetrics.created_at >= cutoff_time
-        ).scalar() or 0
-        
-        # Requests by endpoint
-        endpoint_stats = db.session.query(
-            ApiMetrics.endpoint, 
-            func.count(ApiMetrics.id).label('count'),
-            func.avg(ApiMetrics.response_time_ms).label('avg_response_time')
-        ).filter(
-            ApiMetrics.created_at >= cutoff_time
-        ).group_by(ApiMetrics.endpoint).all()
-        
-        # Requests by format
-        format_stats = db.session.query(
-            ApiMetrics.response_format,
-            func.count(ApiMetrics.id).label('count')
-        ).filter(
-            ApiMetrics.created_at >= cutoff_time
-        ).group_by(ApiMetrics.response_format).all()
-        
-        # Recent update logs
-        recent_updates = db.session.query(UpdateLog).order_by(
-            desc(UpdateLog.created_at)
-        ).limit(5).all()
+        def collect(session):
+            # Basic metrics
+            total_requests = session.query(func.count(ApiMetrics.id)).filter(
+                ApiMetrics.created_at >= cutoff_time
+            ).scalar() or 0
+            
+            # Requests by endpoint
+            endpoint_stats = session.query(
+                ApiMetrics.endpoint, 
+                func.count(ApiMetrics.id).label('count'),
+                func.avg(ApiMetrics.response_time_ms).label('avg_response_time')
+            ).filter(
+                ApiMetrics.created_at >= cutoff_time
+            ).group_by(ApiMetrics.endpoint).all()
+            
+            # Requests by format
+            format_stats = session.query(
+                ApiMetrics.response_format,
+                func.count(ApiMetrics.id).label('count')
+            ).filter(
+                ApiMetrics.created_at >= cutoff_time
+            ).group_by(ApiMetrics.response_format).all()
+            
+            # Recent update logs
+            recent_updates = [update.to_dict() for update in session.query(UpdateLog).order_by(
+                desc(UpdateLog.created_at)
+            ).limit(5)]
+            
+            return total_requests, endpoint_stats, format_stats, recent_updates
+        
+        # Aggregations run on a read replica when one is configured
+        total_requests, endpoint_stats, format_stats, recent_updates = db_service.replicas.read(collect)
         
         response_data = {
             'success': True,
@@ -801,7 +1477,7 @@ def get_api_metrics():
                     {'format': format_name or 'json', 'requests': count}
                     for format_name, count in format_stats
                 ],
-                'recent_updates': [update.to_dict() for update in recent_updates]
+                'recent_updates': recent_updates
             },
             'timestamp': datetime.now().isoformat()
         }
@@ -816,6 +1492,24 @@ def get_api_metrics():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/api/metrics/requests', methods=['GET'])
+@private_no_store
+@rate_limit
+def list_request_metrics():
+    """Page through raw API request metrics, newest first (?limit=&cursor=&endpoint=)"""
+    try:
+        page = db_service.get_request_metrics(request_page_size(), request.args.get('cursor'),
+                                              request.args.get('endpoint'))
+    except ValueError as e:
+        return invalid_cursor_response(e)
+    if page is None:
+        return jsonify({
+            'error': 'Metrics not available',
+            'message': 'Unable to fetch request metrics',
+            'timestamp': datetime.now().isoformat()
+        }), 503
+    return jsonify({'success': True, **page, 'timestamp': datetime.now().isoformat()})
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
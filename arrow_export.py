@@ -0,0 +1,272 @@
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+from models import db, ExchangeRateHistory, ApiMetrics, DailyCandle
+from sqlalchemy import select
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv')  # Flask adds charset=utf-8 to text mimetypes
+}
+# Formats that need pyarrow; ndjson and csv are encoded with the standard library (or orjson)
+ARROW_FORMATS = ('arrow', 'parquet')
+
+# Exportable columns per dataset; ip_address is deliberately not exported.
+# start/end filter on ``time_column`` (default created_at)
+DATASETS = {
+    'history': {
+        'model': ExchangeRateHistory,
+        'columns': ['id', 'currency', 'rate', 'date_published', 'created_at'],
+        'filters': {'currency': 'currency'}
+    },
+    'candles': {
+        'model': DailyCandle,
+        'columns': ['currency', 'day', 'open', 'high', 'low', 'close', 'samples', 'opened_at', 'closed_at'],
+        'filters': {'currency': 'currency'},
+        'time_column': 'day'
+    },
+    'metrics': {
+        'model': ApiMetrics,
+        'columns': ['id', 'endpoint', 'method', 'response_format', 'status_code', 'response_time_ms', 'created_at'],
+        'filters': {'endpoint': 'endpoint', 'status_code': 'status_code'}
+    }
+}
+
+class ExportError(ValueError):
+    """Invalid export request (unknown dataset, column or format)"""
+
+def arrow_available() -> bool:
+    return pa is not None
+
+def format_available(export_format: str) -> bool:
+    return export_format not in ARROW_FORMATS or arrow_available()
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+def _arrow_type(column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return pa.timestamp('us')
+    if python_type is date:
+        return pa.date32()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    return pa.string()
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+class ArrowExporter:
+    """
+    Streams a table as Arrow IPC, Parquet, NDJSON or CSV.
+
+    Rows are read from a server-side cursor (``stream_results``) in chunks;
+    each chunk becomes one record batch (one row group for Parquet) of
+    ``batch_size`` rows or one block of text lines, and its bytes are yielded
+    as soon as they are written. Memory stays bounded by the chunk size
+    regardless of how many rows match.
+
+    Text formats start with a ``first_fetch_size`` chunk and grow it fourfold
+    up to ``text_batch_size``, so the first bytes go out after one small fetch
+    (the ORDER BY follows an index, so no sort has to finish first). Their
+    throughput stops improving well before Arrow's batch size, so the smaller
+    ceiling only saves memory.
+    """
+
+    def __init__(self, batch_size: int = 50000, parquet_compression: str = 'zstd', first_fetch_size: int = 500,
+                 text_batch_size: int = 10000):
+        self.batch_size = max(1, batch_size)
+        self.parquet_compression = parquet_compression
+        self.text_batch_size = max(1, text_batch_size)
+        self.first_fetch_size = max(1, min(first_fetch_size, self.text_batch_size))
+
+    def resolve_columns(self, dataset: str, columns: Optional[List[str]] = None) -> List[str]:
+        if dataset not in DATASETS:
+            raise ExportError(f"Unknown dataset '{dataset}'. Valid datasets: {', '.join(DATASETS)}")
+        available = DATASETS[dataset]['columns']
+        if not columns:
+            return list(available)
+        unknown = [c for c in columns if c not in available]
+        if unknown:
+            raise ExportError(f"Unknown columns: {', '.join(unknown)}. Valid columns: {', '.join(available)}")
+        return columns
+
+    def schema(self, dataset: str, columns: List[str]):
+        table = DATASETS[dataset]['model'].__table__
+        return pa.schema([pa.field(name, _arrow_type(table.c[name])) for name in columns])
+
+    def iter_batches(self, dataset: str, columns: Optional[List[str]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, filters: Optional[Dict] = None) -> Iterator:
+        """Yield pyarrow RecordBatches read from a streaming DB cursor"""
+        columns = self.resolve_columns(dataset, columns)
+        schema = self.schema(dataset, columns)
+        for rows in self.iter_rows(dataset, columns, start, end, filters, self.batch_size, self.batch_size):
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def iter_rows(self, dataset: str, columns: List[str], start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, filters: Optional[Dict] = None,
+                  first_size: Optional[int] = None, max_size: Optional[int] = None) -> Iterator[List[tuple]]:
+        """Yield lists of row tuples fetched from a server-side cursor, ordered by time and id"""
+        model = DATASETS[dataset]['model']
+
+        time_column = getattr(model, DATASETS[dataset].get('time_column', 'created_at'))
+        if time_column.type.python_type is date:
+            start, end = start and start.date(), end and end.date()
+
+        query = select(*[getattr(model, name) for name in columns])
+        if start:
+            query = query.where(time_column >= start)
+        if end:
+            query = query.where(time_column <= end)
+        for param, value in (filters or {}).items():
+            attribute = DATASETS[dataset]['filters'][param]
+            query = query.where(getattr(model, attribute) == value)
+        query = query.order_by(time_column, model.id).execution_options(stream_results=True)
+
+        # Core execution: ORM results are buffered in full unless yield_per is set
+        result = db.session.connection().execute(query)
+        size = first_size or self.first_fetch_size
+        max_size = max_size or self.text_batch_size
+        try:
+            while True:
+                rows = result.fetchmany(size)
+                if not rows:
+                    break
+                yield rows
+                size = min(size * 4, max_size)
+        finally:
+            result.close()
+
+    def stream(self, dataset: str, export_format: str = 'arrow', **kwargs) -> Iterator[bytes]:
+        """Yield the encoded export in chunks, one per record batch"""
+        if export_format not in EXPORT_FORMATS:
+            raise ExportError(f"Unknown format '{export_format}'. Valid formats: {', '.join(EXPORT_FORMATS)}")
+        columns = self.resolve_columns(dataset, kwargs.pop('columns', None))
+        unknown = [param for param in (kwargs.get('filters') or {}) if param not in DATASETS[dataset]['filters']]
+        if unknown:
+            raise ExportError(f"Unknown filters: {', '.join(unknown)}")
+        if export_format == 'ndjson':
+            return self._encode_ndjson(self.iter_rows(dataset, columns, **kwargs), columns)
+        if export_format == 'csv':
+            table = DATASETS[dataset]['model'].__table__
+            temporal = [i for i, name in enumerate(columns) if table.c[name].type.python_type in (date, datetime)]
+            return self._encode_csv(self.iter_rows(dataset, columns, **kwargs), columns, temporal)
+        schema = self.schema(dataset, columns)
+        batches = self.iter_batches(dataset, columns, **kwargs)
+        return self._encode(batches, schema, export_format)
+
+    def _encode_ndjson(self, partitions, columns: List[str]) -> Iterator[bytes]:
+        rows = 0
+        for partition in partitions:
+            if orjson:
+                # orjson writes datetimes and dates as ISO 8601 itself
+                lines = [orjson.dumps(dict(zip(columns, row))) for row in partition]
+            else:
+                lines = [json.dumps(dict(zip(columns, row)), default=_isoformat, ensure_ascii=False).encode('utf-8')
+                         for row in partition]
+            lines.append(b'')
+            rows += len(partition)
+            yield b'\n'.join(lines)
+        logger.info(f"Exported {rows} rows as ndjson")
+
+    def _encode_csv(self, partitions, columns: List[str], temporal: List[int]) -> Iterator[bytes]:
+        """CSV with ISO 8601 dates (``temporal`` are the indexes of date/datetime columns)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        rows = 0
+        for partition in partitions:
+            if temporal:
+                partition = [list(row) for row in partition]
+                for row in partition:
+                    for i in temporal:
+                        if row[i] is not None:
+                            row[i] = row[i].isoformat()
+            writer.writerows(partition)
+            rows += len(partition)
+            # One block per fetch: the buffer never holds more than batch_size rows
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')  # Header of an empty export
+        logger.info(f"Exported {rows} rows as csv")
+
+    def _encode(self, batches, schema, export_format: str) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        if export_format == 'parquet':
+            writer = pq.ParquetWriter(sink, schema, compression=self.parquet_compression)
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+
+        rows = 0
+        try:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            writer.close()
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+        logger.info(f"Exported {rows} rows as {export_format}")
+
+    def write_file(self, path: str, dataset: str, export_format: str = 'arrow', **kwargs) -> int:
+        """Write an export to disk, returning the number of bytes written"""
+        written = 0
+        with open(path, 'wb') as f:
+            for chunk in self.stream(dataset, export_format, **kwargs):
+                f.write(chunk)
+                written += len(chunk)
+        return written
@@ -6,13 +6,14 @@ import urllib3
 from datetime import datetime
 from typing import Dict, Optional
 from config import get_config
+from http_cassette import HttpCassette, parse_latency
 
 logger = logging.getLogger(__name__)
 
 class BCVScraper:
     """Web scraper for Banco Central de Venezuela exchange rates"""
     
-    def __init__(self):
+    def __init__(self, cassette: Optional[HttpCassette] = None):
         self.base_url = "https://www.bcv.org.ve/"
         self.session = requests.Session()
         self.session.headers.update({
@@ -25,6 +26,14 @@ class BCVScraper:
         # Get timeout from configuration
         config = get_config()
         self.timeout = config.REQUEST_TIMEOUT
+        # Record BCV responses to a cassette, or replay them offline (tests, benchmarks, debugging)
+        if cassette is None and config.BCV_CASSETTE_MODE != 'off':
+            cassette = HttpCassette(config.BCV_CASSETTE_DIR, config.BCV_CASSETTE_MODE,
+                                    parse_latency(config.BCV_CASSETTE_LATENCY))
+        self.cassette = cassette
+        if cassette:
+            cassette.mount(self.session)
+            logger.info(f"BCV scraper in cassette {cassette.mode} mode ({cassette.directory})")
         
     def get_page_content(self) -> Optional[BeautifulSoup]:
         """Fetch and parse the BCV main page"""
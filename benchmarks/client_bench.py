@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark del SDK `divisa_client.py`: llamadas al servidor por cada 1.000 conversiones
+
+Levanta la app en un servidor HTTP local (base SQLite temporal con tasas de
+prueba) y cuenta en el middleware WSGI las peticiones que realmente llegan
+mientras cada cliente hace 1.000 conversiones:
+
+    ejemplo (BCVAPIClient)     un GET por conversión, como examples/python_client.py
+    SDK, cabeceras actuales    caché local con las cabeceras que envía hoy el servidor
+    SDK, max-age=60            el servidor anuncia 60s de frescura (Cache-Control)
+    SDK + push (SSE)           suscrito a /api/stream/rates, sin revalidaciones
+    SDK async (gather)         1.000 corrutinas concurrentes, una sola revalidación
+
+Uso:
+    python benchmarks/client_bench.py [conversiones]
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'examples'))
+
+DATA_DIR = tempfile.mkdtemp(prefix='divisa_client_bench_')
+os.environ.update(
+    DB_PATH=os.path.join(DATA_DIR, 'bench.db'),
+    HISTORY_ARCHIVE_DIR=os.path.join(DATA_DIR, 'history_archive'),
+    SHARED_SNAPSHOT_PATH=os.path.join(DATA_DIR, 'snapshot.bin'),
+    RATE_LIMIT_SECONDS='0'
+)
+
+from werkzeug.serving import make_server
+
+import app as divisa_app
+from divisa_client import AsyncDivisaClient, DivisaClient
+from python_client import BCVAPIClient
+
+CURRENCIES = ['USD', 'EUR', 'CNY', 'TRY', 'RUB', 'VES']
+
+class RequestCounter:
+    """Middleware WSGI que cuenta peticiones y respuestas 304 por ruta"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.extra_headers = []
+        self.reset()
+
+    def reset(self):
+        self.requests, self.not_modified = 0, 0
+
+    def __call__(self, environ, start_response):
+        self.requests += 1
+
+        def counting_start_response(status, headers, exc_info=None):
+            if status.startswith('304'):
+                self.not_modified += 1
+            if environ['PATH_INFO'].startswith('/api/rates'):
+                headers = [(k, v) for k, v in headers
+                           if not any(k.lower() == name.lower() for name, _ in self.extra_headers)]
+                headers += self.extra_headers
+            return start_response(status, headers, exc_info)
+        return self.wsgi_app(environ, counting_start_response)
+
+def start_server():
+    with divisa_app.app.app_context():
+        divisa_app.db_service.scraper.get_all_rates = lambda: {
+            'rates': {'USD': 36.5432, 'EUR': 39.8765, 'CNY': 5.0412, 'TRY': 1.1234, 'RUB': 0.4012},
+            'date': 'Lunes, 14 Marzo 2025'
+        }
+        divisa_app.db_service.update_rates_from_bcv()
+    counter = RequestCounter(divisa_app.app.wsgi_app)
+    divisa_app.app.wsgi_app = counter
+    server = make_server('127.0.0.1', 0, divisa_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', counter, server
+
+def conversions(count):
+    rng = random.Random(42)
+    return [(rng.uniform(1, 1000), *rng.sample(CURRENCIES, 2)) for _ in range(count)]
+
+def run_example(base_url, work):
+    client = BCVAPIClient(base_url)
+    for amount, source, target in work:
+        client.convert_currency(amount, source if target == 'VES' else 'VES', target if target != 'VES' else source)
+
+def run_sdk(base_url, work, subscribe=False):
+    with DivisaClient(base_url) as client:
+        if subscribe:
+            client.subscribe()
+            client.get_rates()
+            deadline = time.monotonic() + 5
+            while client.cache.push_until == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)  # Espera a que el stream esté conectado
+        for amount, source, target in work:
+            client.convert(amount, source, target)
+        return client.get_stats()
+
+def run_async(base_url, work):
+    async def main():
+        async with AsyncDivisaClient(base_url) as client:
+            await asyncio.gather(*(client.convert(amount, source, target) for amount, source, target in work))
+            return client.get_stats()
+    return asyncio.run(main())
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    base_url, counter, server = start_server()
+    work = conversions(count)
+
+    scenarios = [
+        ('ejemplo (BCVAPIClient)', lambda: run_example(base_url, work), None),
+        ('SDK, cabeceras actuales', lambda: run_sdk(base_url, work), None),
+        ('SDK, max-age=60', lambda: run_sdk(base_url, work), 'public, max-age=60, stale-if-error=3600'),
+        ('SDK + push (SSE)', lambda: run_sdk(base_url, work, subscribe=True), None),
+        ('SDK async (gather)', lambda: run_async(base_url, work), 'public, max-age=60'),
+    ]
+    print(f"{count:,} conversiones por cliente\n")
+    print(f"{'cliente':<26}{'peticiones':>12}{'304':>8}{'ms total':>11}{'µs/conv':>10}")
+    for name, run, cache_control in scenarios:
+        counter.extra_headers = [('Cache-Control', cache_control)] if cache_control else []
+        counter.reset()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<26}{counter.requests:>12,}{counter.not_modified:>8,}{elapsed * 1000:>11.1f}"
+              f"{elapsed * 1e6 / count:>10.1f}")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
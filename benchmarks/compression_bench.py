@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark de compresión de respuestas: costo de CPU frente a bytes ahorrados
+
+Compara gzip (niveles 1, 6 y 9) y brotli (si está instalado) sobre la página
+principal, los assets estáticos y cuerpos JSON típicos de la API, e incluye el
+costo de servir una variante ya cacheada (búsqueda en el LRU por ruta,
+argumentos y ETag).
+
+Uso:
+    python benchmarks/compression_bench.py
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from compression import brotli
+
+def sample_bodies():
+    bodies = {}
+    for name in ('templates/index.html', 'static/js/app.js', 'static/css/app.css'):
+        with open(os.path.join(ROOT, name), 'rb') as f:
+            bodies[name] = f.read()
+
+    rates = {'USD': 36.5432, 'EUR': 39.8765, 'CNY': 5.0412, 'TRY': 1.1234, 'RUB': 0.4012}
+    bodies['/api/rates (json)'] = json.dumps({
+        'success': True,
+        'data': {'rates': rates, 'date': 'Lunes, 14 Marzo 2025', 'currencies_available': list(rates),
+                 'base_currency': 'VES', 'last_updated': '2025-03-14T13:00:00'},
+        'timestamp': '2025-03-14T13:05:00', 'source': 'Banco Central de Venezuela (BCV) - Cached'
+    }).encode()
+    bodies['/api/history (1000 filas)'] = json.dumps({
+        'success': True, 'currency': 'USD',
+        'history': [{'timestamp': f'2025-01-01T{i % 24:02d}:00:00', 'rate': 36.5 + i / 1000} for i in range(1000)]
+    }).encode()
+    return bodies
+
+def per_call_ms(fn, data, min_time=0.2):
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn(data)
+        calls += 1
+    return (time.perf_counter() - start) * 1000 / calls
+
+def main():
+    codecs = [
+        ('gzip-1', lambda d: gzip.compress(d, compresslevel=1, mtime=0)),
+        ('gzip-6', lambda d: gzip.compress(d, compresslevel=6, mtime=0)),
+        ('gzip-9', lambda d: gzip.compress(d, compresslevel=9, mtime=0)),
+    ]
+    if brotli:
+        codecs += [
+            ('br-5', lambda d: brotli.compress(d, quality=5)),
+            ('br-11', lambda d: brotli.compress(d, quality=11)),
+        ]
+    else:
+        print("brotli no instalado: solo se mide gzip (pip install brotli)\n")
+
+    cache = {}
+    print(f"{'cuerpo':<28} {'codec':<7} {'bytes':>8} {'comprimido':>11} {'ahorro':>7} {'ms/llamada':>11} {'hit (ms)':>9}")
+    for name, data in sample_bodies().items():
+        for codec_name, codec in codecs:
+            compressed = codec(data)
+            ms = per_call_ms(codec, data)
+            key = (codec_name, name, (), 'v1-json')
+            cache[key] = compressed
+            hit_ms = per_call_ms(lambda d: cache.get(key), data)
+            saved = 100 * (1 - len(compressed) / len(data))
+            print(f"{name:<28} {codec_name:<7} {len(data):>8} {len(compressed):>11} {saved:>6.1f}% {ms:>11.3f} {hit_ms:>9.4f}")
+
+if __name__ == '__main__':
+    main()
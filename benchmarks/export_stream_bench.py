@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la exportación en streaming NDJSON/CSV: primer byte, filas/s y memoria
+
+Genera N filas de historial (USD y EUR) en una base SQLite temporal y consume
+la exportación como lo haría la respuesta HTTP, bloque a bloque: mide el tiempo
+hasta el primer bloque, el total y, con --memory, el pico de memoria Python
+(tracemalloc), que debe quedarse igual al pasar de 1M a 10M filas.
+
+Uso:
+    python benchmarks/export_stream_bench.py [--rows 1000000] [--text-batch-size 10000] [--memory]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+from arrow_export import ArrowExporter
+from migrations import SchemaMigrator
+from models import db, ExchangeRateHistory
+
+def seed(rows):
+    start, step = datetime(2000, 1, 1), timedelta(minutes=1)
+    insert = ExchangeRateHistory.__table__.insert()
+    for offset in range(0, rows, 100000):
+        db.session.execute(insert, [
+            {'currency': 'USD' if i % 2 else 'EUR', 'rate': 36.5 + (i % 1000) / 1000,
+             'date_published': None, 'created_at': start + step * i}
+            for i in range(offset, min(offset + 100000, rows))
+        ])
+        db.session.commit()
+
+def measure(exporter, export_format, memory=False, **kwargs):
+    """Primer bloque (ms), total (s), bytes y pico de memoria (MiB, con memory) consumiendo el stream"""
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    first, total = None, 0
+    for chunk in exporter.stream('history', export_format, **kwargs):
+        if first is None:
+            first = (time.perf_counter() - started) * 1000
+        total += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return first, elapsed, total, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--text-batch-size', type=int, default=10000)
+    parser.add_argument('--memory', action='store_true', help='Medir el pico de memoria (tracemalloc, más lento)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='divisa_export_bench_')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    db.init_app(app)
+
+    with app.app_context():
+        SchemaMigrator(db.engine).migrate()
+        print(f"Generando {args.rows:,} filas de historial en {workdir} ...")
+        seed(args.rows)
+        exporter = ArrowExporter(text_batch_size=args.text_batch_size)
+
+        print(f"\n{'formato':<8} {'filtro':<8} {'primer bloque':>14} {'total':>9} {'filas/s':>11} {'MB':>8} {'pico mem':>9}")
+        for export_format in ('ndjson', 'csv'):
+            for label, filters in (('todas', {}), ('USD', {'currency': 'USD'})):
+                first, elapsed, size, peak = measure(exporter, export_format, args.memory, filters=filters)
+                rows = args.rows // 2 if filters else args.rows
+                print(f"{export_format:<8} {label:<8} {first:>11.1f} ms {elapsed:>7.2f} s {rows / elapsed:>11,.0f} "
+                      f"{size / 2 ** 20:>8.1f} {f'{peak:.1f} MiB' if peak is not None else '-':>9}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark del archivo columnar de historial frente a la consulta SQL
+
+Genera N años de muestras de USD cada 30 minutos en una base SQLite temporal,
+construye el archivo memory-mapped y compara rangos de 1 día, 1 año y 10 años.
+
+Uso:
+    python benchmarks/history_archive_bench.py [--years 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+from models import db, ExchangeRateHistory
+from history_archive import HistoryArchive, np
+
+def timed(fn, repeat=3):
+    """Mejor tiempo (ms) de varias ejecuciones y el resultado de la última"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='divisa_bench_')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    db.init_app(app)
+
+    end = datetime(2025, 1, 1)
+    start = end - timedelta(days=365 * args.years)
+    step = timedelta(minutes=30)
+
+    with app.app_context():
+        db.create_all()
+        print(f"Generando {args.years} años de historial USD en {workdir} ...")
+        rows, current, rate = [], start, 1.0
+        while current < end:
+            rate *= 1.00002
+            rows.append({'currency': 'USD', 'rate': rate, 'date_published': None, 'created_at': current})
+            current += step
+        db.session.execute(ExchangeRateHistory.__table__.insert(), rows)
+        db.session.commit()
+        print(f"  {len(rows)} filas")
+
+        archive = HistoryArchive(os.path.join(workdir, 'archive'))
+        build_ms, _ = timed(archive.sync_from_db, repeat=1)
+        print(f"  archivo construido en {build_ms:.0f} ms\n")
+
+        def sql_range(range_start):
+            query = ExchangeRateHistory.query.filter(
+                ExchangeRateHistory.currency == 'USD',
+                ExchangeRateHistory.created_at >= range_start,
+                ExchangeRateHistory.created_at <= end
+            ).order_by(ExchangeRateHistory.created_at)
+            return [{'timestamp': r.created_at.isoformat(), 'rate': r.rate} for r in query]
+
+        print(f"{'rango':<8} {'filas':>8} {'SQL (ms)':>10} {'archivo (ms)':>13} {'numpy (ms)':>11}")
+        for label, days in (('1 día', 1), ('1 año', 365), ('10 años', 3650)):
+            range_start = end - timedelta(days=days)
+            sql_ms, sql_rows = timed(lambda: sql_range(range_start))
+            archive_ms, _ = timed(lambda: archive.query('USD', range_start, end))
+            numpy_ms = None
+            if np is not None:
+                numpy_ms, _ = timed(lambda: archive.to_numpy('USD', range_start, end))
+            numpy_text = f"{numpy_ms:>11.3f}" if numpy_ms is not None else f"{'n/d':>11}"
+            print(f"{label:<8} {len(sql_rows):>8} {sql_ms:>10.2f} {archive_ms:>13.2f} {numpy_text}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark del cache de respuestas de /api/convert y /api/compare
+
+Levanta la aplicación sobre una base SQLite temporal con un snapshot de tasas
+y mide peticiones/s con un conjunto pequeño de combinaciones populares, con y
+sin cache, además de cuántas veces se calcula una misma respuesta cuando
+llegan N peticiones idénticas a la vez con el cache vacío.
+
+Uso:
+    python benchmarks/response_cache_bench.py [--requests 5000] [--concurrency 16]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+workdir = tempfile.mkdtemp(prefix='divisa_response_cache_bench_')
+os.environ.update({
+    'DB_TYPE': 'sqlite', 'DB_PATH': os.path.join(workdir, 'bench.db'), 'RATE_LIMIT_SECONDS': '0',
+    'REFRESH_MODE': 'worker', 'HISTORY_ARCHIVE_DIR': os.path.join(workdir, 'archive'),
+    'SHARED_SNAPSHOT_PATH': os.path.join(workdir, 'snapshot.bin'), 'ADMISSION_ENABLED': 'False'
+})
+
+import logging
+import app as divisa_app
+from models import db, ExchangeRate, RateSnapshot
+
+POPULAR = [
+    '/api/convert?amount=1&from=USD&to=VES',
+    '/api/convert?amount=100&from=USD&to=VES',
+    '/api/convert?amount=1&from=EUR&to=VES',
+    '/api/convert?amount=1000&from=VES&to=USD',
+    '/api/compare?base=USD',
+    '/api/compare?base=VES&currencies=USD,EUR',
+]
+
+def seed():
+    rates = {'USD': 36.5432, 'EUR': 39.8765, 'CNY': 5.0412, 'TRY': 1.1234, 'RUB': 0.4012}
+    with divisa_app.app.app_context():
+        db.session.add_all(ExchangeRate(currency=c, rate=r) for c, r in rates.items())
+        db.session.add(RateSnapshot(rates=json.dumps(rates), date_published='Lunes, 14 Marzo 2025'))
+        db.session.commit()
+        divisa_app.db_service.sync_shared_snapshot()  # Version lookups come from the mmap, as in production
+
+def throughput(requests):
+    client = divisa_app.app.test_client()
+    started = time.perf_counter()
+    for i in range(requests):
+        assert client.get(POPULAR[i % len(POPULAR)]).status_code == 200
+    return requests / (time.perf_counter() - started)
+
+def burst(concurrency):
+    """Cache vacío y concurrency peticiones idénticas a la vez: cuántas calcularon la respuesta"""
+    divisa_app.response_cache.clear()
+    before = divisa_app.response_cache.get_stats()['misses']
+    barrier = threading.Barrier(concurrency)
+
+    def worker():
+        client = divisa_app.app.test_client()
+        barrier.wait()
+        client.get(POPULAR[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return divisa_app.response_cache.get_stats()['misses'] - before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    seed()
+
+    cache = divisa_app.response_cache
+    divisa_app.response_cache = None
+    uncached = throughput(args.requests)
+    divisa_app.response_cache = cache
+    cached = throughput(args.requests)
+
+    print(f"{'modo':<10} {'peticiones/s':>13}")
+    print(f"{'sin cache':<10} {uncached:>13,.0f}")
+    print(f"{'con cache':<10} {cached:>13,.0f}   ({cached / uncached:.1f}x)")
+    print(f"\n{args.concurrency} peticiones idénticas simultáneas -> {burst(args.concurrency)} cálculo(s)")
+    print(f"Métricas: {json.dumps(cache.get_stats())}")
+
+if __name__ == '__main__':
+    main()
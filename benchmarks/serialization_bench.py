@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serializadores: tiempo de codificación, de decodificación y tamaño por formato
+
+Recorre el registro de `serializers.py` (json, csv, xml y msgpack/cbor si están
+instalados) sobre cuerpos típicos de la API y compara además el codificador
+JSON de la librería estándar con el de orjson (si está instalado).
+
+Uso:
+    python benchmarks/serialization_bench.py
+"""
+
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from serializers import SERIALIZERS, cbor2, msgpack, orjson
+
+RATES = {'USD': 36.5432, 'EUR': 39.8765, 'CNY': 5.0412, 'TRY': 1.1234, 'RUB': 0.4012}
+
+def sample_payloads():
+    return {
+        '/api/rates': ('all_rates', {
+            'success': True,
+            'data': {'rates': RATES, 'date': 'Lunes, 14 Marzo 2025', 'currencies_available': list(RATES),
+                     'base_currency': 'VES', 'last_updated': '2025-03-14T13:00:00'},
+            'timestamp': '2025-03-14T13:05:00', 'source': 'Banco Central de Venezuela (BCV) - Cached'
+        }),
+        '/api/rates/usd': ('single_rate', {
+            'success': True, 'currency': 'USD', 'rate': RATES['USD'], 'date_published': 'Lunes, 14 Marzo 2025',
+            'last_updated': '2025-03-14T13:00:00', 'timestamp': '2025-03-14T13:05:00',
+            'source': 'Banco Central de Venezuela (BCV) - Cached'
+        })
+    }
+
+def decoders():
+    """Decodificadores por formato (solo los binarios y JSON tienen ida y vuelta)"""
+    result = {'json': orjson.loads if orjson else json.loads}
+    if msgpack:
+        result['msgpack'] = lambda body: msgpack.unpackb(body, raw=False)
+    if cbor2:
+        result['cbor'] = cbor2.loads
+    return result
+
+def time_per_call(func, arg, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main(iterations=20000):
+    decode = decoders()
+    print(f"Formatos registrados: {', '.join(SERIALIZERS)}")
+    print(f"orjson: {'sí' if orjson else 'no'}  msgpack: {'sí' if msgpack else 'no'}  cbor2: {'sí' if cbor2 else 'no'}\n")
+
+    for name, (endpoint_type, data) in sample_payloads().items():
+        print(name)
+        print(f"  {'formato':<10}{'bytes':>8}{'codificar µs':>15}{'decodificar µs':>17}")
+        for format_name, serializer in SERIALIZERS.items():
+            body = serializer.encode(data, endpoint_type, data['timestamp'])
+            encode_us = time_per_call(lambda d: serializer.encode(d, endpoint_type, d['timestamp']), data, iterations)
+            decode_us = time_per_call(decode[format_name], body, iterations) if format_name in decode else None
+            decode_text = f'{decode_us:>17.2f}' if decode_us is not None else f"{'-':>17}"
+            print(f"  {format_name:<10}{len(body):>8}{encode_us:>15.2f}{decode_text}")
+
+        stdlib_us = time_per_call(json.dumps, data, iterations)
+        print(f"  json.dumps (stdlib): {stdlib_us:.2f} µs")
+        if orjson:
+            print(f"  orjson.dumps:        {time_per_call(orjson.dumps, data, iterations):.2f} µs")
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrencia SQLite: lecturas mientras se escriben métricas
+
+Simula la carga de producción (un commit de ApiMetrics por petición más las
+agregaciones de /api/metrics y lecturas de tasas) con hilos escritores y
+lectores sobre el mismo archivo, y compara el journal por defecto (rollback)
+con el perfil de producción de `sqlite_tuning.py` (WAL, synchronous=NORMAL,
+busy_timeout, mmap y cache). Reporta latencia de lectura (p50/p99/máx),
+throughput y errores "database is locked".
+
+Uso:
+    python benchmarks/sqlite_concurrency_bench.py [segundos] [escritores] [lectores]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from models import db, ApiMetrics, ExchangeRate
+from sqlite_tuning import apply_sqlite_pragmas, sqlite_pragmas
+
+ENDPOINTS = ['get_all_rates', 'get_usd_rate', 'currency_converter', 'compare_currencies', 'get_status']
+
+def make_engine(path, production):
+    # Timeout corto del driver para que el perfil por defecto muestre los errores de bloqueo
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 0.5 if not production else 5})
+    if production:
+        apply_sqlite_pragmas(engine, sqlite_pragmas())
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(ExchangeRate), [
+            {'currency': c, 'rate': 36.5, 'date_published': 'x'} for c in ('USD', 'EUR', 'CNY', 'TRY', 'RUB')
+        ])
+        connection.execute(insert(ApiMetrics), [
+            {'endpoint': random.choice(ENDPOINTS), 'method': 'GET', 'status_code': 200,
+             'response_time_ms': random.random() * 50, 'created_at': datetime.utcnow()} for _ in range(5000)
+        ])
+    return engine
+
+def writer(engine, stop, stats):
+    while not stop.is_set():
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(ApiMetrics).values(
+                    endpoint=random.choice(ENDPOINTS), method='GET', status_code=200,
+                    response_time_ms=random.random() * 50, created_at=datetime.utcnow()
+                ))
+            stats['writes'] += 1
+        except OperationalError:
+            stats['write_errors'] += 1
+
+def reader(engine, stop, stats, latencies):
+    cutoff = datetime.utcnow() - timedelta(hours=24)
+    aggregate = select(ApiMetrics.endpoint, func.count(ApiMetrics.id)).where(
+        ApiMetrics.created_at >= cutoff
+    ).group_by(ApiMetrics.endpoint)
+    rate = select(ExchangeRate.rate).where(ExchangeRate.currency == 'USD')
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.execute(rate).scalar()
+                connection.execute(aggregate).all()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except OperationalError:
+            stats['read_errors'] += 1
+
+def run(production, seconds, writers, readers):
+    directory = tempfile.mkdtemp(prefix='divisa_sqlite_bench_')
+    engine = make_engine(os.path.join(directory, 'bench.db'), production)
+    stop = threading.Event()
+    stats = {'writes': 0, 'write_errors': 0, 'read_errors': 0}
+    latencies = []
+    threads = [threading.Thread(target=writer, args=(engine, stop, stats)) for _ in range(writers)]
+    threads += [threading.Thread(target=reader, args=(engine, stop, stats, latencies)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        'reads_per_s': len(latencies) / seconds,
+        'writes_per_s': stats['writes'] / seconds,
+        'p50_ms': statistics.median(latencies) if latencies else 0,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] if latencies else 0,
+        'max_ms': latencies[-1] if latencies else 0,
+        'read_errors': stats['read_errors'],
+        'write_errors': stats['write_errors']
+    }
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    print(f"{seconds:.0f}s por perfil, {writers} escritores, {readers} lectores\n")
+    print(f"{'perfil':<22}{'lect/s':>9}{'escr/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'err lect':>10}{'err escr':>10}")
+    for name, production in (('rollback (defecto)', False), ('producción (WAL)', True)):
+        r = run(production, seconds, writers, readers)
+        print(f"{name:<22}{r['reads_per_s']:>9.0f}{r['writes_per_s']:>9.0f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['max_ms']:>9.2f}{r['read_errors']:>10}{r['write_errors']:>10}")
+
+if __name__ == '__main__':
+    main()
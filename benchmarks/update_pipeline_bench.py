@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark del pipeline de actualización sin red: `update_rates_from_bcv()` desde un cassette
+
+Reproduce las respuestas del BCV grabadas en un cassette (`http_cassette.py`)
+y mide cada actualización completa: scraping y parseo, escritura de tasas,
+historial, velas diarias y snapshot, archivo columnar y snapshot compartido.
+Con latencia simulada se ve cuánto del tiempo total es red.
+
+Para grabar un cassette real (una vez, con acceso a bcv.org.ve):
+    BCV_CASSETTE_MODE=record BCV_CASSETTE_DIR=cassettes/bcv python -c \\
+        "from bcv_scraper import BCVScraper; BCVScraper().get_all_rates()"
+
+Si el directorio no tiene grabaciones se genera uno sintético con una página
+de estructura similar, útil solo para comparar cambios del pipeline.
+
+Uso:
+    python benchmarks/update_pipeline_bench.py [actualizaciones] [cassette] [latencia: recorded|segundos]
+"""
+
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+DATA_DIR = tempfile.mkdtemp(prefix='divisa_update_bench_')
+os.environ.update(
+    DB_PATH=os.path.join(DATA_DIR, 'bench.db'),
+    HISTORY_ARCHIVE_DIR=os.path.join(DATA_DIR, 'history_archive'),
+    SHARED_SNAPSHOT_PATH=os.path.join(DATA_DIR, 'snapshot.bin'),
+    BCV_CASSETTE_MODE='replay',
+    BCV_CASSETTE_DIR=sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, 'cassettes', 'bcv'),
+    BCV_CASSETTE_LATENCY=sys.argv[3] if len(sys.argv) > 3 else ''
+)
+
+from http_cassette import HttpCassette
+
+BCV_URL = 'https://www.bcv.org.ve/'
+SAMPLE_PAGE = '''<html><body>
+<div id="dolar"><span> USD</span><strong> {usd} </strong></div>
+<div id="euro"><span> EUR</span><strong> {eur} </strong></div>
+<div id="yuan"><span> CNY</span><strong> 5,04120000 </strong></div>
+<div id="lira"><span> TRY</span><strong> 1,12340000 </strong></div>
+<div id="rublo"><span> RUB</span><strong> 0,40120000 </strong></div>
+<div class="pull-right dinpro center">Fecha Valor: <span>Viernes, 14 Marzo 2025</span></div>
+</body></html>'''
+
+def ensure_cassette(directory):
+    cassette = HttpCassette(directory, 'replay')
+    if cassette.load('GET', BCV_URL):
+        return False
+    os.makedirs(directory, exist_ok=True)
+    for step in range(10):  # Diez páginas distintas: cada actualización publica un snapshot nuevo
+        page = SAMPLE_PAGE.format(usd=f'{36.5432 + step / 100:.8f}'.replace('.', ','),
+                                  eur=f'{39.8765 + step / 100:.8f}'.replace('.', ','))
+        cassette.save('GET', BCV_URL, 200, {'Content-Type': 'text/html; charset=utf-8'}, page.encode('utf-8'),
+                      elapsed_seconds=0.35)
+    return True
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    directory = os.environ['BCV_CASSETTE_DIR']
+    synthetic = ensure_cassette(directory)
+
+    import app as divisa_app
+    logging.getLogger().setLevel(logging.WARNING)
+
+    timings = []
+    with divisa_app.app.app_context():
+        service = divisa_app.db_service
+        for _ in range(count):
+            started = time.perf_counter()
+            assert service.update_rates_from_bcv(), 'la actualización falló (ver logs)'
+            timings.append((time.perf_counter() - started) * 1000)
+        stats = service.scraper.cassette.get_stats()
+
+    timings.sort()
+    print(f"cassette: {directory}{' (sintético)' if synthetic else ''}, "
+          f"latencia: {os.environ['BCV_CASSETTE_LATENCY'] or 'ninguna'}")
+    print(f"{count:,} actualizaciones, {stats['replayed']:,} respuestas reproducidas, {stats['misses']} sin grabar")
+    print(f"p50 {statistics.median(timings):.2f} ms   p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms   "
+          f"total {sum(timings) / 1000:.2f} s   ({count / (sum(timings) / 1000):,.1f} actualizaciones/s)")
+
+if __name__ == '__main__':
+    main()
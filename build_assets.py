@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Construye los assets estáticos de la PWA en static/dist
+
+Minifica las hojas de estilo y scripts de static/css y static/js, les añade un
+hash de contenido al nombre (app.css -> app.<hash>.css), los precomprime en
+gzip (y brotli si está instalado) y escribe:
+
+    static/dist/manifest.json           ruta fuente -> ruta con hash (usado por asset_url)
+    static/dist/precache-manifest.js    lista de precache que importa el Service Worker
+
+Ejecutar en cada despliegue; sin build la app sirve los archivos originales.
+
+Uso:
+    python build_assets.py [--prune] [--clean]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from static_assets import DIST_DIR, build_assets, clean_assets
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Minificar, versionar y precomprimir los assets estáticos')
+    parser.add_argument('--prune', action='store_true', help='Eliminar archivos de builds anteriores')
+    parser.add_argument('--clean', action='store_true', help=f'Borrar static/{DIST_DIR} y salir')
+    return parser.parse_args(argv)
+
+def format_size(value):
+    return f'{value:,}' if value is not None else '-'
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.clean:
+        clean_assets(STATIC_FOLDER)
+        print(f'🧹 static/{DIST_DIR} eliminado')
+        return 0
+
+    started = time.perf_counter()
+    result = build_assets(STATIC_FOLDER, prune=args.prune)
+    print(f"{'asset':<20}{'fuente':>10}{'minif.':>10}{'gzip':>10}{'brotli':>10}  salida")
+    for asset in result['assets']:
+        print(f"{asset['asset']:<20}{format_size(asset['source_bytes']):>10}{format_size(asset['minified_bytes']):>10}"
+              f"{format_size(asset.get('gz_bytes')):>10}{format_size(asset.get('br_bytes')):>10}  {asset['output']}")
+    elapsed = time.perf_counter() - started
+    removed = f", {result['removed']} archivos antiguos eliminados" if args.prune else ''
+    print(f"✅ {len(result['manifest'])} assets en static/{DIST_DIR} ({elapsed:.2f}s{removed})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
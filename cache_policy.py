@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+
+# Operational and write endpoints: never stored by browsers, proxies or CDNs
+PRIVATE_NO_STORE = 'private, no-store'
+# Default for API responses that did not choose a policy
+NO_STORE = 'no-store'
+
+class CachePolicy:
+    """
+    Builds ``Cache-Control`` for rate data from the refresh schedule.
+
+    Rates only change when they are refreshed from BCV, at most once per
+    ``UPDATE_INTERVAL_MINUTES`` after the last successful update, so shared
+    caches can keep a response until the next scheduled refresh:
+    ``max-age`` is the time left until then (clamped to one interval).
+    ``stale-while-revalidate`` lets a CDN keep serving while it refetches in
+    the background, and ``stale-if-error`` covers BCV or origin outages, for
+    which the server itself keeps serving cached rates.
+    """
+
+    def __init__(self, update_interval_seconds: int, stale_while_revalidate: int, stale_if_error: int,
+                 min_max_age: int = 5):
+        self.update_interval_seconds = update_interval_seconds
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.min_max_age = min_max_age
+
+    def max_age(self, next_refresh_at: Optional[datetime], now: Optional[datetime] = None) -> int:
+        """Seconds until the next scheduled refresh (both naive UTC)"""
+        if next_refresh_at is None:
+            return self.min_max_age  # Never refreshed yet: the next request will trigger it
+        remaining = (next_refresh_at - (now or datetime.utcnow())).total_seconds()
+        # Overdue: a refresh is in progress or failed, ask again soon
+        return int(min(max(remaining, self.min_max_age), self.update_interval_seconds))
+
+    def for_rates(self, next_refresh_at: Optional[datetime], now: Optional[datetime] = None) -> str:
+        return (f'public, max-age={self.max_age(next_refresh_at, now)}, '
+                f'stale-while-revalidate={self.stale_while_revalidate}, stale-if-error={self.stale_if_error}')
@@ -0,0 +1,143 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import db, DailyCandle, ExchangeRateHistory
+from pagination import keyset_page
+from sqlalchemy import case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+logger = logging.getLogger(__name__)
+
+class DailyCandles:
+    """
+    Maintains the ``daily_candles`` table: one open/high/low/close row per
+    currency and local day, updated with a single upsert per reading.
+
+    Readings are merged order-insensitively (the open is the earliest reading,
+    the close the latest, high/low the extremes), so back-filled history and
+    a rebuild from ``exchange_rate_history`` give the same result as the live
+    updates. SQLite and PostgreSQL use ``INSERT ... ON CONFLICT DO UPDATE``,
+    MySQL/MariaDB ``ON DUPLICATE KEY UPDATE``; other databases fall back to a
+    read-modify-write in the same transaction.
+    """
+
+    def __init__(self, utc_offset_hours: float = -4, batch_size: int = 5000):
+        self.utc_offset = timedelta(hours=utc_offset_hours)
+        self.utc_offset_hours = utc_offset_hours
+        self.batch_size = batch_size
+        self._statements = {}
+
+    def day_for(self, at: datetime) -> date:
+        """Local day of a naive UTC timestamp"""
+        return (at + self.utc_offset).date()
+
+    def aggregate(self, readings: Iterable[Tuple[str, datetime, float]]) -> Dict[Tuple[str, date], Dict]:
+        """Fold (currency, UTC time, rate) readings into one candle per currency and day"""
+        candles: Dict[Tuple[str, date], Dict] = {}
+        for currency, at, rate in readings:
+            key = (currency, self.day_for(at))
+            candle = candles.get(key)
+            if candle is None:
+                candles[key] = {
+                    'currency': currency, 'day': key[1], 'open': rate, 'high': rate, 'low': rate, 'close': rate,
+                    'samples': 1, 'opened_at': at, 'closed_at': at
+                }
+                continue
+            if at < candle['opened_at']:
+                candle['open'], candle['opened_at'] = rate, at
+            if at >= candle['closed_at']:
+                candle['close'], candle['closed_at'] = rate, at
+            candle['high'] = max(candle['high'], rate)
+            candle['low'] = min(candle['low'], rate)
+            candle['samples'] += 1
+        return candles
+
+    def record(self, readings: Iterable[Tuple[str, datetime, float]]) -> int:
+        """Upsert readings into their candles in the current session; the caller commits"""
+        candles = list(self.aggregate(readings).values())
+        for start in range(0, len(candles), self.batch_size):
+            self._upsert(candles[start:start + self.batch_size])
+        return len(candles)
+
+    def sync_from_history(self) -> int:
+        """Build the candle table from the raw history when it is empty; returns candles written"""
+        if db.session.query(DailyCandle.id).first() is not None:
+            return 0
+        rows = db.session.query(
+            ExchangeRateHistory.currency, ExchangeRateHistory.created_at, ExchangeRateHistory.rate
+        ).filter(ExchangeRateHistory.created_at.isnot(None)).order_by(ExchangeRateHistory.id)
+        written = self.record(rows.yield_per(10000))
+        db.session.commit()
+        if written:
+            logger.info(f"Built {written} daily candles from rate history")
+        return written
+
+    def query(self, session, currency: str, start: Optional[date] = None, end: Optional[date] = None,
+              limit: int = 1000, after: Optional[Tuple[date, int]] = None) -> Tuple[List[Dict], Optional[Tuple[date, int]]]:
+        """
+        Most recent ``limit`` candles in [start, end] before the ``(day, id)`` key
+        ``after``, oldest first, and the key to resume from (None on the oldest page)
+        """
+        rows = session.query(DailyCandle).filter(DailyCandle.currency == currency)
+        if start:
+            rows = rows.filter(DailyCandle.day >= start)
+        if end:
+            rows = rows.filter(DailyCandle.day <= end)
+        page, next_key = keyset_page(rows, DailyCandle.day, DailyCandle.id, after, limit, descending=True,
+                                     key=lambda candle: (candle.day, candle.id))
+        return [candle.to_dict() for candle in reversed(page)], next_key
+
+    def _upsert(self, candles: List[Dict]):
+        dialect = db.session.get_bind().dialect.name
+        statement = self._statements.get(dialect)
+        if statement is None and dialect not in self._statements:
+            statement = self._statements[dialect] = self._upsert_statement(dialect)
+        if statement is None:
+            for candle in candles:
+                self._merge_row(candle)
+        else:
+            # One cached statement run as executemany, instead of compiling a multi-row VALUES per batch
+            db.session.execute(statement, candles)
+
+    def _upsert_statement(self, dialect: str):
+        table = DailyCandle.__table__
+        if dialect in ('sqlite', 'postgresql'):
+            insert = (sqlite_insert if dialect == 'sqlite' else postgresql_insert)(table)
+            return insert.on_conflict_do_update(
+                index_elements=['currency', 'day'], set_=dict(self._merge(table.c, insert.excluded))
+            )
+        if dialect in ('mysql', 'mariadb'):
+            insert = mysql_insert(table)
+            # MySQL applies assignments left to right, so the timestamps compared by the others go last
+            return insert.on_duplicate_key_update(self._merge(table.c, insert.inserted))
+        return None
+
+    @staticmethod
+    def _merge(current, new) -> List[Tuple[str, object]]:
+        earlier = new.opened_at < current.opened_at
+        later = new.closed_at >= current.closed_at
+        return [
+            ('open', case((earlier, new.open), else_=current.open)),
+            ('close', case((later, new.close), else_=current.close)),
+            ('high', case((new.high > current.high, new.high), else_=current.high)),
+            ('low', case((new.low < current.low, new.low), else_=current.low)),
+            ('samples', current.samples + new.samples),
+            ('opened_at', case((earlier, new.opened_at), else_=current.opened_at)),
+            ('closed_at', case((later, new.closed_at), else_=current.closed_at)),
+        ]
+
+    @staticmethod
+    def _merge_row(candle: Dict):
+        existing = DailyCandle.query.filter_by(currency=candle['currency'], day=candle['day']).with_for_update().first()
+        if existing is None:
+            db.session.add(DailyCandle(**candle))
+            return
+        if candle['opened_at'] < existing.opened_at:
+            existing.open, existing.opened_at = candle['open'], candle['opened_at']
+        if candle['closed_at'] >= existing.closed_at:
+            existing.close, existing.closed_at = candle['close'], candle['closed_at']
+        existing.high = max(existing.high, candle['high'])
+        existing.low = min(existing.low, candle['low'])
+        existing.samples += candle['samples']
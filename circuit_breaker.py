@@ -0,0 +1,173 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from models import db, CircuitBreakerState
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Circuit breaker around calls to an unreliable upstream (the BCV website).
+
+    State lives in the database so every gunicorn worker sees the same
+    circuit. Transitions out of the open state use conditional UPDATEs, so
+    only one worker wins the half-open probe.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 3, base_backoff_seconds: int = 60,
+                 max_backoff_seconds: int = 3600, probe_timeout_seconds: Optional[int] = None):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max(base_backoff_seconds, max_backoff_seconds)
+        # A probe that never reported back (crashed worker) is retaken after this
+        self.probe_timeout_seconds = probe_timeout_seconds or base_backoff_seconds
+        self._open_until: Optional[datetime] = None  # Known backoff end; nothing can close the circuit sooner
+
+    def allow_request(self) -> bool:
+        """Return True if the caller may contact the upstream now"""
+        try:
+            row = self._get_state()
+            now = datetime.utcnow()
+
+            if row.state == self.CLOSED:
+                return True
+
+            if row.state == self.OPEN:
+                if row.opened_until and now < row.opened_until:
+                    return False
+                won = self._transition(
+                    CircuitBreakerState.state == self.OPEN,
+                    CircuitBreakerState.opened_until == row.opened_until,
+                    values={
+                        'state': self.HALF_OPEN,
+                        'probe_started_at': now,
+                        'half_opened_total': CircuitBreakerState.half_opened_total + 1
+                    }
+                )
+                if won:
+                    logger.info(f"Circuit '{self.name}' half-open, probing upstream")
+                return won
+
+            # Half-open: a single probe is in flight, everyone else waits
+            if row.probe_started_at and now - row.probe_started_at > timedelta(seconds=self.probe_timeout_seconds):
+                return self._transition(
+                    CircuitBreakerState.state == self.HALF_OPEN,
+                    CircuitBreakerState.probe_started_at == row.probe_started_at,
+                    values={'probe_started_at': now}
+                )
+            return False
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error reading circuit '{self.name}': {str(e)}")
+            db.session.rollback()
+            return True  # Fail open: never block updates because of the breaker itself
+
+    def is_open(self) -> bool:
+        """
+        Read-only check: True while allow_request() would refuse (backing off, or another worker probing)
+        Lets callers skip the refresh lease without writing to the database; the backoff end is
+        remembered, so during an outage it costs no query at all
+        """
+        now = datetime.utcnow()
+        if self._open_until and now < self._open_until:
+            return True
+        try:
+            row = CircuitBreakerState.query.filter_by(name=self.name).populate_existing().first()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error reading circuit '{self.name}': {str(e)}")
+            db.session.rollback()
+            return False
+        if not row:
+            return False
+        if row.state == self.OPEN and row.opened_until and now < row.opened_until:
+            self._open_until = row.opened_until
+            return True
+        return bool(row.state == self.HALF_OPEN and row.probe_started_at
+                    and now - row.probe_started_at <= timedelta(seconds=self.probe_timeout_seconds))
+
+    def record_success(self):
+        """Close the circuit after a successful upstream call"""
+        try:
+            row = self._get_state()
+            if row.state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed after successful probe")
+                row.closed_total = (row.closed_total or 0) + 1
+            row.state = self.CLOSED
+            row.failure_count = 0
+            row.consecutive_opens = 0
+            row.opened_until = None
+            row.probe_started_at = None
+            row.last_success_at = datetime.utcnow()
+            db.session.commit()
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error closing circuit '{self.name}': {str(e)}")
+            db.session.rollback()
+
+    def record_failure(self):
+        """Count a failed upstream call, opening the circuit when needed"""
+        try:
+            row = self._get_state()
+            now = datetime.utcnow()
+            row.failure_count = (row.failure_count or 0) + 1
+            row.last_failure_at = now
+
+            if row.state == self.HALF_OPEN or row.failure_count >= self.failure_threshold:
+                row.consecutive_opens = (row.consecutive_opens or 0) + 1
+                backoff = self._backoff_seconds(row.consecutive_opens)
+                row.state = self.OPEN
+                row.opened_until = now + timedelta(seconds=backoff)
+                row.probe_started_at = None
+                row.opened_total = (row.opened_total or 0) + 1
+                logger.warning(f"Circuit '{self.name}' opened for {backoff:.0f}s after {row.failure_count} failures")
+
+            db.session.commit()
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error recording failure on circuit '{self.name}': {str(e)}")
+            db.session.rollback()
+
+    def get_status(self) -> Optional[Dict]:
+        """Get breaker state and transition counts for monitoring"""
+        try:
+            return self._get_state().to_dict()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting circuit '{self.name}' status: {str(e)}")
+            db.session.rollback()
+            return None
+
+    def _backoff_seconds(self, consecutive_opens: int) -> float:
+        """Exponential backoff with equal jitter"""
+        delay = min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** max(0, consecutive_opens - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _transition(self, *conditions, values: Dict) -> bool:
+        """Apply a compare-and-set update; True if this worker won it"""
+        updated = CircuitBreakerState.query.filter(
+            CircuitBreakerState.name == self.name, *conditions
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+        return updated == 1
+
+    def _get_state(self) -> CircuitBreakerState:
+        """Load the shared state row, creating it on first use"""
+        row = CircuitBreakerState.query.filter_by(name=self.name).populate_existing().first()
+        if row:
+            return row
+
+        try:
+            row = CircuitBreakerState(name=self.name, state=self.CLOSED)
+            db.session.add(row)
+            db.session.commit()
+            return row
+        except IntegrityError:
+            # Another worker created it first
+            db.session.rollback()
+            return CircuitBreakerState.query.filter_by(name=self.name).populate_existing().one()
@@ -0,0 +1,211 @@
+import gzip
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Compressed variants carry their coding as an ETag suffix: "v3-json" -> "v3-json-gzip"
+_ENCODING_SUFFIX = re.compile(r'-(?:gzip|br)"')
+
+COMPRESSIBLE_MIMETYPES = (
+    'text/',
+    'application/json',
+    'application/xml',
+    'application/javascript',
+    'application/manifest+json',
+    'image/svg+xml'
+)
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    codings = {}
+    for part in (header or '').split(','):
+        fields = part.strip().split(';')
+        coding = fields[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+class ResponseCompressor:
+    """
+    Negotiates gzip/brotli from ``Accept-Encoding`` and compresses responses
+    in an ``after_request`` hook.
+
+    Only representations that can repeat are cached, in a bounded LRU:
+    responses carrying an ETag (snapshot-versioned API payloads, rendered
+    pages) are keyed by path, normalized query arguments and ETag, so a
+    cached variant lives exactly as long as its snapshot version. Static
+    files are keyed by path, size and mtime and never re-read while
+    unchanged. Other bodies embed per-request fields such as timestamps;
+    they are compressed on every request and never evict reusable variants.
+    Streaming responses (SSE, exports) and small bodies are left alone.
+    """
+
+    def __init__(self, app=None, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5,
+                 cache_entries: int = 256):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self._cache: 'OrderedDict[Tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'compressed': 0, 'cache_hits': 0, 'uncached': 0, 'bytes_in': 0, 'bytes_out': 0}
+        self.static_folder = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        app.before_request(self.strip_encoding_from_etags)
+        app.after_request(self.compress_response)
+
+    @staticmethod
+    def strip_encoding_from_etags():
+        """
+        Turn If-None-Match back into the identity ETags, so every conditional check (views,
+        send_file for static files and sw.js) matches a compressed variant the client cached
+        """
+        header = request.environ.get('HTTP_IF_NONE_MATCH')
+        if header and ('-gzip"' in header or '-br"' in header):
+            request.environ['HTTP_IF_NONE_MATCH'] = _ENCODING_SUFFIX.sub('"', header)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self._stats,
+            'cached_variants': len(self._cache),
+            'encodings': self.available_encodings()
+        }
+
+    def available_encodings(self):
+        return ['br', 'gzip'] if brotli else ['gzip']
+
+    def select_encoding(self, accept_encoding: str) -> Optional[str]:
+        """Pick the best supported coding the client accepts"""
+        codings = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for coding in self.available_encodings():
+            q = codings.get(coding, codings.get('*', 0.0))
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_response(self, response):
+        if not self._is_compressible(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.select_encoding(request.headers.get('Accept-Encoding', ''))
+        if not encoding:
+            return response
+
+        if response.direct_passthrough:
+            key, data = self._static_variant(response, encoding)
+            if key is None:
+                return response
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            key = self._dynamic_key(response, encoding)
+
+        compressed = self._cached(key, data, encoding) if key else self._compress_counted(data, encoding, cached=False)
+        if not compressed:
+            return response
+
+        if response.direct_passthrough:
+            if hasattr(response.response, 'close'):
+                response.response.close()  # Release the file wrapper from send_file
+            response.direct_passthrough = False
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak=weak)
+        return response
+
+    def _is_compressible(self, response) -> bool:
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return False
+        if response.is_streamed and not response.direct_passthrough:
+            return False  # Generators: SSE and streaming exports
+        mimetype = response.mimetype or ''
+        return mimetype.startswith(COMPRESSIBLE_MIMETYPES)
+
+    def _dynamic_key(self, response, encoding: str) -> Optional[Tuple]:
+        """Cache key for a body that repeats while its ETag holds; None for one-off bodies"""
+        etag, _ = response.get_etag()
+        if not etag:
+            return None
+        args = tuple(sorted(request.args.items(multi=True)))
+        return (encoding, request.path, args, etag)
+
+    def _static_variant(self, response, encoding: str):
+        """Key and raw bytes for a file served by the static view"""
+        if request.endpoint != 'static' or not self.static_folder:
+            return None, None
+        path = os.path.join(self.static_folder, request.view_args.get('filename', ''))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None, None
+        if stat.st_size < self.min_size:
+            return None, None
+        key = (encoding, path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._cache:
+                return key, b''
+        with open(path, 'rb') as f:
+            return key, f.read()
+
+    def _cached(self, key, data: bytes, encoding: str) -> Optional[bytes]:
+        """Compressed variant for key; empty when compression does not pay off"""
+        with self._lock:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self._cache.move_to_end(key)
+                self._stats['cache_hits'] += 1
+                return compressed
+
+        if not data:
+            return None
+        compressed = self._compress_counted(data, encoding)
+        with self._lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return compressed
+
+    def _compress_counted(self, data: bytes, encoding: str, cached: bool = True) -> bytes:
+        compressed = self.compress(data, encoding)
+        if len(compressed) >= len(data):
+            compressed = b''
+        with self._lock:
+            self._stats['compressed'] += 1
+            self._stats['uncached'] += not cached
+            self._stats['bytes_in'] += len(data)
+            self._stats['bytes_out'] += len(compressed)
+        return compressed
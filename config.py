@@ -20,9 +20,20 @@ class Config:
     
     # Configuración de actualización automática
     UPDATE_INTERVAL_MINUTES = int(os.environ.get('UPDATE_INTERVAL_MINUTES', '30'))
+    # Actualización desde el BCV: 'inline' (en las peticiones web) o 'worker' (solo refresh_worker.py; la web solo lee)
+    REFRESH_MODE = os.environ.get('REFRESH_MODE', 'inline').lower()
+    # Duración del lease de actualización en la base de datos (un proceso caído lo pierde tras este tiempo)
+    REFRESH_LOCK_TTL_SECONDS = int(os.environ.get('REFRESH_LOCK_TTL_SECONDS', '300'))
+    # Cada cuánto revisa refresh_worker.py si toca actualizar
+    REFRESH_WORKER_POLL_SECONDS = int(os.environ.get('REFRESH_WORKER_POLL_SECONDS', '30'))
     
     # Configuración de timeout para requests
     REQUEST_TIMEOUT = int(os.environ.get('REQUEST_TIMEOUT', '30'))
+    # Cassette HTTP del scraper: off, record (guarda respuestas del BCV) o replay (las sirve sin red)
+    BCV_CASSETTE_MODE = os.environ.get('BCV_CASSETTE_MODE', 'off').lower()
+    BCV_CASSETTE_DIR = os.environ.get('BCV_CASSETTE_DIR', 'cassettes/bcv')
+    # Latencia simulada en replay: vacío (ninguna), 'recorded' (la grabada) o segundos
+    BCV_CASSETTE_LATENCY = os.environ.get('BCV_CASSETTE_LATENCY', '')
     
     # Configuración de pool de conexiones
     DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
@@ -30,6 +41,108 @@ class Config:
     DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '300'))
     DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
 
+    # Réplicas de solo lectura (URIs separadas por comas); vacío = todo va al primario
+    DB_READ_URIS = [uri.strip() for uri in os.environ.get('DB_READ_URIS', '').split(',') if uri.strip()]
+    DB_REPLICA_RETRY_SECONDS = int(os.environ.get('DB_REPLICA_RETRY_SECONDS', '30'))
+
+    # Migraciones de esquema (migrations.py); false = aplicarlas aparte con `python migrate.py`
+    SCHEMA_AUTO_MIGRATE = os.environ.get('SCHEMA_AUTO_MIGRATE', 'True').lower() == 'true'
+
+    # Perfil de producción para SQLite (WAL, pragmas y checkpoints en segundo plano)
+    SQLITE_PRODUCTION_MODE = os.environ.get('SQLITE_PRODUCTION_MODE', 'False').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', '268435456'))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', '65536'))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    SQLITE_WAL_AUTOCHECKPOINT = int(os.environ.get('SQLITE_WAL_AUTOCHECKPOINT', '10000'))
+    SQLITE_CHECKPOINT_SECONDS = int(os.environ.get('SQLITE_CHECKPOINT_SECONDS', '30'))
+    SQLITE_CHECKPOINT_TRUNCATE_MB = int(os.environ.get('SQLITE_CHECKPOINT_TRUNCATE_MB', '64'))
+
+    # Snapshot de tasas compartido entre workers (archivo mapeado en memoria)
+    SHARED_SNAPSHOT_ENABLED = os.environ.get('SHARED_SNAPSHOT_ENABLED', 'True').lower() == 'true'
+    SHARED_SNAPSHOT_PATH = os.environ.get('SHARED_SNAPSHOT_PATH', '')  # Vacío = junto al archivo SQLite, o en el directorio privado del usuario
+    SHARED_SNAPSHOT_CAPACITY = int(os.environ.get('SHARED_SNAPSHOT_CAPACITY', '65536'))
+    # Cada cuántos segundos se compara el snapshot con la base de datos (publicaciones de otros hosts o del worker)
+    SHARED_SNAPSHOT_VERIFY_SECONDS = float(os.environ.get('SHARED_SNAPSHOT_VERIFY_SECONDS', '5'))
+
+    # Configuración del circuit breaker para el scraping del BCV
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '3'))
+    CIRCUIT_BREAKER_BASE_BACKOFF_SECONDS = int(os.environ.get('CIRCUIT_BREAKER_BASE_BACKOFF_SECONDS', '60'))
+    CIRCUIT_BREAKER_MAX_BACKOFF_SECONDS = int(os.environ.get('CIRCUIT_BREAKER_MAX_BACKOFF_SECONDS', '3600'))
+
+    # Configuración del archivo columnar de historial
+    HISTORY_ARCHIVE_ENABLED = os.environ.get('HISTORY_ARCHIVE_ENABLED', 'True').lower() == 'true'
+    HISTORY_ARCHIVE_DIR = os.environ.get('HISTORY_ARCHIVE_DIR', './history_archive')
+
+    # Configuración del stream de tasas (Server-Sent Events)
+    SSE_POLL_SECONDS = float(os.environ.get('SSE_POLL_SECONDS', '2'))
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+    SSE_MAX_CONNECTIONS = int(os.environ.get('SSE_MAX_CONNECTIONS', '5000'))
+
+    # Configuración de webhooks de cambios de tasas
+    WEBHOOK_MAX_WORKERS = int(os.environ.get('WEBHOOK_MAX_WORKERS', '8'))
+    WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get('WEBHOOK_TIMEOUT_SECONDS', '10'))
+    WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '8'))
+    WEBHOOK_BASE_BACKOFF_SECONDS = float(os.environ.get('WEBHOOK_BASE_BACKOFF_SECONDS', '10'))
+    WEBHOOK_MAX_BACKOFF_SECONDS = float(os.environ.get('WEBHOOK_MAX_BACKOFF_SECONDS', '3600'))
+    WEBHOOK_POLL_SECONDS = float(os.environ.get('WEBHOOK_POLL_SECONDS', '5'))
+    # Token de administración: listar todos los webhooks y gestionar cualquiera (vacío = nadie puede listarlos)
+    WEBHOOK_ADMIN_TOKEN = os.environ.get('WEBHOOK_ADMIN_TOKEN', '')
+    # Solo para desarrollo: permite destinos privados, loopback y link-local (SSRF)
+    WEBHOOK_ALLOW_PRIVATE_DESTINATIONS = os.environ.get('WEBHOOK_ALLOW_PRIVATE_DESTINATIONS', 'False').lower() == 'true'
+
+    # Configuración de compresión de respuestas (gzip/brotli)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+    COMPRESSION_CACHE_ENTRIES = int(os.environ.get('COMPRESSION_CACHE_ENTRIES', '256'))
+
+    # Cabeceras Cache-Control para CDN y proxies: las tasas son frescas hasta la próxima actualización programada
+    CACHE_CONTROL_ENABLED = os.environ.get('CACHE_CONTROL_ENABLED', 'True').lower() == 'true'
+    CACHE_MIN_MAX_AGE_SECONDS = int(os.environ.get('CACHE_MIN_MAX_AGE_SECONDS', '5'))
+    CACHE_STALE_WHILE_REVALIDATE_SECONDS = int(os.environ.get(
+        'CACHE_STALE_WHILE_REVALIDATE_SECONDS', str(UPDATE_INTERVAL_MINUTES * 60)))
+    # Por defecto, lo que el propio servidor sigue sirviendo tasas en cache con el circuit breaker abierto
+    CACHE_STALE_IF_ERROR_SECONDS = int(os.environ.get(
+        'CACHE_STALE_IF_ERROR_SECONDS', str(CIRCUIT_BREAKER_MAX_BACKOFF_SECONDS)))
+
+    # Control de admisión: bajo sobrecarga se rechaza (503 + Retry-After) primero lo de baja prioridad
+    # (métricas, comparaciones, listados, exportaciones) para mantener las lecturas de tasas dentro del SLO
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '64'))
+    ADMISSION_CRITICAL_SLO_MS = float(os.environ.get('ADMISSION_CRITICAL_SLO_MS', '250'))
+    ADMISSION_LATENCY_WINDOW_SECONDS = float(os.environ.get('ADMISSION_LATENCY_WINDOW_SECONDS', '10'))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get('ADMISSION_RETRY_AFTER_SECONDS', '5'))
+
+    # Cache LRU de respuestas de /api/convert y /api/compare por parámetros normalizados y versión del snapshot
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_ENTRIES = int(os.environ.get('RESPONSE_CACHE_ENTRIES', '1024'))
+
+    # Analítica móvil por moneda (/api/analytics): ventanas por defecto y ventana máxima en memoria
+    ANALYTICS_WINDOWS = os.environ.get('ANALYTICS_WINDOWS', '7d,30d')
+    ANALYTICS_MAX_WINDOW_DAYS = int(os.environ.get('ANALYTICS_MAX_WINDOW_DAYS', '365'))
+    # Cada cuánto se revisa si el historial tiene filas nuevas sin snapshot nuevo (importaciones)
+    ANALYTICS_CHECK_SECONDS = float(os.environ.get('ANALYTICS_CHECK_SECONDS', '5'))
+
+    # Velas diarias OHLC: desfase horario del día de la vela respecto a UTC (Caracas = -4)
+    CANDLE_UTC_OFFSET_HOURS = float(os.environ.get('CANDLE_UTC_OFFSET_HOURS', '-4'))
+
+    # Paginación por cursor de listados (/api/updates, /api/metrics/requests, /api/history, /api/candles,
+    # webhooks y sus entregas)
+    PAGINATION_DEFAULT_LIMIT = int(os.environ.get('PAGINATION_DEFAULT_LIMIT', '50'))
+    PAGINATION_MAX_LIMIT = int(os.environ.get('PAGINATION_MAX_LIMIT', '500'))
+
+    # Configuración de exportación (Arrow/Parquet, NDJSON y CSV en streaming)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '50000'))
+    EXPORT_PARQUET_COMPRESSION = os.environ.get('EXPORT_PARQUET_COMPRESSION', 'zstd')
+    # NDJSON/CSV: la primera lectura es de EXPORT_FIRST_FETCH_SIZE filas (primer byte rápido) y crece x4 hasta EXPORT_TEXT_BATCH_SIZE
+    EXPORT_FIRST_FETCH_SIZE = int(os.environ.get('EXPORT_FIRST_FETCH_SIZE', '500'))
+    EXPORT_TEXT_BATCH_SIZE = int(os.environ.get('EXPORT_TEXT_BATCH_SIZE', '10000'))
+
+    # Importación de archivos históricos (import_history.py)
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '5000'))
+
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
     DEBUG = True
@@ -39,6 +152,7 @@ class ProductionConfig(Config):
     """Configuración para producción"""
     DEBUG = False
     LOG_LEVEL = 'WARNING'
+    SQLITE_PRODUCTION_MODE = os.environ.get('SQLITE_PRODUCTION_MODE', 'True').lower() == 'true'
 
 class TestingConfig(Config):
     """Configuración para testing"""
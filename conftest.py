@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Fixtures compartidas por las pruebas: aplicación Flask mínima sobre una base SQLite temporal
+"""
+
+import pytest
+from flask import Flask
+
+from migrations import SchemaMigrator
+from models import db
+
+@pytest.fixture
+def app(tmp_path):
+    """Flask app bound to a fully migrated SQLite database in tmp_path; modules that need data override it"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'rates.db'}"
+    db.init_app(app)
+    with app.app_context():
+        SchemaMigrator(db.engine).migrate()
+    return app
+
+class StaticScraper:
+    """Stands in for the BCV scraper with fixed rates"""
+
+    def __init__(self, rates):
+        self.rates = rates
+
+    def get_all_rates(self):
+        return {'rates': dict(self.rates), 'date': 'Lunes, 14 Marzo 2025'}
+
+@pytest.fixture(scope='session')
+def divisa(tmp_path_factory):
+    """The real application module (app.py) on its own SQLite database, imported once per test run"""
+    from config import Config
+    workdir = tmp_path_factory.mktemp('divisa')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('DB_TYPE', 'sqlite')
+        patch.setenv('DB_PATH', str(workdir / 'divisa.db'))
+        for name, value in {'RATE_LIMIT_SECONDS': 0, 'REFRESH_MODE': 'worker', 'ADMISSION_ENABLED': False,
+                            'HISTORY_ARCHIVE_DIR': str(workdir / 'archive'),
+                            'SHARED_SNAPSHOT_PATH': str(workdir / 'snapshot.bin')}.items():
+            patch.setattr(Config, name, value)
+        import app as divisa
+        with divisa.app.app_context():
+            # Published the way the refresh worker does it: rates, history, update log and snapshot v1
+            divisa.db_service.scraper = StaticScraper({'USD': 36.5, 'EUR': 39.8})
+            assert divisa.db_service.update_rates_from_bcv()
+        yield divisa
+        divisa.webhook_dispatcher.stop()
@@ -1,11 +1,24 @@
+import hashlib
+import json
 import logging
-from datetime import datetime, timedelta
+import os
+import time
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional
-from models import db, ExchangeRate, UpdateLog
-from bcv_scraper import BCVScraper
+from models import db, ExchangeRate, UpdateLog, ExchangeRateHistory, RateSnapshot, ApiMetrics
+from analytics import RollingAnalytics
+from candles import DailyCandles
+from circuit_breaker import CircuitBreaker
+from history_archive import HistoryArchive
+from pagination import decode_cursor, encode_cursor, keyset_page
+from refresh_lock import RefreshLock
+from rate_index import RateIndex
+from replicas import ReplicaRouter
+from shared_snapshot import SharedSnapshot, private_runtime_dir
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import desc
-from config import get_config
+from sqlalchemy import desc, func
+from sqlalchemy.engine import make_url
+from config import get_config, DatabaseConfig
 
 logger = logging.getLogger(__name__)
 
@@ -13,30 +26,87 @@ class DatabaseService:
     """Service for managing exchange rate data in the database"""
     
     def __init__(self):
-        self.scraper = BCVScraper()
+        self._scraper = None
         # Get update interval from configuration
         config = get_config()
         self.update_interval_minutes = config.UPDATE_INTERVAL_MINUTES
+        # 'worker': a separate refresh_worker.py process scrapes BCV and web processes only read
+        self.refresh_inline = config.REFRESH_MODE != 'worker'
+        self.refresh_lock = RefreshLock('bcv_refresh', ttl_seconds=config.REFRESH_LOCK_TTL_SECONDS)
+        self.circuit_breaker = CircuitBreaker(
+            'bcv',
+            failure_threshold=config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            base_backoff_seconds=config.CIRCUIT_BREAKER_BASE_BACKOFF_SECONDS,
+            max_backoff_seconds=config.CIRCUIT_BREAKER_MAX_BACKOFF_SECONDS,
+            probe_timeout_seconds=config.REQUEST_TIMEOUT * 2
+        )
+        self.history_archive = HistoryArchive(config.HISTORY_ARCHIVE_DIR) if config.HISTORY_ARCHIVE_ENABLED else None
+        self.rate_index = RateIndex()
+        self.analytics = RollingAnalytics(max_window_days=config.ANALYTICS_MAX_WINDOW_DAYS,
+                                          check_seconds=config.ANALYTICS_CHECK_SECONDS)
+        self.candles = DailyCandles(utc_offset_hours=config.CANDLE_UTC_OFFSET_HOURS)
+        self.snapshot_listeners = []
+        # Read-only queries go to replicas when DB_READ_URIS is set; writes always use db.session
+        self.replicas = ReplicaRouter(
+            config.DB_READ_URIS,
+            DatabaseConfig.get_database_config().get('SQLALCHEMY_ENGINE_OPTIONS'),
+            retry_seconds=config.DB_REPLICA_RETRY_SECONDS
+        )
+        self.shared_snapshot = None
+        # The snapshot file is a per-host copy: it is checked against the database this often
+        self.shared_snapshot_verify_seconds = config.SHARED_SNAPSHOT_VERIFY_SECONDS
+        self._shared_snapshot_verified_at = 0.0
+        if config.SHARED_SNAPSHOT_ENABLED:
+            self.shared_snapshot = SharedSnapshot(
+                config.SHARED_SNAPSHOT_PATH or self._default_shared_snapshot_path(),
+                capacity=config.SHARED_SNAPSHOT_CAPACITY
+            )
+    
+    @property
+    def scraper(self):
+        """BCV scraper, created on first use so read-only web processes never load it"""
+        if self._scraper is None:
+            from bcv_scraper import BCVScraper
+            self._scraper = BCVScraper()
+        return self._scraper
+    
+    @scraper.setter
+    def scraper(self, scraper):
+        self._scraper = scraper
     
     def update_rates_from_bcv(self) -> bool:
         """
         Fetch latest rates from BCV and update database
         Returns True if successful, False otherwise
+        Returns False without contacting BCV while the circuit breaker is open
         """
         try:
+            if not self.circuit_breaker.allow_request():
+                logger.warning("BCV circuit breaker is open, skipping update and serving cached rates")
+                return False
+            
             logger.info("Starting BCV rate update process")
             
-            # Fetch data from BCV
-            bcv_data = self.scraper.get_all_rates()
+            # Fetch data from BCV; timeouts and parse errors count against the breaker too
+            try:
+                bcv_data = self.scraper.get_all_rates()
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
             
             if not bcv_data or 'rates' not in bcv_data:
                 error_msg = "Failed to fetch rates from BCV website"
                 logger.error(error_msg)
+                self.circuit_breaker.record_failure()
                 self._log_update(status='error', message=error_msg)
                 return False
             
+            self.circuit_breaker.record_success()
+            
             rates = bcv_data['rates']
             date_published = bcv_data.get('date', 'N/A')
+            recorded_at = datetime.utcnow()
+            previous_rates = {r.currency: r.rate for r in ExchangeRate.query.all()}
             
             # Update each currency rate
             currencies_updated = 0
@@ -61,14 +131,45 @@ class DatabaseService:
                         db.session.add(new_rate)
                         logger.info(f"Created new {currency} rate: {rate}")
                     
+                    db.session.add(ExchangeRateHistory(
+                        currency=currency,
+                        rate=rate,
+                        date_published=date_published,
+                        created_at=recorded_at
+                    ))
+                    
                     currencies_updated += 1
                     
                 except SQLAlchemyError as e:
                     logger.error(f"Database error updating {currency}: {str(e)}")
                     continue
             
+            # Fold the readings into today's candles in the same transaction
+            try:
+                with db.session.begin_nested():
+                    self.candles.record((currency, recorded_at, rate) for currency, rate in rates.items())
+            except SQLAlchemyError as e:
+                logger.error(f"Database error updating daily candles: {str(e)}")
+            
+            # Publish a new snapshot version only when the rates actually changed
+            snapshot = None
+            if any(previous_rates.get(c) != r for c, r in rates.items()) or not self._get_db_snapshot_version(primary=True):
+                snapshot = RateSnapshot(
+                    rates=json.dumps({**previous_rates, **rates}, sort_keys=True),
+                    date_published=date_published,
+                    created_at=recorded_at
+                )
+                db.session.add(snapshot)
+            
             # Commit all changes
             db.session.commit()
+            self._archive_rates(rates, recorded_at)
+            self._publish_shared_snapshot(
+                snapshot.id if snapshot else self._get_db_snapshot_version(primary=True),
+                {**previous_rates, **rates}, date_published, recorded_at
+            )
+            if snapshot:
+                self._notify_snapshot_listeners(snapshot.to_dict())
             
             success_msg = f"Successfully updated {currencies_updated} currencies"
             logger.info(success_msg)
@@ -84,9 +185,27 @@ class DatabaseService:
             return False
     
     def get_all_rates(self) -> Optional[Dict]:
-        """Get all current exchange rates from database"""
+        """Get all current exchange rates from the shared snapshot or the database"""
+        shared = self._read_shared_snapshot()
+        if shared:
+            return {
+                'rates': dict(shared['rates']),
+                'date': shared['date'],
+                'currencies_available': list(shared['rates']),
+                'base_currency': 'VES',
+                'last_updated': shared['last_updated']
+            }
+        return self._get_all_rates_from_db()
+    
+    def _get_all_rates_from_db(self, primary: bool = False) -> Optional[Dict]:
         try:
-            rates = ExchangeRate.query.all()
+            def query(session):
+                return [
+                    (rate.currency, rate.rate, rate.date_published, rate.updated_at)
+                    for rate in session.query(ExchangeRate).all()
+                ]
+            
+            rates = query(db.session) if primary else self.replicas.read(query)
             
             if not rates:
                 logger.warning("No exchange rates found in database")
@@ -97,13 +216,13 @@ class DatabaseService:
             latest_update = None
             date_published = None
             
-            for rate in rates:
-                rates_dict[rate.currency] = rate.rate
+            for currency, rate, rate_date_published, updated_at in rates:
+                rates_dict[currency] = rate
                 
                 # Track the most recent update
-                if latest_update is None or rate.updated_at > latest_update:
-                    latest_update = rate.updated_at
-                    date_published = rate.date_published
+                if latest_update is None or updated_at > latest_update:
+                    latest_update = updated_at
+                    date_published = rate_date_published
             
             return {
                 'rates': rates_dict,
@@ -121,18 +240,30 @@ class DatabaseService:
         """Get exchange rate for a specific currency from database"""
         try:
             currency = currency.upper()
-            rate = ExchangeRate.query.filter_by(currency=currency).first()
+            shared = self._read_shared_snapshot()
+            if shared and currency in shared['rates']:
+                return {
+                    'currency': currency,
+                    'rate': shared['rates'][currency],
+                    'date_published': shared['date'],
+                    'updated_at': shared['last_updated']
+                }
             
-            if not rate:
-                logger.warning(f"Currency {currency} not found in database")
-                return None
+            def query(session):
+                rate = session.query(ExchangeRate).filter_by(currency=currency).first()
+                if not rate:
+                    return None
+                return {
+                    'currency': rate.currency,
+                    'rate': rate.rate,
+                    'date_published': rate.date_published,
+                    'updated_at': rate.updated_at.isoformat() if rate.updated_at else None
+                }
             
-            return {
-                'currency': rate.currency,
-                'rate': rate.rate,
-                'date_published': rate.date_published,
-                'updated_at': rate.updated_at.isoformat() if rate.updated_at else None
-            }
+            rate_data = self.replicas.read(query)
+            if not rate_data:
+                logger.warning(f"Currency {currency} not found in database")
+            return rate_data
             
         except SQLAlchemyError as e:
             logger.error(f"Database error getting {currency} rate: {str(e)}")
@@ -140,6 +271,13 @@ class DatabaseService:
     
     def should_update_rates(self) -> bool:
         """Check if rates need to be updated based on last update time"""
+        shared = self._read_shared_snapshot()
+        if shared and shared.get('last_success_at'):
+            # Fresh snapshot published on this host: no need to ask the database
+            last_success_at = datetime.fromisoformat(shared['last_success_at'])
+            if datetime.utcnow() - last_success_at <= timedelta(minutes=self.update_interval_minutes):
+                return False
+        
         try:
             # Get the most recent successful update
             last_update = UpdateLog.query.filter_by(status='success').order_by(desc(UpdateLog.created_at)).first()
@@ -162,16 +300,50 @@ class DatabaseService:
             logger.error(f"Database error checking update time: {str(e)}")
             return True  # If we can't check, assume we should update
     
+    def get_next_refresh_at(self) -> Optional[datetime]:
+        """When the rates are next due for a refresh from BCV (naive UTC), None if never updated"""
+        shared = self._read_shared_snapshot()
+        if shared and shared.get('last_success_at'):
+            last_success_at = datetime.fromisoformat(shared['last_success_at'])
+        else:
+            try:
+                last_success_at = self.replicas.read(lambda session: session.query(
+                    func.max(UpdateLog.created_at)
+                ).filter(UpdateLog.status == 'success').scalar())
+            except SQLAlchemyError as e:
+                logger.error(f"Database error getting last successful update: {str(e)}")
+                return None
+        if not last_success_at:
+            return None
+        return last_success_at + timedelta(minutes=self.update_interval_minutes)
+
+    def refresh_rates(self, force: bool = False) -> Optional[bool]:
+        """
+        Update from BCV under the cluster-wide refresh lease
+        Returns None when no update was due, the circuit breaker is open or another process holds the lease
+        """
+        if not force and not self.should_update_rates():
+            return None
+        if not force and self.circuit_breaker.is_open():
+            # BCV is down: no lease round trip on every request until the backoff ends
+            return None
+        if not self.refresh_lock.acquire():
+            logger.info("Another process is refreshing rates, serving cached rates")
+            return None
+        try:
+            # The previous holder may have just finished this refresh
+            if not force and not self.should_update_rates():
+                return None
+            logger.info("Forcing update from BCV" if force else "Rates are outdated, updating from BCV...")
+            return self.update_rates_from_bcv()
+        finally:
+            self.refresh_lock.release()
+    
     def get_rates_with_auto_update(self) -> Optional[Dict]:
-        """Get rates from database, updating from BCV if necessary"""
+        """Get rates from database, updating from BCV if necessary (inline refresh mode only)"""
         try:
-            # Check if we need to update
-            if self.should_update_rates():
-                logger.info("Rates are outdated, updating from BCV...")
-                update_success = self.update_rates_from_bcv()
-                
-                if not update_success:
-                    logger.warning("BCV update failed, returning cached rates")
+            if self.refresh_inline and self.refresh_rates() is False:
+                logger.warning("BCV update failed, returning cached rates")
             
             # Return rates from database
             return self.get_all_rates()
@@ -180,15 +352,351 @@ class DatabaseService:
             logger.error(f"Error in get_rates_with_auto_update: {str(e)}")
             return None
     
-    def get_update_status(self) -> List[Dict]:
+    def get_update_status(self, limit: int = 10) -> List[Dict]:
         """Get recent update logs"""
+        page = self.get_update_logs(limit)
+        return page['updates'] if page else []
+    
+    def get_update_logs(self, limit: int = 50, cursor: Optional[str] = None,
+                        status: Optional[str] = None) -> Optional[Dict]:
+        """Page through update logs, newest first; ValueError for a bad cursor"""
+        after = decode_cursor(cursor, 'update_logs')
         try:
-            logs = UpdateLog.query.order_by(desc(UpdateLog.created_at)).limit(10).all()
-            return [log.to_dict() for log in logs]
+            def query(session):
+                rows = session.query(UpdateLog)
+                if status:
+                    rows = rows.filter(UpdateLog.status == status)
+                return keyset_page(rows, UpdateLog.created_at, UpdateLog.id, after, limit, descending=True)
+            
+            logs, next_key = self.replicas.read(query)
+            return {
+                'updates': [log.to_dict() for log in logs],
+                'count': len(logs),
+                'next_cursor': encode_cursor('update_logs', next_key) if next_key else None
+            }
             
         except SQLAlchemyError as e:
             logger.error(f"Database error getting update logs: {str(e)}")
-            return []
+            return None
+    
+    def get_request_metrics(self, limit: int = 50, cursor: Optional[str] = None,
+                            endpoint: Optional[str] = None) -> Optional[Dict]:
+        """Page through raw API request metrics, newest first; ValueError for a bad cursor"""
+        after = decode_cursor(cursor, 'api_metrics')
+        try:
+            def query(session):
+                rows = session.query(ApiMetrics)
+                if endpoint:
+                    rows = rows.filter(ApiMetrics.endpoint == endpoint)
+                return keyset_page(rows, ApiMetrics.created_at, ApiMetrics.id, after, limit, descending=True)
+            
+            metrics, next_key = self.replicas.read(query)
+            return {
+                'requests': [metric.to_dict() for metric in metrics],
+                'count': len(metrics),
+                'next_cursor': encode_cursor('api_metrics', next_key) if next_key else None
+            }
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting request metrics: {str(e)}")
+            return None
+    
+    def get_snapshot_version(self) -> int:
+        """
+        Get the current rate snapshot version (0 if none was published)
+        Without a shared snapshot it is read where the rates are read: a replica, or the source
+        pinned for the current request, so an ETag never names a version newer than its body
+        """
+        shared = self._read_shared_snapshot()
+        if shared and shared.get('version'):
+            return shared['version']
+        return self._get_db_snapshot_version()
+    
+    def _get_db_snapshot_version(self, primary: bool = False) -> int:
+        try:
+            def query(session):
+                return session.query(func.max(RateSnapshot.id)).scalar() or 0
+            
+            return query(db.session) if primary else self.replicas.read(query)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting snapshot version: {str(e)}")
+            return 0
+    
+    def get_analytics(self, currency: str, windows: List[int]) -> Optional[Dict[str, Dict]]:
+        """
+        Get rolling statistics for a currency over the given windows (seconds)
+        Raises ValueError for windows larger than ANALYTICS_MAX_WINDOW_DAYS
+        """
+        try:
+            return self.analytics.get(currency, windows, self.get_snapshot_version())
+        except SQLAlchemyError as e:
+            logger.error(f"Database error computing analytics for {currency}: {str(e)}")
+            return None
+    
+    def get_analytics_generation(self) -> Optional[int]:
+        """History data generation behind the analytics (changes when rows are imported)"""
+        try:
+            return self.analytics.generation()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error checking history generation: {str(e)}")
+            return None
+    
+    def get_analytics_status(self) -> Dict:
+        """Get rolling analytics cache counters for monitoring"""
+        return self.analytics.get_stats()
+    
+    def get_latest_snapshot(self) -> Optional[Dict]:
+        """Get the most recently published rate snapshot"""
+        try:
+            snapshot = RateSnapshot.query.order_by(desc(RateSnapshot.id)).first()
+            return snapshot.to_dict() if snapshot else None
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting latest snapshot: {str(e)}")
+            return None
+    
+    def add_snapshot_listener(self, listener):
+        """Register a callable invoked with each newly committed snapshot"""
+        self.snapshot_listeners.append(listener)
+    
+    def _notify_snapshot_listeners(self, snapshot: Dict):
+        for listener in self.snapshot_listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Snapshot listener {listener!r} failed: {str(e)}")
+    
+    def get_history(self, currency: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    limit: int = 1000, source: str = 'archive', cursor: Optional[str] = None) -> Optional[Dict]:
+        """Get historical rates for a currency, oldest first; ValueError for a bad cursor"""
+        currency = currency.upper()
+        if source != 'archive' or not self.history_archive:
+            source = 'database'
+        # Archive keys count rows per timestamp and database keys are ids: a cursor only resumes its own source
+        scope = f'history:{source}:{currency}'
+        after = decode_cursor(cursor, scope)
+        try:
+            if source == 'archive':
+                history, next_key = self.history_archive.page(currency, start, end, limit, after)
+            else:
+                def query(session):
+                    rows = session.query(
+                        ExchangeRateHistory.created_at, ExchangeRateHistory.id, ExchangeRateHistory.rate
+                    ).filter(ExchangeRateHistory.currency == currency)
+                    if start:
+                        rows = rows.filter(ExchangeRateHistory.created_at >= start)
+                    if end:
+                        rows = rows.filter(ExchangeRateHistory.created_at <= end)
+                    return keyset_page(rows, ExchangeRateHistory.created_at, ExchangeRateHistory.id, after, limit)
+                
+                rows, next_key = self.replicas.read(query)
+                history = [{'timestamp': row.created_at.isoformat(), 'rate': row.rate} for row in rows]
+            
+            return {
+                'currency': currency,
+                'history': history,
+                'count': len(history),
+                'source': source,
+                'next_cursor': encode_cursor(scope, next_key) if next_key else None
+            }
+            
+        except (SQLAlchemyError, OSError) as e:
+            logger.error(f"Error getting {currency} history: {str(e)}")
+            return None
+    
+    def get_candles(self, currency: str, start: Optional[date] = None, end: Optional[date] = None,
+                    limit: int = 1000, cursor: Optional[str] = None) -> Optional[Dict]:
+        """Get daily OHLC candles for a currency from the precomputed table, newest page first; ValueError for a bad cursor"""
+        currency = currency.upper()
+        scope = f'candles:{currency}'
+        after = decode_cursor(cursor, scope)
+        if after:
+            after = (after[0].date(), after[1])  # Cursors carry datetimes; the column is a date
+        try:
+            candles, next_key = self.replicas.read(
+                lambda session: self.candles.query(session, currency, start, end, limit, after)
+            )
+            return {
+                'currency': currency,
+                'interval': '1d',
+                'utc_offset_hours': self.candles.utc_offset_hours,
+                'candles': candles,
+                'count': len(candles),
+                'next_cursor': encode_cursor(scope, next_key) if next_key else None
+            }
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting {currency} candles: {str(e)}")
+            return None
+    
+    def get_rates_as_of_many(self, currency: str, dates: List[datetime]) -> Optional[List[Optional[Dict]]]:
+        """
+        Batched point-in-time lookups; entries are None before the first record
+        Returns None when the index cannot be refreshed from the database
+        """
+        try:
+            currency = currency.upper()
+            self.rate_index.refresh()
+            results = []
+            for as_of, found in zip(dates, self.rate_index.lookup_many(currency, dates)):
+                if not found:
+                    results.append(None)
+                    continue
+                effective_at, rate = found
+                results.append({
+                    'currency': currency,
+                    'rate': rate,
+                    'as_of': as_of.isoformat(),
+                    'effective_at': effective_at.isoformat()
+                })
+            return results
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Database error refreshing rate index: {str(e)}")
+            return None
+    
+    def get_all_rates_as_of(self, as_of: datetime) -> Optional[Dict]:
+        """Get all rates in effect at a point in time, shaped like get_all_rates()"""
+        try:
+            self.rate_index.refresh()
+            rates_dict = {}
+            latest = None
+            for currency in self.rate_index.currencies():
+                found = self.rate_index.lookup(currency, as_of)
+                if found:
+                    rates_dict[currency] = found[1]
+                    latest = found[0] if latest is None else max(latest, found[0])
+            
+            if not rates_dict:
+                return None
+            
+            return {
+                'rates': rates_dict,
+                'currencies_available': list(rates_dict.keys()),
+                'base_currency': 'VES',
+                'as_of': as_of.isoformat(),
+                'last_updated': latest.isoformat()
+            }
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Database error refreshing rate index: {str(e)}")
+            return None
+    
+    def sync_history_archive(self) -> int:
+        """Bring the columnar archive up to date with the history table"""
+        if not self.history_archive:
+            return 0
+        try:
+            return self.history_archive.sync_from_db()
+        except (SQLAlchemyError, OSError) as e:
+            logger.error(f"Failed to sync history archive: {str(e)}")
+            return 0
+    
+    def sync_daily_candles(self) -> int:
+        """Build the daily candle table from the history table on first run"""
+        try:
+            return self.candles.sync_from_history()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Failed to build daily candles: {str(e)}")
+            return 0
+    
+    def sync_shared_snapshot(self) -> bool:
+        """
+        Publish the database state to the shared snapshot if it is missing or behind
+        Behind means an older version, or an older last successful refresh (another host refreshed
+        and the rates did not change); everything is read from the primary so the two agree
+        """
+        if not self.shared_snapshot:
+            return False
+        self._shared_snapshot_verified_at = time.monotonic()
+        try:
+            db_version = self._get_db_snapshot_version(primary=True)
+            last_success = UpdateLog.query.filter_by(status='success').order_by(desc(UpdateLog.created_at)).first()
+            shared = self.shared_snapshot.read()
+            if shared and shared.get('version', 0) >= db_version and (
+                    not last_success or not shared.get('last_success_at')
+                    or datetime.fromisoformat(shared['last_success_at']) >= last_success.created_at):
+                return False
+            
+            rates_data = self._get_all_rates_from_db(primary=True)
+            if not rates_data:
+                return False
+            if shared:
+                logger.info(f"Shared snapshot v{shared.get('version', 0)} is behind the database "
+                            f"(v{db_version}), republishing")
+            return self._publish_shared_snapshot(
+                db_version, rates_data['rates'], rates_data['date'],
+                datetime.fromisoformat(rates_data['last_updated']),
+                last_success.created_at if last_success else None
+            )
+        except (SQLAlchemyError, OSError) as e:
+            logger.error(f"Failed to sync shared snapshot: {str(e)}")
+            return False
+    
+    def get_shared_snapshot_status(self) -> Optional[Dict]:
+        """Get shared snapshot version and read/publish counters for monitoring"""
+        return self.shared_snapshot.get_stats() if self.shared_snapshot else None
+    
+    def _publish_shared_snapshot(self, version: int, rates: Dict[str, float], date_published: str,
+                                 updated_at: datetime, last_success_at: Optional[datetime] = None) -> bool:
+        """Publish current rates to every worker on this host"""
+        if not self.shared_snapshot:
+            return False
+        try:
+            return self.shared_snapshot.publish({
+                'version': version,
+                'rates': rates,
+                'date': date_published,
+                'last_updated': updated_at.isoformat(),
+                'last_success_at': (last_success_at or updated_at).isoformat()
+            }, version)
+        except OSError as e:
+            logger.error(f"Failed to publish shared snapshot: {str(e)}")
+            return False
+    
+    def _read_shared_snapshot(self) -> Optional[Dict]:
+        if not self.shared_snapshot:
+            return None
+        if time.monotonic() - self._shared_snapshot_verified_at >= self.shared_snapshot_verify_seconds:
+            # Other hosts (or the refresh worker) publish to their own file; catch up from the database
+            self.sync_shared_snapshot()
+        try:
+            return self.shared_snapshot.read()
+        except OSError as e:
+            logger.error(f"Failed to read shared snapshot: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _default_shared_snapshot_path() -> str:
+        """
+        One snapshot file per database, so apps on the same host never share by accident
+        Derived from the database URL alone (SQLite paths made absolute), so every process of
+        one deployment finds the same file whatever its working directory. Never in the shared
+        temp dir: next to the SQLite file, or in the user's private runtime directory
+        """
+        url = make_url(db.engine.url)
+        if url.drivername.startswith('sqlite') and url.database and url.database != ':memory:':
+            return f'{os.path.abspath(url.database)}-snapshot'
+        uri = url.render_as_string(hide_password=False)
+        digest = hashlib.sha1(uri.encode()).hexdigest()[:12]
+        return os.path.join(private_runtime_dir(), f'divisa_snapshot_{digest}.bin')
+    
+    def _archive_rates(self, rates: Dict[str, float], recorded_at: datetime):
+        """Append freshly committed rates to the columnar archive"""
+        if not self.history_archive:
+            return
+        try:
+            for currency, rate in rates.items():
+                self.history_archive.append(currency, recorded_at, rate)
+        except OSError as e:
+            logger.error(f"Failed to append rates to history archive: {str(e)}")
+    
+    def get_circuit_breaker_status(self) -> Optional[Dict]:
+        """Get the BCV circuit breaker state for monitoring"""
+        return self.circuit_breaker.get_status()
+    
+    def get_replica_status(self) -> Dict:
+        """Get read replica health and routing counters for monitoring"""
+        return self.replicas.get_status()
     
     def _log_update(self, status: str, message: str, currencies_updated: int = 0):
         """Log an update attempt to the database"""
@@ -208,4 +716,11 @@ class DatabaseService:
     def force_update(self) -> bool:
         """Force an immediate update from BCV regardless of timing"""
         logger.info("Forcing immediate update from BCV")
-        return self.update_rates_from_bcv()
\ No newline at end of file
+        return self.refresh_rates(force=True) is True
+    
+    def get_refresh_status(self) -> Dict:
+        """Get the refresh mode and who holds the refresh lease for monitoring"""
+        return {
+            'mode': 'inline' if self.refresh_inline else 'worker',
+            'lease': self.refresh_lock.get_status()
+        }
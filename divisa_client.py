@@ -0,0 +1,495 @@
+import asyncio
+import json
+import logging
+import re
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # AsyncDivisaClient falls back to the requests transport in a worker thread
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'divisa-client/1.0'
+RATES_PATH = '/api/rates'
+STREAM_PATH = '/api/stream/rates'
+BASE_CURRENCY = 'VES'
+_DIRECTIVE = re.compile(r'([a-z-]+)(?:=("?)(\d+)\2)?')
+
+class DivisaClientError(Exception):
+    """Raised when rates cannot be obtained from the server or the local cache"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def parse_cache_control(header: Optional[str]) -> Dict[str, Optional[int]]:
+    """Parse a Cache-Control header into {directive: seconds or None}"""
+    directives = {}
+    for part in (header or '').lower().split(','):
+        match = _DIRECTIVE.match(part.strip())
+        if match:
+            directives[match.group(1)] = int(match.group(3)) if match.group(3) else None
+    return directives
+
+def parse_sse(lines: Iterable[str]) -> Iterator[Tuple[str, Optional[str], str]]:
+    """Turn Server-Sent Events lines into (event, id, data) tuples"""
+    event, event_id, data = 'message', None, []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line:
+            if data:
+                yield event, event_id, '\n'.join(data)
+            event, data = 'message', []
+            continue
+        if line.startswith(':'):
+            continue  # Heartbeat comment
+        field, _, value = line.partition(':')
+        value = value[1:] if value.startswith(' ') else value
+        if field == 'event':
+            event = value
+        elif field == 'data':
+            data.append(value)
+        elif field == 'id':
+            event_id = value
+
+def convert_amount(rates: Dict[str, float], amount: float, from_currency: str, to_currency: str) -> Dict:
+    """
+    Convert using VES-based rates, mirroring ``GET /api/convert``: foreign
+    currencies are crossed through VES and results are rounded to 6 decimals.
+    """
+    from_currency, to_currency = from_currency.upper(), to_currency.upper()
+    if amount is None or amount <= 0:
+        raise ValueError('amount must be greater than 0')
+    for currency in (from_currency, to_currency):
+        if currency != BASE_CURRENCY and currency not in rates:
+            raise DivisaClientError(f'{currency} rate not available', 404)
+
+    if from_currency == to_currency:
+        converted, rate = amount, 1.0
+    elif from_currency == BASE_CURRENCY:
+        converted, rate = amount / rates[to_currency], 1 / rates[to_currency]
+    elif to_currency == BASE_CURRENCY:
+        converted, rate = amount * rates[from_currency], rates[from_currency]
+    else:
+        converted = amount * rates[from_currency] / rates[to_currency]
+        rate = rates[from_currency] / rates[to_currency]
+    return {
+        'from': {'currency': from_currency, 'amount': amount},
+        'to': {'currency': to_currency, 'amount': round(converted, 6)},
+        'rate': round(rate, 6)
+    }
+
+class RateCache:
+    """
+    Local copy of the server's rate snapshot with HTTP freshness semantics.
+
+    Freshness follows the response's ``Cache-Control`` (``max-age`` minus
+    ``Age``); ``no-cache`` forces a revalidation on every use and ``no-store``
+    disables caching. Stale entries are revalidated with ``If-None-Match``,
+    so an unchanged snapshot costs a body-less 304, and ``stale-if-error``
+    lets the last snapshot answer while the server is unreachable. While a
+    push subscription is live the cache is kept current by the stream and
+    counts as fresh without asking the server at all.
+    """
+
+    def __init__(self):
+        self.data: Optional[Dict] = None
+        self.etag: Optional[str] = None
+        self.version = 0
+        self.expires_at = 0.0
+        self.stale_if_error_until = 0.0
+        self.push_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def rates(self) -> Dict[str, float]:
+        return self.data['rates'] if self.data else {}
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return self.data is not None and (now < self.expires_at or now < self.push_until)
+
+    def can_serve_stale(self) -> bool:
+        return self.data is not None and time.monotonic() < self.stale_if_error_until
+
+    def conditional_headers(self) -> Dict[str, str]:
+        return {'If-None-Match': self.etag} if self.etag and self.data else {}
+
+    def store(self, status: int, headers, body: Optional[Dict]) -> bool:
+        """Apply a 200 or 304 from /api/rates; returns False for any other status"""
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if status == 304 and self.data is not None:
+            pass  # Same snapshot: only the freshness information is renewed
+        elif status == 200 and body and body.get('success'):
+            if 'no-store' in directives:
+                self.data, self.etag = None, None
+                return True
+            self.data = body['data']
+            self.etag = headers.get('ETag')
+        else:
+            return False
+
+        now = time.monotonic()
+        max_age = 0 if 'no-cache' in directives else (directives.get('max-age') or 0)
+        age = _int_header(headers.get('Age'))
+        self.expires_at = now + max(max_age - age, 0)
+        self.stale_if_error_until = self.expires_at + (directives.get('stale-if-error') or 0)
+        self.version = max(self.version, _int_header(headers.get('X-Snapshot-Version')))
+        return True
+
+    def apply_push(self, snapshot: Dict, keepalive: float) -> bool:
+        """Install a snapshot received over SSE; returns True if it was newer"""
+        version = snapshot.get('version', 0)
+        if version <= self.version and self.data is not None:
+            return False
+        self.data = {
+            'rates': dict(snapshot['rates']),
+            'date': snapshot.get('date_published'),
+            'currencies_available': list(snapshot['rates']),
+            'base_currency': BASE_CURRENCY,
+            'last_updated': snapshot.get('created_at')
+        }
+        self.etag = None  # The push payload is not the /api/rates representation
+        self.version = version
+        self.push_until = time.monotonic() + keepalive
+        return True
+
+def _int_header(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+class _ClientBase:
+    def __init__(self, base_url: str, timeout: float, heartbeat_grace: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.heartbeat_grace = heartbeat_grace
+        self.cache = RateCache()
+        self.listeners = []
+        self._stats = {'server_requests': 0, 'not_modified': 0, 'cache_hits': 0,
+                       'stale_served': 0, 'push_updates': 0, 'conversions': 0}
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Register a callable invoked with the rates dict after each push update"""
+        self.listeners.append(listener)
+
+    def get_stats(self) -> Dict:
+        return {**self._stats, 'snapshot_version': self.cache.version, 'fresh': self.cache.is_fresh()}
+
+    def _rate(self, data: Dict, currency: str) -> float:
+        currency = currency.upper()
+        if currency not in data['rates']:
+            raise DivisaClientError(f'{currency} rate not available', 404)
+        return data['rates'][currency]
+
+    def _convert(self, data: Dict, amount: float, from_currency: str, to_currency: str) -> Dict:
+        self._stats['conversions'] += 1
+        result = convert_amount(data['rates'], amount, from_currency, to_currency)
+        result['rates_date'] = data.get('last_updated')
+        result['snapshot_version'] = self.cache.version
+        return result
+
+    def _stale_or_raise(self, message: str, status_code: Optional[int] = None) -> Dict:
+        if self.cache.can_serve_stale():
+            self._stats['stale_served'] += 1
+            logger.warning(f"{message}; serving cached rates (stale-if-error)")
+            return self.cache.data
+        raise DivisaClientError(message, status_code)
+
+    def _handle_event(self, event: str, data: str):
+        if event != 'rates':
+            return
+        try:
+            snapshot = json.loads(data)
+        except ValueError:
+            return
+        with self.cache.lock:
+            updated = self.cache.apply_push(snapshot, self.heartbeat_grace)
+        if updated:
+            self._stats['push_updates'] += 1
+            for listener in self.listeners:
+                try:
+                    listener(self.cache.data)
+                except Exception as e:
+                    logger.error(f"Rate listener {listener!r} failed: {str(e)}")
+
+    def _touch_push(self):
+        # Any line on the stream (events or heartbeats) proves it is still live
+        self.cache.push_until = time.monotonic() + self.heartbeat_grace
+
+class DivisaClient(_ClientBase):
+    """
+    Client for the DivisaAPI rate endpoints.
+
+    All reads go through a local snapshot cache (see ``RateCache``), so
+    repeated lookups and conversions only reach the server when the snapshot
+    is stale, and then as a conditional request. Conversions are computed
+    locally from the cached VES rates with the same arithmetic as
+    ``/api/convert``. Requests share a pooled ``requests.Session`` with
+    keep-alive and retries. ``subscribe()`` follows ``/api/stream/rates`` in a
+    background thread; if the server has no stream (or it drops) the client
+    quietly falls back to cache revalidation.
+
+        with DivisaClient('https://divisa.example.com') as client:
+            client.subscribe()
+            client.convert(100, 'USD', 'EUR')
+    """
+
+    def __init__(self, base_url: str = 'http://localhost:5000', timeout: float = 10, pool_maxsize: int = 10,
+                 max_retries: int = 2, heartbeat_grace: float = 45, session: Optional[requests.Session] = None):
+        super().__init__(base_url, timeout, heartbeat_grace)
+        self.session = session or self._make_session(pool_maxsize, max_retries)
+        self._refresh_lock = threading.Lock()
+        self._stream_thread = None
+        self._stream_response = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _make_session(pool_maxsize: int, max_retries: int) -> requests.Session:
+        session = requests.Session()
+        retry = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                      allowed_methods=('GET',), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'User-Agent': USER_AGENT, 'Accept': 'application/json'})
+        return session
+
+    def get_rates(self, force: bool = False) -> Dict:
+        """Current rates payload (``rates``, ``date``, ``last_updated``...), from cache when fresh"""
+        if not force and self.cache.is_fresh():
+            self._stats['cache_hits'] += 1
+            return self.cache.data
+        with self._refresh_lock:
+            # Another thread may have refreshed while this one waited
+            if not force and self.cache.is_fresh():
+                self._stats['cache_hits'] += 1
+                return self.cache.data
+            return self._refresh()
+
+    def get_rate(self, currency: str) -> float:
+        return self._rate(self.get_rates(), currency)
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> Dict:
+        return self._convert(self.get_rates(), amount, from_currency, to_currency)
+
+    def _refresh(self) -> Dict:
+        self._stats['server_requests'] += 1
+        try:
+            response = self.session.get(f'{self.base_url}{RATES_PATH}',
+                                        headers=self.cache.conditional_headers(), timeout=self.timeout)
+            body = response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError) as e:
+            return self._stale_or_raise(f'Could not reach {self.base_url}: {str(e)}')
+
+        with self.cache.lock:
+            stored = self.cache.store(response.status_code, response.headers, body)
+        if response.status_code == 304:
+            self._stats['not_modified'] += 1
+        if not stored:
+            return self._stale_or_raise(f'{RATES_PATH} answered {response.status_code}', response.status_code)
+        if self.cache.data is None:
+            return body['data']  # no-store: usable once, never cached
+        return self.cache.data
+
+    def subscribe(self) -> bool:
+        """Start following the push stream in a daemon thread (idempotent)"""
+        if self._stream_thread and self._stream_thread.is_alive():
+            return True
+        self._stopped.clear()
+        self._stream_thread = threading.Thread(target=self._follow_stream, name='divisa-client-sse', daemon=True)
+        self._stream_thread.start()
+        return True
+
+    def _follow_stream(self):
+        backoff = 1.0
+        while not self._stopped.is_set():
+            try:
+                headers = {'Accept': 'text/event-stream'}
+                if self.cache.version:
+                    headers['Last-Event-ID'] = str(self.cache.version)
+                with self.session.get(f'{self.base_url}{STREAM_PATH}', headers=headers, stream=True,
+                                      timeout=(self.timeout, self.heartbeat_grace)) as response:
+                    if response.status_code == 404:
+                        logger.info("Server has no rate stream; using cache revalidation only")
+                        return
+                    if response.status_code != 200:
+                        raise DivisaClientError(f'{STREAM_PATH} answered {response.status_code}',
+                                                response.status_code)
+                    self._stream_response = response
+                    backoff = 1.0
+                    for event, _, data in parse_sse(self._stream_lines(response)):
+                        self._handle_event(event, data)
+            except Exception as e:
+                if self._stopped.is_set():
+                    return  # close() shut the connection under the reader
+                logger.debug(f"Rate stream interrupted: {str(e)}")
+            finally:
+                self._stream_response = None
+                self.cache.push_until = 0.0
+            self._stopped.wait(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def _stream_lines(self, response) -> Iterator[str]:
+        for line in response.iter_lines(decode_unicode=True):
+            if self._stopped.is_set():
+                return
+            self._touch_push()
+            yield line or ''
+
+    def close(self):
+        self._stopped.set()
+        response = self._stream_response
+        if response is not None:
+            # Closing the response does not wake a thread blocked in recv(); shutting the socket down does.
+            # urllib3 >= 2.3 exposes that, since the connection's sock is detached while a body is read
+            try:
+                if hasattr(response.raw, 'shutdown'):
+                    response.raw.shutdown()
+                else:
+                    sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+                    if sock is not None:
+                        sock.shutdown(socket.SHUT_RDWR)
+            except (OSError, ValueError, RuntimeError):
+                pass  # Already closed or released to the pool
+            response.close()
+        if self._stream_thread:
+            self._stream_thread.join(timeout=self.timeout)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class AsyncDivisaClient(_ClientBase):
+    """
+    asyncio counterpart of ``DivisaClient`` with the same cache semantics.
+
+    Uses aiohttp when it is installed; otherwise each request runs on a
+    pooled ``requests`` session in a worker thread. Concurrent coroutines
+    asking for stale rates share a single revalidation request.
+    """
+
+    def __init__(self, base_url: str = 'http://localhost:5000', timeout: float = 10, pool_maxsize: int = 10,
+                 max_retries: int = 2, heartbeat_grace: float = 45):
+        super().__init__(base_url, timeout, heartbeat_grace)
+        self.pool_maxsize = pool_maxsize
+        self._sync = None if aiohttp else DivisaClient(base_url, timeout, pool_maxsize, max_retries, heartbeat_grace)
+        if self._sync:
+            self.cache = self._sync.cache  # One cache, whichever transport fills it
+            self._stats = self._sync._stats
+            self._sync.listeners = self.listeners
+        self._http = None
+        self._refresh_lock = None
+        self._stream_task = None
+
+    async def get_rates(self, force: bool = False) -> Dict:
+        if not force and self.cache.is_fresh():
+            self._stats['cache_hits'] += 1
+            return self.cache.data
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if not force and self.cache.is_fresh():
+                self._stats['cache_hits'] += 1
+                return self.cache.data
+            if self._sync:
+                return await asyncio.to_thread(self._sync._refresh)
+            return await self._refresh()
+
+    async def get_rate(self, currency: str) -> float:
+        return self._rate(await self.get_rates(), currency)
+
+    async def convert(self, amount: float, from_currency: str, to_currency: str) -> Dict:
+        return self._convert(await self.get_rates(), amount, from_currency, to_currency)
+
+    async def _session(self):
+        if self._http is None:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': USER_AGENT, 'Accept': 'application/json'}
+            )
+        return self._http
+
+    async def _refresh(self) -> Dict:
+        self._stats['server_requests'] += 1
+        session = await self._session()
+        try:
+            async with session.get(f'{self.base_url}{RATES_PATH}', headers=self.cache.conditional_headers()) as response:
+                body = await response.json() if response.status == 200 else None
+                status, headers = response.status, response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return self._stale_or_raise(f'Could not reach {self.base_url}: {str(e)}')
+
+        stored = self.cache.store(status, headers, body)
+        if status == 304:
+            self._stats['not_modified'] += 1
+        if not stored:
+            return self._stale_or_raise(f'{RATES_PATH} answered {status}', status)
+        return self.cache.data if self.cache.data is not None else body['data']
+
+    async def subscribe(self) -> bool:
+        """Follow the push stream in a background task (or thread without aiohttp)"""
+        if self._sync:
+            return self._sync.subscribe()
+        if self._stream_task is None or self._stream_task.done():
+            self._stream_task = asyncio.get_running_loop().create_task(self._follow_stream())
+        return True
+
+    async def _follow_stream(self):
+        backoff = 1.0
+        session = await self._session()
+        while True:
+            try:
+                headers = {'Accept': 'text/event-stream'}
+                if self.cache.version:
+                    headers['Last-Event-ID'] = str(self.cache.version)
+                timeout = aiohttp.ClientTimeout(total=None, sock_read=self.heartbeat_grace)
+                async with session.get(f'{self.base_url}{STREAM_PATH}', headers=headers, timeout=timeout) as response:
+                    if response.status == 404:
+                        logger.info("Server has no rate stream; using cache revalidation only")
+                        return
+                    if response.status == 200:
+                        backoff = 1.0
+                        lines = []
+                        async for raw in response.content:
+                            self._touch_push()
+                            lines.append(raw.decode('utf-8'))
+                            if not lines[-1].strip():
+                                # A blank line completes an event: dispatch it right away
+                                for event, _, data in parse_sse(lines):
+                                    self._handle_event(event, data)
+                                lines = []
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.debug(f"Rate stream interrupted: {str(e)}")
+            finally:
+                self.cache.push_until = 0.0
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def close(self):
+        if self._stream_task:
+            self._stream_task.cancel()
+        if self._http is not None:
+            await self._http.close()
+        if self._sync:
+            await asyncio.to_thread(self._sync.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
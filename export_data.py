@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Exporta el historial de tasas, las velas diarias o las métricas de la API a Arrow IPC, Parquet, NDJSON o CSV
+
+Lee la base de datos configurada (ver config.py / .env) en lotes con un cursor
+en streaming, de modo que la memoria no crece con el número de filas.
+Arrow y Parquet requieren pyarrow; NDJSON y CSV no.
+
+Uso:
+    python export_data.py history historial.parquet --format parquet --currency USD --start 2025-01-01
+    python export_data.py metrics metricas.arrows --columns endpoint,status_code,created_at
+    python export_data.py candles velas.parquet --currency USD --start 2024-01-01
+    python export_data.py history historial.csv --currency EUR
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from flask import Flask
+
+from arrow_export import ArrowExporter, ExportError, DATASETS, EXPORT_FORMATS, format_available
+from config import get_config, DatabaseConfig
+from models import db
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Exportar historial, velas o métricas a Arrow, Parquet, NDJSON o CSV')
+    parser.add_argument('dataset', choices=list(DATASETS), help='Conjunto de datos a exportar')
+    parser.add_argument('output', help='Archivo de salida')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), help='Formato (por defecto según la extensión)')
+    parser.add_argument('--columns', help='Columnas separadas por comas (por defecto todas)')
+    parser.add_argument('--start', help='Fecha/hora ISO 8601 inicial (UTC)')
+    parser.add_argument('--end', help='Fecha/hora ISO 8601 final (UTC)')
+    parser.add_argument('--currency', help='Filtrar historial por divisa')
+    parser.add_argument('--endpoint', help='Filtrar métricas por endpoint')
+    parser.add_argument('--status-code', type=int, help='Filtrar métricas por código HTTP')
+    parser.add_argument('--batch-size', type=int, help='Filas por lote (por defecto EXPORT_BATCH_SIZE)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = get_config()
+    export_format = args.format or next(
+        (name for name, (_, extension) in EXPORT_FORMATS.items() if args.output.endswith(f'.{extension}')), 'arrow'
+    )
+    if not format_available(export_format):
+        print('❌ pyarrow no está instalado: pip install pyarrow (o usar --format ndjson/csv)', file=sys.stderr)
+        return 1
+    filters = {
+        name: value for name, value in (
+            ('currency', args.currency.upper() if args.currency else None),
+            ('endpoint', args.endpoint),
+            ('status_code', args.status_code)
+        ) if value is not None and name in DATASETS[args.dataset]['filters']
+    }
+
+    app = Flask(__name__)
+    app.config.update(DatabaseConfig.get_database_config())
+    db.init_app(app)
+
+    exporter = ArrowExporter(
+        batch_size=args.batch_size or config.EXPORT_BATCH_SIZE,
+        parquet_compression=config.EXPORT_PARQUET_COMPRESSION,
+        text_batch_size=config.EXPORT_TEXT_BATCH_SIZE
+    )
+
+    started = time.perf_counter()
+    try:
+        with app.app_context():
+            written = exporter.write_file(
+                args.output, args.dataset, export_format,
+                columns=args.columns.split(',') if args.columns else None,
+                start=datetime.fromisoformat(args.start) if args.start else None,
+                end=datetime.fromisoformat(args.end) if args.end else None,
+                filters=filters
+            )
+    except (ExportError, ValueError) as e:
+        print(f'❌ {e}', file=sys.stderr)
+        return 2
+
+    elapsed = time.perf_counter() - started
+    print(f'✅ {args.dataset} exportado a {args.output} ({export_format}, {written:,} bytes, {elapsed:.2f}s)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for production: gunicorn -c gunicorn.conf.py app:app
+
+Uses the gevent worker so each Server-Sent Events subscriber of /api/stream/rates
+is a greenlet instead of a thread; every value can be overridden from the environment.
+"""
+
+import multiprocessing
+import os
+
+from config import Config
+
+# Dirección y número de procesos (WEB_CONCURRENCY es la variable estándar de los PaaS)
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+
+# Worker gevent: gunicorn parchea la librería estándar al arrancar cada worker, antes de
+# importar la aplicación, así que threading.Condition y time.sleep ceden el control y miles
+# de streams inactivos no necesitan un hilo cada uno. No usar preload_app: importaría la
+# aplicación en el master sin parchear
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+
+# Conexiones simultáneas por worker: los streams SSE más margen para las peticiones normales
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', Config.SSE_MAX_CONNECTIONS + 1000))
+
+# Con gevent el timeout solo vigila que el worker siga vivo; los streams largos envían heartbeats
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+loglevel = Config.LOG_LEVEL.lower()
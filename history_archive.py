@@ -0,0 +1,371 @@
+import bisect
+import logging
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from models import db, ExchangeRateHistory
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+RATE_SCALE = 10 ** 8  # BCV publishes rates with 8 decimals
+_INT64 = struct.Struct('<q')
+
+def to_micros(value: datetime) -> int:
+    """Convert a naive UTC datetime to microseconds since the epoch"""
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def from_micros(value: int) -> datetime:
+    """Convert microseconds since the epoch to a naive UTC datetime"""
+    return EPOCH + timedelta(microseconds=value)
+
+def _identity(path: str) -> Optional[Tuple[int, int, int]]:
+    """(device, inode, size) of a file, None if missing: a rebuild swaps the inode, an append grows the size"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino, stat.st_size
+
+class _Column:
+    """Read-only memory map over one append-only int64 column file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.identity = None
+        self.size = 0
+        self.map = None
+        self.view = None
+
+    def changed(self) -> bool:
+        return _identity(self.path) != self.identity
+
+    def remap(self) -> int:
+        """Map the file as it is now; returns the row count"""
+        # Old maps are left to the GC: callers may still hold NumPy views on them
+        try:
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                size = stat.st_size // 8 * 8  # Whole rows only: an interrupted append leaves a partial tail
+                if size:
+                    self.map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                    self.view = memoryview(self.map).cast('q')
+                else:
+                    self.map = self.view = None
+                self.identity = (stat.st_dev, stat.st_ino, stat.st_size)
+                self.size = size
+        except FileNotFoundError:
+            self.map = self.view = self.identity = None
+            self.size = 0
+        return self.size // 8
+
+class HistoryArchive:
+    """
+    Columnar, memory-mapped archive of the exchange rate history.
+
+    Each currency is stored as two append-only files of little-endian int64:
+    ``<CUR>.ts`` (microseconds since the epoch, UTC, non-decreasing) and
+    ``<CUR>.rate`` (rate scaled by ``RATE_SCALE``). Range lookups are binary
+    searches over the mapped timestamps and slices are zero-copy.
+
+    Writers hold an exclusive ``flock`` on ``<CUR>.lock``. Readers take it
+    shared only to remap, when a column grew or was replaced, so they never
+    pair the timestamps of one generation with the rates of another.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._columns: Dict[str, Tuple[_Column, _Column]] = {}
+        self._lock = threading.Lock()
+
+    def currencies(self) -> List[str]:
+        """Currencies present in the archive"""
+        return sorted(name[:-3] for name in os.listdir(self.directory) if name.endswith('.ts'))
+
+    def append(self, currency: str, timestamp: datetime, rate: float) -> bool:
+        """
+        Append one observation. Returns False if it would break timestamp order
+        (older rows have to go through ``rebuild_from_db``).
+        """
+        return self.append_many(currency, [(timestamp, rate)]) == 1
+
+    def append_many(self, currency: str, rows: List[Tuple[datetime, float]]) -> int:
+        """Append observations sorted by timestamp; returns how many were written"""
+        currency = currency.upper()
+        ts_path, rate_path = self._paths(currency)
+
+        with self._exclusive(currency):
+            self._truncate_partial(ts_path, rate_path)
+            last = self._last_timestamp(ts_path, rate_path)
+            ts_chunk = bytearray()
+            rate_chunk = bytearray()
+            skipped = 0
+            for timestamp, rate in rows:
+                micros = to_micros(timestamp)
+                if last is not None and micros < last:
+                    skipped += 1
+                    continue
+                ts_chunk += _INT64.pack(micros)
+                rate_chunk += _INT64.pack(round(rate * RATE_SCALE))
+                last = micros
+
+            if ts_chunk:
+                # Rates first: readers only see rows present in both files
+                with open(rate_path, 'ab') as f:
+                    f.write(rate_chunk)
+                with open(ts_path, 'ab') as f:
+                    f.write(ts_chunk)
+        if skipped:
+            # Still in the database; sync_from_db notices the gap and rebuilds the currency
+            logger.warning(f"History archive skipped {skipped} {currency} rows older than its tail")
+        return len(ts_chunk) // 8
+
+    def count(self, currency: str) -> int:
+        """Number of observations archived for a currency"""
+        ts_col, rate_col = self._get_columns(currency)
+        if ts_col.changed() or rate_col.changed():
+            with self._shared(currency):
+                ts_col.remap()
+                rate_col.remap()
+        return min(ts_col.size, rate_col.size) // 8
+
+    def bounds(self, currency: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> Tuple[int, int]:
+        """Row index range [lo, hi) whose timestamps fall in [start, end]"""
+        ts_col, _ = self._get_columns(currency)
+        n = self.count(currency)
+        if not n:
+            return 0, 0
+        lo = bisect.bisect_left(ts_col.view, to_micros(start), 0, n) if start else 0
+        hi = bisect.bisect_right(ts_col.view, to_micros(end), lo, n) if end else n
+        return lo, hi
+
+    def query(self, currency: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              limit: Optional[int] = None) -> List[Dict]:
+        """Observations in [start, end] as dictionaries, oldest first"""
+        lo, hi = self.bounds(currency, start, end)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self._rows(currency, lo, hi)
+
+    def page(self, currency: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             limit: int = 1000, after: Optional[Tuple[datetime, int]] = None
+             ) -> Tuple[List[Dict], Optional[Tuple[datetime, int]]]:
+        """
+        Keyset page of ``query()``: rows after ``after``, plus the key of the next page (None on the last).
+
+        Rows carry no id, so a key is ``(timestamp, n)``: the first ``n`` rows
+        at that timestamp were already returned. Unlike a row offset it stays
+        valid when ``rebuild_from_db`` inserts older rows, and resolving it is
+        one binary search.
+        """
+        lo, hi = self.bounds(currency, start, end)
+        ts_col, _ = self._get_columns(currency)
+        if after is not None and hi > lo:
+            lo = max(lo, bisect.bisect_left(ts_col.view, to_micros(after[0]), lo, hi) + after[1])
+        stop = min(hi, lo + limit)
+        rows = self._rows(currency, lo, stop)
+        if stop >= hi:
+            return rows, None
+        last = ts_col.view[stop - 1]
+        return rows, (from_micros(last), stop - bisect.bisect_left(ts_col.view, last, 0, stop))
+
+    def to_numpy(self, currency: str, start: Optional[datetime] = None, end: Optional[datetime] = None):
+        """
+        Zero-copy NumPy views ``(timestamps, scaled_rates)`` for [start, end].
+
+        ``timestamps`` is ``datetime64[us]`` and ``scaled_rates`` is int64; divide
+        by ``RATE_SCALE`` for float rates (that step copies).
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for HistoryArchive.to_numpy")
+        lo, hi = self.bounds(currency, start, end)
+        ts_col, rate_col = self._get_columns(currency)
+        if hi <= lo:
+            return np.empty(0, dtype='datetime64[us]'), np.empty(0, dtype='<i8')
+        timestamps = np.frombuffer(ts_col.map, dtype='<i8', count=hi - lo, offset=lo * 8)
+        rates = np.frombuffer(rate_col.map, dtype='<i8', count=hi - lo, offset=lo * 8)
+        return timestamps.view('datetime64[us]'), rates
+
+    def sync_from_db(self, batch_size: int = 10000) -> int:
+        """
+        Bring every currency up to date with the history table; returns rows added.
+
+        Rows newer than the archive tail are appended. If the table holds a
+        different number of rows up to the tail than the archive (rows were
+        back-filled, or an append was skipped), the currency is rebuilt.
+        """
+        added = 0
+        currencies = [row[0] for row in db.session.query(ExchangeRateHistory.currency).distinct()]
+        for currency in currencies:
+            ts_path, rate_path = self._paths(currency.upper())
+            last = self._last_timestamp(ts_path, rate_path)
+            query = ExchangeRateHistory.query.filter(ExchangeRateHistory.currency == currency)
+            if last is not None:
+                archived = self.count(currency)
+                in_db = query.filter(ExchangeRateHistory.created_at <= from_micros(last)) \
+                    .with_entities(func.count(ExchangeRateHistory.id)).scalar()
+                if in_db != archived:
+                    logger.warning(f"History archive has {archived} {currency} rows up to its tail, "
+                                   f"the database {in_db}; rebuilding")
+                    added += self.rebuild_from_db(currency, batch_size) - archived
+                    continue
+                query = query.filter(ExchangeRateHistory.created_at > from_micros(last))
+            added += self._append_query(currency, query, batch_size)
+        if added:
+            logger.info(f"History archive synced {added} rows from database")
+        return added
+
+    def rebuild_from_db(self, currency: str, batch_size: int = 10000) -> int:
+        """
+        Rewrite a currency's columns from the database (e.g. after back-filling); returns the row count.
+
+        The new columns are written to temporary files while readers and
+        appenders keep using the current ones. Under the currency lock, rows
+        appended in the meantime (newer than the new tail) are carried over
+        and both files are swapped in with ``os.replace``.
+        """
+        currency = currency.upper()
+        ts_path, rate_path = self._paths(currency)
+        ts_tmp, rate_tmp = f'{ts_path}.rebuild', f'{rate_path}.rebuild'
+        query = ExchangeRateHistory.query.filter(ExchangeRateHistory.currency == currency)
+        written, last = 0, None
+        try:
+            with open(ts_tmp, 'wb') as ts_file, open(rate_tmp, 'wb') as rate_file:
+                for batch in self._query_batches(query, batch_size):
+                    ts_file.write(b''.join(_INT64.pack(to_micros(ts)) for ts, _ in batch))
+                    rate_file.write(b''.join(_INT64.pack(round(rate * RATE_SCALE)) for _, rate in batch))
+                    written += len(batch)
+                    last = to_micros(batch[-1][0])
+
+                with self._exclusive(currency):
+                    self._truncate_partial(ts_path, rate_path)
+                    carried = self._rows_after(ts_path, rate_path, last)
+                    ts_file.write(b''.join(_INT64.pack(ts) for ts, _ in carried))
+                    rate_file.write(b''.join(_INT64.pack(rate) for _, rate in carried))
+                    written += len(carried)
+                    ts_file.flush()
+                    rate_file.flush()
+                    # Rates first, like appends: a crash in between leaves a tail that is truncated
+                    os.replace(rate_tmp, rate_path)
+                    os.replace(ts_tmp, ts_path)
+        finally:
+            for path in (ts_tmp, rate_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+        logger.info(f"History archive rebuilt {currency} with {written} rows")
+        return written
+
+    def _append_query(self, currency: str, query, batch_size: int) -> int:
+        return sum(self.append_many(currency, batch) for batch in self._query_batches(query, batch_size))
+
+    @staticmethod
+    def _query_batches(query, batch_size: int):
+        """History rows of a query as lists of (created_at, rate), in archive order"""
+        batch = []
+        rows = query.order_by(ExchangeRateHistory.created_at, ExchangeRateHistory.id).yield_per(batch_size)
+        for row in rows:
+            if row.created_at is None:
+                continue
+            batch.append((row.created_at, row.rate))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _rows_after(ts_path: str, rate_path: str, after: Optional[int]) -> List[Tuple[int, int]]:
+        """Raw (micros, scaled rate) rows of the current files newer than ``after``"""
+        if not os.path.exists(ts_path) or not os.path.exists(rate_path):
+            return []
+        with open(ts_path, 'rb') as f:
+            timestamps = [value for (value,) in _INT64.iter_unpack(f.read())]
+        if after is not None:
+            start = bisect.bisect_right(timestamps, after)
+            if start == len(timestamps):
+                return []
+            timestamps = timestamps[start:]
+        else:
+            start = 0
+        with open(rate_path, 'rb') as f:
+            f.seek(start * 8)
+            rates = [value for (value,) in _INT64.iter_unpack(f.read(len(timestamps) * 8))]
+        return list(zip(timestamps, rates))
+
+    def _rows(self, currency: str, lo: int, hi: int) -> List[Dict]:
+        ts_col, rate_col = self._get_columns(currency)
+        timestamps = ts_col.view[lo:hi].tolist() if hi > lo else []
+        rates = rate_col.view[lo:hi].tolist() if hi > lo else []
+        return [
+            {'timestamp': from_micros(ts).isoformat(), 'rate': rate / RATE_SCALE}
+            for ts, rate in zip(timestamps, rates)
+        ]
+
+    def _get_columns(self, currency: str) -> Tuple[_Column, _Column]:
+        currency = currency.upper()
+        columns = self._columns.get(currency)
+        if columns is None:
+            ts_path, rate_path = self._paths(currency)
+            columns = self._columns[currency] = (_Column(ts_path), _Column(rate_path))
+        return columns
+
+    def _last_timestamp(self, ts_path: str, rate_path: str) -> Optional[int]:
+        if not os.path.exists(ts_path):
+            return None
+        n = os.path.getsize(ts_path) // 8
+        if os.path.exists(rate_path):
+            n = min(n, os.path.getsize(rate_path) // 8)
+        if not n:
+            return None
+        with open(ts_path, 'rb') as f:
+            f.seek((n - 1) * 8)
+            return _INT64.unpack(f.read(8))[0]
+
+    @contextmanager
+    def _exclusive(self, currency: str):
+        """Serialize writers of one currency across threads and processes"""
+        with self._lock, open(self._lock_path(currency), 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    @contextmanager
+    def _shared(self, currency: str):
+        """Keep writers out while a reader maps both columns"""
+        with open(self._lock_path(currency), 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+            yield
+
+    def _truncate_partial(self, ts_path: str, rate_path: str):
+        """Drop a half-written tail left by an interrupted append"""
+        sizes = [os.path.getsize(p) if os.path.exists(p) else 0 for p in (ts_path, rate_path)]
+        aligned = min(sizes) // 8 * 8
+        for path, size in zip((ts_path, rate_path), sizes):
+            if size > aligned:
+                os.truncate(path, aligned)
+
+    def _paths(self, currency: str) -> Tuple[str, str]:
+        return (os.path.join(self.directory, f'{currency}.ts'),
+                os.path.join(self.directory, f'{currency}.rate'))
+
+    def _lock_path(self, currency: str) -> str:
+        return os.path.join(self.directory, f'{currency}.lock')
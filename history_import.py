@@ -0,0 +1,390 @@
+import csv
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import unicodedata
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from models import db, ExchangeRateHistory
+from candles import DailyCandles
+from sqlalchemy import insert
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+logger = logging.getLogger(__name__)
+
+CURRENCIES = ('USD', 'EUR', 'CNY', 'TRY', 'RUB')
+# Names used for the currencies in BCV files and hand-made spreadsheets (accent-free, lowercase)
+CURRENCY_ALIASES = {
+    'dolar': 'USD', 'dolares': 'USD', 'us$': 'USD', '$': 'USD', 'dolar estadounidense': 'USD',
+    'euro': 'EUR', 'euros': 'EUR', '€': 'EUR',
+    'yuan': 'CNY', 'yuanes': 'CNY', 'renminbi': 'CNY', 'rmb': 'CNY', 'cny/rmb': 'CNY',
+    'lira': 'TRY', 'liras': 'TRY', 'lira turca': 'TRY',
+    'rublo': 'RUB', 'rublos': 'RUB', 'rublo ruso': 'RUB'
+}
+DATE_HEADERS = {'fecha', 'date', 'fecha valor', 'dia', 'day', 'created_at', 'timestamp'}
+CURRENCY_HEADERS = {'moneda', 'currency', 'divisa', 'codigo'}
+RATE_HEADERS = {'tasa', 'rate', 'valor', 'venta', 'bs/me', 'tipo de cambio', 'close'}
+MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7, 'agosto': 8,
+    'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12
+}
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+_NUMERIC_DATE = re.compile(r'(\d{1,2})[/\-.](\d{1,2})[/\-.](\d{4})')
+_LONG_DATE = re.compile(r'(\d{1,2})\s+(?:de\s+)?([a-z]+)\s+(?:de\s+)?(\d{4})')
+_COMPACT_DATE = re.compile(r'^(\d{2})(\d{2})(\d{4})$')
+
+Reading = Tuple[str, datetime, float]
+
+def _text(value) -> str:
+    """Lowercase, accent-free, whitespace-collapsed text of a cell"""
+    if value is None:
+        return ''
+    text = ''.join(c for c in unicodedata.normalize('NFKD', str(value)) if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+def normalize_currency(value) -> Optional[str]:
+    """ISO code for a currency cell (``'usd'``, ``'Dólar'``, ``'EUR '``), or None"""
+    text = _text(value)
+    if len(text) == 3 and text.isalpha():
+        return text.upper()
+    return CURRENCY_ALIASES.get(text)
+
+def parse_rate(value) -> Optional[float]:
+    """Float for a rate cell, accepting ``36,5432`` and ``1.234,56`` as well as ``36.5432``"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or '').replace('Bs.', '').replace('Bs', '').replace(' ', '').strip()
+    if not text:
+        return None
+    if ',' in text and '.' in text:
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif text.count(',') == 1:
+        text = text.replace(',', '.')
+    else:
+        text = text.replace(',', '')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def parse_date(value) -> Optional[Tuple[datetime, bool]]:
+    """
+    ``(datetime, date_only)`` for a date cell, or None
+
+    Accepts datetime/date cells, Excel serial numbers, ISO 8601, dd/mm/yyyy,
+    ddmmyyyy (BCV sheet names) and Spanish long dates ("Lunes, 14 Marzo 2025",
+    "Fecha Valor: 14/03/2025"). Aware datetimes are converted to naive UTC.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value, value.time() == datetime.min.time()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day), True
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if 20000 <= value <= 80000:  # Excel serial day between 1954 and 2119
+            return EXCEL_EPOCH + timedelta(days=float(value)), float(value).is_integer()
+        return None
+
+    text = _text(value)
+    if text.startswith('fecha valor'):
+        text = text[len('fecha valor'):].lstrip(' :')
+    if not text:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed, len(str(value).strip()) == 10
+    except ValueError:
+        pass
+    try:
+        match = _NUMERIC_DATE.search(text)
+        if match:
+            return datetime(int(match.group(3)), int(match.group(2)), int(match.group(1))), True
+        match = _LONG_DATE.search(text)
+        if match and match.group(2) in MONTHS:
+            return datetime(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1))), True
+        match = _COMPACT_DATE.match(text)
+        if match:
+            return datetime(int(match.group(3)), int(match.group(2)), int(match.group(1))), True
+    except ValueError:  # Day or month out of range
+        return None
+    return None
+
+def iter_rows(path: str, encoding: str = 'utf-8-sig') -> Iterator[Tuple[str, Sequence]]:
+    """
+    Stream ``(sheet_name, row)`` from a CSV, .xlsx or .xls file
+
+    CSV is read line by line, .xlsx in openpyxl's read-only mode and .xls one
+    sheet at a time (``on_demand``), so memory does not grow with file size.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        if openpyxl is None:
+            raise ImportError('Reading .xlsx files requires openpyxl (pip install openpyxl)')
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                for row in sheet.iter_rows(values_only=True):
+                    yield sheet.title, row
+        finally:
+            workbook.close()
+    elif extension == '.xls':
+        if xlrd is None:
+            raise ImportError('Reading .xls files requires xlrd (pip install xlrd)')
+        book = xlrd.open_workbook(path, on_demand=True)
+        try:
+            for index in range(book.nsheets):
+                sheet = book.sheet_by_index(index)
+                for row_index in range(sheet.nrows):
+                    yield sheet.name, [
+                        xlrd.xldate_as_datetime(cell.value, book.datemode) if cell.ctype == xlrd.XL_CELL_DATE
+                        else cell.value
+                        for cell in sheet.row(row_index)
+                    ]
+                book.unload_sheet(index)
+        finally:
+            book.release_resources()
+    else:
+        with open(path, newline='', encoding=encoding, errors='replace') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+            except csv.Error:
+                dialect = csv.excel
+            name = os.path.basename(path)
+            for row in csv.reader(f, dialect):
+                yield name, row
+
+class _SheetParser:
+    """
+    Turns the rows of one sheet into readings; the layout is detected from its rows:
+
+    long   a header with date, currency and rate columns
+    wide   a header with a date column and one column per currency code
+    bcv    BCV's daily sheets: a "Fecha Valor" cell, then one row per currency
+           whose last number is the Bs/ME selling rate
+    """
+
+    def __init__(self, sheet_name: str):
+        found = parse_date(sheet_name)
+        self.day = found[0] if found else None
+        self.date_column = None
+        self.currency_column = None
+        self.rate_column = None
+        self.currency_columns: Dict[int, str] = {}
+
+    def feed(self, row: Sequence) -> Optional[List[Tuple[str, Tuple[datetime, bool], float]]]:
+        """Readings for the row, or None if it was a header, blank or unparseable"""
+        if self.date_column is not None:
+            return self._tabular(row)
+        texts = [_text(cell) for cell in row]
+        if self._header(texts):
+            return None
+        for index, text in enumerate(texts):
+            if text.startswith('fecha valor'):
+                found = parse_date(text) or next(
+                    (parse_date(cell) for cell in row[index + 1:] if parse_date(cell)), None)
+                if found:
+                    self.day = found[0]
+                return None
+        return self._bcv(row) if self.day else None
+
+    def _header(self, texts: List[str]) -> bool:
+        date_column = next((i for i, text in enumerate(texts) if text in DATE_HEADERS), None)
+        if date_column is None:
+            return False
+        currency_column = next((i for i, text in enumerate(texts) if text in CURRENCY_HEADERS), None)
+        rate_column = next((i for i, text in enumerate(texts) if text in RATE_HEADERS), None)
+        if currency_column is None or rate_column is None:
+            self.currency_columns = {i: normalize_currency(text) for i, text in enumerate(texts)
+                                     if i != date_column and normalize_currency(text)}
+            if not self.currency_columns:
+                return False
+        self.date_column, self.currency_column, self.rate_column = date_column, currency_column, rate_column
+        return True
+
+    def _tabular(self, row: Sequence):
+        if len(row) <= self.date_column:
+            return None
+        found = parse_date(row[self.date_column])
+        if not found:
+            return None
+        if self.currency_columns:
+            readings = [(currency, found, parse_rate(row[i])) for i, currency in self.currency_columns.items()
+                        if i < len(row)]
+        elif max(self.currency_column, self.rate_column) < len(row):
+            readings = [(normalize_currency(row[self.currency_column]), found, parse_rate(row[self.rate_column]))]
+        else:
+            return None
+        return [reading for reading in readings if reading[0] and reading[2]] or None
+
+    def _bcv(self, row: Sequence):
+        for index, cell in enumerate(row):
+            currency = normalize_currency(cell) if isinstance(cell, str) else None
+            if currency:
+                rates = [rate for rate in (parse_rate(c) for c in row[index + 1:] if c not in (None, ''))
+                         if rate is not None]
+                return [(currency, (self.day, True), rates[-1])] if rates else None
+        return None
+
+class HistoryImporter:
+    """
+    Streams historical rate archives into ``exchange_rate_history``.
+
+    Rows are parsed one at a time and inserted in batches of ``batch_size``
+    with a single executemany per batch. Each batch is deduplicated within
+    itself and against the rows already stored for the same currencies and
+    time span (``created_at`` is indexed), and folded into the daily candles
+    in the same transaction. After every commit the number of rows consumed
+    is checkpointed in ``state_path``, so an interrupted import resumes where
+    it stopped; re-reading a few rows after a crash is harmless because of
+    the deduplication.
+
+    Date-only values are taken as local midnight (``utc_offset_hours``) and
+    stored in UTC; naive datetimes are assumed to be UTC already, as in the
+    API and the exports.
+    """
+
+    def __init__(self, currencies: Iterable[str] = CURRENCIES, utc_offset_hours: float = -4,
+                 batch_size: int = 5000, state_path: Optional[str] = None,
+                 candles: Optional[DailyCandles] = None, encoding: str = 'utf-8-sig'):
+        self.currencies = {c.upper() for c in currencies}
+        self.utc_offset = timedelta(hours=utc_offset_hours)
+        self.batch_size = max(1, batch_size)
+        self.state_path = state_path
+        self.candles = candles
+        self.encoding = encoding
+
+    def import_file(self, path: str, restart: bool = False,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Import one archive; returns counters and throughput"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        fingerprint = {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+        checkpoint = {} if restart else self._load_state().get(path, {})
+        if {k: checkpoint.get(k) for k in fingerprint} != fingerprint:
+            checkpoint = {}  # New or modified file: start over
+
+        stats = {
+            'file': path, 'rows_read': 0, 'readings': 0, 'inserted': 0, 'duplicates': 0, 'skipped': 0,
+            'resumed_from': checkpoint.get('position', 0), 'currencies': set(), 'seconds': 0.0
+        }
+        if checkpoint.get('done'):
+            stats['already_imported'] = True
+            stats['currencies'] = []
+            return stats
+
+        started = time.perf_counter()
+        resume_from = stats['resumed_from']
+        position = 0
+        batch: List[Reading] = []
+        parser, sheet = None, None
+        for sheet_name, row in iter_rows(path, self.encoding):
+            position += 1
+            if sheet_name != sheet:
+                parser, sheet = _SheetParser(sheet_name), sheet_name
+            # Rows before the checkpoint still go through the parser to restore header/date state
+            readings = parser.feed(row)
+            if position <= resume_from:
+                continue
+            stats['rows_read'] += 1
+            if readings is None:
+                if any(cell not in (None, '') for cell in row):
+                    stats['skipped'] += 1
+                continue
+            for currency, found, rate in readings:
+                if currency in self.currencies and rate > 0:
+                    batch.append((currency, self._to_utc(*found), rate))
+            if len(batch) >= self.batch_size:
+                self._flush(batch, stats)
+                self._save_checkpoint(path, {**fingerprint, 'position': position})
+                batch = []
+                stats['seconds'] = time.perf_counter() - started
+                if progress:
+                    progress(self._throughput(stats))
+
+        self._flush(batch, stats)
+        self._save_checkpoint(path, {**fingerprint, 'position': position, 'done': True})
+        stats['seconds'] = time.perf_counter() - started
+        stats['currencies'] = sorted(stats['currencies'])
+        return self._throughput(stats)
+
+    def _to_utc(self, value: datetime, date_only: bool) -> datetime:
+        return value - self.utc_offset if date_only else value
+
+    def _flush(self, batch: List[Reading], stats: Dict):
+        stats['readings'] += len(batch)
+        unique: Dict[Tuple[str, datetime], float] = {}
+        for currency, at, rate in batch:
+            unique.setdefault((currency, at), rate)
+        rows = []
+        if unique:
+            times = [at for _, at in unique]
+            existing = set(db.session.query(ExchangeRateHistory.currency, ExchangeRateHistory.created_at).filter(
+                ExchangeRateHistory.currency.in_({currency for currency, _ in unique}),
+                ExchangeRateHistory.created_at.between(min(times), max(times))
+            ))
+            rows = [{
+                'currency': currency,
+                'rate': rate,
+                'date_published': (at + self.utc_offset).date().isoformat(),
+                'created_at': at
+            } for (currency, at), rate in unique.items() if (currency, at) not in existing]
+            if rows:
+                db.session.execute(insert(ExchangeRateHistory), rows)
+                if self.candles:
+                    self.candles.record((row['currency'], row['created_at'], row['rate']) for row in rows)
+            db.session.commit()
+        stats['inserted'] += len(rows)
+        stats['duplicates'] += len(batch) - len(rows)
+        stats['currencies'].update(row['currency'] for row in rows)
+
+    @staticmethod
+    def _throughput(stats: Dict) -> Dict:
+        seconds = stats['seconds'] or 1e-9
+        stats['rows_per_second'] = round(stats['rows_read'] / seconds, 1)
+        stats['inserted_per_second'] = round(stats['inserted'] / seconds, 1)
+        return stats
+
+    def _load_state(self) -> Dict:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable import state {self.state_path}: {str(e)}")
+            return {}
+
+    def _save_checkpoint(self, path: str, checkpoint: Dict):
+        """Atomically record progress for ``path`` (after the batch is committed)"""
+        if not self.state_path:
+            return
+        state = self._load_state()
+        state[path] = checkpoint
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.import_state_')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.state_path)
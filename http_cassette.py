@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'record', 'replay')
+# Set by the transport for the body we store decoded; kept out of the cassette
+_HOP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Replay mode got a request that was never recorded"""
+
+class HttpCassette:
+    """
+    Records HTTP responses to a directory and replays them offline.
+
+    Each request (method + URL) maps to one JSON file holding the list of
+    responses recorded for it: status, reason, headers, body and how long the
+    server took. Replay serves them in recording order and keeps returning the
+    last one, so a cassette recorded across several refreshes reproduces the
+    same sequence of pages on every run. ``latency`` adds simulated network
+    time on replay: ``'recorded'`` sleeps for the recorded duration, a number
+    sleeps that many seconds, and None replays instantly.
+    """
+
+    def __init__(self, directory: str, mode: str = 'replay', latency: Union[None, str, float] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'. Valid modes: {', '.join(MODES)}")
+        self.directory = directory
+        self.mode = mode
+        self.latency = latency
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {'recorded': 0, 'replayed': 0, 'misses': 0}
+        if mode == 'record':
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return hashlib.sha1(f'{method.upper()} {url}'.encode('utf-8')).hexdigest()[:16]
+
+    def path(self, method: str, url: str) -> str:
+        return os.path.join(self.directory, f'{self.key(method, url)}.json')
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """Route the session's http(s) traffic through the cassette (no-op when off)"""
+        if self.mode != 'off':
+            adapter = CassetteAdapter(self)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
+
+    def load(self, method: str, url: str) -> List[Dict]:
+        path = self.path(method, url)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['interactions']
+
+    def save(self, method: str, url: str, status: int, headers: Dict[str, str], body: bytes,
+             elapsed_seconds: float = 0.0, reason: str = 'OK'):
+        """Append a response for ``method url`` to its cassette file"""
+        with self._lock:
+            interactions = self.load(method, url)
+            interactions.append({
+                'status': status,
+                'reason': reason,
+                'headers': {k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS},
+                'body_base64': base64.b64encode(body).decode('ascii'),
+                'elapsed_seconds': round(elapsed_seconds, 6),
+                'recorded_at': datetime.utcnow().isoformat()
+            })
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.cassette_')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'method': method.upper(), 'url': url, 'interactions': interactions}, f, indent=2)
+            os.replace(temp_path, self.path(method, url))
+            self._stats['recorded'] += 1
+
+    def next_interaction(self, method: str, url: str) -> Optional[Dict]:
+        """The next recorded response for ``method url`` (the last one repeats), or None"""
+        interactions = self.load(method, url)
+        if not interactions:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        key = self.key(method, url)
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self._stats['replayed'] += 1
+        return interactions[min(position, len(interactions) - 1)]
+
+    def rewind(self):
+        """Replay every sequence from its first response again"""
+        with self._lock:
+            self._positions.clear()
+
+    def replay_delay(self, interaction: Dict) -> float:
+        if self.latency == 'recorded':
+            return interaction.get('elapsed_seconds', 0.0)
+        return float(self.latency or 0)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'mode': self.mode, 'directory': self.directory, **self._stats}
+
+class CassetteAdapter(BaseAdapter):
+    """requests transport adapter that records through a real HTTPAdapter or replays from a cassette"""
+
+    def __init__(self, cassette: HttpCassette):
+        super().__init__()
+        self.cassette = cassette
+        self.http = HTTPAdapter() if cassette.mode == 'record' else None
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == 'record':
+            started = time.perf_counter()
+            response = self.http.send(request, **kwargs)
+            body = response.content
+            self.cassette.save(request.method, request.url, response.status_code, dict(response.headers), body,
+                               time.perf_counter() - started, response.reason or '')
+            return response
+
+        interaction = self.cassette.next_interaction(request.method, request.url)
+        if interaction is None:
+            raise CassetteMiss(f'No recorded response for {request.method} {request.url} '
+                               f'in {self.cassette.directory}', request=request)
+        delay = self.cassette.replay_delay(interaction)
+        if delay:
+            time.sleep(delay)
+        return self.build_response(request, interaction)
+
+    @staticmethod
+    def build_response(request, interaction: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction.get('reason', '')
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response._content = base64.b64decode(interaction['body_base64'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction.get('elapsed_seconds', 0.0))
+        return response
+
+    def close(self):
+        if self.http:
+            self.http.close()
+
+def parse_latency(value: Optional[str]) -> Union[None, str, float]:
+    """``''`` -> None, ``'recorded'`` -> 'recorded', ``'0.25'`` -> 0.25"""
+    value = (value or '').strip().lower()
+    if not value:
+        return None
+    return value if value == 'recorded' else float(value)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Importa archivos históricos de tasas del BCV (hojas de cálculo o CSV) a ExchangeRateHistory
+
+Lee cada archivo fila por fila (memoria acotada), normaliza divisas, fechas y
+números ("36,5432", "Fecha Valor: 14/03/2025", "Lunes, 14 Marzo 2025"), inserta
+por lotes, descarta filas ya existentes y guarda un punto de control tras cada
+lote: si se interrumpe, volver a ejecutar el mismo comando continúa donde quedó.
+
+Formatos: .csv, .xlsx (requiere openpyxl) y .xls (requiere xlrd). Se admiten
+las hojas diarias del BCV ("Fecha Valor" y una fila por moneda), tablas largas
+(fecha, moneda, tasa) y anchas (fecha, USD, EUR, ...).
+
+Uso:
+    python import_history.py archivos/2_1_2c*.xls
+    python import_history.py tasas_2015_2024.csv --currencies USD,EUR --batch-size 20000
+    python import_history.py tasas.csv --restart
+"""
+
+import argparse
+import sys
+import time
+
+from flask import Flask
+
+from candles import DailyCandles
+from config import get_config, DatabaseConfig
+from history_archive import HistoryArchive
+from history_import import CURRENCIES, HistoryImporter
+from migrations import SchemaMigrator
+from models import db
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Importar archivos históricos de tasas del BCV')
+    parser.add_argument('files', nargs='+', help='Archivos .csv, .xlsx o .xls')
+    parser.add_argument('--currencies', default=','.join(CURRENCIES),
+                        help=f'Divisas a importar separadas por comas (por defecto {",".join(CURRENCIES)})')
+    parser.add_argument('--batch-size', type=int, help='Filas por lote (por defecto IMPORT_BATCH_SIZE)')
+    parser.add_argument('--state-file', default='import_history_state.json',
+                        help='Archivo de puntos de control para reanudar (por defecto import_history_state.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignorar el punto de control y empezar de cero')
+    parser.add_argument('--encoding', default='utf-8-sig', help='Codificación de los CSV (por defecto utf-8-sig)')
+    parser.add_argument('--no-candles', action='store_true', help='No actualizar las velas diarias')
+    return parser.parse_args(argv)
+
+def print_progress(stats):
+    print(f"   … {stats['rows_read']:,} filas, {stats['inserted']:,} insertadas "
+          f"({stats['rows_per_second']:,.0f} filas/s)", flush=True)
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = get_config()
+
+    app = Flask(__name__)
+    app.config.update(DatabaseConfig.get_database_config())
+    db.init_app(app)
+
+    importer = HistoryImporter(
+        currencies=[c.strip() for c in args.currencies.split(',') if c.strip()],
+        utc_offset_hours=config.CANDLE_UTC_OFFSET_HOURS,
+        batch_size=args.batch_size or config.IMPORT_BATCH_SIZE,
+        state_path=args.state_file,
+        candles=None if args.no_candles else DailyCandles(utc_offset_hours=config.CANDLE_UTC_OFFSET_HOURS),
+        encoding=args.encoding
+    )
+
+    started = time.perf_counter()
+    total_rows, total_inserted, currencies = 0, 0, set()
+    with app.app_context():
+        SchemaMigrator(db.engine).migrate()
+        for path in args.files:
+            print(f'📥 {path}')
+            try:
+                stats = importer.import_file(path, restart=args.restart, progress=print_progress)
+            except (OSError, ImportError) as e:
+                print(f'❌ {e}', file=sys.stderr)
+                return 2
+            if stats.get('already_imported'):
+                print('   ya importado (usar --restart para repetir)')
+                continue
+            if stats['resumed_from']:
+                print(f"   reanudado tras {stats['resumed_from']:,} filas")
+            print(f"   {stats['rows_read']:,} filas leídas, {stats['inserted']:,} insertadas, "
+                  f"{stats['duplicates']:,} duplicadas, {stats['skipped']:,} sin datos en "
+                  f"{stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} filas/s)")
+            total_rows += stats['rows_read']
+            total_inserted += stats['inserted']
+            currencies.update(stats['currencies'])
+
+        # Imported rows are usually older than the archive tail, so rewrite the affected columns
+        if currencies and config.HISTORY_ARCHIVE_ENABLED:
+            archive = HistoryArchive(config.HISTORY_ARCHIVE_DIR)
+            for currency in sorted(currencies):
+                archive.rebuild_from_db(currency)
+            print(f"🗂️  Archivo columnar reconstruido para {', '.join(sorted(currencies))}")
+
+    elapsed = time.perf_counter() - started
+    print(f'✅ {total_inserted:,} tasas importadas de {total_rows:,} filas en {elapsed:.2f}s '
+          f'({total_rows / elapsed if elapsed else 0:,.0f} filas/s)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
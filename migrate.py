@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Aplica las migraciones de esquema pendientes (índices, restricciones y correcciones de datos)
+
+Las tablas nuevas se crean desde los modelos; las migraciones versionadas de
+migrations.py añaden o reemplazan índices y restricciones en tablas existentes
+y quedan registradas en la tabla schema_migrations. Con SCHEMA_AUTO_MIGRATE=true
+(por defecto) cada proceso web las aplica al iniciar; con false, ejecutar este
+script en cada despliegue antes de arrancar los workers.
+
+Funciona con SQLite, PostgreSQL y MySQL/MariaDB (según DATABASE_URL / DB_PATH).
+
+Uso:
+    python migrate.py           # aplicar las pendientes
+    python migrate.py --status  # solo mostrar la versión actual y las pendientes
+"""
+
+import argparse
+import logging
+import sys
+
+from flask import Flask
+
+from config import DatabaseConfig
+from migrations import SchemaMigrator
+from models import db
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Migraciones de esquema de la base de datos')
+    parser.add_argument('--status', action='store_true', help='Mostrar el estado sin aplicar nada')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    app = Flask(__name__)
+    app.config.update(DatabaseConfig.get_database_config())
+    db.init_app(app)
+
+    with app.app_context():
+        migrator = SchemaMigrator(db.engine)
+        print(f'🗄️  Base de datos: {db.engine.url.render_as_string(hide_password=True)}')
+        if not args.status:
+            applied = migrator.migrate()
+            print(f"✅ {len(applied)} migraciones aplicadas" if applied else '✅ Nada que aplicar')
+        status = migrator.get_status()
+        if status is None:
+            print('❌ No se pudo leer schema_migrations', file=sys.stderr)
+            return 1
+        print(f"   versión {status['version']} de {status['latest']}")
+        for name in status['pending']:
+            print(f'   pendiente: {name}')
+    return 1 if args.status and status['pending'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
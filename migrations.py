@@ -0,0 +1,190 @@
+import logging
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import Index, MetaData, Table, inspect, select, delete, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from models import (db, ExchangeRate, ExchangeRateHistory, UpdateLog, ApiMetrics, SchemaMigration, WebhookDelivery,
+                    WebhookSubscription)
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'name', 'apply'])
+
+# Columns of indexes a later version replaced, which the models no longer declare, so the
+# versions that introduced them still run as released
+RETIRED_INDEXES = {
+    # Version 1; replaced by ix_api_metrics_created_at_id in version 3
+    'ix_api_metrics_created_at_endpoint': ('created_at', 'endpoint'),
+}
+
+def _indexes(conn, table_name: str) -> Dict[str, Dict]:
+    return {index['name']: index for index in inspect(conn).get_indexes(table_name)}
+
+def _model_index(model, name: str):
+    return next(index for index in model.__table__.indexes if index.name == name)
+
+def _create_index(conn, model, name: str):
+    """Create an index declared on a model (or in RETIRED_INDEXES) unless the table already has it"""
+    if name in _indexes(conn, model.__tablename__):
+        return
+    if name in RETIRED_INDEXES:
+        table = Table(model.__tablename__, MetaData(), autoload_with=conn)
+        Index(name, *(table.c[column] for column in RETIRED_INDEXES[name])).create(conn)
+    else:
+        _model_index(model, name).create(conn)
+    logger.info(f"Created index {name} on {model.__tablename__}")
+
+def _drop_index(conn, table_name: str, name: str):
+    """Drop an index that is no longer declared on the models"""
+    if name not in _indexes(conn, table_name):
+        return
+    # Reflected into a throwaway MetaData so the models' tables are left untouched
+    table = Table(table_name, MetaData(), autoload_with=conn)
+    next(index for index in table.indexes if index.name == name).drop(conn)
+    logger.info(f"Dropped index {name} on {table_name}")
+
+def add_hot_path_indexes(conn):
+    _create_index(conn, UpdateLog, 'ix_update_logs_status_created_at')
+    _create_index(conn, ApiMetrics, 'ix_api_metrics_created_at_endpoint')
+    # The composite index leads with created_at, so the single-column one is redundant
+    _drop_index(conn, ApiMetrics.__tablename__, 'ix_api_metrics_created_at')
+
+def unique_exchange_rate_currency(conn):
+    name = 'ix_exchange_rates_currency'
+    existing = _indexes(conn, ExchangeRate.__tablename__).get(name)
+    if existing and existing['unique']:
+        return
+
+    # Keep the most recently updated row per currency; that is the one the API served
+    table = ExchangeRate.__table__
+    keep, duplicates = {}, []
+    rows = conn.execute(select(table.c.id, table.c.currency, table.c.updated_at).order_by(table.c.id))
+    for row_id, currency, updated_at in rows:
+        current = keep.get(currency)
+        if current is None:
+            keep[currency] = (row_id, updated_at)
+        elif (updated_at or datetime.min) >= (current[1] or datetime.min):
+            duplicates.append(current[0])
+            keep[currency] = (row_id, updated_at)
+        else:
+            duplicates.append(row_id)
+    if duplicates:
+        conn.execute(delete(table).where(table.c.id.in_(duplicates)))
+        logger.warning(f"Removed {len(duplicates)} duplicate exchange_rates rows before adding the unique constraint")
+
+    if existing:
+        _drop_index(conn, ExchangeRate.__tablename__, name)
+    _model_index(ExchangeRate, name).create(conn)
+    logger.info(f"Created unique index {name} on {ExchangeRate.__tablename__}")
+
+def add_keyset_pagination_indexes(conn):
+    # Each ends in (created_at, id), the order cursors resume from (see pagination.py)
+    _create_index(conn, UpdateLog, 'ix_update_logs_created_at_id')
+    _create_index(conn, ApiMetrics, 'ix_api_metrics_created_at_id')
+    # Serves the /api/metrics range scans as well; one index less to write on every request
+    _drop_index(conn, ApiMetrics.__tablename__, 'ix_api_metrics_created_at_endpoint')
+    _create_index(conn, ExchangeRateHistory, 'ix_exchange_rate_history_currency_created_at_id')
+    _create_index(conn, WebhookDelivery, 'ix_webhook_deliveries_subscription_created_at_id')
+
+def add_webhook_management_tokens(conn):
+    table = WebhookSubscription.__table__
+    if 'token_hash' in {column['name'] for column in inspect(conn).get_columns(table.name)}:
+        return
+    # Subscriptions registered before this version have no token; only the admin token manages them
+    column = table.c.token_hash
+    conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}')
+    logger.info(f"Added column {column.name} to {table.name}")
+
+# Append only: a released version is never edited or renumbered
+MIGRATIONS = [
+    Migration(1, 'hot_path_indexes', add_hot_path_indexes),
+    Migration(2, 'unique_exchange_rate_currency', unique_exchange_rate_currency),
+    Migration(3, 'keyset_pagination_indexes', add_keyset_pagination_indexes),
+    Migration(4, 'webhook_management_tokens', add_webhook_management_tokens),
+]
+
+class SchemaMigrator:
+    """
+    Versioned schema migrations on top of the models.
+
+    New tables (and the indexes declared on them) still come from the models
+    via ``create_all``; migrations cover what ``create_all`` cannot do to an
+    existing table: add or replace indexes and constraints and fix the data
+    they need. Applied versions are recorded in ``schema_migrations`` and every
+    migration checks the live schema first, so a database created from the
+    current models runs them as no-ops.
+
+    Each migration runs in its own transaction that starts by inserting its
+    version row. When several workers start at once, the others block on that
+    row (or fail on its primary key) and skip the version instead of applying
+    it twice. On MySQL/MariaDB DDL commits implicitly, so a failed migration
+    removes its row again to be retried on the next start.
+    """
+
+    def __init__(self, engine, migrations: Optional[List[Migration]] = None):
+        self.engine = engine
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS, key=lambda m: m.version)
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def applied_versions(self) -> List[int]:
+        table = SchemaMigration.__table__
+        with self.engine.connect() as conn:
+            if not inspect(conn).has_table(table.name):
+                return []
+            return [row[0] for row in conn.execute(select(table.c.version).order_by(table.c.version))]
+
+    def pending(self) -> List[Migration]:
+        applied = set(self.applied_versions())
+        return [migration for migration in self.migrations if migration.version not in applied]
+
+    def migrate(self) -> List[int]:
+        """Create missing tables and apply pending migrations; returns the versions applied here"""
+        db.metadata.create_all(self.engine)
+        applied = []
+        for migration in self.pending():
+            if self._apply(migration):
+                applied.append(migration.version)
+        if applied:
+            logger.info(f"Schema migrated to version {self.latest_version} (applied {applied})")
+        return applied
+
+    def get_status(self) -> Optional[Dict]:
+        try:
+            applied = self.applied_versions()
+            return {
+                'version': max(applied) if applied else 0,
+                'latest': self.latest_version,
+                'pending': [f'{m.version}_{m.name}' for m in self.migrations if m.version not in applied]
+            }
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting schema status: {str(e)}")
+            return None
+
+    def _apply(self, migration: Migration) -> bool:
+        table = SchemaMigration.__table__
+        label = f'{migration.version}_{migration.name}'
+        with self.engine.connect() as conn:
+            transaction = conn.begin()
+            try:
+                conn.execute(insert(table).values(version=migration.version, name=migration.name,
+                                                  applied_at=datetime.utcnow()))
+            except IntegrityError:
+                transaction.rollback()
+                logger.info(f"Schema migration {label} was applied by another process")
+                return False
+            try:
+                logger.info(f"Applying schema migration {label}")
+                migration.apply(conn)
+                transaction.commit()
+                return True
+            except Exception:
+                logger.error(f"Schema migration {label} failed")
+                transaction.rollback()
+                # MySQL/MariaDB may have committed the version row along with the DDL
+                with self.engine.begin() as cleanup:
+                    cleanup.execute(delete(table).where(table.c.version == migration.version))
+                raise
@@ -1,4 +1,5 @@
 import os
+import json
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
@@ -13,7 +14,7 @@ class ExchangeRate(db.Model):
     __tablename__ = 'exchange_rates'
     
     id = db.Column(db.Integer, primary_key=True)
-    currency = db.Column(db.String(3), nullable=False, index=True)  # USD, EUR, etc.
+    currency = db.Column(db.String(3), nullable=False, unique=True, index=True)  # USD, EUR, etc.
     rate = db.Column(db.Float, nullable=False)  # Exchange rate value
     date_published = db.Column(db.String(100))  # Date from BCV (as text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -35,6 +36,11 @@ class ExchangeRate(db.Model):
 class UpdateLog(db.Model):
     """Model for tracking BCV scraping updates"""
     __tablename__ = 'update_logs'
+    # should_update_rates(): WHERE status = 'success' ORDER BY created_at DESC LIMIT 1
+    __table_args__ = (
+        db.Index('ix_update_logs_status_created_at', 'status', 'created_at'),
+        db.Index('ix_update_logs_created_at_id', 'created_at', 'id'),  # Keyset pagination (/api/updates)
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     status = db.Column(db.String(20), nullable=False)  # success, error
@@ -55,9 +61,87 @@ class UpdateLog(db.Model):
     def __repr__(self):
         return f'<UpdateLog {self.status}: {self.currencies_updated} currencies>'
 
+class CircuitBreakerState(db.Model):
+    """Model for sharing circuit breaker state across workers"""
+    __tablename__ = 'circuit_breaker_state'
+
+    name = db.Column(db.String(50), primary_key=True)
+    state = db.Column(db.String(10), nullable=False, default='closed')  # closed, open, half_open
+    failure_count = db.Column(db.Integer, default=0)  # Consecutive failures while closed
+    consecutive_opens = db.Column(db.Integer, default=0)  # Drives the exponential backoff
+    opened_until = db.Column(db.DateTime)
+    probe_started_at = db.Column(db.DateTime)
+    last_failure_at = db.Column(db.DateTime)
+    last_success_at = db.Column(db.DateTime)
+    opened_total = db.Column(db.Integer, default=0)
+    half_opened_total = db.Column(db.Integer, default=0)
+    closed_total = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'state': self.state,
+            'failure_count': self.failure_count,
+            'consecutive_opens': self.consecutive_opens,
+            'opened_until': self.opened_until.isoformat() if self.opened_until else None,
+            'last_failure_at': self.last_failure_at.isoformat() if self.last_failure_at else None,
+            'last_success_at': self.last_success_at.isoformat() if self.last_success_at else None,
+            'transitions': {
+                'opened': self.opened_total,
+                'half_opened': self.half_opened_total,
+                'closed': self.closed_total
+            }
+        }
+
+    def __repr__(self):
+        return f'<CircuitBreakerState {self.name}: {self.state}>'
+
+class RefreshLease(db.Model):
+    """Model for the cluster-wide lease held by the process refreshing rates from BCV"""
+    __tablename__ = 'refresh_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(255))  # host:pid:thread of the current holder
+    acquired_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)  # A crashed holder loses the lease after this
+    acquired_total = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        now = datetime.utcnow()
+        held = bool(self.holder and self.expires_at and self.expires_at > now)
+        return {
+            'name': self.name,
+            'held': held,
+            'holder': self.holder if held else None,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None,
+            'expires_at': self.expires_at.isoformat() if held else None,
+            'acquired_total': self.acquired_total
+        }
+
+    def __repr__(self):
+        return f'<RefreshLease {self.name}: {self.holder}>'
+
+class SchemaMigration(db.Model):
+    """Model for recording applied schema migrations (see migrations.py)"""
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'name': self.name,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None
+        }
+
 class ExchangeRateHistory(db.Model):
     """Model for storing historical exchange rates"""
     __tablename__ = 'exchange_rate_history'
+    # Keyset pagination of /api/history/<currency>?source=database
+    __table_args__ = (db.Index('ix_exchange_rate_history_currency_created_at_id', 'currency', 'created_at', 'id'),)
     
     id = db.Column(db.Integer, primary_key=True)
     currency = db.Column(db.String(3), nullable=False, index=True)
@@ -73,9 +157,121 @@ class ExchangeRateHistory(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class DailyCandle(db.Model):
+    """Model for daily open/high/low/close rates per currency, upserted on each update"""
+    __tablename__ = 'daily_candles'
+    __table_args__ = (db.UniqueConstraint('currency', 'day', name='uq_daily_candles_currency_day'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    currency = db.Column(db.String(3), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # Local day (CANDLE_UTC_OFFSET_HOURS)
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=1)  # Rate readings aggregated into the candle
+    opened_at = db.Column(db.DateTime, nullable=False)  # UTC time of the open reading
+    closed_at = db.Column(db.DateTime, nullable=False)  # UTC time of the close reading
+    
+    def to_dict(self):
+        return {
+            'currency': self.currency,
+            'day': self.day.isoformat(),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'samples': self.samples,
+            'opened_at': self.opened_at.isoformat(),
+            'closed_at': self.closed_at.isoformat()
+        }
+    
+    def __repr__(self):
+        return f'<DailyCandle {self.currency} {self.day}: {self.close}>'
+
+class RateSnapshot(db.Model):
+    """Model for versioned snapshots of the published rates"""
+    __tablename__ = 'rate_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Snapshot version, monotonically increasing
+    rates = db.Column(db.Text, nullable=False)  # JSON object {currency: rate}
+    date_published = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'version': self.id,
+            'rates': json.loads(self.rates),
+            'date_published': self.date_published,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<RateSnapshot v{self.id}>'
+
+class WebhookSubscription(db.Model):
+    """Model for endpoints notified when the published rates change"""
+    __tablename__ = 'webhook_subscriptions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), nullable=False)
+    secret = db.Column(db.String(100))  # Used to sign payloads (HMAC-SHA256)
+    description = db.Column(db.String(200))
+    max_concurrency = db.Column(db.Integer, default=2)  # In-flight deliveries per worker process
+    token_hash = db.Column(db.String(64))  # SHA-256 of the management token returned on registration
+    active = db.Column(db.Boolean, default=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'description': self.description,
+            'max_concurrency': self.max_concurrency,
+            'active': self.active,
+            'signed': bool(self.secret),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class WebhookDelivery(db.Model):
+    """Model for the persistent webhook delivery and retry queue"""
+    __tablename__ = 'webhook_deliveries'
+    # Keyset pagination of /api/webhooks/<id>/deliveries
+    __table_args__ = (
+        db.Index('ix_webhook_deliveries_subscription_created_at_id', 'subscription_id', 'created_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    subscription_id = db.Column(db.Integer, db.ForeignKey('webhook_subscriptions.id'), nullable=False, index=True)
+    event = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON body sent to the subscriber
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending, delivering, delivered, failed
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_status_code = db.Column(db.Integer)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'subscription_id': self.subscription_id,
+            'event': self.event,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_status_code': self.last_status_code,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None
+        }
+
 class ApiMetrics(db.Model):
     """Model for tracking API usage metrics"""
     __tablename__ = 'api_metrics'
+    # /api/metrics range scans (WHERE created_at >= ?) and keyset pagination of /api/metrics/requests
+    __table_args__ = (db.Index('ix_api_metrics_created_at_id', 'created_at', 'id'),)
     
     id = db.Column(db.Integer, primary_key=True)
     endpoint = db.Column(db.String(100), nullable=False)
@@ -84,7 +280,7 @@ class ApiMetrics(db.Model):
     response_format = db.Column(db.String(10))  # json, csv, xml
     status_code = db.Column(db.Integer)
     response_time_ms = db.Column(db.Float)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import tuple_
+
+Key = Tuple[datetime, int]
+
+def encode_cursor(scope: str, key: Key) -> str:
+    """Opaque cursor for the position just after ``key`` (a ``(created_at, id)`` pair) in a listing"""
+    timestamp, tiebreak = key
+    payload = json.dumps([scope, timestamp.isoformat(), tiebreak], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: Optional[str], scope: str) -> Optional[Key]:
+    """Key of a cursor from ``encode_cursor``; ValueError if it is malformed or from another listing"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_scope, timestamp, tiebreak = json.loads(raw)
+        key = (datetime.fromisoformat(timestamp), int(tiebreak))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Malformed cursor') from e
+    if cursor_scope != scope:
+        raise ValueError('Cursor belongs to a different listing')
+    return key
+
+def keyset_page(query, time_column, id_column, after: Optional[Key], limit: int, descending: bool = False,
+                key: Callable = lambda row: (row.created_at, row.id)) -> Tuple[List, Optional[Key]]:
+    """
+    One page of ``query`` ordered by ``(time_column, id_column)``, resuming after ``after``.
+
+    The position is a row-value comparison instead of an OFFSET, so with an
+    index ending in ``(time_column, id_column)`` every page is an index range
+    scan of ``limit + 1`` rows however deep it is. Returns the rows and the
+    key to resume from, or None on the last page.
+    """
+    position = tuple_(time_column, id_column)
+    if after is not None:
+        query = query.filter(position < tuple_(*after) if descending else position > tuple_(*after))
+    if descending:
+        query = query.order_by(time_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(time_column, id_column)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, key(rows[-1])
+
+def page_size(value: Optional[int], default: int, maximum: int) -> int:
+    """Requested page size clamped to ``[1, maximum]``"""
+    if value is None:
+        return default
+    return max(1, min(value, maximum))
@@ -0,0 +1,115 @@
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import or_
+from models import ExchangeRateHistory
+
+logger = logging.getLogger(__name__)
+
+class RateIndex:
+    """
+    In-memory, per-currency sorted index of the rate history for point-in-time
+    ("as of") lookups.
+
+    The index remembers the highest ``ExchangeRateHistory.id`` it has seen and
+    ``refresh()`` only loads newer rows, so keeping it current costs one
+    primary-key range query. Back-filled rows with older timestamps are placed
+    with ``insort`` so the per-currency lists always stay sorted.
+
+    Ids are assigned at insert time but become visible at commit, so a
+    transaction that commits after a later one leaves a hole below the high
+    water mark. Every hole is remembered and re-read on each refresh until
+    its rows show up or ``gap_ttl_seconds`` pass (ids of rolled-back
+    transactions never appear).
+    """
+
+    def __init__(self, batch_size: int = 10000, gap_ttl_seconds: float = 600):
+        self.batch_size = batch_size
+        self.gap_ttl_seconds = gap_ttl_seconds
+        self._timestamps: Dict[str, List[datetime]] = {}
+        self._rates: Dict[str, List[float]] = {}
+        self._last_id = 0
+        self._gaps: List[Tuple[int, int, float, Set[int]]] = []  # (first id, last id, noticed at, ids seen)
+        self._lock = threading.RLock()
+
+    def refresh(self) -> int:
+        """Load history rows added since the last refresh; returns how many"""
+        with self._lock:
+            now = time.monotonic()
+            self._gaps = [gap for gap in self._gaps if now - gap[2] < self.gap_ttl_seconds]
+            rows = ExchangeRateHistory.query.with_entities(
+                ExchangeRateHistory.id,
+                ExchangeRateHistory.currency,
+                ExchangeRateHistory.created_at,
+                ExchangeRateHistory.rate
+            ).filter(or_(
+                ExchangeRateHistory.id > self._last_id,
+                *(ExchangeRateHistory.id.between(first, last) for first, last, _, _ in self._gaps)
+            )).order_by(ExchangeRateHistory.id).yield_per(self.batch_size)
+
+            added = 0
+            initial = not self._last_id  # Holes in old history are rollbacks, not late commits
+            for row_id, currency, created_at, rate in rows:
+                if row_id > self._last_id:
+                    if row_id > self._last_id + 1 and not initial:
+                        self._gaps.append((self._last_id + 1, row_id - 1, now, set()))
+                    self._last_id = row_id
+                elif not self._fill_gap(row_id):
+                    continue  # Already loaded on an earlier pass over the hole
+                if created_at is None:
+                    continue
+                self._insert(currency, created_at, rate)
+                added += 1
+            self._gaps = [gap for gap in self._gaps if len(gap[3]) <= gap[1] - gap[0]]
+
+            if added:
+                logger.debug(f"Rate index loaded {added} history rows (last id {self._last_id})")
+            return added
+
+    def lookup(self, currency: str, as_of: datetime) -> Optional[Tuple[datetime, float]]:
+        """Latest ``(effective_at, rate)`` at or before ``as_of``, or None"""
+        with self._lock:
+            timestamps = self._timestamps.get(currency.upper())
+            if not timestamps:
+                return None
+            position = bisect.bisect_right(timestamps, as_of) - 1
+            if position < 0:
+                return None
+            return timestamps[position], self._rates[currency.upper()][position]
+
+    def lookup_many(self, currency: str, dates: List[datetime]) -> List[Optional[Tuple[datetime, float]]]:
+        """Batched ``lookup`` for many instants, in the order given"""
+        with self._lock:
+            return [self.lookup(currency, as_of) for as_of in dates]
+
+    def pending_gaps(self) -> int:
+        """Holes below the high water mark still being re-read"""
+        with self._lock:
+            return len(self._gaps)
+
+    def _fill_gap(self, row_id: int) -> bool:
+        """Mark a late row as seen; False if it already was"""
+        for first, last, _, seen in self._gaps:
+            if first <= row_id <= last:
+                if row_id in seen:
+                    return False
+                seen.add(row_id)
+                return True
+        return False
+
+    def currencies(self) -> List[str]:
+        return sorted(self._timestamps)
+
+    def _insert(self, currency: str, created_at: datetime, rate: float):
+        timestamps = self._timestamps.setdefault(currency, [])
+        rates = self._rates.setdefault(currency, [])
+        if not timestamps or created_at >= timestamps[-1]:
+            timestamps.append(created_at)
+            rates.append(rate)
+        else:
+            position = bisect.bisect_right(timestamps, created_at)
+            timestamps.insert(position, created_at)
+            rates.insert(position, rate)
@@ -0,0 +1,119 @@
+import json
+import logging
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+class RateBroadcaster:
+    """
+    Fans rate snapshot changes out to Server-Sent Events subscribers.
+
+    A single background poller per process watches the snapshot version and
+    wakes every waiting stream through a shared condition, so idle
+    connections cost no database queries. Connections themselves are plain
+    generators: under gunicorn's gevent worker (``-k gevent``) each one is a
+    greenlet and the condition wait yields cooperatively, so thousands of
+    idle streams do not need a thread each.
+    """
+
+    def __init__(self, app, db_service, poll_interval: float = 2.0, heartbeat_interval: float = 15.0,
+                 max_connections: int = 5000):
+        self.app = app
+        self.db_service = db_service
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.max_connections = max_connections
+        self._condition = threading.Condition()
+        self._snapshot: Optional[Dict] = None
+        self._version = 0
+        self._connections = 0
+        self._events_sent = 0
+        self._poller = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def get_stats(self) -> Dict:
+        return {
+            'connections': self._connections,
+            'max_connections': self.max_connections,
+            'snapshot_version': self._version,
+            'events_sent': self._events_sent
+        }
+
+    def try_acquire(self) -> bool:
+        """Reserve a connection slot; False when the process is at capacity"""
+        with self._condition:
+            if self._connections >= self.max_connections:
+                return False
+            self._connections += 1
+        self._ensure_poller()
+        return True
+
+    def stream(self, last_event_id: Optional[int] = None) -> Iterator[str]:
+        """
+        Generate the SSE wire format for one subscriber. A slot must have been
+        reserved with ``try_acquire``; it is released when the client goes away.
+        """
+        try:
+            yield f"retry: {int(self.poll_interval * 2500)}\n\n"
+            # Versions start at 1: with nothing published yet (version 0) the stream waits instead of spinning
+            known = max(last_event_id or 0, 0)
+            while True:
+                snapshot = self._wait_for_change(known, self.heartbeat_interval)
+                if snapshot:
+                    known = snapshot['version']
+                    self._events_sent += 1
+                    yield self.format_event(snapshot)
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            with self._condition:
+                self._connections -= 1
+
+    @staticmethod
+    def format_event(snapshot: Dict) -> str:
+        data = json.dumps(snapshot, separators=(',', ':'))
+        return f"id: {snapshot['version']}\nevent: rates\ndata: {data}\n\n"
+
+    def publish(self, snapshot: Optional[Dict]):
+        """Record a newer snapshot and wake all subscribers"""
+        if not snapshot or snapshot['version'] <= self._version:
+            return
+        with self._condition:
+            self._snapshot = snapshot
+            self._version = snapshot['version']
+            self._condition.notify_all()
+
+    def _wait_for_change(self, known: int, timeout: float) -> Optional[Dict]:
+        with self._condition:
+            if self._version <= known:
+                self._condition.wait(timeout)
+            if self._snapshot and self._version > known:
+                return self._snapshot
+            return None
+
+    def _ensure_poller(self):
+        if self._poller and self._poller.is_alive():
+            return
+        with self._start_lock:
+            if self._poller and self._poller.is_alive():
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name='rate-broadcaster', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        while True:
+            try:
+                if self._connections:
+                    with self.app.app_context():
+                        version = self.db_service.get_snapshot_version()
+                        if version > self._version:
+                            self.publish(self.db_service.get_latest_snapshot())
+            except Exception as e:
+                logger.error(f"Rate broadcaster poll failed: {str(e)}")
+            time.sleep(self.poll_interval)
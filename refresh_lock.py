@@ -0,0 +1,100 @@
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from models import db, RefreshLease
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+class RefreshLock:
+    """
+    Cluster-wide lease so only one process refreshes rates from BCV at a time.
+
+    Like the circuit breaker, the lease is a row in the shared database and
+    every change is a compare-and-set UPDATE, so it works across hosts on
+    any supported database. A holder that crashes loses the lease once
+    ``ttl_seconds`` pass; long refreshes should call ``renew()``.
+    """
+
+    def __init__(self, name: str = 'bcv_refresh', ttl_seconds: int = 300):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.hostname = socket.gethostname()
+
+    @property
+    def holder(self) -> str:
+        # Per thread: inline refreshes in a threaded web worker must exclude each other too
+        return f'{self.hostname}:{os.getpid()}:{threading.get_ident()}'
+
+    def acquire(self) -> bool:
+        """Take the lease if it is free, expired or already ours"""
+        try:
+            self._ensure_row()
+            now = datetime.utcnow()
+            won = self._transition(
+                or_(RefreshLease.holder.is_(None), RefreshLease.expires_at <= now,
+                    RefreshLease.holder == self.holder),
+                values={
+                    'holder': self.holder,
+                    'acquired_at': now,
+                    'expires_at': now + timedelta(seconds=self.ttl_seconds),
+                    'acquired_total': RefreshLease.acquired_total + 1
+                }
+            )
+            if not won:
+                logger.debug(f"Refresh lease '{self.name}' is held by another process")
+            return won
+        except SQLAlchemyError as e:
+            logger.error(f"Database error acquiring refresh lease '{self.name}': {str(e)}")
+            db.session.rollback()
+            return False
+
+    def renew(self) -> bool:
+        """Extend the lease; False if it expired and someone else took it"""
+        try:
+            return self._transition(
+                RefreshLease.holder == self.holder,
+                values={'expires_at': datetime.utcnow() + timedelta(seconds=self.ttl_seconds)}
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Database error renewing refresh lease '{self.name}': {str(e)}")
+            db.session.rollback()
+            return False
+
+    def release(self):
+        try:
+            self._transition(RefreshLease.holder == self.holder, values={'holder': None, 'expires_at': None})
+        except SQLAlchemyError as e:
+            logger.error(f"Database error releasing refresh lease '{self.name}': {str(e)}")
+            db.session.rollback()
+
+    def get_status(self) -> Optional[Dict]:
+        try:
+            row = RefreshLease.query.filter_by(name=self.name).populate_existing().first()
+            return row.to_dict() if row else {'name': self.name, 'held': False, 'acquired_total': 0}
+        except SQLAlchemyError as e:
+            logger.error(f"Database error getting refresh lease '{self.name}': {str(e)}")
+            db.session.rollback()
+            return None
+
+    def _transition(self, *conditions, values: Dict) -> bool:
+        """Apply a compare-and-set update; True if this holder won it"""
+        updated = RefreshLease.query.filter(
+            RefreshLease.name == self.name, *conditions
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+        return updated == 1
+
+    def _ensure_row(self):
+        if RefreshLease.query.filter_by(name=self.name).first():
+            return
+        try:
+            db.session.add(RefreshLease(name=self.name, acquired_total=0))
+            db.session.commit()
+        except IntegrityError:
+            # Another process created it first
+            db.session.rollback()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Worker de actualización de tasas: el único proceso que contacta al BCV
+
+Con REFRESH_MODE=worker los procesos web solo leen tasas y versiones de
+snapshot (sin scraper, BeautifulSoup ni red saliente) y este proceso hace el
+scraping: escribe tasas, historial, velas y una nueva versión de snapshot,
+publica el snapshot compartido y encola los webhooks. Cada actualización
+toma un lease en la base de datos (tabla refresh_leases), así que pueden
+correr varias instancias en distintos hosts sin actualizar dos veces.
+
+Uso:
+    python refresh_worker.py                 # bucle: revisa cada REFRESH_WORKER_POLL_SECONDS
+    python refresh_worker.py --once          # una actualización si toca (cron, systemd timer)
+    python refresh_worker.py --once --force  # actualizar ya, aunque no toque
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+
+from flask import Flask
+
+from config import get_config, DatabaseConfig
+from database_service import DatabaseService
+from migrations import SchemaMigrator
+from models import db
+from sqlite_tuning import apply_sqlite_pragmas, sqlite_pragmas
+from webhooks import WebhookDispatcher
+
+logger = logging.getLogger('refresh_worker')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Worker de actualización de tasas desde el BCV')
+    parser.add_argument('--once', action='store_true', help='Una sola actualización y salir')
+    parser.add_argument('--force', action='store_true', help='Actualizar aunque no haya pasado el intervalo')
+    parser.add_argument('--poll', type=int, help='Segundos entre revisiones (por defecto REFRESH_WORKER_POLL_SECONDS)')
+    return parser.parse_args(argv)
+
+def create_app(config):
+    app = Flask(__name__)
+    app.config.update(DatabaseConfig.get_database_config())
+    db.init_app(app)
+    with app.app_context():
+        if config.SQLITE_PRODUCTION_MODE and db.engine.dialect.name == 'sqlite':
+            apply_sqlite_pragmas(db.engine, sqlite_pragmas(
+                busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+                mmap_size=config.SQLITE_MMAP_SIZE,
+                cache_size_kb=config.SQLITE_CACHE_SIZE_KB,
+                synchronous=config.SQLITE_SYNCHRONOUS,
+                wal_autocheckpoint=config.SQLITE_WAL_AUTOCHECKPOINT
+            ))
+        if config.SCHEMA_AUTO_MIGRATE:
+            SchemaMigrator(db.engine).migrate()
+    return app
+
+def refresh_once(service, force=False):
+    """Run one refresh; returns the process exit code"""
+    result = service.refresh_rates(force=force)
+    if result is None:
+        lease = service.refresh_lock.get_status() or {}
+        if lease.get('held'):
+            logger.info(f"Otro proceso está actualizando ({lease['holder']})")
+        else:
+            logger.info('Las tasas están al día, no toca actualizar')
+        return 0
+    return 0 if result else 1
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = get_config()
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
+
+    app = create_app(config)
+    webhook_dispatcher = WebhookDispatcher(
+        app,
+        max_workers=config.WEBHOOK_MAX_WORKERS,
+        timeout_seconds=config.WEBHOOK_TIMEOUT_SECONDS,
+        max_attempts=config.WEBHOOK_MAX_ATTEMPTS,
+        base_backoff_seconds=config.WEBHOOK_BASE_BACKOFF_SECONDS,
+        max_backoff_seconds=config.WEBHOOK_MAX_BACKOFF_SECONDS,
+        poll_interval=config.WEBHOOK_POLL_SECONDS,
+        allow_private_destinations=config.WEBHOOK_ALLOW_PRIVATE_DESTINATIONS
+    )
+
+    with app.app_context():
+        service = DatabaseService()
+        service.sync_history_archive()
+        service.sync_daily_candles()
+        service.sync_shared_snapshot()
+        service.add_snapshot_listener(webhook_dispatcher.enqueue_snapshot)
+
+        if args.once:
+            code = refresh_once(service, force=args.force)
+            webhook_dispatcher.stop()
+            return code
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        poll_seconds = args.poll or config.REFRESH_WORKER_POLL_SECONDS
+        logger.info(f"Worker de actualización iniciado: intervalo {config.UPDATE_INTERVAL_MINUTES} min, "
+                    f"revisión cada {poll_seconds}s")
+        force = args.force
+        while not stop.is_set():
+            try:
+                refresh_once(service, force=force)
+                force = False
+            except Exception as e:
+                logger.error(f"Error en el worker de actualización: {str(e)}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+            stop.wait(poll_seconds)
+        logger.info('Worker de actualización detenido')
+        webhook_dispatcher.stop()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
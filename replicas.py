@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, TypeVar
+from models import db
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_UNCHOSEN = object()  # Pinned, but no read has picked a source yet
+_PRIMARY = object()
+
+class Replica:
+    """A read-only database endpoint and its health state"""
+
+    def __init__(self, uri: str, engine_options: Optional[Dict] = None):
+        self.uri = uri
+        self.engine = create_engine(uri, **(engine_options or {}))
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.healthy = True
+        self.retry_at = 0.0
+        self.failures = 0
+        self.last_error = None
+
+    @property
+    def name(self) -> str:
+        """URI with the password masked, safe for logs and /api/status"""
+        return make_url(self.uri).render_as_string(hide_password=True)
+
+    def to_dict(self) -> Dict:
+        return {
+            'replica': self.name,
+            'healthy': self.healthy,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
+
+class ReplicaRouter:
+    """
+    Routes read-only queries to read replicas, falling back to the primary.
+
+    Replicas are used round-robin. A replica whose query or health check fails
+    is taken out of rotation for ``retry_seconds``; after that a ``SELECT 1``
+    probe decides whether it comes back. When no replica is configured or
+    healthy, reads run on the primary session (``db.session``). Writes never
+    go through the router.
+
+    Between ``pin()`` and ``release()`` every read of the calling thread goes
+    to the source its first read used, so values read separately (a snapshot
+    version for the ETag, then the rates) come from the same database. A
+    failure moves the pin to the primary, which is never behind a replica.
+    """
+
+    def __init__(self, uris: List[str], engine_options: Optional[Dict] = None, retry_seconds: float = 30):
+        self.replicas = [Replica(uri, engine_options) for uri in uris]
+        self.retry_seconds = retry_seconds
+        self._next = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'replica_reads': 0, 'primary_reads': 0, 'fallbacks': 0}
+
+    def pin(self):
+        """Start sending this thread's reads to a single source (e.g. for one request)"""
+        self._local.pin = _UNCHOSEN
+
+    def release(self):
+        self._local.pin = None
+
+    @contextmanager
+    def pinned(self):
+        self.pin()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def read(self, query: Callable[[Session], T]) -> T:
+        """Run ``query(session)`` on a healthy replica, or on the primary"""
+        pin = getattr(self._local, 'pin', None)
+        if pin is None or pin is _UNCHOSEN:
+            replica = self._pick()
+            if pin is _UNCHOSEN:
+                self._local.pin = replica or _PRIMARY
+        else:
+            replica = None if pin is _PRIMARY else pin
+        if replica is not None:
+            session = replica.session_factory()
+            try:
+                result = query(session)
+                self._stats['replica_reads'] += 1
+                return result
+            except SQLAlchemyError as e:
+                self._mark_failed(replica, e)
+                self._stats['fallbacks'] += 1
+                if pin is not None:
+                    self._local.pin = _PRIMARY
+            finally:
+                session.close()
+
+        self._stats['primary_reads'] += 1
+        return query(db.session)
+
+    def check_health(self) -> Dict:
+        """Probe every replica now and return their states"""
+        for replica in self.replicas:
+            self._probe(replica)
+        return self.get_status()
+
+    def get_status(self) -> Dict:
+        return {
+            'configured': len(self.replicas),
+            'healthy': sum(1 for r in self.replicas if r.healthy),
+            'replicas': [r.to_dict() for r in self.replicas],
+            **self._stats
+        }
+
+    def _pick(self) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+        now = time.monotonic()
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+            if now >= replica.retry_at and self._probe(replica):
+                return replica
+        return None
+
+    def _probe(self, replica: Replica) -> bool:
+        try:
+            with replica.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except SQLAlchemyError as e:
+            self._mark_failed(replica, e)
+            return False
+
+        if not replica.healthy:
+            logger.info(f"Read replica {replica.name} is healthy again")
+        replica.healthy = True
+        replica.last_error = None
+        return True
+
+    def _mark_failed(self, replica: Replica, error: Exception):
+        if replica.healthy:
+            logger.warning(f"Read replica {replica.name} failed, using primary for {self.retry_seconds}s: {error}")
+        replica.healthy = False
+        replica.failures += 1
+        replica.retry_at = time.monotonic() + self.retry_seconds
+        replica.last_error = str(error).splitlines()[0] if str(error) else type(error).__name__
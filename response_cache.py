@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+class ResponseCache:
+    """
+    Bounded LRU of rendered responses with request coalescing.
+
+    Callers key entries by endpoint, normalized parameters and the rate
+    snapshot version, so a new snapshot simply stops hitting the old entries
+    and the LRU ages them out. ``get_or_compute`` runs ``compute`` once per
+    key: concurrent misses for the same key wait for the first caller instead
+    of recomputing, and only compute themselves when that result turned out
+    not to be cacheable (an error response), raised, or took too long.
+    """
+
+    def __init__(self, max_entries: int = 1024, wait_timeout: float = 10):
+        self.max_entries = max(1, max_entries)
+        self.wait_timeout = wait_timeout
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._in_flight: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'uncacheable': 0}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._entries[key]
+            computing = self._in_flight.get(key)
+            if computing is None:
+                computing = self._in_flight[key] = threading.Event()
+                self._stats['misses'] += 1
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            computing.wait(self.wait_timeout)
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self._stats['coalesced'] += 1
+                    return self._entries[key]
+                self._stats['misses'] += 1
+            return compute()
+
+        try:
+            value = compute()
+            if cacheable(value):
+                self._store(key, value)
+            else:
+                with self._lock:
+                    self._stats['uncacheable'] += 1
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            computing.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+        # Coalesced requests were served without computing, so they count as hits
+        served = stats['hits'] + stats['coalesced']
+        lookups = served + stats['misses']
+        stats['hit_ratio'] = round(served / lookups, 4) if lookups else None
+        return stats
+
+    def _store(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
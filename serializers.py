@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+class Serializer:
+    """A response format: encoder plus the media types it answers to"""
+
+    def __init__(self, name: str, mimetype: str, encode: Callable[[Dict, str, str], bytes],
+                 accept: Tuple[str, ...] = (), headers: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.mimetype = mimetype
+        self.encode = encode  # (data, endpoint_type, timestamp) -> bytes
+        self.accept = accept or (mimetype.split(';')[0],)
+        self.headers = headers or {}
+
+SERIALIZERS: 'OrderedDict[str, Serializer]' = OrderedDict()
+
+def register_serializer(serializer: Serializer) -> Serializer:
+    """Add a format to the registry (``?format=<name>`` and Accept negotiation)"""
+    SERIALIZERS[serializer.name] = serializer
+    return serializer
+
+# Formats whose encoder comes from an optional package: {format: package}
+OPTIONAL_FORMATS = {'msgpack': 'msgpack', 'cbor': 'cbor2'}
+
+def unavailable_format(format_param: str) -> Optional[str]:
+    """Package missing for an explicit ?format= this API offers but cannot encode here, or None"""
+    format_param = (format_param or '').lower()
+    if format_param in OPTIONAL_FORMATS and format_param not in SERIALIZERS:
+        return OPTIONAL_FORMATS[format_param]
+    return None
+
+def get_serializer(name: str) -> Serializer:
+    return SERIALIZERS.get(name, SERIALIZERS['json'])
+
+def negotiate_format(format_param: str, accept_header: str) -> str:
+    """Pick a registered format from ?format= first, then the Accept header"""
+    format_param = (format_param or '').lower()
+    if format_param in SERIALIZERS:
+        return format_param
+    accept_header = (accept_header or '').lower()
+    for name, serializer in SERIALIZERS.items():
+        if name != 'json' and any(mimetype in accept_header for mimetype in serializer.accept):
+            return name
+    return 'json'
+
+def dumps_json(data) -> bytes:
+    """Compact JSON with sorted keys; uses orjson when installed"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def encode_json(data, endpoint_type, timestamp) -> bytes:
+    return dumps_json(data) + b'\n'
+
+def encode_csv(data, endpoint_type, timestamp) -> bytes:
+    """Format response as CSV"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    if endpoint_type == 'all_rates' and data.get('success') and 'data' in data:
+        # CSV for all rates
+        writer.writerow(['Currency', 'Rate', 'Date_Published', 'Last_Updated', 'Base_Currency'])
+
+        rates = data['data']['rates']
+        date_published = data['data'].get('date', '')
+        last_updated = data['data'].get('last_updated', '')
+        base_currency = data['data'].get('base_currency', 'VES')
+
+        for currency, rate in rates.items():
+            writer.writerow([currency, rate, date_published, last_updated, base_currency])
+
+    elif endpoint_type == 'single_rate' and data.get('success'):
+        # CSV for single rate
+        writer.writerow(['Currency', 'Rate', 'Date_Published', 'Last_Updated', 'Timestamp'])
+        writer.writerow([
+            data.get('currency', ''),
+            data.get('rate', ''),
+            data.get('date_published', ''),
+            data.get('last_updated', ''),
+            data.get('timestamp', '')
+        ])
+
+    elif endpoint_type == 'status' and data.get('success'):
+        # CSV for status
+        writer.writerow(['Metric', 'Value'])
+        writer.writerow(['System_Status', data.get('system_status', '')])
+        writer.writerow(['Rates_Available', data.get('rates_available', '')])
+        writer.writerow(['Last_Update', data.get('last_update', '')])
+        writer.writerow(['Timestamp', data.get('timestamp', '')])
+
+    else:
+        # Error response in CSV
+        writer.writerow(['Error', 'Message', 'Timestamp'])
+        writer.writerow([
+            data.get('error', 'Unknown error'),
+            data.get('message', ''),
+            data.get('timestamp', timestamp)
+        ])
+
+    return output.getvalue().encode('utf-8')
+
+def encode_xml(data, endpoint_type, timestamp) -> bytes:
+    """Format response as XML"""
+    if endpoint_type == 'all_rates' and data.get('success') and 'data' in data:
+        # XML for all rates
+        rates = data['data']['rates']
+        date_published = data['data'].get('date', '')
+        last_updated = data['data'].get('last_updated', '')
+        base_currency = data['data'].get('base_currency', 'VES')
+
+        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+<bcv_rates>
+    <success>true</success>
+    <timestamp>{timestamp}</timestamp>
+    <source>{data.get('source', '')}</source>
+    <data>
+        <base_currency>{base_currency}</base_currency>
+        <date>{date_published}</date>
+        <last_updated>{last_updated}</last_updated>
+        <rates>'''
+
+        for currency, rate in rates.items():
+            xml_content += f'''
+            <rate>
+                <currency>{currency}</currency>
+                <value>{rate}</value>
+            </rate>'''
+
+        xml_content += '''
+        </rates>
+    </data>
+</bcv_rates>'''
+
+    elif endpoint_type == 'single_rate' and data.get('success'):
+        # XML for single rate
+        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+<bcv_rate>
+    <success>true</success>
+    <currency>{data.get('currency', '')}</currency>
+    <rate>{data.get('rate', '')}</rate>
+    <date_published>{data.get('date_published', '')}</date_published>
+    <last_updated>{data.get('last_updated', '')}</last_updated>
+    <timestamp>{timestamp}</timestamp>
+    <source>{data.get('source', '')}</source>
+</bcv_rate>'''
+
+    elif endpoint_type == 'status' and data.get('success'):
+        # XML for status
+        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+<bcv_status>
+    <success>true</success>
+    <system_status>{data.get('system_status', '')}</system_status>
+    <rates_available>{data.get('rates_available', '')}</rates_available>
+    <last_update>{data.get('last_update', '')}</last_update>
+    <timestamp>{timestamp}</timestamp>
+</bcv_status>'''
+
+    else:
+        # Error response in XML
+        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+<bcv_error>
+    <success>false</success>
+    <error>{data.get('error', 'Unknown error')}</error>
+    <message>{data.get('message', '')}</message>
+    <timestamp>{timestamp}</timestamp>
+</bcv_error>'''
+
+    return xml_content.encode('utf-8')
+
+register_serializer(Serializer('json', 'application/json', encode_json))
+register_serializer(Serializer(
+    'csv', 'text/csv; charset=utf-8', encode_csv,
+    headers={'Content-Disposition': 'attachment; filename=bcv_rates.csv'}
+))
+register_serializer(Serializer(
+    'xml', 'application/xml; charset=utf-8', encode_xml,
+    accept=('application/xml', 'text/xml')
+))
+
+if msgpack:
+    register_serializer(Serializer(
+        'msgpack', 'application/msgpack',
+        lambda data, endpoint_type, timestamp: msgpack.packb(data, use_bin_type=True),
+        accept=('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+    ))
+
+if cbor2:
+    register_serializer(Serializer(
+        'cbor', 'application/cbor',
+        lambda data, endpoint_type, timestamp: cbor2.dumps(data)
+    ))
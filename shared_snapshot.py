@@ -0,0 +1,183 @@
+import getpass
+import json
+import logging
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: publishes are only serialized within the process
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DIVSNAP1'
+HEADER_SIZE = 64
+# magic, sequence, version, payload length
+_HEADER = struct.Struct('<8sQQI')
+_SEQUENCE = struct.Struct('<Q')
+_SEQUENCE_OFFSET = 8
+
+def private_runtime_dir() -> str:
+    """
+    Per-user directory no other local user can write to: $XDG_RUNTIME_DIR when set, otherwise a
+    0700 directory in the system temp dir that must belong to the current user
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return runtime_dir
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    directory = os.path.join(tempfile.gettempdir(), f'divisa-{uid if uid is not None else getpass.getuser()}')
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if uid is not None and (not stat.S_ISDIR(info.st_mode) or info.st_uid != uid or info.st_mode & 0o077):
+        raise PermissionError(f"{directory} is not a private directory of uid {uid}")
+    return directory
+
+def _dumps(data: Dict) -> bytes:
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def _loads(view: memoryview):
+    if orjson:
+        return orjson.loads(view)  # Parses straight from the mapping
+    return json.loads(bytes(view))
+
+class SharedSnapshot:
+    """
+    Rate snapshot shared by every worker on the host through a memory-mapped file.
+
+    The publishing process writes a JSON payload guarded by a sequence
+    counter (a seqlock): the counter is odd while a write is in progress and
+    readers retry until they see the same even value before and after
+    parsing. Readers keep the last decoded payload per sequence number, so
+    once a snapshot is decoded every further read is a single 8-byte load
+    from the mapping, with no copies and no database queries.
+    """
+
+    def __init__(self, path: str, capacity: int = 65536, read_retries: int = 100):
+        self.path = path
+        self.capacity = max(capacity, HEADER_SIZE + 1024)
+        self.read_retries = read_retries
+        self._map = None
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._cached = (None, None)  # (sequence, payload)
+        self._stats = {'publishes': 0, 'decodes': 0, 'retries': 0}
+
+    def publish(self, data: Dict, version: int) -> bool:
+        """Write a new payload and make it visible to all readers atomically"""
+        payload = _dumps(data)
+        if HEADER_SIZE + len(payload) > self.capacity:
+            logger.error(f"Shared snapshot payload ({len(payload)} bytes) exceeds capacity {self.capacity}")
+            return False
+
+        with self._lock:
+            shared = self._open()
+            fd = self._open_fd(create=False)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                sequence = _SEQUENCE.unpack_from(shared, _SEQUENCE_OFFSET)[0]
+                if sequence & 1:
+                    sequence += 1  # A publisher died mid-write; the lock says nobody else is writing
+                _SEQUENCE.pack_into(shared, _SEQUENCE_OFFSET, sequence + 1)
+                shared[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+                _HEADER.pack_into(shared, 0, MAGIC, sequence + 1, version, len(payload))
+                _SEQUENCE.pack_into(shared, _SEQUENCE_OFFSET, sequence + 2)
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        self._stats['publishes'] += 1
+        return True
+
+    def read(self) -> Optional[Dict]:
+        """Return the latest published payload, or None if nothing was published"""
+        shared = self._open()
+        for _ in range(self.read_retries):
+            sequence = _SEQUENCE.unpack_from(shared, _SEQUENCE_OFFSET)[0]
+            if sequence & 1:
+                self._stats['retries'] += 1
+                time.sleep(0)
+                continue
+
+            cached_sequence, cached = self._cached
+            if sequence == cached_sequence:
+                return cached
+
+            magic, _, _, length = _HEADER.unpack_from(shared, 0)
+            if magic != MAGIC or not length:
+                return None
+
+            try:
+                with memoryview(shared) as view, view[HEADER_SIZE:HEADER_SIZE + length] as payload_view:
+                    data = _loads(payload_view)
+            except ValueError:
+                data = None  # Torn read: the payload changed under us
+
+            if data is not None and _SEQUENCE.unpack_from(shared, _SEQUENCE_OFFSET)[0] == sequence:
+                self._cached = (sequence, data)
+                self._stats['decodes'] += 1
+                return data
+            self._stats['retries'] += 1
+        logger.warning("Shared snapshot kept changing while reading, giving up")
+        return None
+
+    def version(self) -> int:
+        """Published snapshot version (0 if nothing was published)"""
+        data = self.read()
+        return data.get('version', 0) if data else 0
+
+    def get_stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'version': self.version(),
+            **self._stats
+        }
+
+    def _open(self) -> mmap.mmap:
+        if self._map is not None:
+            return self._map
+        with self._open_lock:
+            if self._map is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                fd = self._open_fd(create=True)
+                try:
+                    if fcntl:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    if os.fstat(fd).st_size < self.capacity:
+                        os.ftruncate(fd, self.capacity)
+                    self._map = mmap.mmap(fd, self.capacity)
+                finally:
+                    if fcntl:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+        return self._map
+
+    def _open_fd(self, create: bool) -> int:
+        """
+        Open the file without following symlinks and refuse one another user owns: whoever can
+        write it decides the rates every worker serves
+        """
+        flags = os.O_RDWR | getattr(os, 'O_NOFOLLOW', 0) | (os.O_CREAT if create else 0)
+        fd = os.open(self.path, flags, 0o600)
+        info = os.fstat(fd)
+        if not stat.S_ISREG(info.st_mode) or (hasattr(os, 'getuid') and info.st_uid != os.getuid()):
+            os.close(fd)
+            raise PermissionError(f"Shared snapshot {self.path} is not a regular file owned by this user")
+        return fd
@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+def sqlite_pragmas(busy_timeout_ms: int = 5000, mmap_size: int = 268435456, cache_size_kb: int = 65536,
+                   synchronous: str = 'NORMAL', wal_autocheckpoint: int = 10000) -> Dict[str, object]:
+    """Pragmas of the production profile, in the order they are applied"""
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': synchronous,
+        'busy_timeout': busy_timeout_ms,
+        'mmap_size': mmap_size,
+        'cache_size': -cache_size_kb,  # Negative values are KiB, not pages
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': wal_autocheckpoint
+    }
+
+def apply_sqlite_pragmas(engine, pragmas: Dict[str, object]):
+    """Set pragmas on every new DBAPI connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    # Connections opened before the listener existed keep the old settings
+    engine.dispose()
+    logger.info(f"SQLite production profile enabled: {', '.join(f'{k}={v}' for k, v in pragmas.items())}")
+
+class CheckpointManager:
+    """
+    Runs WAL checkpoints from a background thread.
+
+    A PASSIVE checkpoint every ``interval_seconds`` copies committed pages
+    back into the database without waiting on readers or writers, so request
+    threads rarely pay for ``wal_autocheckpoint``. When the WAL file grows past
+    ``truncate_bytes`` (long-running readers kept it from being reset), a
+    TRUNCATE checkpoint is attempted to reclaim the space.
+    """
+
+    def __init__(self, engine, interval_seconds: float = 30, truncate_bytes: int = 64 * 1024 * 1024):
+        self.engine = engine
+        self.interval_seconds = interval_seconds
+        self.truncate_bytes = truncate_bytes
+        self.wal_path = f'{engine.url.database}-wal' if engine.url.database else None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'checkpoints': 0, 'truncates': 0, 'busy': 0, 'errors': 0,
+                       'last_checkpoint_at': None, 'last_result': None}
+
+    def start(self):
+        """Start the checkpoint thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='sqlite-checkpoint', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval_seconds + 1)
+
+    def wal_size(self) -> int:
+        try:
+            return os.path.getsize(self.wal_path) if self.wal_path else 0
+        except OSError:
+            return 0
+
+    def checkpoint(self, mode: str = 'PASSIVE') -> Optional[Dict]:
+        """Run one checkpoint; returns SQLite's (busy, log, checkpointed) triple"""
+        try:
+            with self.engine.connect() as connection:
+                busy, log_frames, checkpointed = connection.execute(
+                    text(f'PRAGMA wal_checkpoint({mode})')
+                ).one()
+        except SQLAlchemyError as e:
+            with self._lock:
+                self._stats['errors'] += 1
+            logger.warning(f"SQLite {mode} checkpoint failed: {str(e)}")
+            return None
+
+        result = {'mode': mode, 'busy': bool(busy), 'log_frames': log_frames, 'checkpointed': checkpointed}
+        # Updated from the checkpoint thread, read by /api/metrics
+        with self._lock:
+            self._stats['checkpoints'] += 1
+            self._stats['busy'] += int(bool(busy))
+            self._stats['truncates'] += int(mode == 'TRUNCATE' and not busy)
+            self._stats['last_checkpoint_at'] = time.time()
+            self._stats['last_result'] = result
+        return result
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            'interval_seconds': self.interval_seconds,
+            'wal_bytes': self.wal_size()
+        }
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_seconds):
+            self.checkpoint('PASSIVE')
+            if self.wal_size() > self.truncate_bytes:
+                result = self.checkpoint('TRUNCATE')
+                if result and not result['busy']:
+                    logger.info("SQLite WAL truncated after exceeding the size threshold")
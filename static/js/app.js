@@ -6,6 +6,8 @@ class DivisaPWA {
         this.isOnline = navigator.onLine;
         this.updateAvailable = false;
         this.serviceWorker = null;
+        this.rateStream = null;
+        this.snapshotVersion = null;
         
         this.init();
     }
@@ -28,6 +30,9 @@ class DivisaPWA {
         // Verificar actualizaciones
         this.checkForUpdates();
         
+        // Suscribirse a cambios de tasas (SSE) en lugar de hacer polling
+        this.subscribeToRates();
+        
         console.log('DivisaAPI PWA inicializada correctamente');
     }
     
@@ -244,11 +249,50 @@ class DivisaPWA {
         }
     }
     
+    subscribeToRates() {
+        if (!('EventSource' in window)) {
+            console.warn('EventSource no soportado, se mantiene la consulta manual');
+            return;
+        }
+        
+        // EventSource reconecta solo y envía Last-Event-ID para reanudar
+        this.rateStream = new EventSource('/api/stream/rates');
+        this.rateStream.addEventListener('rates', (event) => {
+            const snapshot = JSON.parse(event.data);
+            const isFirst = this.snapshotVersion === null;
+            this.snapshotVersion = snapshot.version;
+            
+            // Pista de invalidación para que el Service Worker revalide las tasas cacheadas
+            if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+                navigator.serviceWorker.controller.postMessage({
+                    type: 'SNAPSHOT_VERSION',
+                    version: snapshot.version
+                });
+            }
+            
+            window.dispatchEvent(new CustomEvent('divisa:rates', {
+                detail: { snapshot, isFirst }
+            }));
+        });
+        this.rateStream.addEventListener('error', () => {
+            console.warn('Stream de tasas desconectado, reintentando...');
+        });
+    }
+    
     handleServiceWorkerMessage(data) {
         switch (data.type) {
             case 'RATES_UPDATED':
                 this.handleRatesUpdate(data.timestamp);
                 break;
+            case 'RATES_REVALIDATED':
+                // La revalidación en segundo plano trajo una versión más nueva que la mostrada
+                if (this.snapshotVersion !== null && data.version > this.snapshotVersion) {
+                    this.snapshotVersion = data.version;
+                    window.dispatchEvent(new CustomEvent('divisa:rates', {
+                        detail: { snapshot: { version: data.version }, isFirst: false }
+                    }));
+                }
+                break;
             default:
                 console.log('Mensaje del Service Worker:', data);
         }
@@ -343,7 +387,8 @@ class DivisaPWA {
     }
     
     getCacheVersion() {
-        return 'divisa-api-v1.1.0';
+        // La vigencia del cache la marca la versión de snapshot del servidor
+        return this.snapshotVersion;
     }
 }
 
@@ -0,0 +1,492 @@
+// Initialize Feather Icons with error handling
+function initializeFeatherIcons() {
+    try {
+        if (typeof feather !== 'undefined') {
+            feather.replace();
+            console.log('✅ Feather Icons inicializado correctamente');
+        } else {
+            console.warn('⚠️ Feather Icons no está disponible, usando fallback');
+            // Fallback: reemplazar iconos con texto simple
+            document.querySelectorAll('[data-feather]').forEach(el => {
+                const iconName = el.getAttribute('data-feather');
+                el.innerHTML = getIconFallback(iconName);
+                el.removeAttribute('data-feather');
+            });
+        }
+    } catch (error) {
+        console.error('❌ Error al inicializar Feather Icons:', error);
+        // Fallback en caso de error
+        document.querySelectorAll('[data-feather]').forEach(el => {
+            const iconName = el.getAttribute('data-feather');
+            el.innerHTML = getIconFallback(iconName);
+            el.removeAttribute('data-feather');
+        });
+    }
+}
+
+// Fallback function for icons
+function getIconFallback(iconName) {
+    const fallbacks = {
+        'dollar-sign': '💲',
+        'trending-up': '📈',
+        'refresh-cw': '🔄',
+        'calculator': '🧮',
+        'arrow-right': '➡️',
+        'check-circle': '✅',
+        'copy': '📋',
+        'code': '💻',
+        'play': '▶️',
+        'info': 'ℹ️',
+        'clock': '🕐',
+        'alert-circle': '⚠️',
+        'loader': '⏳',
+        'zap': '⚡',
+        'database': '🗄️',
+        'check': '✓',
+        'circle': '⚪',
+        'wifi': '📶',
+        'download': '⬇️'
+    };
+    return fallbacks[iconName] || '•';
+}
+
+// Initialize when DOM is ready
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initializeFeatherIcons);
+} else {
+    initializeFeatherIcons();
+}
+
+// Currency symbols and names
+const currencySymbols = {
+    'USD': '$',
+    'EUR': '€',
+    'CNY': '¥',
+    'TRY': '₺',
+    'RUB': '₽',
+    'VES': 'Bs.'
+};
+
+const currencyNames = {
+    'USD': 'Dólar Estadounidense',
+    'EUR': 'Euro',
+    'CNY': 'Yuan Chino',
+    'TRY': 'Lira Turca',
+    'RUB': 'Rublo Ruso',
+    'VES': 'Bolívar Venezolano'
+};
+
+// Load exchange rates
+// minVersion: versión de snapshot mínima aceptable (evita que el Service Worker sirva tasas viejas)
+async function loadRates(minVersion) {
+    const container = document.getElementById('ratesContainer');
+    const lastUpdated = document.getElementById('lastUpdated');
+    const refreshBtn = document.getElementById('refreshRates');
+    const apiStatusBadge = document.getElementById('apiStatusBadge');
+    const onlineStatusBadge = document.getElementById('online-status');
+
+    console.log('🔄 Iniciando carga de tipos de cambio...');
+
+    // Deshabilitar el botón de refrescar durante la carga
+    if (refreshBtn) {
+        refreshBtn.disabled = true;
+        refreshBtn.innerHTML = '<i data-feather="loader" class="me-1"></i>Cargando...';
+        initializeFeatherIcons();
+    }
+
+    // Actualizar el estado de la API
+    apiStatusBadge.innerHTML = '<i data-feather="loader" class="me-1"></i>Verificando API...';
+    initializeFeatherIcons();
+
+    // Crear un AbortController para timeout
+    const controller = new AbortController();
+    const timeoutId = setTimeout(() => {
+        console.log('⏰ Timeout alcanzado (10s) - Abortando solicitud');
+        controller.abort();
+    }, 10000); // 10 segundos timeout
+
+    // Timeout adicional más agresivo para casos extremos
+    const aggressiveTimeoutId = setTimeout(() => {
+        console.log('🚨 Timeout agresivo (15s) - Forzando abort');
+        controller.abort();
+    }, 15000); // 15 segundos timeout
+
+    try {
+        container.innerHTML = `
+            <div class="text-center py-5">
+                <div class="loading-spinner mx-auto mb-3"></div>
+                <p class="text-muted">Obteniendo tipos de cambio...</p>
+                <small class="text-muted d-block">Esto puede tomar unos segundos</small>
+            </div>
+        `;
+
+        console.log('📡 Enviando solicitud a /api/rates...');
+        const headers = typeof minVersion === 'number'
+            ? { 'X-Min-Snapshot-Version': String(minVersion) }
+            : {};
+        const response = await fetch('/api/rates', {
+            headers,
+            signal: controller.signal
+        });
+
+        // Limpiar el timeout si la respuesta llega a tiempo
+        clearTimeout(timeoutId);
+        clearTimeout(aggressiveTimeoutId); // Limpiar el timeout agresivo
+        console.log(`✅ Respuesta recibida: ${response.status} ${response.statusText}`);
+
+        if (!response.ok) {
+            throw new Error(`Error HTTP: ${response.status} ${response.statusText}`);
+        }
+
+        const data = await response.json();
+        console.log('📊 Datos recibidos:', data);
+
+        if (data.success && data.data && data.data.rates) {
+            const rates = data.data.rates;
+            console.log(`💰 Tipos de cambio obtenidos: ${Object.keys(rates).length} divisas`);
+
+            let html = '<div class="row g-4">';
+
+            Object.entries(rates).forEach(([currency, rate]) => {
+                const symbol = currencySymbols[currency] || currency;
+                const name = currencyNames[currency] || currency;
+
+                html += `
+                    <div class="col-md-6 col-lg-4">
+                        <div class="currency-card">
+                            <div class="currency-symbol">${symbol}</div>
+                            <h5 class="mb-2">${currency}</h5>
+                            <p class="text-muted small mb-3">${name}</p>
+                            <div class="rate-value">1 ${currency} = ${parseFloat(rate).toLocaleString('es-VE', {minimumFractionDigits: 2, maximumFractionDigits: 8})} VES</div>
+                            <small class="text-muted">Tasa de cambio</small>
+                            <button class="btn btn-copy btn-sm mt-3 copy-rate" 
+                                    data-rate="${rate}" data-currency="${currency}">
+                                <i data-feather="copy" class="me-1"></i>
+                                Copiar
+                            </button>
+                        </div>
+                    </div>
+                `;
+            });
+
+            html += '</div>';
+            container.innerHTML = html;
+
+            // Update timestamp
+            const updateTime = new Date(data.timestamp).toLocaleString('es-VE');
+            lastUpdated.innerHTML = `
+                <i data-feather="clock" class="me-1"></i>
+                Última actualización: ${updateTime}
+                ${data.data.date ? `| Fecha valor: ${data.data.date}` : ''}
+            `;
+            initializeFeatherIcons();
+
+            // Add copy event listeners
+            document.querySelectorAll('.copy-rate').forEach(btn => {
+                btn.addEventListener('click', () => {
+                    const rate = btn.dataset.rate;
+                    const currency = btn.dataset.currency;
+                    const textToCopy = `${currency}: ${rate} VES`;
+                    copyToClipboard(textToCopy, `${currency} copiado`);
+                });
+            });
+
+            console.log('🎉 Interfaz actualizada exitosamente');
+            apiStatusBadge.innerHTML = '<i data-feather="check-circle" class="me-1"></i>API funcionando';
+            initializeFeatherIcons();
+        } else {
+            throw new Error(data.message || 'No se pudieron obtener los tipos de cambio');
+        }
+    } catch (error) {
+        // Limpiar el timeout en caso de error
+        clearTimeout(timeoutId);
+        clearTimeout(aggressiveTimeoutId); // Limpiar el timeout agresivo
+
+        console.error('❌ Error en loadRates:', error);
+
+        let errorMessage = 'Error al cargar los tipos de cambio';
+
+        if (error.name === 'AbortError') {
+            errorMessage = 'La solicitud tardó demasiado tiempo. Por favor, verifica tu conexión e intenta de nuevo.';
+            console.log('⏰ Error de timeout - Solicitud abortada');
+        } else if (error.message.includes('Failed to fetch')) {
+            errorMessage = 'Error de conexión. Verifica que la API esté funcionando.';
+            console.log('🌐 Error de conexión - Fallo en fetch');
+        } else if (error.message.includes('HTTP')) {
+            errorMessage = `Error del servidor: ${error.message}`;
+            console.log('🚨 Error HTTP del servidor');
+        } else {
+            errorMessage = `${errorMessage}: ${error.message}`;
+            console.log('⚠️ Error general:', error.message);
+        }
+
+        container.innerHTML = `
+            <div class="alert alert-danger" role="alert">
+                <i data-feather="alert-circle" class="me-2"></i>
+                ${errorMessage}
+                <div class="mt-3">
+                    <button class="btn btn-outline-danger btn-sm me-2" onclick="loadRates()">
+                        <i data-feather="refresh-cw" class="me-1"></i>
+                        Reintentar
+                    </button>
+                    <button class="btn btn-outline-warning btn-sm" onclick="forceReload()">
+                        <i data-feather="zap" class="me-1"></i>
+                        Forzar Recarga
+                    </button>
+                </div>
+            </div>
+        `;
+        initializeFeatherIcons();
+        apiStatusBadge.innerHTML = '<i data-feather="alert-circle" class="me-1"></i>API no disponible';
+        initializeFeatherIcons();
+    } finally {
+        // Restaurar el botón de refrescar
+        if (refreshBtn) {
+            refreshBtn.disabled = false;
+            refreshBtn.innerHTML = '<i data-feather="refresh-cw" class="me-1"></i>Actualizar';
+            initializeFeatherIcons();
+        }
+        console.log('🏁 Función loadRates completada');
+    }
+}
+
+// Currency conversion
+async function convertCurrency() {
+    const amount = parseFloat(document.getElementById('converterAmount').value);
+    const fromCurrency = document.getElementById('fromCurrency').value;
+    const toCurrency = document.getElementById('toCurrency').value;
+
+    if (!amount || amount <= 0) {
+        alert('Por favor ingresa una cantidad válida');
+        return;
+    }
+
+    if (fromCurrency === toCurrency) {
+        showConversionResult(amount, fromCurrency, amount, toCurrency, 1);
+        return;
+    }
+
+    try {
+        // Obtener las tasas actuales del contenedor
+        const ratesContainer = document.getElementById('ratesContainer');
+        const rateElements = ratesContainer.querySelectorAll('.copy-rate');
+
+        if (rateElements.length === 0) {
+            alert('Primero debes cargar los tipos de cambio. Haz clic en "Actualizar".');
+            return;
+        }
+
+        // Crear un objeto con las tasas disponibles
+        const rates = {};
+        rateElements.forEach(element => {
+            const currency = element.dataset.currency;
+            const rate = parseFloat(element.dataset.rate);
+            rates[currency] = rate;
+        });
+
+        console.log('💰 Tasas disponibles para conversión:', rates);
+
+        let conversionRate, resultAmount;
+
+        // Lógica de conversión corregida
+        if (fromCurrency === 'VES' && toCurrency !== 'VES') {
+            // De VES a otra moneda: VES ÷ tasa = cantidad en la otra moneda
+            conversionRate = 1 / rates[toCurrency];
+            resultAmount = amount * conversionRate;
+            console.log(`🔄 Conversión: ${amount} VES ÷ ${rates[toCurrency]} = ${resultAmount} ${toCurrency}`);
+        } else if (fromCurrency !== 'VES' && toCurrency === 'VES') {
+            // De otra moneda a VES: cantidad × tasa = VES
+            conversionRate = rates[fromCurrency];
+            resultAmount = amount * conversionRate;
+            console.log(`🔄 Conversión: ${amount} ${fromCurrency} × ${rates[fromCurrency]} = ${resultAmount} VES`);
+        } else if (fromCurrency !== 'VES' && toCurrency !== 'VES') {
+            // Entre dos monedas extranjeras: usar VES como intermediario
+            const fromToVES = amount * rates[fromCurrency];
+            conversionRate = 1 / rates[toCurrency];
+            resultAmount = fromToVES * conversionRate;
+            console.log(`🔄 Conversión cruzada: ${amount} ${fromCurrency} → ${fromToVES} VES → ${resultAmount} ${toCurrency}`);
+        } else {
+            throw new Error('Combinación de monedas no válida');
+        }
+
+        showConversionResult(amount, fromCurrency, resultAmount, toCurrency, conversionRate);
+
+    } catch (error) {
+        console.error('❌ Error en conversión:', error);
+        alert('Error al realizar la conversión: ' + error.message);
+    }
+}
+
+function showConversionResult(fromAmount, fromCurrency, toAmount, toCurrency, rate) {
+    const resultDiv = document.getElementById('conversionResult');
+    const detailsDiv = document.getElementById('conversionDetails');
+
+    // Formatear los números según la moneda
+    const formatAmount = (amount, currency) => {
+        if (currency === 'VES') {
+            return amount.toLocaleString('es-VE', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+        } else {
+            return amount.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 6});
+        }
+    };
+
+    // Generar explicación del cálculo
+    let calculationExplanation = '';
+    if (fromCurrency === 'VES' && toCurrency !== 'VES') {
+        // Mostrar como multiplicación: 100 VES × (1/131.24) = 0.76 USD
+        const multiplier = (1/rate).toFixed(6);
+        calculationExplanation = `${fromAmount} VES × ${multiplier} = ${toAmount.toFixed(6)} ${toCurrency}`;
+    } else if (fromCurrency !== 'VES' && toCurrency === 'VES') {
+        calculationExplanation = `${fromAmount} ${fromCurrency} × ${rate.toFixed(2)} = ${toAmount.toFixed(2)} VES`;
+    } else {
+        calculationExplanation = `${fromAmount} ${fromCurrency} → ${(fromAmount * (fromCurrency === 'VES' ? 1 : (1/rate))).toFixed(2)} VES → ${toAmount.toFixed(6)} ${toCurrency}`;
+    }
+
+    detailsDiv.innerHTML = `
+        <div class="row g-3">
+            <div class="col-md-4">
+                <div class="text-center">
+                    <h5 class="text-primary">${formatAmount(fromAmount, fromCurrency)}</h5>
+                    <small class="text-muted">${fromCurrency}</small>
+                </div>
+            </div>
+            <div class="col-md-4">
+                <div class="text-center">
+                    <i data-feather="arrow-right" class="text-muted"></i>
+                    <br>
+                    <small class="text-muted">Tipo: ${rate.toFixed(6)}</small>
+                    <br>
+                    <small class="text-muted">${fromCurrency} → ${toCurrency}</small>
+                </div>
+            </div>
+            <div class="col-md-4">
+                <div class="text-center">
+                    <h5 class="text-success">${formatAmount(toAmount, toCurrency)}</h5>
+                    <small class="text-muted">${toCurrency}</small>
+                </div>
+            </div>
+        </div>
+        <div class="row mt-3">
+            <div class="col-12">
+                <div class="text-center">
+                    <small class="text-muted">
+                        <i data-feather="info" class="me-1"></i>
+                        <strong>Cálculo:</strong> ${calculationExplanation}
+                    </small>
+                </div>
+            </div>
+        </div>
+    `;
+
+    resultDiv.style.display = 'block';
+    initializeFeatherIcons();
+}
+
+// Copy to clipboard function
+function copyToClipboard(text, message = 'Copiado al portapapeles') {
+    navigator.clipboard.writeText(text).then(() => {
+        showCopyFeedback(message);
+    }).catch(() => {
+        // Fallback for older browsers
+        const textArea = document.createElement('textarea');
+        textArea.value = text;
+        document.body.appendChild(textArea);
+        textArea.select();
+        document.execCommand('copy');
+        document.body.removeChild(textArea);
+        showCopyFeedback(message);
+    });
+}
+
+function showCopyFeedback(message) {
+    const feedback = document.getElementById('copyFeedback');
+    feedback.innerHTML = `<i data-feather="check" class="me-2"></i>${message}`;
+    feedback.classList.add('show');
+
+    setTimeout(() => {
+        feedback.classList.remove('show');
+    }, 2000);
+
+    initializeFeatherIcons();
+}
+
+// Test API endpoint
+async function testApiEndpoint() {
+    const endpoint = document.getElementById('testEndpoint').value;
+    const responseDiv = document.getElementById('apiResponse');
+    const contentDiv = document.getElementById('responseContent');
+    const infoDiv = document.getElementById('responseInfo');
+
+    if (!endpoint) {
+        alert('Por favor ingresa un endpoint válido');
+        return;
+    }
+
+    try {
+        responseDiv.style.display = 'block';
+        contentDiv.textContent = 'Cargando...';
+        infoDiv.innerHTML = '';
+
+        const startTime = Date.now();
+        const response = await fetch(endpoint);
+        const endTime = Date.now();
+        const data = await response.json();
+
+        contentDiv.textContent = JSON.stringify(data, null, 2);
+
+        const statusClass = response.ok ? 'text-success' : 'text-danger';
+        infoDiv.innerHTML = `
+            <span class="${statusClass}">
+                <i data-feather="info" class="me-1"></i>
+                Status: ${response.status} ${response.statusText} | 
+                Tiempo: ${endTime - startTime}ms
+            </span>
+        `;
+        initializeFeatherIcons();
+    } catch (error) {
+        contentDiv.textContent = `Error: ${error.message}`;
+        infoDiv.innerHTML = `
+            <span class="text-danger">
+                <i data-feather="alert-circle" class="me-1"></i>
+                Error de conexión
+            </span>
+        `;
+        initializeFeatherIcons();
+    }
+}
+
+// Force reload function for extreme cases
+function forceReload() {
+    console.log('🔄 Forzando recarga completa de la página...');
+    window.location.reload(true);
+}
+
+// Event listeners
+document.getElementById('refreshRates').addEventListener('click', () => loadRates());
+document.getElementById('convertBtn').addEventListener('click', convertCurrency);
+document.getElementById('testApiBtn').addEventListener('click', testApiEndpoint);
+
+// Copy endpoint buttons
+document.querySelectorAll('.copy-endpoint').forEach(btn => {
+    btn.addEventListener('click', () => {
+        const endpoint = btn.dataset.endpoint;
+        copyToClipboard(endpoint, 'Endpoint copiado');
+    });
+});
+
+// Copy conversion result
+document.getElementById('copyResult').addEventListener('click', () => {
+    const details = document.getElementById('conversionDetails').textContent;
+    copyToClipboard(details, 'Resultado copiado');
+});
+
+// Load rates on page load
+loadRates();
+
+// Recargar solo cuando el servidor publica una nueva versión de tasas (SSE)
+window.addEventListener('divisa:rates', (event) => {
+    if (!event.detail.isFirst) {
+        console.log(`📡 Nueva versión de tasas: ${event.detail.snapshot.version}`);
+        loadRates(event.detail.snapshot.version);
+    }
+});
@@ -0,0 +1,89 @@
+// Registrar Service Worker para PWA
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('/static/sw.js', { scope: '/' })
+            .then((registration) => {
+                console.log('✅ Service Worker registrado exitosamente:', registration.scope);
+
+                // Verificar actualizaciones
+                registration.addEventListener('updatefound', () => {
+                    const newWorker = registration.installing;
+                    newWorker.addEventListener('statechange', () => {
+                        if (newWorker.state === 'installed' && navigator.serviceWorker.controller) {
+                            console.log('🔄 Nueva versión disponible');
+                            showUpdateNotification();
+                        }
+                    });
+                });
+            })
+            .catch((error) => {
+                console.error('❌ Error registrando Service Worker:', error);
+            });
+    });
+}
+
+// Mostrar notificación de actualización
+function showUpdateNotification() {
+    if (window.divisaPWA) {
+        window.divisaPWA.showUpdateNotification();
+    }
+}
+
+// Función para instalar PWA manualmente
+function installPWA() {
+    if (window.divisaPWA) {
+        window.divisaPWA.installApp();
+    }
+}
+
+// Función para verificar estado de la PWA
+function checkPWAStatus() {
+    const isStandalone = window.matchMedia('(display-mode: standalone)').matches || 
+                        window.navigator.standalone === true;
+
+    console.log('📱 PWA Status:', {
+        isStandalone: isStandalone,
+        isOnline: navigator.onLine,
+        hasServiceWorker: 'serviceWorker' in navigator
+    });
+
+    return {
+        isStandalone,
+        isOnline: navigator.onLine,
+        hasServiceWorker: 'serviceWorker' in navigator
+    };
+}
+
+// Verificar estado al cargar
+document.addEventListener('DOMContentLoaded', () => {
+    setTimeout(() => {
+        checkPWAStatus();
+    }, 1000);
+});
+
+// Mostrar botón de instalación si es apropiado
+function updateInstallButton() {
+    const installBtn = document.getElementById('pwa-install-btn');
+    const isStandalone = window.matchMedia('(display-mode: standalone)').matches || 
+                        window.navigator.standalone === true;
+
+    if (installBtn) {
+        if (isStandalone) {
+            installBtn.style.display = 'none';
+        } else if (window.divisaPWA && window.divisaPWA.deferredPrompt) {
+            installBtn.style.display = 'flex';
+        } else {
+            installBtn.style.display = 'none';
+        }
+    }
+}
+
+// Actualizar botón cuando cambie el estado
+window.addEventListener('appinstalled', () => {
+    updateInstallButton();
+});
+
+// Verificar estado inicial
+document.addEventListener('DOMContentLoaded', () => {
+    setTimeout(updateInstallButton, 2000);
+});
@@ -1,67 +1,229 @@
-const CACHE_NAME = 'divisa-api-v1.1.0';
-const STATIC_CACHE = 'divisa-static-v1.1.0';
-const DYNAMIC_CACHE = 'divisa-dynamic-v1.1.0';
+// Nombres de cache estables: la frescura la decide el servidor (ETag, Cache-Control
+// y X-Snapshot-Version), no una versión escrita a mano en este archivo
+const STATIC_CACHE = 'divisa-static';
+const API_CACHE = 'divisa-api';
+const CACHES = [STATIC_CACHE, API_CACHE];
+
+// Cabecera con la hora en que el Service Worker guardó la respuesta
+const FETCHED_AT_HEADER = 'X-SW-Fetched-At';
+
+// Lista de precache generada por build_assets.py (assets con hash de contenido).
+// Al cambiar el build cambia este import, y con él se instala un Service Worker nuevo
+try {
+  importScripts('/static/dist/precache-manifest.js');
+} catch (error) {
+  // Sin build: se cachean los archivos fuente
+}
+const PRECACHE_FILES = self.__PRECACHE_MANIFEST || [];
+const DIST_PREFIX = '/static/dist/';
 
 // Archivos estáticos para cache offline
-const STATIC_FILES = [
+const SHELL_FILES = [
   '/',
   '/static/manifest.json',
   '/static/icons/icon-192x192.png',
-  '/static/icons/icon-512x512.png',
+  '/static/icons/icon-512x512.png'
+];
+const SOURCE_FILES = [
   '/static/css/app.css',
-  '/static/js/app.js'
+  '/static/css/index.css',
+  '/static/js/app.js',
+  '/static/js/index.js',
+  '/static/js/pwa.js'
+];
+const STATIC_FILES = SHELL_FILES.concat(PRECACHE_FILES.length ? PRECACHE_FILES : SOURCE_FILES);
+
+// Rutas de tasas: se sirven desde cache y se revalidan en segundo plano
+const RATE_ROUTES = [
+  '/api/rates'
 ];
 
-// Rutas de la API que queremos cachear
-const API_ROUTES = [
-  '/api/rates',
+// Rutas de estado: siempre a la red, cache solo sin conexión
+const LIVE_ROUTES = [
   '/api/status',
   '/api/health'
 ];
 
-// Estrategia de cache: Cache First para archivos estáticos
+// Última versión de snapshot conocida (pistas del servidor vía SSE o cabeceras)
+let latestSnapshotVersion = 0;
+
 async function cacheStaticFiles() {
   const cache = await caches.open(STATIC_CACHE);
   return cache.addAll(STATIC_FILES);
 }
 
-// Estrategia de cache: Network First para API, fallback a cache
-async function networkFirst(request) {
-  try {
-    const response = await fetch(request);
-    if (response.ok) {
-      const cache = await caches.open(DYNAMIC_CACHE);
-      cache.put(request, response.clone());
+function snapshotVersionOf(response) {
+  return parseInt(response.headers.get('X-Snapshot-Version') || '0', 10);
+}
+
+function noteSnapshotVersion(version) {
+  if (version > latestSnapshotVersion) {
+    latestSnapshotVersion = version;
+    return true;
+  }
+  return false;
+}
+
+// Frescura según Cache-Control: max-age del servidor; sin él la entrada siempre se revalida
+function isFresh(response, minVersion) {
+  if (snapshotVersionOf(response) < Math.max(latestSnapshotVersion, minVersion)) {
+    return false;
+  }
+  const cacheControl = response.headers.get('Cache-Control') || '';
+  if (/no-cache|no-store/.test(cacheControl)) {
+    return false;
+  }
+  const maxAge = /max-age=(\d+)/.exec(cacheControl);
+  const fetchedAt = parseInt(response.headers.get(FETCHED_AT_HEADER) || '0', 10);
+  return Boolean(maxAge) && Date.now() - fetchedAt < parseInt(maxAge[1], 10) * 1000;
+}
+
+// Cabeceras de frescura que un 304 puede renovar en la entrada cacheada
+const REVALIDATION_HEADERS = ['Cache-Control', 'Date', 'ETag', 'Expires', 'Last-Modified', 'X-Snapshot-Version'];
+
+// Copia de la respuesta con la hora de guardado y, opcionalmente, cabeceras renovadas
+async function stamp(response, headers) {
+  const merged = new Headers(response.headers);
+  if (headers) {
+    REVALIDATION_HEADERS.forEach((name) => {
+      if (headers.has(name)) {
+        merged.set(name, headers.get(name));
+      }
+    });
+  }
+  merged.set(FETCHED_AT_HEADER, String(Date.now()));
+  return new Response(await response.blob(), {
+    status: response.status,
+    statusText: response.statusText,
+    headers: merged
+  });
+}
+
+// Revalidación condicional: If-None-Match con el ETag guardado, 304 solo renueva la entrada
+async function revalidate(request, cacheName, cached) {
+  const headers = new Headers(request.headers);
+  const etag = cached && cached.headers.get('ETag');
+  if (etag) {
+    headers.set('If-None-Match', etag);
+  }
+  const response = await fetch(request.url, { headers, credentials: 'same-origin' });
+  const cache = await caches.open(cacheName);
+
+  if (response.status === 304 && cached) {
+    const refreshed = await stamp(cached.clone(), response.headers);
+    await cache.put(request, refreshed.clone());
+    noteSnapshotVersion(snapshotVersionOf(refreshed));
+    return refreshed;
+  }
+
+  if (response.ok) {
+    const previousVersion = cached ? snapshotVersionOf(cached) : 0;
+    const stored = await stamp(response);
+    await cache.put(request, stored.clone());
+    const version = snapshotVersionOf(stored);
+    noteSnapshotVersion(version);
+    if (cached && version > previousVersion) {
+      notifyClients({ type: 'RATES_REVALIDATED', version, url: request.url });
     }
-    return response;
+    return stored;
+  }
+  return response;
+}
+
+// Stale-while-revalidate: respuesta inmediata desde cache y revalidación en segundo plano
+async function staleWhileRevalidate(event, cacheName) {
+  const { request } = event;
+  const minVersion = parseInt(request.headers.get('X-Min-Snapshot-Version') || '0', 10);
+  const cached = await caches.match(request, { cacheName });
+
+  if (cached && isFresh(cached, minVersion)) {
+    return cached;
+  }
+
+  const network = revalidate(request, cacheName, cached);
+  if (cached && snapshotVersionOf(cached) >= minVersion) {
+    event.waitUntil(network.catch((error) => console.warn('Revalidación fallida:', request.url, error)));
+    return cached;
+  }
+
+  try {
+    return await network;
   } catch (error) {
-    const cachedResponse = await caches.match(request);
-    if (cachedResponse) {
-      return cachedResponse;
+    if (cached) {
+      return cached;
     }
     throw error;
   }
 }
 
-// Estrategia de cache: Cache First para archivos estáticos
+// Cache First para assets con hash: su contenido nunca cambia bajo la misma URL
 async function cacheFirst(request) {
-  const cachedResponse = await caches.match(request);
-  if (cachedResponse) {
-    return cachedResponse;
+  const cached = await caches.match(request, { cacheName: STATIC_CACHE });
+  if (cached) {
+    return cached;
   }
-  
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(STATIC_CACHE);
+    cache.put(request, response.clone());
+  }
+  return response;
+}
+
+// Elimina los assets de builds anteriores que ya no están en la lista de precache
+async function pruneStaticCache() {
+  if (!PRECACHE_FILES.length) {
+    return;
+  }
+  const cache = await caches.open(STATIC_CACHE);
+  const requests = await cache.keys();
+  await Promise.all(requests.map((request) => {
+    const { pathname } = new URL(request.url);
+    if (pathname.startsWith(DIST_PREFIX) && !PRECACHE_FILES.includes(pathname)) {
+      return cache.delete(request);
+    }
+  }));
+}
+
+// Network First para datos en vivo, fallback a cache sin conexión
+async function networkFirst(request) {
   try {
     const response = await fetch(request);
     if (response.ok) {
-      const cache = await caches.open(STATIC_CACHE);
+      const cache = await caches.open(API_CACHE);
       cache.put(request, response.clone());
     }
     return response;
   } catch (error) {
+    const cachedResponse = await caches.match(request);
+    if (cachedResponse) {
+      return cachedResponse;
+    }
     throw error;
   }
 }
 
+// Invalida las tasas cacheadas cuando el servidor anuncia una versión nueva
+async function revalidateRates() {
+  const cache = await caches.open(API_CACHE);
+  const requests = await cache.keys();
+  await Promise.all(requests.map(async (request) => {
+    const cached = await cache.match(request);
+    if (cached && snapshotVersionOf(cached) < latestSnapshotVersion) {
+      try {
+        await revalidate(request, API_CACHE, cached);
+      } catch (error) {
+        console.warn('No se pudo revalidar', request.url, error);
+      }
+    }
+  }));
+}
+
+async function notifyClients(message) {
+  const clients = await self.clients.matchAll();
+  clients.forEach(client => client.postMessage(message));
+}
+
 // Instalación del Service Worker
 self.addEventListener('install', (event) => {
   console.log('Service Worker instalando...');
@@ -80,13 +242,13 @@ self.addEventListener('activate', (event) => {
     caches.keys().then((cacheNames) => {
       return Promise.all(
         cacheNames.map((cacheName) => {
-          if (cacheName !== STATIC_CACHE && cacheName !== DYNAMIC_CACHE) {
+          if (!CACHES.includes(cacheName)) {
             console.log('Eliminando cache antiguo:', cacheName);
             return caches.delete(cacheName);
           }
         })
       );
-    }).then(() => {
+    }).then(pruneStaticCache).then(() => {
       console.log('Service Worker activado y cache limpiado');
       return self.clients.claim();
     })
@@ -98,27 +260,43 @@ self.addEventListener('fetch', (event) => {
   const { request } = event;
   const url = new URL(request.url);
   
-  // Cache estático para archivos CSS, JS, imágenes y manifest
-  if (request.destination === 'style' || 
-      request.destination === 'script' || 
-      request.destination === 'image' ||
-      url.pathname === '/static/manifest.json') {
-    event.respondWith(cacheFirst(request));
+  if (request.method !== 'GET' || url.origin !== self.location.origin) {
+    return;
+  }
+  
+  // El stream SSE nunca pasa por cache
+  if (url.pathname.startsWith('/api/stream/')) {
+    return;
+  }
+  
+  // Tasas: cache inmediato y revalidación con ETag/If-None-Match
+  if (RATE_ROUTES.some(route => url.pathname.startsWith(route))) {
+    event.respondWith(staleWhileRevalidate(event, API_CACHE));
     return;
   }
   
-  // Network First para rutas de API
-  if (API_ROUTES.some(route => url.pathname.startsWith(route))) {
+  // Estado y salud: siempre a la red
+  if (LIVE_ROUTES.some(route => url.pathname.startsWith(route))) {
     event.respondWith(networkFirst(request));
     return;
   }
   
-  // Cache First para la página principal
-  if (url.pathname === '/' || url.pathname === '/index.html') {
+  // Assets versionados por build_assets.py: inmutables
+  if (PRECACHE_FILES.includes(url.pathname)) {
     event.respondWith(cacheFirst(request));
     return;
   }
   
+  // Página principal y archivos estáticos: cache inmediato y revalidación condicional
+  if (request.destination === 'style' || 
+      request.destination === 'script' || 
+      request.destination === 'image' ||
+      url.pathname === '/static/manifest.json' ||
+      url.pathname === '/' || url.pathname === '/index.html') {
+    event.respondWith(staleWhileRevalidate(event, STATIC_CACHE));
+    return;
+  }
+  
   // Para otras rutas, usar Network First
   event.respondWith(networkFirst(request));
 });
@@ -130,7 +308,14 @@ self.addEventListener('message', (event) => {
   }
   
   if (event.data && event.data.type === 'GET_VERSION') {
-    event.ports[0].postMessage({ version: CACHE_NAME });
+    event.ports[0].postMessage({ caches: CACHES, snapshotVersion: latestSnapshotVersion });
+  }
+  
+  // Pista de invalidación: la página recibió una versión nueva por SSE
+  if (event.data && event.data.type === 'SNAPSHOT_VERSION') {
+    if (noteSnapshotVersion(event.data.version)) {
+      event.waitUntil(revalidateRates());
+    }
   }
 });
 
@@ -150,12 +335,9 @@ async function updateRatesInBackground() {
       console.log('Tipos de cambio actualizados en background');
       
       // Notificar a todos los clientes
-      const clients = await self.clients.matchAll();
-      clients.forEach(client => {
-        client.postMessage({
-          type: 'RATES_UPDATED',
-          timestamp: new Date().toISOString()
-        });
+      notifyClients({
+        type: 'RATES_UPDATED',
+        timestamp: new Date().toISOString()
       });
     }
   } catch (error) {
@@ -0,0 +1,378 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import time
+from typing import Dict, List
+from flask import abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+from compression import parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+PRECACHE_NAME = 'precache-manifest.js'
+SOURCE_DIRS = ('css', 'js')
+HASH_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Preferred order when the client accepts several codings
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+_IDENTIFIER = re.compile(r'[A-Za-z0-9_$\\]')
+# After these characters a '/' starts a regular expression, not a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                   'throw', 'instanceof', 'yield', 'await'}
+# A line break after these (or before the closing ones) never matters for ASI
+_NEWLINE_AFTER = set('{;,([')
+_NEWLINE_BEFORE = set('});,].')
+
+def minify_css(source: str) -> str:
+    """Drop comments and redundant whitespace from a stylesheet, leaving strings untouched"""
+    out = []
+    i, length = 0, len(source)
+    while i < length:
+        char = source[i]
+        if char in '"\'':
+            end = _string_end(source, i)
+            out.append(source[i:end])
+            i = end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+        elif char.isspace():
+            while i < length and source[i].isspace():
+                i += 1
+            previous = out[-1][-1:] if out else ''
+            following = source[i:i + 1]
+            # Whitespace before ':' is kept: it is a descendant combinator in selectors
+            if previous and following and previous not in '{};,>:' and following not in '{};,>!':
+                out.append(' ')
+        else:
+            out.append(char)
+            i += 1
+    return ''.join(out).replace(';}', '}').strip() + '\n'
+
+def minify_js(source: str) -> str:
+    """
+    Conservative JavaScript minifier: removes comments and indentation and
+    collapses whitespace, but never renames or reorders anything.
+
+    Strings, template literals and regular expressions are copied verbatim,
+    and line breaks are only dropped where automatic semicolon insertion
+    cannot depend on them.
+    """
+    out = []
+    pending = ''  # Whitespace (or a removed comment) waiting for the next token
+    i, length = 0, len(source)
+    while i < length:
+        char = source[i]
+        if char.isspace():
+            if char == '\n' or not pending:
+                pending = '\n' if char == '\n' else ' '
+            i += 1
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end < 0 else end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = length if end < 0 else end + 2
+            pending = '\n' if pending == '\n' or '\n' in source[i:end] else ' '
+            i = end
+            continue
+
+        if char in '"\'':
+            end = _string_end(source, i)
+        elif char == '`':
+            end = _template_end(source, i)
+        elif char == '/' and _starts_regex(out):
+            end = _regex_end(source, i)
+        else:
+            end = i + 1
+        if pending and out:
+            out.append(_separator(out[-1][-1], char, pending))
+        pending = ''
+        out.append(source[i:end])
+        i = end
+    return ''.join(out) + '\n'
+
+def _separator(previous: str, following: str, whitespace: str) -> str:
+    """What is left of a whitespace run between two tokens"""
+    if whitespace == '\n' and previous not in _NEWLINE_AFTER and following not in _NEWLINE_BEFORE:
+        return '\n'
+    if _IDENTIFIER.match(previous) and _IDENTIFIER.match(following):
+        return ' '
+    if previous + following in ('++', '--', '+-', '-+', '//', '/*'):
+        return ' '
+    return ''
+
+def _string_end(source: str, start: int) -> int:
+    quote, i = source[start], start + 1
+    while i < len(source):
+        if source[i] == '\\':
+            i += 2
+            continue
+        if source[i] == quote or source[i] == '\n':
+            return i + 1
+        i += 1
+    return len(source)
+
+def _template_end(source: str, start: int) -> int:
+    """End of a template literal, following ``${...}`` expressions (which may nest templates)"""
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+        elif char == '`':
+            return i + 1
+        elif source.startswith('${', i):
+            i = _expression_end(source, i + 2)
+        else:
+            i += 1
+    return len(source)
+
+def _expression_end(source: str, i: int) -> int:
+    depth = 1
+    while i < len(source):
+        char = source[i]
+        if char in '"\'':
+            i = _string_end(source, i)
+            continue
+        if char == '`':
+            i = _template_end(source, i)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if not depth:
+                return i + 1
+        i += 1
+    return len(source)
+
+def _starts_regex(out: List[str]) -> bool:
+    code = ''.join(out[-40:]).rstrip()
+    if not code:
+        return True
+    if code[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r'[A-Za-z_$][\w$]*$', code)
+    return bool(word) and word.group(0) in _REGEX_KEYWORDS
+
+def _regex_end(source: str, start: int) -> int:
+    i, in_class = start + 1, False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            break
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and (source[i].isalnum() or source[i] == '_'):
+                i += 1  # Flags
+            return i
+        i += 1
+    return i
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def fingerprint(relative_path: str, content: bytes) -> str:
+    """``css/app.css`` -> ``css/app.<hash>.css`` using a digest of the content"""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    root, extension = os.path.splitext(relative_path)
+    return f'{root}.{digest}{extension}'
+
+def precompress(path: str, content: bytes) -> Dict[str, int]:
+    """Write .gz (and .br when brotli is installed) next to ``path``; returns sizes written"""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli:
+        variants['.br'] = brotli.compress(content, quality=11)
+    written = {}
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content):
+            _write_atomic(path + suffix, compressed)
+            written[suffix] = len(compressed)
+    return written
+
+def build_assets(static_folder: str, prune: bool = False) -> Dict:
+    """
+    Minify, fingerprint and precompress the stylesheets and scripts under
+    ``static/css`` and ``static/js`` into ``static/dist``.
+
+    Writes ``dist/manifest.json`` (source path -> fingerprinted path) and
+    ``dist/precache-manifest.js`` for the service worker. Files from earlier
+    builds are kept so pages still cached by clients keep working, unless
+    ``prune`` is set.
+    """
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    manifest, report = {}, []
+    for source_dir in SOURCE_DIRS:
+        directory = os.path.join(static_folder, source_dir)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            minifier = MINIFIERS.get(os.path.splitext(name)[1])
+            if not minifier:
+                continue
+            relative = f'{source_dir}/{name}'
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                original = f.read()
+            content = minifier(original).encode('utf-8')
+            hashed = fingerprint(relative, content)
+            target = os.path.join(dist_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write_atomic(target, content)
+            compressed = precompress(target, content)
+            manifest[relative] = hashed
+            report.append({
+                'asset': relative,
+                'output': hashed,
+                'source_bytes': len(original.encode('utf-8')),
+                'minified_bytes': len(content),
+                **{f'{suffix[1:]}_bytes': size for suffix, size in compressed.items()}
+            })
+
+    precache = [f'/static/{DIST_DIR}/{hashed}' for hashed in manifest.values()]
+    _write_atomic(
+        os.path.join(dist_folder, PRECACHE_NAME),
+        ('// Generado por build_assets.py: no editar\n'
+         f'self.__PRECACHE_MANIFEST = {json.dumps(precache, indent=2)};\n').encode('utf-8')
+    )
+    # The manifest goes last: a running server only switches once every file it names exists
+    _write_atomic(
+        os.path.join(dist_folder, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    )
+    removed = _prune(dist_folder, manifest) if prune else 0
+    return {'manifest': manifest, 'assets': report, 'removed': removed}
+
+def _prune(dist_folder: str, manifest: Dict[str, str]) -> int:
+    keep = {os.path.join(dist_folder, hashed) for hashed in manifest.values()}
+    removed = 0
+    for directory, _, files in os.walk(dist_folder):
+        for name in files:
+            path = os.path.join(directory, name)
+            base = path
+            for _, suffix in PRECOMPRESSED:
+                if path.endswith(suffix):
+                    base = path[:-len(suffix)]
+            if directory != dist_folder and base not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def _write_atomic(path: str, content: bytes):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+def clean_assets(static_folder: str):
+    shutil.rmtree(os.path.join(static_folder, DIST_DIR), ignore_errors=True)
+
+class AssetManifest:
+    """
+    Resolves asset paths to their fingerprinted build output and serves it.
+
+    Templates call ``asset_url('css/app.css')``; when ``build_assets.py`` has
+    run this returns ``/static/dist/css/app.<hash>.css``, otherwise the plain
+    ``/static/css/app.css`` so development works without a build. Because a
+    fingerprinted URL changes whenever its content does, those files are
+    served with a one-year ``immutable`` Cache-Control and browsers never
+    revalidate them. The ``.br``/``.gz`` files written at build time are sent
+    as-is to clients that accept them, so nothing is compressed per request.
+    """
+
+    def __init__(self, app=None):
+        self.dist_folder = None
+        self.manifest_path = None
+        self._manifest: Dict[str, str] = {}
+        self._fingerprinted = frozenset()
+        self._mtime = None
+        self._stats = {'served': 0, 'precompressed': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.dist_folder = os.path.join(app.static_folder, DIST_DIR)
+        self.manifest_path = os.path.join(self.dist_folder, MANIFEST_NAME)
+        app.add_template_global(self.asset_url, 'asset_url')
+        app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>', 'dist_asset', self.serve)
+
+    def load(self) -> Dict[str, str]:
+        """Current manifest, re-read when a new build replaces the file"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except (OSError, TypeError):
+            mtime = None
+        if mtime != self._mtime:
+            manifest = {}
+            if mtime is not None:
+                try:
+                    with open(self.manifest_path, encoding='utf-8') as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read asset manifest: {str(e)}")
+            self._manifest = manifest
+            self._fingerprinted = frozenset(manifest.values())
+            self._mtime = mtime
+        return self._manifest
+
+    def asset_url(self, path: str) -> str:
+        hashed = self.load().get(path)
+        if hashed:
+            return url_for('dist_asset', filename=hashed)
+        return url_for('static', filename=path)
+
+    def serve(self, filename: str):
+        path = safe_join(self.dist_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+
+        self.load()
+        encoding, served = None, path
+        accepted = parse_accept_encoding(request.headers.get('Accept-Encoding', ''))
+        for coding, suffix in PRECOMPRESSED:
+            if accepted.get(coding, accepted.get('*', 0.0)) > 0 and os.path.isfile(path + suffix):
+                encoding, served = coding, path + suffix
+                break
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_file(served, mimetype=mimetype, conditional=True)
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+            self._stats['precompressed'] += 1
+        # Build metadata (manifest, precache list) keeps its name across builds and must be revalidated
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if filename in self._fingerprinted else 'no-cache'
+        self._stats['served'] += 1
+        return response
+
+    def get_stats(self) -> Dict:
+        manifest = self.load()
+        return {
+            'built': bool(manifest),
+            'assets': len(manifest),
+            'built_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(self._mtime / 1e9)) if self._mtime else None,
+            **self._stats
+        }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Pruebas del control de admisión: prioridades, 503 con Retry-After y contadores de descarte
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from admission import AdmissionController, CRITICAL, LOW, NORMAL
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.release = threading.Event()
+    app.entered = threading.Semaphore(0)
+
+    def blocking():
+        app.entered.release()
+        app.release.wait(5)
+        return jsonify({'ok': True})
+
+    # Same endpoint names as app.py so the default priorities apply
+    app.add_url_rule('/api/rates', 'get_all_rates', lambda: jsonify({'ok': True}))
+    app.add_url_rule('/api/convert', 'currency_converter', blocking)
+    app.add_url_rule('/api/compare', 'compare_currencies', blocking)
+    app.add_url_rule('/api/stream/rates', 'stream_rates', lambda: jsonify({'ok': True}))
+    yield app
+    app.release.set()
+
+def hold(app, path, count):
+    """Start count requests to a blocking endpoint and wait until all are in flight"""
+    threads = [threading.Thread(target=app.test_client().get, args=(path,)) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for _ in threads:
+        assert app.entered.acquire(timeout=5)
+    return threads
+
+def test_low_priority_is_shed_first(app):
+    admission = AdmissionController(app, max_in_flight=4, retry_after_seconds=7)
+    client = app.test_client()
+    threads = hold(app, '/api/compare', 1) + hold(app, '/api/convert', 2)
+
+    shed = client.get('/api/compare')
+    assert shed.status_code == 503
+    assert shed.headers['Retry-After'] == '7' and shed.headers['Cache-Control'] == 'no-store'
+    assert shed.get_json()['priority'] == LOW
+    # One slot left: normal may take it, rate reads always keep getting through
+    assert client.get('/api/rates').status_code == 200
+    assert client.get('/api/stream/rates').status_code == 200
+
+    threads += hold(app, '/api/convert', 1)
+    assert client.get('/api/convert').status_code == 503
+    assert client.get('/api/rates').status_code == 503  # Every slot is busy
+
+    app.release.set()
+    for thread in threads:
+        thread.join(5)
+    stats = admission.get_stats()
+    assert stats['classes'][LOW] == {'in_flight': 0, 'admitted': 1, 'shed': 1, 'p95_ms': 0.0}
+    assert stats['classes'][NORMAL]['admitted'] == 3 and stats['classes'][NORMAL]['shed'] == 1
+    assert stats['classes'][CRITICAL]['admitted'] == 1 and stats['classes'][CRITICAL]['shed'] == 1
+    assert stats['shed_total'] == 3
+    assert client.get('/api/compare').status_code == 200
+
+def record(admission, priority, milliseconds, count=20):
+    for _ in range(count):
+        assert admission.try_admit(priority)
+        admission.release(priority, milliseconds)
+
+@pytest.mark.parametrize('critical_ms, admitted', [
+    (100, {CRITICAL, NORMAL, LOW}),
+    (200, {CRITICAL, NORMAL}),  # p95 at 80% of the SLO
+    (300, {CRITICAL}),          # SLO breached
+])
+def test_slow_rate_reads_shed_by_priority(critical_ms, admitted):
+    admission = AdmissionController(critical_slo_ms=250, latency_refresh_seconds=0)
+    record(admission, CRITICAL, critical_ms)
+    assert admission.critical_p95_ms() == critical_ms
+    assert {p for p in (CRITICAL, NORMAL, LOW) if admission.try_admit(p)} == admitted
+
+def test_latency_pressure_fades_with_the_window():
+    admission = AdmissionController(critical_slo_ms=250, window_seconds=0.2, latency_refresh_seconds=0)
+    record(admission, CRITICAL, 1000)
+    assert not admission.try_admit(LOW)
+    time.sleep(0.3)
+    assert admission.critical_p95_ms() == 0.0
+    assert admission.try_admit(LOW)
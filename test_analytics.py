@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la analítica móvil: estadísticas de ventana deslizante frente a un cálculo directo,
+EMA con muestreo irregular y recarga del historial importado sin snapshot nuevo
+"""
+
+import math
+import random
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics import RollingAnalytics, WindowStats, format_window, parse_window
+from models import db, ExchangeRateHistory
+
+START = datetime(2025, 1, 1)
+
+def test_parse_and_format_windows():
+    assert parse_window(' 7D ') == 7 * 86400
+    assert format_window(parse_window('12h')) == '12h'
+    assert format_window(parse_window('48h')) == '2d'
+    for value in ('0d', '7w', 'd', '-1h'):
+        with pytest.raises(ValueError):
+            parse_window(value)
+
+def test_window_matches_direct_computation():
+    rng = random.Random(7)
+    stats = WindowStats(3600)
+    samples, at = [], START
+    for _ in range(500):
+        at += timedelta(seconds=rng.choice([30, 60, 90, 600, 1800]))  # Irregular, with gaps
+        rate = 36 + rng.gauss(0, 0.5)
+        stats.add(at, rate)
+        samples.append((at, rate))
+
+        # Samples in (at - window, at], the ones Welford removal and the deques must agree with
+        window = [r for t, r in samples if t > at - timedelta(seconds=3600)]
+        result = stats.result()
+        assert result['samples'] == len(window)
+        assert result['sma'] == pytest.approx(statistics.fmean(window), abs=1e-6)
+        expected_std = statistics.stdev(window) if len(window) > 1 else 0.0
+        assert result['std'] == pytest.approx(expected_std, abs=1e-5)
+        assert (result['min'], result['max']) == (min(window), max(window))
+        assert (result['first'], result['last']) == (window[0], window[-1])
+
+def test_window_empties_after_a_long_gap():
+    stats = WindowStats(3600)
+    stats.add(START, 10.0)
+    stats.add(START + timedelta(minutes=30), 20.0)
+    stats.add(START + timedelta(hours=5), 30.0)
+    result = stats.result()
+    assert (result['samples'], result['sma'], result['std'], result['min'], result['max']) == (1, 30.0, 0.0, 30.0, 30.0)
+
+def test_ema_weights_by_elapsed_time():
+    stats = WindowStats(3600)
+    stats.add(START, 10.0)
+    assert stats.ema == 10.0
+    # One full time constant later the EMA has covered 1 - 1/e of the step
+    stats.add(START + timedelta(hours=1), 20.0)
+    assert stats.ema == pytest.approx(10 + 10 * (1 - math.exp(-1)))
+    # A sample at the same instant does not move it
+    before = stats.ema
+    stats.add(START + timedelta(hours=1), 50.0)
+    assert stats.ema == before
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db.session.add_all(ExchangeRateHistory(currency='USD', rate=36 + i, created_at=START + timedelta(days=i))
+                           for i in range(10))
+        db.session.commit()
+        yield app
+
+def test_imported_history_is_picked_up_without_a_new_snapshot(app):
+    analytics = RollingAnalytics(check_seconds=0)
+    first = analytics.get('USD', [30 * 86400], version=1)['30d']
+    assert (first['samples'], first['min']) == (10, 36)
+    assert analytics.get('USD', [30 * 86400], version=1) is analytics.get('USD', [30 * 86400], version=1)
+
+    # Back-filled rows, older than the latest sample, with no snapshot change
+    generation = analytics.generation()
+    db.session.add_all(ExchangeRateHistory(currency='USD', rate=30 + i, created_at=START - timedelta(days=i + 1))
+                       for i in range(3))
+    db.session.commit()
+    assert analytics.generation() == generation + 3
+    result = analytics.get('USD', [30 * 86400], version=1)['30d']
+    assert (result['samples'], result['min'], result['from']) == (13, 30, (START - timedelta(days=3)).isoformat())
+    assert analytics.get_stats()['rebuilds'] == 3
+
+def test_generation_check_is_throttled(app):
+    analytics = RollingAnalytics(check_seconds=3600)
+    assert analytics.get('USD', [7 * 86400], version=1)['7d']['samples'] == 7
+    db.session.add(ExchangeRateHistory(currency='USD', rate=99.0, created_at=START + timedelta(days=10)))
+    db.session.commit()
+    assert analytics.get('USD', [7 * 86400], version=1)['7d']['samples'] == 7
+    # A new snapshot version refreshes regardless of the throttle
+    assert analytics.get('USD', [7 * 86400], version=2)['7d']['max'] == 99.0
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Pruebas de Cache-Control: max-age según el calendario de actualización y no-store por defecto
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache_policy import CachePolicy, NO_STORE, PRIVATE_NO_STORE
+
+NOW = datetime(2025, 3, 14, 12, 0, 0)
+
+@pytest.fixture
+def policy():
+    return CachePolicy(update_interval_seconds=1800, stale_while_revalidate=600, stale_if_error=3600, min_max_age=5)
+
+@pytest.mark.parametrize('next_refresh_at, expected', [
+    (None, 5),  # Never updated: the next request triggers the refresh
+    (NOW + timedelta(seconds=700.9), 700),
+    (NOW + timedelta(seconds=2), 5),
+    (NOW - timedelta(minutes=10), 5),  # Overdue: refresh in progress or failing
+    (NOW + timedelta(hours=3), 1800),  # Never past one interval, even with a skewed schedule
+])
+def test_max_age(policy, next_refresh_at, expected):
+    assert policy.max_age(next_refresh_at, NOW) == expected
+
+def test_rates_header(policy):
+    assert policy.for_rates(NOW + timedelta(minutes=1), NOW) == \
+        'public, max-age=60, stale-while-revalidate=600, stale-if-error=3600'
+
+def test_endpoint_headers(divisa):
+    client = divisa.app.test_client()
+    rates = client.get('/api/rates')
+    assert rates.headers['Cache-Control'].startswith('public, max-age=')
+    assert 'Accept' in rates.headers['Vary']
+    max_age = int(rates.headers['Cache-Control'].split('max-age=')[1].split(',')[0])
+    assert 5 <= max_age <= divisa.config.UPDATE_INTERVAL_MINUTES * 60
+
+    # Operational and write endpoints, whatever their status
+    assert client.get('/api/status').headers['Cache-Control'] == PRIVATE_NO_STORE
+    assert client.post('/api/update').headers['Cache-Control'] == PRIVATE_NO_STORE
+    assert client.get('/api/webhooks').headers['Cache-Control'] == PRIVATE_NO_STORE
+
+    # Errors of cacheable endpoints and responses without a policy
+    error = client.get('/api/convert?amount=-1&from=USD&to=VES')
+    assert error.status_code == 400
+    assert error.headers['Cache-Control'] == NO_STORE
+    assert client.get('/api/health').headers['Cache-Control'] == NO_STORE
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las velas diarias: fusión OHLC independiente del orden, extremos, lecturas repetidas y
+upsert por día entre actualizaciones
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from candles import DailyCandles
+from config import Config
+from conftest import StaticScraper
+from models import db, DailyCandle
+
+@pytest.fixture(params=['upsert', 'read-modify-write'])
+def candles(app, request, monkeypatch):
+    candles = DailyCandles(utc_offset_hours=-4)
+    if request.param == 'read-modify-write':
+        # The fallback for databases without an upsert statement
+        monkeypatch.setattr(candles, '_upsert_statement', lambda dialect: None)
+    with app.app_context():
+        yield candles
+
+def record(candles, *readings):
+    candles.record(readings)
+    db.session.commit()
+
+def candle(currency='USD', day=date(2025, 3, 14)):
+    row = DailyCandle.query.filter_by(currency=currency, day=day).populate_existing().one()
+    return row.open, row.high, row.low, row.close, row.samples
+
+def test_out_of_order_readings_keep_the_earliest_open_and_latest_close(candles):
+    record(candles, ('USD', datetime(2025, 3, 14, 18), 36.6))
+    record(candles, ('USD', datetime(2025, 3, 14, 12), 36.4))  # Back-filled, earlier in the day
+    record(candles, ('USD', datetime(2025, 3, 14, 15), 36.5))
+    assert candle() == (36.4, 36.6, 36.4, 36.6, 3)
+    row = DailyCandle.query.one()
+    assert (row.opened_at, row.closed_at) == (datetime(2025, 3, 14, 12), datetime(2025, 3, 14, 18))
+
+    # Within one batch the order does not matter either
+    record(candles, ('EUR', datetime(2025, 3, 14, 20), 40.2), ('EUR', datetime(2025, 3, 14, 10), 39.8))
+    assert candle('EUR') == (39.8, 40.2, 39.8, 40.2, 2)
+
+def test_high_and_low_widen(candles):
+    record(candles, ('USD', datetime(2025, 3, 14, 12), 36.5))
+    record(candles, ('USD', datetime(2025, 3, 14, 13), 37.1), ('USD', datetime(2025, 3, 14, 14), 36.0))
+    record(candles, ('USD', datetime(2025, 3, 14, 15), 36.7))  # Inside the range: extremes unchanged
+    assert candle() == (36.5, 37.1, 36.0, 36.7, 4)
+
+def test_rerecording_a_reading_leaves_the_candle_unchanged(candles):
+    record(candles, ('USD', datetime(2025, 3, 14, 12), 36.4), ('USD', datetime(2025, 3, 14, 18), 36.6))
+    before = DailyCandle.query.one().to_dict()
+    record(candles, ('USD', datetime(2025, 3, 14, 12), 36.4))
+    record(candles, ('USD', datetime(2025, 3, 14, 18), 36.6))
+    after = DailyCandle.query.populate_existing().one().to_dict()
+    # Only the reading count moves; the importer deduplicates readings before they get here
+    assert after.pop('samples') == before.pop('samples') + 2
+    assert after == before
+    assert DailyCandle.query.count() == 1
+
+def test_local_day_boundary(candles):
+    # 02:00 UTC is still the previous day at UTC-4
+    record(candles, ('USD', datetime(2025, 3, 15, 2), 36.9), ('USD', datetime(2025, 3, 15, 5), 37.0))
+    assert candle() == (36.9, 36.9, 36.9, 36.9, 1)
+    assert candle(day=date(2025, 3, 15)) == (37.0, 37.0, 37.0, 37.0, 1)
+
+def test_refreshes_upsert_one_candle_per_day(app, monkeypatch):
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_ENABLED', False)
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_ENABLED', False)
+    from database_service import DatabaseService
+
+    with app.app_context():
+        service = DatabaseService()
+        service.scraper = scraper = StaticScraper({'USD': 36.5, 'EUR': 39.8})
+        assert service.update_rates_from_bcv()
+        scraper.rates = {'USD': 36.8, 'EUR': 39.6}
+        assert service.update_rates_from_bcv()
+
+        day = service.candles.day_for(datetime.utcnow())
+        assert DailyCandle.query.count() == 2
+        assert candle('USD', day) == (36.5, 36.8, 36.5, 36.8, 2)
+        assert candle('EUR', day) == (39.8, 39.8, 39.6, 39.6, 2)
+        assert [c['close'] for c in service.get_candles('USD')['candles']] == [36.8]
+
+def test_pages_walk_back_from_the_newest_day(app, monkeypatch):
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_ENABLED', False)
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_ENABLED', False)
+    from database_service import DatabaseService
+
+    with app.app_context():
+        service = DatabaseService()
+        record(service.candles, *(('USD', datetime(2025, 3, day, 12), 30.0 + day) for day in range(1, 11)))
+
+        first = service.get_candles('USD', limit=4)
+        assert [c['day'] for c in first['candles']] == ['2025-03-07', '2025-03-08', '2025-03-09', '2025-03-10']
+        second = service.get_candles('USD', limit=4, cursor=first['next_cursor'])
+        assert [c['day'] for c in second['candles']] == ['2025-03-03', '2025-03-04', '2025-03-05', '2025-03-06']
+        last = service.get_candles('USD', end=date(2025, 3, 8), limit=4, cursor=second['next_cursor'])
+        assert [c['day'] for c in last['candles']] == ['2025-03-01', '2025-03-02'] and last['next_cursor'] is None
+        with pytest.raises(ValueError):
+            service.get_candles('EUR', cursor=first['next_cursor'])
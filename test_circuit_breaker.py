@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Pruebas del circuit breaker compartido: apertura por umbral, backoff exponencial, sonda única en
+half-open, expiración de la sonda y cierre tras un éxito
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker
+from config import Config
+from models import db, CircuitBreakerState
+
+@pytest.fixture
+def breaker(app, monkeypatch):
+    monkeypatch.setattr(circuit_breaker.random, 'uniform', lambda low, high: high)  # No jitter
+    with app.app_context():
+        yield CircuitBreaker('bcv', failure_threshold=3, base_backoff_seconds=60, max_backoff_seconds=300,
+                             probe_timeout_seconds=30)
+
+def state():
+    return CircuitBreakerState.query.filter_by(name='bcv').populate_existing().one()
+
+def backoff():
+    row = state()
+    return round((row.opened_until - row.last_failure_at).total_seconds())
+
+def expire(**values):
+    """Move the stored deadlines into the past, as if time had passed"""
+    CircuitBreakerState.query.filter_by(name='bcv').update(values)
+    db.session.commit()
+
+def test_threshold_opens_the_circuit(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow_request() and state().state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert state().state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.is_open()
+    assert backoff() == 60
+
+def test_backoff_grows_exponentially_up_to_the_cap(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    seen = [backoff()]
+    for _ in range(4):
+        expire(opened_until=datetime.utcnow() - timedelta(seconds=1))
+        assert breaker.allow_request()  # Half-open probe...
+        breaker.record_failure()  # ...that fails reopens at once, for longer
+        seen.append(backoff())
+    assert seen == [60, 120, 240, 300, 300]
+    assert state().opened_total == 5
+
+def test_half_open_allows_a_single_probe(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    expire(opened_until=datetime.utcnow() - timedelta(seconds=1))
+    other_worker = CircuitBreaker('bcv', probe_timeout_seconds=30)
+    assert breaker.allow_request()
+    assert state().state == CircuitBreaker.HALF_OPEN
+    assert not other_worker.allow_request()
+    assert not breaker.allow_request()
+    assert other_worker.is_open()
+
+def test_probe_timeout_lets_another_worker_probe(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    expire(opened_until=datetime.utcnow() - timedelta(seconds=1))
+    assert breaker.allow_request()
+    # The probing worker died without reporting back
+    expire(probe_started_at=datetime.utcnow() - timedelta(seconds=31))
+    assert not breaker.is_open()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # The new probe holds it again
+
+def test_success_closes_the_circuit(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    expire(opened_until=datetime.utcnow() - timedelta(seconds=1))
+    assert breaker.allow_request()
+    breaker.record_success()
+    row = state()
+    assert (row.state, row.failure_count, row.consecutive_opens, row.opened_until) == (CircuitBreaker.CLOSED, 0, 0, None)
+    assert row.closed_total == 1
+    assert breaker.allow_request() and not breaker.is_open()
+    # The backoff starts over after a recovery
+    for _ in range(3):
+        breaker.record_failure()
+    assert backoff() == 60
+
+def test_scraper_exceptions_count_as_failures(app, monkeypatch):
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_ENABLED', False)
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_ENABLED', False)
+    monkeypatch.setattr(Config, 'CIRCUIT_BREAKER_FAILURE_THRESHOLD', 2)
+    from database_service import DatabaseService
+
+    class TimingOut:
+        calls = 0
+
+        def get_all_rates(self):
+            self.calls += 1
+            raise TimeoutError('BCV did not answer')
+
+    with app.app_context():
+        service = DatabaseService()
+        service.scraper = scraper = TimingOut()
+        assert not service.update_rates_from_bcv()
+        assert not service.update_rates_from_bcv()
+        assert service.circuit_breaker.get_status()['state'] == CircuitBreaker.OPEN
+        assert not service.update_rates_from_bcv()
+        assert scraper.calls == 2
+
+        # A half-open probe that raises reopens the circuit instead of waiting out the probe timeout
+        expire(opened_until=datetime.utcnow() - timedelta(seconds=1))
+        assert not service.update_rates_from_bcv()
+        assert scraper.calls == 3
+        assert service.circuit_breaker.get_status()['state'] == CircuitBreaker.OPEN
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Pruebas del compresor de respuestas: qué variantes se guardan en el LRU y con qué clave
+"""
+
+import gzip
+import itertools
+
+import pytest
+from flask import Flask, jsonify, request
+
+from compression import ResponseCompressor
+
+@pytest.fixture
+def compressor():
+    app = Flask(__name__)
+    compressor = ResponseCompressor(app, min_size=100, cache_entries=4)
+    counter = itertools.count()
+    rates = {f'C{i:03d}': 36.5 + i for i in range(50)}
+
+    @app.route('/rates')
+    def rates_view():
+        # A new timestamp on every request, like the API responses
+        response = jsonify({'rates': rates, 'timestamp': next(counter), 'args': request.args.to_dict()})
+        response.set_etag(f"v{request.args.get('v', '1')}-json", weak=True)
+        return response
+
+    @app.route('/convert')
+    def convert_view():
+        return jsonify({'rates': rates, 'timestamp': next(counter)})
+
+    compressor.client = app.test_client()
+    return compressor
+
+def get(compressor, path):
+    response = compressor.client.get(path, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    return response
+
+def test_bodies_without_etag_are_not_cached(compressor):
+    get(compressor, '/rates')
+    for _ in range(10):
+        assert b'"timestamp"' in gzip.decompress(get(compressor, '/convert').data)
+    stats = compressor.get_stats()
+    # The one-off bodies did not push the reusable variant out of the cache
+    assert (stats['cached_variants'], stats['uncached']) == (1, 10)
+    get(compressor, '/rates')
+    assert compressor.get_stats()['cache_hits'] == 1
+
+def test_variants_are_keyed_by_path_args_and_etag(compressor):
+    first = get(compressor, '/rates?b=2&a=1')
+    # Same representation with the arguments in another order: served from the cache
+    again = get(compressor, '/rates?a=1&b=2')
+    assert again.data == first.data
+    assert again.headers['ETag'] == 'W/"v1-json-gzip"'
+
+    other_args = get(compressor, '/rates?a=3')
+    new_version = get(compressor, '/rates?a=1&b=2&v=2')
+    assert gzip.decompress(other_args.data) != gzip.decompress(first.data)
+    assert new_version.headers['ETag'] == 'W/"v2-json-gzip"'
+    stats = compressor.get_stats()
+    assert (stats['compressed'], stats['cache_hits'], stats['cached_variants']) == (3, 1, 3)
+
+def test_small_and_unaccepted_responses_pass_through(compressor):
+    compressor.min_size = 10 ** 6
+    assert 'Content-Encoding' not in compressor.client.get('/rates', headers={'Accept-Encoding': 'gzip'}).headers
+    compressor.min_size = 100
+    assert 'Content-Encoding' not in compressor.client.get('/rates', headers={'Accept-Encoding': 'identity'}).headers
+    assert compressor.get_stats()['compressed'] == 0
+
+def test_compressed_etags_revalidate_static_files(tmp_path):
+    app = Flask(__name__, static_folder=str(tmp_path), static_url_path='/static')
+    ResponseCompressor(app, min_size=100)
+    (tmp_path / 'sw.js').write_text('self.addEventListener("fetch", () => {});\n' * 50)
+    client = app.test_client()
+
+    first = client.get('/static/sw.js', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].endswith('-gzip"')
+    # The browser sends back the ETag of the variant it cached; send_file must still match it
+    again = client.get('/static/sw.js', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert client.get('/static/sw.js', headers={'If-None-Match': '"other-gzip"'}).status_code == 200
+
+def test_brotli_is_preferred_when_installed(compressor):
+    brotli = pytest.importorskip('brotli')
+    response = compressor.client.get('/rates', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.headers['ETag'] == 'W/"v1-json-br"'
+    assert b'"rates"' in brotli.decompress(response.data)
+    assert compressor.select_encoding('br;q=0.5, gzip') == 'gzip'
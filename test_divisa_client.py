@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Pruebas del SDK de Python: Cache-Control, parser SSE, caché local, paridad de conversiones con
+/api/convert y reconexión y cierre del stream
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+from divisa_client import DivisaClient, RateCache, convert_amount, parse_cache_control, parse_sse
+
+@pytest.mark.parametrize('header, expected', [
+    ('public, max-age=300, stale-while-revalidate=60', {'public': None, 'max-age': 300, 'stale-while-revalidate': 60}),
+    ('Private, No-Store', {'private': None, 'no-store': None}),
+    ('max-age="120"', {'max-age': 120}),
+    ('', {}),
+    (None, {}),
+])
+def test_parse_cache_control(header, expected):
+    assert parse_cache_control(header) == expected
+
+def test_parse_sse():
+    lines = ['retry: 5000', '', ': heartbeat', '', 'id: 3', 'event: rates', 'data: {"a":', 'data: 1}', '',
+             'data:no space', '\r\n']
+    assert list(parse_sse(lines)) == [('rates', '3', '{"a":\n1}'), ('message', '3', 'no space')]
+
+def body(rates):
+    return {'success': True, 'data': {'rates': rates, 'last_updated': 'x'}}
+
+def test_cache_store_freshness_and_revalidation():
+    cache = RateCache()
+    assert not cache.store(500, {}, None)
+    assert cache.store(200, {'Cache-Control': 'public, max-age=60, stale-if-error=600', 'Age': '20',
+                             'ETag': 'W/"v2-json"', 'X-Snapshot-Version': '2'}, body({'USD': 36.5}))
+    now = time.monotonic()
+    assert cache.is_fresh(now) and not cache.is_fresh(now + 41)  # max-age minus Age
+    assert cache.conditional_headers() == {'If-None-Match': 'W/"v2-json"'}
+    assert cache.version == 2 and cache.can_serve_stale()
+
+    # 304: same data, new freshness window
+    assert cache.store(304, {'Cache-Control': 'max-age=300'}, None)
+    assert cache.rates == {'USD': 36.5}
+    assert cache.is_fresh(time.monotonic() + 200)
+
+    assert cache.store(200, {'Cache-Control': 'no-cache'}, body({'USD': 37.0}))
+    assert cache.rates == {'USD': 37.0} and not cache.is_fresh()
+
+    assert cache.store(200, {'Cache-Control': 'private, no-store'}, body({'USD': 38.0}))
+    assert cache.data is None and cache.conditional_headers() == {}
+    assert not cache.store(304, {}, None)  # Nothing left to revalidate
+
+def test_cache_apply_push():
+    cache = RateCache()
+    assert cache.apply_push({'version': 4, 'rates': {'USD': 36.5}, 'date_published': 'd'}, keepalive=30)
+    assert cache.data['base_currency'] == 'VES' and cache.data['currencies_available'] == ['USD']
+    assert cache.etag is None and cache.is_fresh()
+    assert not cache.apply_push({'version': 4, 'rates': {'USD': 1.0}}, keepalive=30)
+    assert not cache.apply_push({'version': 3, 'rates': {'USD': 1.0}}, keepalive=30)
+    assert cache.apply_push({'version': 5, 'rates': {'USD': 37.0}}, keepalive=30)
+    assert cache.rates == {'USD': 37.0}
+
+def test_convert_amount_matches_the_endpoint(divisa):
+    client = divisa.app.test_client()
+    rates = client.get('/api/rates').get_json()['data']['rates']
+    for amount, from_currency, to_currency in [(100, 'USD', 'EUR'), (1, 'usd', 'VES'), (1000, 'VES', 'EUR'),
+                                               (2.5, 'EUR', 'EUR'), (0.333, 'EUR', 'USD')]:
+        server = client.get(f'/api/convert?amount={amount}&from={from_currency}&to={to_currency}').get_json()
+        local = convert_amount(rates, amount, from_currency, to_currency)
+        assert {key: server['conversion'][key] for key in ('from', 'to', 'rate')} == local
+
+    with pytest.raises(ValueError):
+        convert_amount(rates, 0, 'USD', 'VES')
+
+class StreamServer:
+    """SSE server that ends the first connection after one event and holds the next ones open"""
+
+    def __init__(self):
+        self.last_event_ids = []
+        self.done = threading.Event()
+        self.server = make_server('127.0.0.1', 0, self.wsgi, threaded=True)
+        self.url = f'http://127.0.0.1:{self.server.port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def wsgi(self, environ, start_response):
+        self.last_event_ids.append(environ.get('HTTP_LAST_EVENT_ID'))
+        start_response('200 OK', [('Content-Type', 'text/event-stream')])
+        version = len(self.last_event_ids)
+        snapshot = json.dumps({'version': version, 'rates': {'USD': 36.0 + version}})
+        yield f'id: {version}\nevent: rates\ndata: {snapshot}\n\n'.encode()
+        if version > 1:
+            self.done.wait(30)
+
+    def stop(self):
+        self.done.set()
+        self.server.shutdown()
+
+def test_stream_reconnects_and_closes_promptly():
+    server = StreamServer()
+    client = DivisaClient(server.url, heartbeat_grace=30)
+    second = threading.Event()
+    client.add_listener(lambda data: data['rates']['USD'] == 38.0 and second.set())
+    try:
+        client.subscribe()
+        assert second.wait(10)
+        # The reconnect resumed from the version pushed on the first connection
+        assert server.last_event_ids == [None, '1']
+        assert client.get_rate('USD') == 38.0
+        assert client.get_stats()['push_updates'] == 2 and client.get_stats()['server_requests'] == 0
+
+        # The reader is blocked in recv() on a silent stream: close() must not wait for the read timeout
+        started = time.monotonic()
+        client.close()
+        assert time.monotonic() - started < 2
+        assert not client._stream_thread.is_alive()
+    finally:
+        server.stop()
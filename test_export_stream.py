@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la exportación en streaming NDJSON/CSV: contenido, filtros y tamaño de los bloques
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from arrow_export import ArrowExporter, ExportError, format_available
+from models import db, ApiMetrics, ExchangeRateHistory
+
+START = datetime(2025, 1, 1, 8, 30)
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db.session.add_all(
+            ExchangeRateHistory(currency='USD' if i % 5 else 'EUR', rate=36 + i / 1000, date_published=f'día {i}',
+                                created_at=START + timedelta(minutes=i))
+            for i in range(3000)
+        )
+        db.session.add(ApiMetrics(endpoint='/api/rates', method='GET', status_code=200, response_time_ms=1.5,
+                                  created_at=START))
+        db.session.commit()
+    with app.app_context():
+        yield app
+
+def export(exporter, export_format, **kwargs):
+    return list(exporter.stream('history', export_format, **kwargs))
+
+def test_ndjson_rows_match_the_table(app):
+    chunks = export(ArrowExporter(), 'ndjson', filters={'currency': 'USD'}, columns=['id', 'rate', 'created_at'])
+    rows = [json.loads(line) for line in b''.join(chunks).splitlines()]
+    expected = ExchangeRateHistory.query.filter_by(currency='USD').order_by(ExchangeRateHistory.created_at).all()
+    assert rows == [{'id': r.id, 'rate': r.rate, 'created_at': r.created_at.isoformat()} for r in expected]
+    assert list(rows[0]) == ['id', 'rate', 'created_at']
+
+def test_csv_has_header_and_iso_dates(app):
+    end = START + timedelta(minutes=9)
+    text = b''.join(export(ArrowExporter(), 'csv', start=START, end=end)).decode('utf-8')
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == ['id', 'currency', 'rate', 'date_published', 'created_at']
+    assert len(rows) == 11
+    assert rows[1] == ['1', 'EUR', '36.0', 'día 0', START.isoformat()]
+
+    empty = b''.join(export(ArrowExporter(), 'csv', filters={'currency': 'TRY'}))
+    assert empty == b'id,currency,rate,date_published,created_at\r\n'
+
+def test_chunks_start_small_and_grow_to_text_batch_size(app):
+    exporter = ArrowExporter(first_fetch_size=10, text_batch_size=1000)
+    chunks = export(exporter, 'ndjson')
+    assert [chunk.count(b'\n') for chunk in chunks] == [10, 40, 160, 640, 1000, 1000, 150]
+
+    chunks = export(exporter, 'csv')
+    assert [chunk.count(b'\n') for chunk in chunks] == [11, 40, 160, 640, 1000, 1000, 150]
+
+def test_text_formats_do_not_need_pyarrow(app):
+    assert format_available('ndjson') and format_available('csv')
+    metrics = list(ArrowExporter().stream('metrics', 'ndjson'))
+    assert json.loads(metrics[0])['endpoint'] == '/api/rates'
+    with pytest.raises(ExportError):
+        export(ArrowExporter(), 'xml')
+
+def test_endpoint_filters_are_parsed_or_rejected(divisa):
+    client = divisa.app.test_client()
+    response = client.get('/api/export/metrics?format=ndjson&status_code=abc')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid filter'
+
+    client.get('/api/rates')  # Tracked as a 200 metric
+    rows = [json.loads(line) for line in client.get('/api/export/metrics?format=ndjson&status_code=200').data.splitlines()]
+    assert rows and all(row['status_code'] == 200 for row in rows)
+
+    history = client.get('/api/export/history?format=csv&currency=usd').data.decode('utf-8')
+    assert [row[1] for row in csv.reader(io.StringIO(history))][1:] == ['USD']
+
+def test_arrow_and_parquet_round_trip(app):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    exporter = ArrowExporter(batch_size=1000)
+    stream = b''.join(export(exporter, 'arrow', filters={'currency': 'EUR'}, columns=['id', 'rate']))
+    table = pa.ipc.open_stream(stream).read_all()
+    assert table.column_names == ['id', 'rate']
+    assert table.num_rows == 600
+    assert table.column('id').to_pylist()[:2] == [1, 6]
+
+    parquet = pq.read_table(io.BytesIO(b''.join(export(exporter, 'parquet', start=START + timedelta(minutes=2990)))))
+    assert parquet.num_rows == 10
+    assert parquet.column('created_at').to_pylist()[-1] == START + timedelta(minutes=2999)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Pruebas del archivo columnar de historial: orden de los appends, rangos, recuperación de escrituras
+parciales, sincronización con la base y reconstrucción concurrente con escrituras y lecturas
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from history_archive import HistoryArchive, RATE_SCALE
+from models import db, ExchangeRateHistory
+
+START = datetime(2020, 1, 1)
+
+def minutes(i):
+    return START + timedelta(minutes=i)
+
+@pytest.fixture
+def history(app):
+    """25k USD rows in the database"""
+    with app.app_context():
+        db.session.execute(ExchangeRateHistory.__table__.insert(), [
+            {'currency': 'USD', 'rate': 1 + i / 1000, 'created_at': minutes(i)} for i in range(25000)
+        ])
+        db.session.commit()
+        yield
+
+def test_rebuild_keeps_live_appends_and_old_view(history, tmp_path, monkeypatch):
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    web = HistoryArchive(str(tmp_path / 'archive'))  # Another process on the same directory
+    archive.append_many('USD', [(minutes(i), 1 + i / 1000) for i in range(20000, 25000)])
+    seen_during_build = []
+    live = minutes(30000)
+    build = HistoryArchive._query_batches
+
+    def slow_build(query, batch_size):
+        for number, batch in enumerate(build(query, batch_size)):
+            yield batch
+            if number == 0:
+                assert web.append('USD', live, 99.0)
+                seen_during_build.append(web.count('USD'))
+
+    monkeypatch.setattr(HistoryArchive, '_query_batches', staticmethod(slow_build))
+    assert web.count('USD') == 5000
+    assert archive.rebuild_from_db('USD', batch_size=10000) == 25001
+
+    # Readers kept the old columns during the build, and the live row survived the swap
+    assert seen_during_build == [5001]
+    assert web.count('USD') == 25001
+    rows = web.query('USD')
+    assert rows[0] == {'timestamp': START.isoformat(), 'rate': 1.0}
+    assert rows[-1] == {'timestamp': live.isoformat(), 'rate': 99.0}
+    assert not [name for name in (tmp_path / 'archive').iterdir() if name.suffix == '.rebuild']
+
+def test_readers_notice_a_replaced_file_of_the_same_size(history, tmp_path):
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    archive.append_many('USD', [(minutes(i), 5.0) for i in range(25000)])
+    reader = HistoryArchive(str(tmp_path / 'archive'))
+    assert reader.query('USD', limit=1)[0]['rate'] == 5.0
+
+    archive.rebuild_from_db('USD')
+    assert reader.count('USD') == 25000
+    assert reader.query('USD', limit=2)[1]['rate'] == 1.001
+
+def test_appends_keep_timestamp_order(tmp_path, caplog):
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    assert archive.append_many('usd', [(minutes(0), 1.0), (minutes(2), 2.0), (minutes(2), 2.5)]) == 3
+    # Older than the tail: skipped and reported; equal timestamps are allowed
+    assert archive.append_many('USD', [(minutes(1), 9.0), (minutes(2), 3.0), (minutes(3), 4.0)]) == 2
+    assert 'skipped 1 USD rows older than its tail' in caplog.text
+    assert not archive.append('USD', minutes(1), 9.0)
+    assert [row['rate'] for row in archive.query('USD')] == [1.0, 2.0, 2.5, 3.0, 4.0]
+    assert archive.currencies() == ['USD']
+
+def test_ranges_are_inclusive_and_pages_resume(tmp_path):
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    archive.append_many('USD', [(minutes(i // 2), i / 100) for i in range(20)])  # Two rows per minute
+    assert archive.bounds('USD', minutes(3), minutes(5)) == (6, 12)
+    assert [row['timestamp'] for row in archive.query('USD', minutes(9))] == [minutes(9).isoformat()] * 2
+    assert archive.query('USD', minutes(20)) == []
+    assert archive.bounds('EUR') == (0, 0)
+
+    # A page that stops between two rows of the same minute resumes on the second one
+    rows, after = archive.page('USD', limit=7)
+    assert after == (minutes(3), 1)
+    pages = [rows]
+    while after:
+        rows, after = archive.page('USD', limit=7, after=after)
+        pages.append(rows)
+    assert [row['rate'] for page in pages for row in page] == [i / 100 for i in range(20)]
+    assert [len(page) for page in pages] == [7, 7, 6]
+
+def test_partial_write_is_truncated(tmp_path):
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    archive.append_many('USD', [(minutes(i), 1.0 + i) for i in range(3)])
+    # Interrupted append: the rate landed, the timestamp only half
+    with open(tmp_path / 'archive' / 'USD.rate', 'ab') as f:
+        f.write(b'\x00' * 8)
+    with open(tmp_path / 'archive' / 'USD.ts', 'ab') as f:
+        f.write(b'\x00' * 4)
+    assert archive.count('USD') == 3
+
+    assert archive.append('USD', minutes(3), 4.0)
+    assert [row['rate'] for row in archive.query('USD')] == [1.0, 2.0, 3.0, 4.0]
+    assert all(os.path.getsize(tmp_path / 'archive' / name) == 32 for name in ('USD.ts', 'USD.rate'))
+
+def test_sync_appends_new_rows_and_rebuilds_after_backfill(app, tmp_path):
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    with app.app_context():
+        db.session.add_all(ExchangeRateHistory(currency='USD', rate=1 + i, created_at=minutes(10 * i)) for i in range(3))
+        db.session.commit()
+        assert archive.sync_from_db() == 3
+        assert archive.sync_from_db() == 0
+
+        # A new row plus one back-filled before the tail, like an import
+        db.session.add(ExchangeRateHistory(currency='USD', rate=9.0, created_at=minutes(30)))
+        db.session.add(ExchangeRateHistory(currency='USD', rate=1.5, created_at=minutes(5)))
+        db.session.commit()
+        assert archive.sync_from_db() == 2
+        assert [row['rate'] for row in archive.query('USD')] == [1.0, 1.5, 2.0, 3.0, 9.0]
+
+def test_numpy_views(tmp_path):
+    np = pytest.importorskip('numpy')
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    archive.append_many('USD', [(minutes(i), 36.5 + i) for i in range(10)])
+    timestamps, rates = archive.to_numpy('USD', minutes(2), minutes(4))
+    assert timestamps.tolist() == [minutes(i) for i in range(2, 5)]
+    assert (rates / RATE_SCALE).tolist() == [38.5, 39.5, 40.5]
+    assert not rates.flags.writeable
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Pruebas de grabación y reproducción del tráfico HTTP del scraper contra un servidor local con una página tipo BCV
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask
+
+from bcv_scraper import BCVScraper
+from config import Config
+from http_cassette import HttpCassette
+from models import db, ExchangeRate
+
+PAGE = '''<html><body>
+<div id="dolar"><span> USD</span><strong> {usd} </strong></div>
+<div id="euro"><span> EUR</span><strong> 41,20450000 </strong></div>
+<div class="pull-right dinpro center">Fecha Valor: <span class="date-display-single">Viernes, 14 Marzo 2025</span></div>
+</body></html>'''
+
+class BCVPage:
+    """Servidor HTTP local que sirve una página con la estructura de bcv.org.ve"""
+
+    def __init__(self, rates=('36,54320000',), delay=0.0):
+        self.rates = list(rates)
+        self.requests = 0
+        page = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                usd = page.rates[min(page.requests, len(page.rates) - 1)]
+                page.requests += 1
+                time.sleep(delay)
+                body = PAGE.format(usd=usd).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def record(directory, page):
+    scraper = BCVScraper(cassette=HttpCassette(directory, 'record'))
+    scraper.base_url = page.url
+    return scraper
+
+def replay(directory, url, latency=None):
+    scraper = BCVScraper(cassette=HttpCassette(directory, 'replay', latency))
+    scraper.base_url = url
+    return scraper
+
+def test_replays_recorded_responses_offline(tmp_path):
+    page = BCVPage(delay=0.05)
+    recorded = record(str(tmp_path), page).get_all_rates()
+    page.close()
+
+    replayed = replay(str(tmp_path), page.url).get_all_rates()
+    assert replayed == recorded
+    assert replayed['rates']['USD'] == 36.5432
+    assert page.requests == 1
+
+def test_replay_sequence_and_simulated_latency(tmp_path):
+    page = BCVPage(rates=['36,54320000', '36,60010000'], delay=0.05)
+    scraper = record(str(tmp_path), page)
+    assert [scraper.get_all_rates()['rates']['USD'] for _ in range(2)] == [36.5432, 36.6001]
+    page.close()
+
+    scraper = replay(str(tmp_path), page.url, latency='recorded')
+    started = time.perf_counter()
+    # Responses come back in recording order and the last one repeats
+    assert [scraper.get_all_rates()['rates']['USD'] for _ in range(3)] == [36.5432, 36.6001, 36.6001]
+    assert time.perf_counter() - started >= 0.15
+    assert scraper.cassette.get_stats()['replayed'] == 3
+
+def test_unrecorded_request_fails_like_a_network_error(tmp_path):
+    scraper = replay(str(tmp_path), 'http://127.0.0.1:9/')
+    assert scraper.get_all_rates() is None
+    assert scraper.cassette.get_stats()['misses'] == 1
+
+def test_update_pipeline_runs_from_cassette(tmp_path, monkeypatch):
+    page = BCVPage()
+    record(str(tmp_path / 'cassette'), page).get_all_rates()
+    page.close()
+
+    monkeypatch.setattr(Config, 'BCV_CASSETTE_MODE', 'replay')
+    monkeypatch.setattr(Config, 'BCV_CASSETTE_DIR', str(tmp_path / 'cassette'))
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_ENABLED', False)
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_ENABLED', False)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'rates.db'}"
+    db.init_app(app)
+    from database_service import DatabaseService
+    with app.app_context():
+        db.create_all()
+        service = DatabaseService()
+        service.scraper.base_url = page.url
+        assert service.update_rates_from_bcv()
+        assert ExchangeRate.query.filter_by(currency='USD').one().rate == 36.5432
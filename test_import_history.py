@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Pruebas del importador de históricos con archivos sintéticos de varios años
+"""
+
+import csv
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from candles import DailyCandles
+from history_import import HistoryImporter, parse_date, parse_rate, normalize_currency
+from models import db, DailyCandle, ExchangeRateHistory
+
+START = date(2019, 1, 1)
+DAYS = 5 * 365
+CURRENCIES = ['USD', 'EUR', 'CNY', 'TRY', 'RUB']
+
+def synthetic_rates(days=DAYS):
+    """Tasas diarias de cinco divisas con una devaluación gradual"""
+    rng = random.Random(7)
+    base = {'USD': 3.0, 'EUR': 3.4, 'CNY': 0.45, 'TRY': 0.5, 'RUB': 0.05}
+    for offset in range(days):
+        day = START + timedelta(days=offset)
+        yield day, {c: round(rate * 1.002 ** offset * rng.uniform(0.99, 1.01), 8) for c, rate in base.items()}
+
+def write_wide_csv(path, days=DAYS):
+    """Formato ancho con coma decimal y fechas dd/mm/yyyy, como las planillas exportadas a mano"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Fecha', *CURRENCIES])
+        for day, rates in synthetic_rates(days):
+            writer.writerow([day.strftime('%d/%m/%Y'), *(f'{rates[c]:.8f}'.replace('.', ',') for c in CURRENCIES)])
+
+def write_bcv_csv(path, days):
+    """Hojas diarias del BCV concatenadas: cabecera con "Fecha Valor" y una fila por moneda"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        for day, rates in synthetic_rates(days):
+            writer.writerow(['BANCO CENTRAL DE VENEZUELA'])
+            writer.writerow(['', '', '', '', f"Fecha Valor: {day.strftime('%d/%m/%Y')}"])
+            writer.writerow(['Moneda', 'País', 'Compra ME/USD', 'Venta ME/USD', 'Compra Bs/ME', 'Venta Bs/ME'])
+            for currency in CURRENCIES + ['JPY']:
+                rate = rates.get(currency, 0.02)
+                writer.writerow([currency, 'XX', '1,0000', '1,0000', f'{rate * 0.995:.8f}'.replace('.', ','),
+                                 f'{rate:.8f}'.replace('.', ',')])
+
+@pytest.fixture
+def importer(tmp_path):
+    return HistoryImporter(batch_size=1000, state_path=str(tmp_path / 'state.json'),
+                           candles=DailyCandles(utc_offset_hours=-4))
+
+def history_count():
+    return db.session.query(func.count(ExchangeRateHistory.id)).scalar()
+
+def test_normalization():
+    assert parse_rate('1.234,56') == 1234.56
+    assert parse_rate('36,5432') == 36.5432
+    assert parse_rate('Bs. 36.54') == 36.54
+    assert normalize_currency(' Dólar ') == 'USD' and normalize_currency('eur') == 'EUR'
+    assert parse_date('Fecha Valor: 14/03/2025') == (datetime(2025, 3, 14), True)
+    assert parse_date('Lunes, 14 Marzo 2025') == (datetime(2025, 3, 14), True)
+    assert parse_date('14032025') == (datetime(2025, 3, 14), True)
+    assert parse_date('2025-03-14T13:30:00-04:00') == (datetime(2025, 3, 14, 17, 30), False)
+    assert parse_date(45730) == (datetime(2025, 3, 14), True)
+
+def test_imports_multi_year_file(app, importer, tmp_path):
+    path = tmp_path / 'tasas.csv'
+    write_wide_csv(path)
+    with app.app_context():
+        stats = importer.import_file(str(path))
+        assert stats['inserted'] == DAYS * len(CURRENCIES)
+        assert stats['rows_read'] == DAYS + 1 and stats['skipped'] == 1  # Header
+        assert stats['rows_per_second'] > 0
+        assert history_count() == DAYS * len(CURRENCIES)
+        # Date-only values are local (UTC-4) midnight, stored in UTC
+        first = ExchangeRateHistory.query.order_by(ExchangeRateHistory.created_at).first()
+        assert first.created_at == datetime(2019, 1, 1, 4)
+        assert db.session.query(func.count(DailyCandle.id)).scalar() == DAYS * len(CURRENCIES)
+
+        # Same file again: already imported; with --restart every row is a duplicate
+        assert importer.import_file(str(path))['already_imported']
+        stats = importer.import_file(str(path), restart=True)
+        assert stats['inserted'] == 0 and stats['duplicates'] == DAYS * len(CURRENCIES)
+        assert history_count() == DAYS * len(CURRENCIES)
+
+def test_resumes_after_interruption(app, importer, tmp_path):
+    path = tmp_path / 'tasas.csv'
+    write_wide_csv(path)
+
+    def interrupt(stats):
+        if stats['inserted'] >= 3000:
+            raise KeyboardInterrupt
+
+    with app.app_context():
+        with pytest.raises(KeyboardInterrupt):
+            importer.import_file(str(path), progress=interrupt)
+        assert history_count() == 3000
+
+        stats = importer.import_file(str(path))
+        assert stats['resumed_from'] == 601  # Header + 600 days of 5 currencies
+        assert stats['inserted'] == DAYS * len(CURRENCIES) - 3000
+        assert stats['duplicates'] == 0
+        assert history_count() == DAYS * len(CURRENCIES)
+
+def test_bcv_daily_sheets_and_existing_rows(app, importer, tmp_path):
+    path = tmp_path / 'bcv.csv'
+    write_bcv_csv(path, days=400)
+    with app.app_context():
+        db.session.add(ExchangeRateHistory(currency='USD', rate=1.0, created_at=datetime(2019, 1, 2, 4)))
+        db.session.commit()
+
+        stats = importer.import_file(str(path))
+        assert stats['inserted'] == 400 * len(CURRENCIES) - 1  # JPY is not imported; one USD row existed
+        assert stats['duplicates'] == 1
+        usd = ExchangeRateHistory.query.filter_by(currency='USD', created_at=datetime(2019, 1, 1, 4)).one()
+        assert usd.rate == pytest.approx(3.0, rel=0.02)  # Venta Bs/ME, the last column
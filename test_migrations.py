@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las migraciones de esquema y de los planes de consulta de las rutas calientes (SQLite)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, desc, func, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from migrations import MIGRATIONS, Migration, SchemaMigrator
+from models import db, ApiMetrics, ExchangeRate, SchemaMigration, UpdateLog
+
+LEGACY_SCHEMA = [
+    'DROP TABLE schema_migrations',
+    'DROP INDEX ix_update_logs_status_created_at',
+    'DROP INDEX ix_update_logs_created_at_id',
+    'DROP INDEX ix_api_metrics_created_at_id',
+    'DROP INDEX ix_exchange_rate_history_currency_created_at_id',
+    'DROP INDEX ix_webhook_deliveries_subscription_created_at_id',
+    'CREATE INDEX ix_api_metrics_created_at ON api_metrics (created_at)',
+    'DROP INDEX ix_exchange_rates_currency',
+    'CREATE INDEX ix_exchange_rates_currency ON exchange_rates (currency)',
+    'ALTER TABLE webhook_subscriptions DROP COLUMN token_hash',
+]
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rates.db'}")
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def legacy_engine(engine):
+    """Database as created by db.create_all() before migrations existed, with duplicated currencies"""
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add_all([
+            ExchangeRate(currency='USD', rate=36.1, updated_at=now),
+            ExchangeRate(currency='USD', rate=35.9, updated_at=now - timedelta(days=1)),
+            ExchangeRate(currency='EUR', rate=39.2, updated_at=now),
+        ])
+        session.commit()
+    return engine
+
+def indexes(engine, table):
+    return {index['name']: index for index in inspect(engine).get_indexes(table)}
+
+def query_plan(engine, statement):
+    compiled = statement.compile(dialect=engine.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    params = [value.isoformat(' ') if isinstance(value, datetime) else value for value in params]
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', tuple(params)).fetchall()
+    return ' | '.join(row[-1] for row in rows)
+
+def test_fresh_database_starts_at_latest_version(engine):
+    migrator = SchemaMigrator(engine)
+    assert migrator.migrate() == [m.version for m in MIGRATIONS]
+    assert migrator.get_status() == {'version': MIGRATIONS[-1].version, 'latest': MIGRATIONS[-1].version, 'pending': []}
+    assert migrator.migrate() == []
+    assert indexes(engine, 'exchange_rates')['ix_exchange_rates_currency']['unique']
+
+def test_legacy_database_is_upgraded(legacy_engine):
+    assert indexes(legacy_engine, 'exchange_rates')['ix_exchange_rates_currency']['unique'] == 0
+    SchemaMigrator(legacy_engine).migrate()
+
+    assert 'ix_update_logs_status_created_at' in indexes(legacy_engine, 'update_logs')
+    assert set(indexes(legacy_engine, 'api_metrics')) == {'ix_api_metrics_created_at_id'}
+    assert 'token_hash' in {column['name'] for column in inspect(legacy_engine).get_columns('webhook_subscriptions')}
+    with Session(legacy_engine) as session:
+        # The most recently updated duplicate is the one kept
+        assert sorted((r.currency, r.rate) for r in session.query(ExchangeRate)) == [('EUR', 39.2), ('USD', 36.1)]
+        assert [m.name for m in session.query(SchemaMigration).order_by(SchemaMigration.version)] == \
+            [m.name for m in MIGRATIONS]
+        session.add(ExchangeRate(currency='USD', rate=1.0))
+        with pytest.raises(IntegrityError):
+            session.commit()
+
+def test_released_versions_keep_their_indexes(legacy_engine):
+    # A deployment that stopped at version 2 got the (created_at, endpoint) index; only version 3 replaces it
+    SchemaMigrator(legacy_engine, MIGRATIONS[:2]).migrate()
+    assert set(indexes(legacy_engine, 'api_metrics')) == {'ix_api_metrics_created_at_endpoint'}
+    SchemaMigrator(legacy_engine).migrate()
+    assert set(indexes(legacy_engine, 'api_metrics')) == {'ix_api_metrics_created_at_id'}
+
+def test_failed_migration_is_not_recorded(engine):
+    def broken(conn):
+        conn.exec_driver_sql('CREATE INDEX ix_broken ON update_logs (status)')
+        raise RuntimeError('boom')
+
+    migrator = SchemaMigrator(engine, MIGRATIONS + [Migration(99, 'broken', broken)])
+    with pytest.raises(RuntimeError):
+        migrator.migrate()
+    # The DDL rolled back with it and the next start retries the version
+    assert 'ix_broken' not in indexes(engine, 'update_logs')
+    assert migrator.get_status()['pending'] == ['99_broken']
+
+@pytest.mark.parametrize('statement, index', [
+    # DatabaseService.should_update_rates() on every read request
+    (select(UpdateLog).filter_by(status='success').order_by(desc(UpdateLog.created_at)).limit(1),
+     'ix_update_logs_status_created_at'),
+    # /api/metrics
+    (select(func.count(ApiMetrics.id)).where(ApiMetrics.created_at >= datetime(2025, 1, 1)),
+     'ix_api_metrics_created_at_id'),
+    (select(ApiMetrics.endpoint, func.count(ApiMetrics.id), func.avg(ApiMetrics.response_time_ms))
+     .where(ApiMetrics.created_at >= datetime(2025, 1, 1)).group_by(ApiMetrics.endpoint),
+     'ix_api_metrics_created_at_id'),
+    # update_rates_from_bcv()
+    (select(ExchangeRate).filter_by(currency='USD'), 'ix_exchange_rates_currency'),
+])
+def test_hot_queries_use_indexes(legacy_engine, statement, index):
+    SchemaMigrator(legacy_engine).migrate()
+    plan = query_plan(legacy_engine, statement)
+    assert f'USING INDEX {index}' in plan or f'USING COVERING INDEX {index}' in plan, plan
+    assert 'TEMP B-TREE FOR ORDER BY' not in plan, plan
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la paginación por cursor (keyset) de historial, registros de actualización y métricas
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from config import Config
+from history_archive import HistoryArchive
+from models import db, ApiMetrics, ExchangeRateHistory, UpdateLog, WebhookDelivery, WebhookSubscription
+from pagination import decode_cursor, encode_cursor, keyset_page
+from test_migrations import query_plan
+
+START = datetime(2025, 1, 1)
+
+def timestamps(count):
+    # Runs of three rows with the same timestamp: pages must not split ties incorrectly
+    return [START + timedelta(minutes=i // 3) for i in range(count)]
+
+@pytest.fixture
+def service(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_DIR', str(tmp_path / 'archive'))
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_ENABLED', False)
+    with app.app_context():
+        for i, created_at in enumerate(timestamps(100)):
+            db.session.add(ExchangeRateHistory(currency='USD', rate=36 + i / 100, created_at=created_at))
+            db.session.add(UpdateLog(status='success' if i % 4 else 'error', message=str(i), created_at=created_at))
+        db.session.commit()
+        from database_service import DatabaseService
+        service = DatabaseService()
+        service.sync_history_archive()
+        yield service
+
+def walk(fetch, key):
+    items, cursor, pages = [], None, 0
+    while True:
+        page = fetch(cursor)
+        items += page[key]
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            return items, pages
+
+@pytest.mark.parametrize('source', ['archive', 'database'])
+def test_history_pages_cover_every_row_once(service, source):
+    full = service.get_history('USD', limit=1000, source=source)
+    assert full['source'] == source and full['count'] == 100 and full['next_cursor'] is None
+
+    rows, pages = walk(lambda cursor: service.get_history('USD', limit=7, source=source, cursor=cursor), 'history')
+    assert rows == full['history']
+    assert pages == 15
+
+    end = START + timedelta(minutes=20)
+    rows, _ = walk(lambda cursor: service.get_history('USD', START + timedelta(minutes=5), end, 4, source, cursor),
+                   'history')
+    assert rows == service.get_history('USD', START + timedelta(minutes=5), end, 1000, source)['history']
+
+def test_update_logs_newest_first_with_filter(service):
+    logs, _ = walk(lambda cursor: service.get_update_logs(9, cursor), 'updates')
+    assert [log['message'] for log in logs] == [str(i) for i in range(99, -1, -1)]
+
+    errors, _ = walk(lambda cursor: service.get_update_logs(5, cursor, status='error'), 'updates')
+    assert [log['message'] for log in errors] == [str(i) for i in range(96, -1, -4)]
+    assert service.get_update_status(limit=3) == service.get_update_logs(3)['updates']
+
+def test_cursors_are_validated(service):
+    with pytest.raises(ValueError):
+        service.get_update_logs(10, 'not-a-cursor')
+    history_cursor = service.get_history('USD', limit=10, source='database')['next_cursor']
+    with pytest.raises(ValueError):
+        service.get_update_logs(10, history_cursor)
+    with pytest.raises(ValueError):
+        service.get_history('USD', limit=10, source='archive', cursor=history_cursor)
+    assert decode_cursor(encode_cursor('x', (START, 7)), 'x') == (START, 7)
+
+def test_archive_keys_survive_rebuild_with_older_rows(tmp_path):
+    archive = HistoryArchive(str(tmp_path))
+    archive.append_many('USD', [(ts, 1.0) for ts in timestamps(30)])
+    first, key = archive.page('USD', limit=10)
+    # A rebuild that adds older rows shifts positions but not timestamps
+    archive = HistoryArchive(str(tmp_path / 'rebuilt'))
+    archive.append_many('USD', [(START - timedelta(days=1), 0.5)] + [(ts, 1.0) for ts in timestamps(30)])
+    rest, _ = archive.page('USD', limit=100, after=key)
+    assert len(first) + len(rest) == 30
+    assert rest[0]['timestamp'] == timestamps(30)[10].isoformat()
+
+@pytest.mark.parametrize('model, filters, descending, index', [
+    (UpdateLog, {}, True, 'ix_update_logs_created_at_id'),
+    (ApiMetrics, {}, True, 'ix_api_metrics_created_at_id'),
+    (ExchangeRateHistory, {'currency': 'USD'}, False, 'ix_exchange_rate_history_currency_created_at_id'),
+    (WebhookDelivery, {'subscription_id': 1}, True, 'ix_webhook_deliveries_subscription_created_at_id'),
+])
+def test_deep_pages_are_index_range_scans(service, model, filters, descending, index):
+    captured = []
+
+    class Query:
+        """Records the statement keyset_page builds instead of running it"""
+        def __init__(self, statement):
+            self.statement = statement
+        def filter(self, *criteria):
+            return Query(self.statement.where(*criteria))
+        def order_by(self, *columns):
+            return Query(self.statement.order_by(*columns))
+        def limit(self, count):
+            return Query(self.statement.limit(count))
+        def all(self):
+            captured.append(self.statement)
+            return []
+
+    keyset_page(Query(select(model).filter_by(**filters)), model.created_at, model.id,
+                (START + timedelta(days=365), 123456), 50, descending)
+    plan = query_plan(db.engine, captured[0])
+    assert f'USING INDEX {index}' in plan or f'USING COVERING INDEX {index}' in plan, plan
+    assert 'TEMP B-TREE' not in plan and 'SCAN' not in plan, plan
+
+def test_endpoints_clamp_to_the_page_size_limit(divisa, monkeypatch):
+    monkeypatch.setattr(divisa.config, 'PAGINATION_MAX_LIMIT', 2)
+    monkeypatch.setattr(divisa.config, 'WEBHOOK_ADMIN_TOKEN', 'admin-token')
+    client = divisa.app.test_client()
+    with divisa.app.app_context():
+        subscriptions = [WebhookSubscription(url=f'https://example.com/{i}', created_at=START) for i in range(5)]
+        rows = [ExchangeRateHistory(currency='RUB', rate=0.4, created_at=created_at) for created_at in timestamps(3)]
+        db.session.add_all(subscriptions + rows)
+        db.session.commit()
+        ids = [subscription.id for subscription in subscriptions]
+    try:
+        history = client.get('/api/history/RUB?source=database&limit=100000').get_json()
+        assert history['count'] == 2 and history['next_cursor']
+        rest = client.get(f"/api/history/RUB?source=database&limit=100000&cursor={history['next_cursor']}").get_json()
+        assert rest['count'] == 1 and rest['next_cursor'] is None
+
+        headers = {'Authorization': 'Bearer admin-token'}
+        listed = walk(lambda cursor: client.get(f"/api/webhooks?limit=50{f'&cursor={cursor}' if cursor else ''}",
+                                                headers=headers).get_json(), 'webhooks')
+        assert [webhook['id'] for webhook in listed[0]] == ids and listed[1] == 3
+        assert client.get('/api/webhooks?cursor=bogus', headers=headers).status_code == 400
+        assert client.get('/api/candles/RUB?cursor=bogus').status_code == 400
+    finally:
+        with divisa.app.app_context():
+            WebhookSubscription.query.filter(WebhookSubscription.id.in_(ids)).delete()
+            ExchangeRateHistory.query.filter_by(currency='RUB').delete()
+            db.session.commit()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Pruebas del índice "as of": búsquedas puntuales, filas retro-cargadas, filas que confirman tarde
+con ids menores y errores de base de datos
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from models import db, ExchangeRateHistory
+from rate_index import RateIndex
+
+START = datetime(2025, 3, 14, 9)
+
+def add(row_id, rate, hours, currency='USD'):
+    db.session.add(ExchangeRateHistory(id=row_id, currency=currency, rate=rate, created_at=START + timedelta(hours=hours)))
+    db.session.commit()
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        yield app
+
+def test_lookups_and_backfilled_rows(app):
+    index = RateIndex()
+    add(1, 36.0, 0)
+    add(2, 37.0, 24)
+    assert index.refresh() == 2
+    assert index.lookup('usd', START - timedelta(seconds=1)) is None
+    assert index.lookup('USD', START + timedelta(hours=23)) == (START, 36.0)
+    assert index.lookup_many('USD', [START + timedelta(hours=24), START + timedelta(days=9)]) == \
+        [(START + timedelta(hours=24), 37.0)] * 2
+
+    add(3, 36.5, 12)  # Imported later, older timestamp
+    assert index.refresh() == 1
+    assert index.refresh() == 0
+    assert index.lookup('USD', START + timedelta(hours=23)) == (START + timedelta(hours=12), 36.5)
+
+def test_rows_committed_late_with_lower_ids_are_loaded(app):
+    index = RateIndex()
+    add(1, 36.0, 0)
+    index.refresh()
+    # Ids 2 and 3 were taken by transactions that have not committed yet
+    add(4, 38.0, 3)
+    assert index.refresh() == 1
+    assert index.pending_gaps() == 1
+
+    add(2, 37.0, 1)
+    assert index.refresh() == 1
+    assert index.refresh() == 0  # Seen rows of a hole are not loaded twice
+    assert index.lookup('USD', START + timedelta(hours=2)) == (START + timedelta(hours=1), 37.0)
+    assert index.pending_gaps() == 1
+
+    add(3, 37.5, 2, currency='EUR')
+    assert index.refresh() == 1
+    assert index.pending_gaps() == 0
+    assert index.currencies() == ['EUR', 'USD']
+
+def test_holes_expire(app):
+    index = RateIndex(gap_ttl_seconds=0)
+    add(1, 36.0, 0)
+    index.refresh()
+    add(3, 38.0, 2)
+    index.refresh()
+    # A rolled-back id never shows up; the hole is not re-read forever
+    assert index.refresh() == 0
+    assert index.pending_gaps() == 0
+
+def test_database_errors_are_503(divisa, monkeypatch):
+    def broken():
+        raise OperationalError('SELECT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(divisa.db_service.rate_index, 'refresh', broken)
+    client = divisa.app.test_client()
+    assert client.get('/api/rates/usd/as_of?dates=2025-03-14').status_code == 503
+    assert client.get('/api/rates/usd?as_of=2025-03-14').status_code == 503
+    with divisa.app.app_context():
+        assert divisa.db_service.get_rates_as_of_many('USD', [START]) is None
+
+    monkeypatch.undo()
+    response = client.get('/api/rates/usd/as_of?dates=2000-01-01')
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['rate'] is None
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Pruebas del stream SSE de tasas: formato de eventos, reanudación con Last-Event-ID y límite de conexiones
+"""
+
+import json
+import time
+from itertools import islice
+
+import pytest
+
+from rate_stream import RateBroadcaster
+
+SNAPSHOT = {'version': 3, 'rates': {'USD': 36.5}}
+
+@pytest.fixture
+def broadcaster():
+    broadcaster = RateBroadcaster(app=None, db_service=None, heartbeat_interval=0.01, max_connections=2)
+    broadcaster._ensure_poller = lambda: None  # Snapshots are published by hand
+    broadcaster.publish(SNAPSHOT)
+    return broadcaster
+
+def test_new_subscriber_gets_the_current_snapshot(broadcaster):
+    assert broadcaster.try_acquire()
+    stream = broadcaster.stream()
+    assert next(stream) == 'retry: 5000\n\n'
+    event = next(stream)
+    assert event.startswith('id: 3\nevent: rates\ndata: ')
+    assert json.loads(event.split('data: ', 1)[1]) == SNAPSHOT
+    assert next(stream) == ': heartbeat\n\n'  # Nothing new until the version moves
+
+    broadcaster.publish({'version': 2, 'rates': {}})  # Older versions are ignored
+    assert next(stream) == ': heartbeat\n\n'
+    broadcaster.publish({'version': 4, 'rates': {'USD': 37.0}})
+    assert next(stream).startswith('id: 4\n')
+    stream.close()
+    assert broadcaster.get_stats()['events_sent'] == 2
+
+@pytest.mark.parametrize('last_event_id, first', [
+    (3, ': heartbeat\n\n'),  # Already up to date: no replay
+    (1, 'id: 3\n'),  # Missed versions: resumes with the current snapshot
+])
+def test_last_event_id_replay(broadcaster, last_event_id, first):
+    assert broadcaster.try_acquire()
+    stream = broadcaster.stream(last_event_id)
+    next(stream)
+    assert next(stream).startswith(first)
+    stream.close()
+
+def test_capacity_and_slot_release(broadcaster):
+    assert broadcaster.try_acquire() and broadcaster.try_acquire()
+    assert not broadcaster.try_acquire()
+    stream = broadcaster.stream()
+    next(stream)
+    stream.close()  # Client went away
+    assert broadcaster.connections == 1
+    assert broadcaster.try_acquire()
+
+def test_stream_endpoint(divisa, monkeypatch):
+    monkeypatch.setattr(divisa.rate_broadcaster, 'heartbeat_interval', 0.05)
+    with divisa.app.app_context():
+        version = divisa.db_service.get_snapshot_version()
+    client = divisa.app.test_client()
+
+    response = client.get('/api/stream/rates', headers={'Last-Event-ID': str(version - 1)})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+    chunks = response.response
+    assert next(chunks).startswith(b'retry: ')
+    # The process poller publishes the snapshot on its first pass; heartbeats may come first
+    event = next(chunk for chunk in islice(chunks, 100) if chunk != b': heartbeat\n\n').decode()
+    assert event.startswith(f'id: {version}\nevent: rates\n')
+    assert json.loads(event.split('data: ', 1)[1])['rates']['USD'] == 36.5
+    response.close()
+
+    response = client.get(f'/api/stream/rates?last_event_id={version}')
+    next(response.response)
+    assert next(response.response) == b': heartbeat\n\n'
+    response.close()
+    assert divisa.rate_broadcaster.connections == 0
+
+def test_stream_endpoint_at_capacity(divisa, monkeypatch):
+    monkeypatch.setattr(divisa.rate_broadcaster, 'max_connections', 0)
+    response = divisa.app.test_client().get('/api/stream/rates')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
+    assert '/api/rates' in response.get_json()['message']
+
+def test_stream_without_a_snapshot_waits_for_the_heartbeat():
+    broadcaster = RateBroadcaster(app=None, db_service=None, heartbeat_interval=0.2)
+    broadcaster._ensure_poller = lambda: None
+    assert broadcaster.try_acquire()
+    stream = broadcaster.stream()
+    next(stream)
+    started = time.monotonic()
+    assert next(stream) == ': heartbeat\n\n'
+    assert next(stream) == ': heartbeat\n\n'
+    assert time.monotonic() - started >= 0.35
+    broadcaster.publish(SNAPSHOT)
+    assert next(stream).startswith('id: 3\n')
+    stream.close()
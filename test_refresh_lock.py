@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Pruebas del lease de actualización compartido y del modo web de solo lectura (REFRESH_MODE=worker)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import Config
+from models import db, RefreshLease
+from refresh_lock import RefreshLock
+
+class OtherHost(RefreshLock):
+    """Lease de otro proceso (mismo archivo SQLite, distinto holder)"""
+
+    @property
+    def holder(self):
+        return 'otro-host:1:1'
+
+@pytest.fixture
+def service_factory(monkeypatch, app):
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_ENABLED', False)
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_ENABLED', False)
+
+    def factory(mode='inline'):
+        monkeypatch.setattr(Config, 'REFRESH_MODE', mode)
+        from database_service import DatabaseService
+        service = DatabaseService()
+        service.scrapes = 0
+
+        class Scraper:
+            def get_all_rates(self):
+                service.scrapes += 1
+                return {'rates': {'USD': 36.5}, 'date': 'x'}
+        service.scraper = Scraper()
+        return service
+    return factory
+
+def test_lease_excludes_other_holders_until_released_or_expired(app):
+    with app.app_context():
+        ours, theirs = RefreshLock(ttl_seconds=60), OtherHost(ttl_seconds=60)
+        assert ours.acquire()
+        assert not theirs.acquire()
+        assert ours.acquire()  # Reentrant for the same holder
+        ours.release()
+        assert theirs.acquire()
+        assert ours.get_status()['holder'] == 'otro-host:1:1'
+
+        # A crashed holder's lease is taken over once it expires
+        RefreshLease.query.update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        assert ours.acquire()
+        assert not theirs.renew()
+
+def test_refresh_skips_while_another_process_holds_the_lease(app, service_factory):
+    with app.app_context():
+        service = service_factory()
+        assert OtherHost(ttl_seconds=60).acquire()
+        assert service.refresh_rates() is None
+        assert not service.force_update()
+        assert service.scrapes == 0
+
+        OtherHost().release()
+        assert service.refresh_rates() is True
+        assert service.refresh_rates() is None  # Fresh now
+        assert service.scrapes == 1
+        assert not service.get_refresh_status()['lease']['held']
+
+def test_worker_mode_web_process_never_scrapes(app, service_factory):
+    with app.app_context():
+        worker = service_factory('inline')
+        assert worker.refresh_rates(force=True)
+
+        web = service_factory('worker')
+        web.scraper = None
+        assert web.get_rates_with_auto_update()['rates'] == {'USD': 36.5}
+        assert web._scraper is None
+        assert web.get_refresh_status()['mode'] == 'worker'
+
+def test_open_breaker_skips_the_lease(app, service_factory, monkeypatch):
+    with app.app_context():
+        service = service_factory()
+        for _ in range(service.circuit_breaker.failure_threshold):
+            service.circuit_breaker.record_failure()
+        acquired = []
+        monkeypatch.setattr(service.refresh_lock, 'acquire', lambda: acquired.append(1) or True)
+        for _ in range(3):
+            assert service.refresh_rates() is None
+        assert acquired == [] and service.scrapes == 0
+        assert RefreshLease.query.count() == 0
+
+def test_worker_mode_web_process_does_not_deliver_webhooks(divisa):
+    assert divisa.app.test_client().get('/api/health').status_code in (200, 503)
+    assert divisa.webhook_dispatcher._thread is None
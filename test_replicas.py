@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Pruebas del enrutamiento a réplicas de lectura con dos archivos SQLite (primario y réplica)
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from config import Config
+from models import db, ExchangeRate, RateSnapshot, UpdateLog
+from replicas import ReplicaRouter
+
+def seed_rate(session, rate, snapshots=1):
+    session.add(ExchangeRate(currency='USD', rate=rate, date_published='x', updated_at=datetime.utcnow()))
+    session.add(UpdateLog(status='success', message=f'seed {rate}', currencies_updated=1))
+    # The replica lags one snapshot behind the primary
+    session.add_all(RateSnapshot(rates=f'{{"USD": {rate}}}') for _ in range(snapshots))
+    session.commit()
+
+@pytest.fixture
+def replica_uri(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed_rate(session, 1.0)
+    engine.dispose()
+    return uri
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        seed_rate(db.session, 2.0, snapshots=2)
+    return app
+
+@pytest.fixture
+def service(monkeypatch, app, replica_uri):
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_ENABLED', False)
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_ENABLED', False)
+    monkeypatch.setattr(Config, 'DB_READ_URIS', [replica_uri])
+    monkeypatch.setattr(Config, 'DB_REPLICA_RETRY_SECONDS', 0)
+    from database_service import DatabaseService
+    with app.app_context():
+        yield DatabaseService()
+
+def test_reads_use_replica(app, service):
+    with app.app_context():
+        assert service.get_currency_rate('USD')['rate'] == 1.0
+        assert service.get_all_rates()['rates'] == {'USD': 1.0}
+        assert service.get_update_status()[0]['message'] == 'seed 1.0'
+        assert service.get_replica_status()['replica_reads'] == 3
+
+def test_writes_go_to_primary(app, service, replica_uri):
+    service.scraper.get_all_rates = lambda: {'rates': {'USD': 3.0}, 'date': 'y'}
+    with app.app_context():
+        assert service.update_rates_from_bcv()
+        assert ExchangeRate.query.filter_by(currency='USD').one().rate == 3.0
+
+    engine = create_engine(replica_uri)
+    with Session(engine) as session:
+        assert session.query(ExchangeRate).filter_by(currency='USD').one().rate == 1.0
+    engine.dispose()
+
+def test_falls_back_to_primary_and_recovers(app, service, replica_uri):
+    replica = service.replicas.replicas[0]
+    healthy_engine = replica.engine
+    replica.engine = create_engine('sqlite:////nonexistent/dir/replica.db')
+    replica.session_factory.configure(bind=replica.engine)
+
+    with app.app_context():
+        assert service.get_currency_rate('USD')['rate'] == 2.0
+        status = service.get_replica_status()
+        assert status['healthy'] == 0
+        assert status['fallbacks'] == 1
+        assert status['replicas'][0]['last_error']
+
+        # Health probe brings the replica back once it is reachable again
+        replica.engine = healthy_engine
+        replica.session_factory.configure(bind=healthy_engine)
+        assert service.get_currency_rate('USD')['rate'] == 1.0
+        assert service.get_replica_status()['healthy'] == 1
+
+def test_version_and_rates_come_from_the_same_source(app, service, replica_uri):
+    with app.app_context():
+        with service.replicas.pinned():
+            assert service.get_snapshot_version() == 1
+            assert service.get_all_rates()['rates'] == {'USD': 1.0}
+
+        # A failing replica moves the pin to the primary for the rest of the block
+        replica = service.replicas.replicas[0]
+        with service.replicas.pinned():
+            assert service.get_snapshot_version() == 1
+            replica.session_factory.configure(bind=create_engine('sqlite:////nonexistent/dir/replica.db'))
+            assert service.get_all_rates()['rates'] == {'USD': 2.0}
+            replica.session_factory.configure(bind=replica.engine)
+            assert service.get_snapshot_version() == 2
+        assert service.get_snapshot_version() == 1
+
+def test_pin_holds_one_replica(app, replica_uri, tmp_path):
+    other_uri = f"sqlite:///{tmp_path / 'other.db'}"
+    engine = create_engine(other_uri)
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed_rate(session, 3.0)
+    engine.dispose()
+
+    router = ReplicaRouter([replica_uri, other_uri])
+    read_rate = lambda: router.read(lambda session: session.query(ExchangeRate).one().rate)
+    with app.app_context():
+        assert [read_rate() for _ in range(4)] == [1.0, 3.0, 1.0, 3.0]
+        with router.pinned():
+            assert [read_rate() for _ in range(4)] == [1.0] * 4
+        assert read_rate() == 3.0
+
+def test_no_replicas_reads_primary(app):
+    router = ReplicaRouter([])
+    with app.app_context():
+        assert router.read(lambda session: session.query(ExchangeRate).one().rate) == 2.0
+        assert router.get_status()['primary_reads'] == 1
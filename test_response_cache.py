@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pruebas del cache LRU de respuestas: coalescencia de fallos concurrentes, desalojo y métricas
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from response_cache import ResponseCache
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return b'{"rate": 36.5}'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+                 for _ in range(8)]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [b'{"rate": 36.5}'] * 9
+    stats = cache.get_stats()
+    assert (stats['misses'], stats['hits'] + stats['coalesced']) == (1, 8)
+    assert cache.get_or_compute('k', compute) == b'{"rate": 36.5}' and len(calls) == 1
+
+def test_lru_eviction_and_hit_ratio():
+    cache = ResponseCache(max_entries=2)
+    assert cache.get_stats()['hit_ratio'] is None
+    for key in ('a', 'b', 'a', 'c', 'b'):
+        cache.get_or_compute(key, lambda: key.upper())
+    # 'a' was used after 'b', so 'c' evicted 'b' and the last lookup recomputed it
+    stats = cache.get_stats()
+    assert stats == {'hits': 1, 'misses': 4, 'coalesced': 0, 'evictions': 2, 'uncacheable': 0,
+                     'entries': 2, 'max_entries': 2, 'hit_ratio': 0.2}
+
+def test_uncacheable_and_failed_results_are_not_stored():
+    cache = ResponseCache()
+    error = ('Service unavailable', 503)
+    assert cache.get_or_compute('k', lambda: error, cacheable=lambda value: value[1] == 200) == error
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', lambda: (_ for _ in ()).throw(RuntimeError('boom')))
+    assert cache.get_or_compute('k', lambda: ('ok', 200)) == ('ok', 200)
+    assert cache.get_or_compute('k', lambda: ('other', 200)) == ('ok', 200)
+    assert cache.get_stats()['uncacheable'] == 1
+
+def test_as_of_conversions_follow_history_imports(divisa, monkeypatch):
+    from models import db, ExchangeRateHistory
+    monkeypatch.setattr(divisa.db_service.analytics, 'check_seconds', 0)
+    client = divisa.app.test_client()
+    url = '/api/convert?amount=2&from=CNY&to=VES&as_of=2020-01-02'
+
+    def import_row(created_at, rate):
+        with divisa.app.app_context():
+            db.session.add(ExchangeRateHistory(currency='CNY', rate=rate, created_at=created_at))
+            db.session.commit()
+
+    import_row(datetime(2020, 1, 1), 5.0)
+    assert client.get(url).get_json()['conversion']['to']['amount'] == 10.0
+    # An import adds rows without publishing a snapshot: the cached answer must not survive it
+    import_row(datetime(2020, 1, 1, 12), 6.0)
+    assert client.get(url).get_json()['conversion']['to']['amount'] == 12.0
+    assert client.get(url).get_json()['conversion']['to']['amount'] == 12.0
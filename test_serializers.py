@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Pruebas del registro de serializadores: negociación de formato, formatos opcionales y ETag/304 por snapshot
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+import serializers
+from serializers import SERIALIZERS, negotiate_format, unavailable_format
+
+@pytest.mark.parametrize('format_param, accept, expected', [
+    ('', '', 'json'),
+    ('CSV', 'application/xml', 'csv'),  # ?format= wins over Accept
+    ('', 'text/xml, */*', 'xml'),
+    ('', 'text/csv', 'csv'),
+    ('yaml', 'application/json', 'json'),  # Unknown names keep the JSON default
+])
+def test_negotiation(format_param, accept, expected):
+    assert negotiate_format(format_param, accept) == expected
+
+def test_missing_optional_package_is_reported(monkeypatch):
+    monkeypatch.delitem(SERIALIZERS, 'msgpack', raising=False)
+    assert unavailable_format('msgpack') == 'msgpack'
+    assert unavailable_format('yaml') is None
+    assert unavailable_format('json') is None
+    # Accept negotiation still falls back to JSON when the type cannot be produced
+    assert negotiate_format('', 'application/msgpack') == 'json'
+
+@pytest.mark.parametrize('name, package', [('msgpack', 'msgpack'), ('cbor', 'cbor2')])
+def test_binary_formats_round_trip(name, package):
+    codec = pytest.importorskip(package)
+    data = {'success': True, 'data': {'rates': {'USD': 36.5}}}
+    body = SERIALIZERS[name].encode(data, 'all_rates', '')
+    decoded = codec.unpackb(body) if name == 'msgpack' else codec.loads(body)
+    assert decoded == data
+
+def test_json_encoding_is_compact_and_sorted():
+    assert serializers.dumps_json({'b': 1, 'a': 'ñ'}) == '{"a":"ñ","b":1}'.encode()
+
+def test_unavailable_format_is_406(divisa, monkeypatch):
+    monkeypatch.delitem(SERIALIZERS, 'cbor', raising=False)
+    response = divisa.app.test_client().get('/api/rates?format=cbor')
+    assert response.status_code == 406
+    assert 'cbor2' in response.get_json()['message']
+
+def test_etag_per_snapshot_and_format(divisa):
+    client = divisa.app.test_client()
+    with divisa.app.app_context():
+        version = divisa.db_service.get_snapshot_version()
+
+    response = client.get('/api/rates')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'W/"v{version}-json"'
+    assert json.loads(response.data)['data']['rates']['USD'] == 36.5
+
+    csv = client.get('/api/rates/usd?format=csv')
+    assert csv.headers['ETag'] == f'W/"v{version}-csv"'
+    assert csv.mimetype == 'text/csv'
+
+    not_modified = client.get('/api/rates', headers={'If-None-Match': response.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    # A compressed variant of the same representation also matches
+    assert client.get('/api/rates', headers={'If-None-Match': f'W/"v{version}-json-gzip"'}).status_code == 304
+    # Another format or an older snapshot does not
+    assert client.get('/api/rates?format=xml', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+    assert client.get('/api/rates', headers={'If-None-Match': f'W/"v{version - 1}-json"'}).status_code == 200
+
+def test_other_endpoints_keep_flasks_json(divisa):
+    # Only the registry's json format goes through orjson; jsonify keeps Flask's output byte for byte
+    app = divisa.app
+    data = {'z': 1, 'moneda': 'Bolívar', 'at': datetime(2025, 3, 14, 12, 30)}
+    with app.app_context():
+        assert app.json.response(data).data == DefaultJSONProvider(app).response(data).data
+        assert app.json.response(data).data == \
+            b'{"at":"Fri, 14 Mar 2025 12:30:00 GMT","moneda":"Bol\\u00edvar","z":1}\n'
+
+    health = app.test_client().get('/api/health')
+    assert health.data == (json.dumps(health.get_json(), sort_keys=True, separators=(',', ':')) + '\n').encode()
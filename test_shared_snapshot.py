@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Pruebas del snapshot compartido: procesos con archivos distintos sobre la misma base de datos
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from config import Config
+from shared_snapshot import SharedSnapshot, private_runtime_dir
+
+class Scraper:
+    def __init__(self, rates):
+        self.rates = rates
+
+    def get_all_rates(self):
+        return {'rates': dict(self.rates), 'date': 'x'}
+
+@pytest.fixture
+def service_factory(monkeypatch, app, tmp_path):
+    monkeypatch.setattr(Config, 'HISTORY_ARCHIVE_ENABLED', False)
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_VERIFY_SECONDS', 0)
+
+    def factory(name):
+        # Another host, or another working directory: each process has its own snapshot file
+        monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_PATH', str(tmp_path / f'{name}.bin'))
+        from database_service import DatabaseService
+        service = DatabaseService()
+        service.sync_shared_snapshot()
+        return service
+    return factory
+
+def test_snapshot_catches_up_with_other_publishers(app, service_factory):
+    with app.app_context():
+        a, b = service_factory('a'), service_factory('b')
+        a.scraper = Scraper({'USD': 36.5})
+        assert a.update_rates_from_bcv()
+        assert b.get_snapshot_version() == a.get_snapshot_version() == 1
+        assert b.get_all_rates()['rates'] == {'USD': 36.5}
+
+        a.scraper.rates['USD'] = 37.0
+        assert a.update_rates_from_bcv()
+        assert b.get_snapshot_version() == 2
+        assert b.get_currency_rate('USD')['rate'] == 37.0
+        assert not b.should_update_rates()
+
+        # Same rates, new successful refresh: the version stays but the freshness moves
+        first_refresh = b.get_next_refresh_at()
+        assert a.update_rates_from_bcv()
+        assert a.get_snapshot_version() == 2
+        assert b.get_next_refresh_at() > first_refresh
+
+def test_verification_is_throttled(app, service_factory, monkeypatch):
+    monkeypatch.setattr(Config, 'SHARED_SNAPSHOT_VERIFY_SECONDS', 3600)
+    with app.app_context():
+        a, b = service_factory('a'), service_factory('b')
+        a.scraper = Scraper({'USD': 36.5})
+        assert a.update_rates_from_bcv()
+        assert b.sync_shared_snapshot()
+        a.scraper.rates['USD'] = 37.0
+        assert a.update_rates_from_bcv()
+        assert b.get_snapshot_version() == 1
+        b._shared_snapshot_verified_at = 0.0
+        assert b.get_snapshot_version() == 2
+
+def test_default_path_does_not_depend_on_cwd(app, monkeypatch, tmp_path):
+    from database_service import DatabaseService
+    with app.app_context():
+        first = DatabaseService._default_shared_snapshot_path()
+        monkeypatch.chdir(tmp_path)
+        assert DatabaseService._default_shared_snapshot_path() == first
+
+def test_default_path_is_private(app, tmp_path, monkeypatch):
+    from database_service import DatabaseService
+    with app.app_context():
+        assert DatabaseService._default_shared_snapshot_path() == f"{tmp_path / 'rates.db'}-snapshot"
+
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    directory = private_runtime_dir()
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    # Pre-created by someone else, or left open to them: refused
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        private_runtime_dir()
+
+def test_planted_files_are_refused(tmp_path):
+    planted = tmp_path / 'planted.bin'
+    SharedSnapshot(str(planted)).publish({'version': 99, 'rates': {'USD': 1.0}}, 99)
+    os.symlink(planted, tmp_path / 'snapshot.bin')
+    with pytest.raises(OSError):
+        SharedSnapshot(str(tmp_path / 'snapshot.bin')).read()
+
+    if os.getuid() != 0:
+        pytest.skip('changing the owner needs root')
+    os.chown(planted, 12345, -1)
+    with pytest.raises(PermissionError):
+        SharedSnapshot(str(planted)).read()
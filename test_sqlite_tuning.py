@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Pruebas del perfil de producción SQLite: pragmas por conexión y checkpoints del WAL
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from sqlite_tuning import CheckpointManager, apply_sqlite_pragmas, sqlite_pragmas
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rates.db'}")
+    apply_sqlite_pragmas(engine, sqlite_pragmas(busy_timeout_ms=1234, cache_size_kb=2048))
+    yield engine
+    engine.dispose()
+
+def pragma(connection, name):
+    return connection.execute(text(f'PRAGMA {name}')).scalar()
+
+def test_pragmas_are_applied_to_every_connection(engine):
+    with engine.connect() as first, engine.connect() as second:
+        for connection in (first, second):
+            assert pragma(connection, 'journal_mode') == 'wal'
+            assert pragma(connection, 'busy_timeout') == 1234
+            assert pragma(connection, 'cache_size') == -2048  # KiB, not pages
+            assert pragma(connection, 'synchronous') == 1  # NORMAL
+            assert pragma(connection, 'temp_store') == 2  # MEMORY
+            assert pragma(connection, 'foreign_keys') == 0  # Left as SQLite's default
+
+def test_checkpoints(engine):
+    manager = CheckpointManager(engine, truncate_bytes=0)
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE rates (id INTEGER PRIMARY KEY, rate REAL)'))
+        connection.execute(text('INSERT INTO rates (rate) VALUES (:rate)'), [{'rate': i / 10} for i in range(500)])
+    assert manager.get_stats()['wal_bytes'] > 0
+
+    passive = manager.checkpoint('PASSIVE')
+    assert passive['mode'] == 'PASSIVE' and not passive['busy']
+    assert passive['checkpointed'] == passive['log_frames'] > 0
+    stats = manager.get_stats()
+    assert (stats['checkpoints'], stats['truncates'], stats['busy'], stats['errors']) == (1, 0, 0, 0)
+    assert stats['wal_bytes'] > 0  # PASSIVE copies pages back but leaves the file
+
+    truncate = manager.checkpoint('TRUNCATE')
+    assert not truncate['busy']
+    stats = manager.get_stats()
+    assert (stats['checkpoints'], stats['truncates']) == (2, 1)
+    assert stats['last_result'] == truncate
+    assert stats['wal_bytes'] == 0
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT count(*) FROM rates')).scalar() == 500
+
+def test_failed_checkpoint_is_counted(engine):
+    manager = CheckpointManager(engine)
+    assert manager.checkpoint('NOT A MODE') is None
+    assert manager.get_stats()['errors'] == 1
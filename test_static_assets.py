@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Pruebas del pipeline de assets estáticos: minificadores JS/CSS, manifest con hash, servido de los
+archivos del build y vuelta a los originales sin build
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+from flask import Flask, render_template_string
+
+from static_assets import AssetManifest, IMMUTABLE_CACHE_CONTROL, build_assets, clean_assets, minify_css, minify_js
+
+REPO_STATIC = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+@pytest.mark.parametrize('source, expected', [
+    # Comment markers inside strings are content
+    ('const a = "x // no";  // comment\nlet b = \'/* kept */\';', 'const a="x // no";let b=\'/* kept */\';\n'),
+    # Regular expressions, with '/' and '*' inside a class and an escaped slash
+    ('const re = /[/*]+\\/x/g; // trailing', 'const re=/[/*]+\\/x/g;\n'),
+    ('if (ok) { return /ab+c/i.test(s) }', 'if(ok){return/ab+c/i.test(s)}\n'),
+    ('x = a / b / c;', 'x=a/b/c;\n'),  # Division is not a regex
+    # Template literals are verbatim, nested ones and braces in strings included
+    ('const t = `a  ${ b ? `in ${c}` : "}" }  z`;', 'const t=`a  ${ b ? `in ${c}` : "}" }  z`;\n'),
+    # Line breaks ASI may depend on are kept; '+ +' never becomes '++'
+    ('let i = a\n++b\nfoo()\n[1, 2].forEach(f)', 'let i=a\n++b\nfoo()\n[1,2].forEach(f)\n'),
+    ('a = b + +c; d = e - -f;', 'a=b+ +c;d=e- -f;\n'),
+    ('return  x\n/* multi\nline */ y', 'return x\ny\n'),
+])
+def test_minify_js(source, expected):
+    assert minify_js(source) == expected
+
+@pytest.mark.parametrize('source, expected', [
+    ('/* header */\nb > c { content: "/* keep */" ; }', 'b>c{content:"/* keep */"}\n'),
+    ('.a,\n.b {\n  margin: 0 auto !important;\n}', '.a,.b{margin:0 auto!important}\n'),
+    # A space before ':' in a selector is a descendant combinator
+    ('nav :hover { color: red }', 'nav :hover{color:red}\n'),
+    ('@media (max-width: 600px) {\n  .x { font: 12px/1.5 "Open Sans" }\n}',
+     '@media (max-width:600px){.x{font:12px/1.5 "Open Sans"}}\n'),
+])
+def test_minify_css(source, expected):
+    assert minify_css(source) == expected
+
+@pytest.mark.skipif(not shutil.which('node'), reason='node is not installed')
+def test_minified_repo_scripts_still_parse(tmp_path):
+    for name in sorted(os.listdir(os.path.join(REPO_STATIC, 'js'))):
+        with open(os.path.join(REPO_STATIC, 'js', name), encoding='utf-8') as f:
+            (tmp_path / name).write_text(minify_js(f.read()), encoding='utf-8')
+        subprocess.run(['node', '--check', str(tmp_path / name)], check=True, capture_output=True)
+
+@pytest.fixture
+def static(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'css' / 'app.css').write_text('body {\n  margin: 0;\n}\n' * 40)
+    (tmp_path / 'js' / 'app.js').write_text('// app\nconsole.log("hola");\n' * 40)
+    (tmp_path / 'js' / 'notes.txt').write_text('not an asset')
+    return tmp_path
+
+@pytest.fixture
+def assets(static):
+    app = Flask(__name__, static_folder=str(static), static_url_path='/static')
+    assets = AssetManifest(app)
+    app.config['SERVER_NAME'] = 'localhost'
+    assets.app = app
+    return assets
+
+def test_build_fingerprints_by_content(static):
+    result = build_assets(str(static))
+    minified = minify_css((static / 'css' / 'app.css').read_text()).encode()
+    expected = f'css/app.{hashlib.sha256(minified).hexdigest()[:10]}.css'
+    assert result['manifest']['css/app.css'] == expected
+    assert set(result['manifest']) == {'css/app.css', 'js/app.js'}
+    assert (static / 'dist' / expected).read_bytes() == minified
+    assert gzip.decompress((static / 'dist' / f'{expected}.gz').read_bytes()) == minified
+    assert json.loads((static / 'dist' / 'manifest.json').read_text()) == result['manifest']
+    assert f'/static/dist/{expected}' in (static / 'dist' / 'precache-manifest.js').read_text()
+
+    # Same content, same name; new content, new name, and --prune drops the old file
+    assert build_assets(str(static))['manifest'] == result['manifest']
+    (static / 'css' / 'app.css').write_text('body { margin: 1px }\n' * 40)
+    rebuilt = build_assets(str(static), prune=True)
+    assert rebuilt['manifest']['css/app.css'] != expected
+    assert rebuilt['removed'] == 2  # The old stylesheet and its .gz
+    assert not (static / 'dist' / expected).exists()
+
+def test_asset_url_and_serving(static, assets):
+    app = assets.app
+    template = "{{ asset_url('css/app.css') }}"
+    with app.app_context():
+        # No build yet: the original file
+        assert render_template_string(template) == 'http://localhost/static/css/app.css'
+        hashed = build_assets(str(static))['manifest']['css/app.css']
+        assert render_template_string(template) == f'http://localhost/static/dist/{hashed}'
+        assert render_template_string("{{ asset_url('css/missing.css') }}") == 'http://localhost/static/css/missing.css'
+
+    client = app.test_client()
+    response = client.get(f'/static/dist/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert gzip.decompress(response.data) == (static / 'dist' / hashed).read_bytes()
+    response.close()
+    plain = client.get(f'/static/dist/{hashed}')
+    assert 'Content-Encoding' not in plain.headers
+    plain.close()
+    manifest = client.get('/static/dist/manifest.json')
+    assert manifest.headers['Cache-Control'] == 'no-cache'
+    manifest.close()
+    assert client.get('/static/dist/../css/app.css').status_code == 404
+
+def test_missing_or_broken_manifest_falls_back_to_sources(static, assets):
+    build_assets(str(static))
+    with assets.app.app_context():
+        (static / 'dist' / 'manifest.json').write_text('{not json')
+        os.utime(static / 'dist' / 'manifest.json', ns=(1, 1))  # A new mtime forces a re-read
+        assert render_template_string("{{ asset_url('js/app.js') }}") == 'http://localhost/static/js/app.js'
+        clean_assets(str(static))
+        assert render_template_string("{{ asset_url('js/app.js') }}") == 'http://localhost/static/js/app.js'
+    assert assets.get_stats()['built'] is False
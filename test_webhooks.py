@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Pruebas de entrega de webhooks contra receptores HTTP locales (rápidos, lentos y con fallos)
+"""
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from models import db, WebhookSubscription, WebhookDelivery
+from webhooks import (WebhookDispatcher, caller_authorized, check_destination, issue_management_token,
+                      management_token_matches)
+
+class Receiver:
+    """Servidor HTTP local que simula un suscriptor de webhooks"""
+
+    def __init__(self, delay=0.0, fail_first=0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                with receiver.lock:
+                    receiver.active += 1
+                    receiver.max_active = max(receiver.max_active, receiver.active)
+                    receiver.requests.append((dict(self.headers), body))
+                    failing = len(receiver.requests) <= receiver.fail_first
+                time.sleep(receiver.delay)
+                with receiver.lock:
+                    receiver.active -= 1
+                self.send_response(500 if failing else 204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/hook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+@pytest.fixture
+def dispatcher(app):
+    # The receivers listen on 127.0.0.1, which the default dispatcher refuses
+    dispatcher = WebhookDispatcher(app, max_workers=4, timeout_seconds=5, max_attempts=3,
+                                   base_backoff_seconds=0.05, max_backoff_seconds=0.1, poll_interval=0.05,
+                                   allow_private_destinations=True)
+    yield dispatcher
+    dispatcher.stop()
+
+def subscribe(app, url, **kwargs):
+    with app.app_context():
+        subscription = WebhookSubscription(url=url, **kwargs)
+        db.session.add(subscription)
+        db.session.commit()
+        return subscription.id
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def deliveries(app, subscription_id):
+    with app.app_context():
+        return [d.to_dict() for d in WebhookDelivery.query.filter_by(subscription_id=subscription_id)]
+
+def test_enqueue_does_not_wait_for_slow_receiver(app, dispatcher):
+    receiver = Receiver(delay=1.0)
+    try:
+        subscription_id = subscribe(app, receiver.url, secret='s3cret')
+        with app.app_context():
+            start = time.time()
+            assert dispatcher.enqueue_snapshot({'version': 1, 'rates': {'USD': 36.5}}) == 1
+            assert time.time() - start < 0.5
+
+        assert wait_for(lambda: deliveries(app, subscription_id)[0]['status'] == 'delivered')
+        headers, body = receiver.requests[0]
+        expected = hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+        assert headers['X-Divisa-Signature'] == f'sha256={expected}'
+        assert json.loads(body)['snapshot']['version'] == 1
+    finally:
+        receiver.close()
+
+def test_per_endpoint_concurrency_limit(app, dispatcher):
+    slow = Receiver(delay=0.3)
+    fast = Receiver()
+    try:
+        slow_id = subscribe(app, slow.url, max_concurrency=2)
+        fast_id = subscribe(app, fast.url, max_concurrency=2)
+        with app.app_context():
+            for version in range(1, 7):
+                dispatcher.enqueue_snapshot({'version': version, 'rates': {'USD': 36.0 + version}})
+
+        # The fast endpoint is not held back by the slow one's backlog
+        assert wait_for(lambda: len(fast.requests) == 6, timeout=3)
+        assert len(slow.requests) < 6
+
+        assert wait_for(lambda: all(d['status'] == 'delivered' for d in deliveries(app, slow_id)))
+        assert slow.max_active <= 2
+        assert all(d['status'] == 'delivered' for d in deliveries(app, fast_id))
+    finally:
+        slow.close()
+        fast.close()
+
+def test_failed_delivery_is_retried_from_queue(app, dispatcher):
+    receiver = Receiver(fail_first=2)
+    try:
+        subscription_id = subscribe(app, receiver.url)
+        with app.app_context():
+            dispatcher.enqueue_snapshot({'version': 1, 'rates': {'USD': 36.5}})
+
+        assert wait_for(lambda: deliveries(app, subscription_id)[0]['status'] == 'delivered')
+        delivery = deliveries(app, subscription_id)[0]
+        assert delivery['attempts'] == 3
+        assert len(receiver.requests) == 3
+    finally:
+        receiver.close()
+
+def test_delivery_fails_after_max_attempts(app, dispatcher):
+    receiver = Receiver(fail_first=10)
+    try:
+        subscription_id = subscribe(app, receiver.url)
+        with app.app_context():
+            dispatcher.enqueue_snapshot({'version': 1, 'rates': {'USD': 36.5}})
+
+        assert wait_for(lambda: deliveries(app, subscription_id)[0]['status'] == 'failed')
+        delivery = deliveries(app, subscription_id)[0]
+        assert delivery['attempts'] == 3
+        assert delivery['last_status_code'] == 500
+    finally:
+        receiver.close()
+
+def test_unsubscribed_endpoints_get_nothing_more(app, dispatcher):
+    kept, dropped = Receiver(), Receiver()
+    try:
+        kept_id = subscribe(app, kept.url)
+        dropped_id = subscribe(app, dropped.url)
+        with app.app_context():
+            # Queued before the DELETE deactivated the subscription
+            db.session.add(WebhookDelivery(subscription_id=dropped_id, event='rates.updated', payload='{}',
+                                           next_attempt_at=datetime.utcnow()))
+            db.session.get(WebhookSubscription, dropped_id).active = False
+            db.session.commit()
+            dispatcher.enqueue_snapshot({'version': 1, 'rates': {'USD': 36.5}})
+
+        assert wait_for(lambda: deliveries(app, kept_id)[0]['status'] == 'delivered')
+        time.sleep(0.2)
+        assert dropped.requests == []
+        assert deliveries(app, dropped_id)[0]['status'] == 'pending'
+    finally:
+        kept.close()
+        dropped.close()
+
+def test_unexpected_errors_are_recorded_and_free_the_worker(app, dispatcher, monkeypatch):
+    def broken_post(*args, **kwargs):
+        raise TypeError('bad header value')
+    monkeypatch.setattr(dispatcher.session, 'post', broken_post)
+    subscription_id = subscribe(app, 'http://127.0.0.1:9/hook')
+    with app.app_context():
+        dispatcher.enqueue_snapshot({'version': 1, 'rates': {'USD': 36.5}})
+
+    assert wait_for(lambda: deliveries(app, subscription_id)[0]['status'] == 'failed')
+    delivery = deliveries(app, subscription_id)[0]
+    assert delivery['attempts'] == 3
+    assert delivery['last_error'] == 'TypeError: bad header value'
+    assert wait_for(lambda: dispatcher.get_stats()['in_flight'] == 0)
+
+def test_default_dispatcher_refuses_private_destinations(app):
+    receiver = Receiver()
+    dispatcher = WebhookDispatcher(app, max_workers=1, timeout_seconds=5, max_attempts=1, poll_interval=0.05)
+    try:
+        subscription_id = subscribe(app, receiver.url)
+        with app.app_context():
+            dispatcher.enqueue_snapshot({'version': 1, 'rates': {'USD': 36.5}})
+
+        assert wait_for(lambda: deliveries(app, subscription_id)[0]['status'] == 'failed')
+        assert 'non-public address 127.0.0.1' in deliveries(app, subscription_id)[0]['last_error']
+        assert receiver.requests == []
+    finally:
+        dispatcher.stop()
+        receiver.close()
+
+@pytest.mark.parametrize('url, allowed', [
+    ('http://169.254.169.254/latest/meta-data/', False),  # Cloud metadata
+    ('http://localhost:8080/hook', False),
+    ('http://10.0.0.1/hook', False),
+    ('http://[::1]/hook', False),
+    ('http://[::ffff:192.168.1.1]/hook', False),
+    ('http://does-not-exist.invalid/hook', False),
+    ('https://93.184.216.34/hook', True),
+])
+def test_check_destination(url, allowed):
+    assert (check_destination(url) is None) == allowed
+
+def test_management_tokens():
+    mine, other = WebhookSubscription(url='https://a.example'), WebhookSubscription(url='https://b.example')
+    token = issue_management_token(mine)
+    issue_management_token(other)
+    assert token not in mine.token_hash
+    assert management_token_matches(mine, token)
+    assert not management_token_matches(other, token)
+    assert not management_token_matches(WebhookSubscription(url='https://legacy.example'), token)
+
+    assert caller_authorized(f'Bearer {token}', '', mine)
+    assert not caller_authorized(f'Bearer {token}', '', other)
+    assert not caller_authorized(f'Bearer {token}', '')  # Listing every webhook needs the admin token
+    assert not caller_authorized(token, '', mine)
+    assert caller_authorized('Bearer admin', 'admin', other)
+    assert caller_authorized('Bearer admin', 'admin')
+    assert not caller_authorized('Bearer ', '')
+    assert not caller_authorized(None, 'admin')
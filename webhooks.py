@@ -0,0 +1,334 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import random
+import secrets
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from models import db, WebhookSubscription, WebhookDelivery
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+RATES_UPDATED_EVENT = 'rates.updated'
+
+class BlockedDestinationError(OSError):
+    """A webhook connection reached an address the dispatcher must not call"""
+
+def is_public_address(address: str) -> bool:
+    """False for private, loopback, link-local (cloud metadata), multicast and reserved addresses"""
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+def check_destination(url: str) -> Optional[str]:
+    """Why a webhook URL must not be registered, or None; every address its host resolves to must be public"""
+    parsed = urlparse(url)
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)}
+    except (OSError, ValueError, UnicodeError):
+        return f'{parsed.hostname} does not resolve'
+    blocked = sorted(address for address in addresses if not is_public_address(address))
+    if blocked:
+        return f'{parsed.hostname} resolves to non-public addresses ({", ".join(blocked)})'
+    return None
+
+def issue_management_token(subscription: WebhookSubscription) -> str:
+    """Give a subscription a new management token; only its SHA-256 is stored"""
+    token = secrets.token_urlsafe(32)
+    subscription.token_hash = hashlib.sha256(token.encode()).hexdigest()
+    return token
+
+def management_token_matches(subscription: WebhookSubscription, token: str) -> bool:
+    if not subscription.token_hash or not token:
+        return False
+    return hmac.compare_digest(subscription.token_hash, hashlib.sha256(token.encode()).hexdigest())
+
+def caller_authorized(authorization: str, admin_token: str, subscription: Optional[WebhookSubscription] = None) -> bool:
+    """Bearer token check: the admin token manages every webhook, a management token only its own"""
+    scheme, _, token = (authorization or '').partition(' ')
+    token = token.strip()
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    if admin_token and hmac.compare_digest(token.encode(), admin_token.encode()):
+        return True
+    return subscription is not None and management_token_matches(subscription, token)
+
+class _PublicOnly:
+    """Refuses a connection once the socket shows it reached a non-public address"""
+
+    def _new_conn(self):
+        sock = super()._new_conn()
+        address = sock.getpeername()[0]
+        if not is_public_address(address):
+            sock.close()
+            raise BlockedDestinationError(f'{self.host} resolved to non-public address {address}')
+        return sock
+
+class _PublicHTTPConnection(_PublicOnly, HTTPConnection):
+    pass
+
+class _PublicHTTPSConnection(_PublicOnly, HTTPSConnection):
+    pass
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+class PublicOnlyAdapter(requests.adapters.HTTPAdapter):
+    """
+    HTTP adapter that checks the address each connection actually reached.
+    Registration validates the resolved addresses too, but DNS can change
+    afterwards; checking the connected socket also covers rebinding.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _PublicHTTPConnectionPool,
+            'https': _PublicHTTPSConnectionPool
+        }
+
+class WebhookDispatcher:
+    """
+    Delivers rate-change webhooks from a persistent queue.
+
+    Publishing a snapshot only inserts ``WebhookDelivery`` rows; a dispatcher
+    thread claims due rows and hands them to a bounded pool of delivery
+    workers. Each endpoint is further limited to its ``max_concurrency``
+    in-flight requests per process. Failed deliveries are rescheduled with
+    exponential backoff and jitter until ``max_attempts`` is reached. Claims
+    are compare-and-set updates, so several processes can share one queue.
+
+    Unless ``allow_private_destinations`` is set, deliveries only connect to
+    public addresses, never follow redirects and ignore proxy settings from
+    the environment, so a subscriber URL cannot reach internal services.
+    """
+
+    def __init__(self, app, max_workers: int = 8, timeout_seconds: float = 10, max_attempts: int = 8,
+                 base_backoff_seconds: float = 10, max_backoff_seconds: float = 3600, poll_interval: float = 5,
+                 allow_private_destinations: bool = False):
+        self.app = app
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.poll_interval = poll_interval
+        # A claimed delivery whose worker died becomes due again after this lease
+        self.lease_seconds = timeout_seconds * 3
+        self.allow_private_destinations = allow_private_destinations
+        adapter = requests.adapters.HTTPAdapter if allow_private_destinations else PublicOnlyAdapter
+        self.session = requests.Session()
+        self.session.trust_env = allow_private_destinations
+        self.session.mount('http://', adapter(pool_maxsize=max_workers))
+        self.session.mount('https://', adapter(pool_maxsize=max_workers))
+        self._executor = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._endpoint_slots: Dict[int, threading.BoundedSemaphore] = {}
+        self._stats = {'delivered': 0, 'retried': 0, 'failed': 0}
+
+    def start(self):
+        """Start the dispatcher thread and worker pool (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='webhook')
+            self._thread = threading.Thread(target=self._run, name='webhook-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+
+    def wake(self):
+        """Ask the dispatcher to look for due deliveries now"""
+        self.start()
+        self._wake.set()
+
+    def get_stats(self) -> Dict:
+        return {
+            'in_flight': self._in_flight,
+            'max_workers': self.max_workers,
+            **self._stats
+        }
+
+    def enqueue_snapshot(self, snapshot: Dict) -> int:
+        """Queue a rates.updated delivery for every active subscription"""
+        payload = json.dumps({
+            'event': RATES_UPDATED_EVENT,
+            'snapshot': snapshot
+        }, separators=(',', ':'))
+        try:
+            subscriptions = WebhookSubscription.query.filter_by(active=True).all()
+            for subscription in subscriptions:
+                db.session.add(WebhookDelivery(
+                    subscription_id=subscription.id,
+                    event=RATES_UPDATED_EVENT,
+                    payload=payload,
+                    next_attempt_at=datetime.utcnow()
+                ))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to queue webhook deliveries: {str(e)}")
+            db.session.rollback()
+            return 0
+
+        if subscriptions:
+            logger.info(f"Queued {len(subscriptions)} webhook deliveries for snapshot v{snapshot.get('version')}")
+            self.wake()
+        return len(subscriptions)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                with self.app.app_context():
+                    self._dispatch_due()
+            except Exception as e:
+                logger.error(f"Webhook dispatcher error: {str(e)}")
+
+    def _dispatch_due(self):
+        free = self.max_workers - self._in_flight
+        if free <= 0:
+            return
+
+        now = datetime.utcnow()
+        due = db.session.query(
+            WebhookDelivery.id, WebhookDelivery.next_attempt_at, WebhookDelivery.attempts,
+            WebhookDelivery.event, WebhookDelivery.payload,
+            WebhookSubscription.id, WebhookSubscription.url, WebhookSubscription.secret,
+            WebhookSubscription.max_concurrency
+        ).join(
+            WebhookSubscription, WebhookDelivery.subscription_id == WebhookSubscription.id
+        ).filter(
+            WebhookDelivery.status.in_(['pending', 'delivering']),
+            WebhookDelivery.next_attempt_at <= now,
+            WebhookSubscription.active.is_(True)  # Nothing more goes out once the owner unsubscribes
+        ).order_by(WebhookDelivery.next_attempt_at).limit(free * 4).all()
+
+        for delivery_id, due_at, attempts, event, payload, subscription_id, url, secret, max_concurrency in due:
+            if self._in_flight >= self.max_workers:
+                break
+            slots = self._slots_for(subscription_id, max_concurrency)
+            if not slots.acquire(blocking=False):
+                continue  # Endpoint at its concurrency limit, retry on a later pass
+            if not self._claim(delivery_id, due_at, now):
+                slots.release()
+                continue
+            with self._lock:
+                self._in_flight += 1
+            self._executor.submit(self._deliver, delivery_id, url, secret, event, payload, (attempts or 0) + 1, slots)
+
+    def _claim(self, delivery_id: int, due_at: datetime, now: datetime) -> bool:
+        claimed = WebhookDelivery.query.filter(
+            WebhookDelivery.id == delivery_id,
+            WebhookDelivery.next_attempt_at == due_at,
+            WebhookDelivery.status.in_(['pending', 'delivering'])
+        ).update({
+            'status': 'delivering',
+            'next_attempt_at': now + timedelta(seconds=self.lease_seconds)
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def _deliver(self, delivery_id: int, url: str, secret: Optional[str], event: str, payload: str,
+                 attempt: int, slots: threading.BoundedSemaphore):
+        status_code = None
+        error = None
+        try:
+            headers = {
+                'Content-Type': 'application/json',
+                'User-Agent': 'DivisaAPI-Webhooks/1.0',
+                'X-Divisa-Event': event,
+                'X-Divisa-Delivery': str(delivery_id),
+                'X-Divisa-Attempt': str(attempt)
+            }
+            if secret:
+                signature = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+                headers['X-Divisa-Signature'] = f'sha256={signature}'
+            response = self.session.post(url, data=payload.encode(), headers=headers, timeout=self.timeout_seconds,
+                                         allow_redirects=False)
+            status_code = response.status_code
+            if not 200 <= status_code < 300:
+                error = f'HTTP {status_code}'
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        except Exception as e:
+            # Still recorded below, or the delivery would stay claimed and its worker slot lost
+            logger.error(f"Webhook delivery {delivery_id} raised {type(e).__name__}: {str(e)}")
+            error = f'{type(e).__name__}: {str(e)}'
+        finally:
+            slots.release()
+
+        try:
+            with self.app.app_context():
+                self._record_result(delivery_id, attempt, status_code, error)
+        except Exception as e:
+            logger.error(f"Failed to record webhook delivery {delivery_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._wake.set()
+
+    def _record_result(self, delivery_id: int, attempt: int, status_code: Optional[int], error: Optional[str]):
+        delivery = db.session.get(WebhookDelivery, delivery_id)
+        if not delivery:
+            return
+        delivery.attempts = attempt
+        delivery.last_status_code = status_code
+        delivery.last_error = error
+        now = datetime.utcnow()
+
+        if error is None:
+            delivery.status = 'delivered'
+            delivery.delivered_at = now
+            self._stats['delivered'] += 1
+        elif attempt >= self.max_attempts:
+            delivery.status = 'failed'
+            self._stats['failed'] += 1
+            logger.warning(f"Webhook delivery {delivery_id} failed permanently after {attempt} attempts: {error}")
+        else:
+            delivery.status = 'pending'
+            delivery.next_attempt_at = now + timedelta(seconds=self._backoff_seconds(attempt))
+            self._stats['retried'] += 1
+            logger.info(f"Webhook delivery {delivery_id} attempt {attempt} failed ({error}), retrying")
+        db.session.commit()
+
+    def _backoff_seconds(self, attempt: int) -> float:
+        """Exponential backoff with equal jitter"""
+        delay = min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _slots_for(self, subscription_id: int, max_concurrency: Optional[int]) -> threading.BoundedSemaphore:
+        slots = self._endpoint_slots.get(subscription_id)
+        if slots is None:
+            slots = self._endpoint_slots[subscription_id] = threading.BoundedSemaphore(max(1, max_concurrency or 1))
+        return slots